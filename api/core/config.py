@@ -29,12 +29,18 @@ class Settings(BaseSettings):
 
     # Redis
     REDIS_URL: str = "redis://localhost:6379"
+    # Workers that miss heartbeats for the TTL have their queue claims requeued
+    WORKER_HEARTBEAT_SECONDS: int = 15
+    WORKER_HEARTBEAT_TTL_SECONDS: int = 60
 
     # Security
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ENCRYPTION_KEY: str = "your-encryption-key-32-bytes-min"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    API_KEY_CACHE_TTL_SECONDS: int = 30
+    API_KEY_USAGE_FLUSH_SECONDS: int = 15
+    PASSWORD_HASH_WORKERS: int = 4
 
     # LDAP
     LDAP_SERVER: Optional[str] = None
@@ -43,11 +49,78 @@ class Settings(BaseSettings):
     LDAP_BASE_DN: Optional[str] = None
     LDAP_BIND_DN: Optional[str] = None
     LDAP_BIND_PASSWORD: Optional[str] = None
+    LDAP_PAGE_SIZE: int = 1000  # Entries per paged-results page
+    LDAP_CHECKPOINT_ENTRIES: int = 10000  # Between resume points of long jobs
+    LDAP_TIMEOUT_SECONDS: float = 10  # Connect, bind and API-side operations
+    LDAP_ASYNC_WORKERS: int = 8  # Threads for LDAP calls made by the API
+    # Fleet health probing by the worker
+    LDAP_HEALTH_INTERVAL_SECONDS: int = 60
+    LDAP_HEALTH_CONCURRENCY: int = 32
+    LDAP_HEALTH_TIMEOUT_SECONDS: float = 5
+    # Bound connections reused across jobs and API calls, per server config
+    LDAP_POOL_ENABLED: bool = True
+    LDAP_POOL_MAX_SIZE: int = 4
+    LDAP_POOL_IDLE_SECONDS: int = 300
+    LDAP_POOL_CHECK_INTERVAL_SECONDS: int = 30  # Health check idle connections
+    LDAP_POOL_CHECK_TIMEOUT_SECONDS: int = 5
+    LDAP_POOL_ACQUIRE_TIMEOUT_SECONDS: float = 30
 
     # Backup
     BACKUP_DIR: str = "/app/backups"
-    BACKUP_RETENTION_DAYS: int = 30
+    BACKUP_RETENTION_DAYS: int = 30  # For backups without a schedule; 0 disables
+    RETENTION_INTERVAL_MINUTES: int = 60
+    RETENTION_BATCH_SIZE: int = 500
     INCREMENTAL_BACKUP_ENABLED: bool = True
+    FILE_REAPER_CONCURRENCY: int = 16
+    FILE_REAPER_BATCH_SIZE: int = 500
+    # Per-backup entry index used by the content browser
+    BACKUP_INDEX_ENABLED: bool = True
+    BACKUP_INDEX_CACHE_SIZE: int = 16
+
+    # Background backup verification
+    VERIFY_INTERVAL_MINUTES: int = 60
+    VERIFY_MAX_AGE_HOURS: int = 168  # Re-verify each backup weekly
+    VERIFY_BATCH_SIZE: int = 50
+    VERIFY_CONCURRENCY: int = 2
+    VERIFY_IO_BUDGET_MB: float = 50  # MB/s per worker; 0 disables the limit
+
+    # Backup storage ("local" keeps artifacts in BACKUP_DIR; with "s3",
+    # BACKUP_DIR is only per-worker scratch space)
+    STORAGE_BACKEND: str = "local"
+    S3_BUCKET: Optional[str] = None
+    S3_PREFIX: str = "backups/"
+    S3_ENDPOINT_URL: Optional[str] = None
+    S3_REGION: Optional[str] = None
+    S3_ACCESS_KEY_ID: Optional[str] = None
+    S3_SECRET_ACCESS_KEY: Optional[str] = None
+    S3_PART_SIZE_MB: int = 16
+    S3_MAX_CONCURRENCY: int = 8
+    # Redirect raw downloads to a presigned URL instead of proxying the object
+    S3_PRESIGNED_DOWNLOADS: bool = True
+    DOWNLOAD_URL_EXPIRE_SECONDS: int = 300
+
+    # Configuration import/export
+    CONFIG_IMPORT_BATCH_SIZE: int = 1000
+    CONFIG_EXPORT_BATCH_SIZE: int = 1000
+
+    # Cached list responses; writes invalidate them immediately
+    RESPONSE_CACHE_TTL_SECONDS: int = 300
+    DASHBOARD_CACHE_SECONDS: int = 10
+    DASHBOARD_FAILURE_WINDOW_DAYS: int = 7
+
+    # Retries of jobs that failed on transient LDAP or network errors
+    JOB_RETRY_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BASE_DELAY_SECONDS: float = 30
+    JOB_RETRY_MAX_DELAY_SECONDS: float = 900
+    # Per-server circuit breaker shared by all workers
+    CIRCUIT_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_FAILURE_WINDOW_SECONDS: int = 300
+    CIRCUIT_OPEN_SECONDS: int = 120
+
+    # Live job progress over Redis pub/sub and server-sent events
+    PROGRESS_PUBLISH_INTERVAL_SECONDS: float = 1.0  # Per job
+    PROGRESS_PERSIST_INTERVAL_SECONDS: int = 10  # All running jobs, batched
+    EVENT_STREAM_KEEPALIVE_SECONDS: int = 15
 
     # CORS
     CORS_ALLOWED_ORIGINS: Optional[str] = None
@@ -55,10 +128,30 @@ class Settings(BaseSettings):
     # Webhooks
     WEBHOOK_ENABLED: bool = False
     WEBHOOK_URL: Optional[str] = None
+    WEBHOOK_SECRET: Optional[str] = None  # HMAC-SHA256 signing of WEBHOOK_URL
+    # JSON list of {"url", "events": ["backup.*"], "secret", "batch_size"}
+    WEBHOOK_SUBSCRIPTIONS: Optional[str] = None
+    WEBHOOK_BATCH_SIZE: int = 1  # Events per request; above 1 sends a list
+    WEBHOOK_HTTP2: bool = True
+    WEBHOOK_TIMEOUT_SECONDS: float = 10
+    WEBHOOK_MAX_CONNECTIONS: int = 20
+    WEBHOOK_QUEUE_BATCH_SIZE: int = 100  # Deliveries claimed per pass
+    WEBHOOK_POLL_INTERVAL_SECONDS: float = 1
+    WEBHOOK_MAX_ATTEMPTS: int = 8
+    WEBHOOK_RETRY_BASE_DELAY_SECONDS: float = 5
+    WEBHOOK_RETRY_MAX_DELAY_SECONDS: float = 600
+    WEBHOOK_DEAD_LETTER_SIZE: int = 1000
+
+    # OpenTelemetry tracing from API requests through the queues to jobs
+    TRACING_ENABLED: bool = False
+    TRACING_SERVICE_NAME: str = "ldapguard"  # Suffixed with -api or -worker
+    TRACING_EXPORTER: str = "otlp"  # "otlp", "console" or "none"
+    TRACING_OTLP_ENDPOINT: str = "http://localhost:4318"  # OTLP over HTTP
+    TRACING_SAMPLE_RATIO: float = 1.0
 
     # Metrics
     PROMETHEUS_ENABLED: bool = True
-    PROMETHEUS_PORT: int = 9090
+    PROMETHEUS_PORT: int = 9090  # Worker exporter
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -1,7 +1,7 @@
 import base64
 import logging
 import os
-from typing import Optional
+from typing import Iterable, Iterator, Optional
 
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import padding
@@ -61,6 +61,71 @@ class AESEncryption:
 
         return data
 
+    def encrypt_stream(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Encrypt data incrementally in the same format as encrypt().
+
+        Yields base64 text as ASCII bytes, so the concatenated output equals
+        ``encrypt(data).encode()`` without holding the data in memory.
+        """
+        iv = os.urandom(16)
+        cipher = Cipher(
+            algorithms.AES(self.key), modes.CBC(iv), backend=default_backend()
+        )
+        encryptor = cipher.encryptor()
+        padder = padding.PKCS7(128).padder()
+        pending = iv
+
+        for chunk in chunks:
+            pending += encryptor.update(padder.update(chunk))
+            # Base64 encode whole 3-byte groups only
+            usable = len(pending) - len(pending) % 3
+            if usable:
+                yield base64.b64encode(pending[:usable])
+                pending = pending[usable:]
+
+        pending += encryptor.update(padder.finalize()) + encryptor.finalize()
+        yield base64.b64encode(pending)
+
+    def decrypt_stream(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Decrypt the output of encrypt() incrementally.
+
+        Accepts the base64 text in arbitrary chunks and yields plaintext as
+        soon as whole cipher blocks are available, so large files never have
+        to be held in memory.
+        """
+        encoded = b""
+        iv = b""
+        decryptor = None
+        unpadder = padding.PKCS7(128).unpadder()
+
+        def decrypt(raw: bytes) -> bytes:
+            nonlocal iv, decryptor
+            if decryptor is None:
+                iv += raw
+                if len(iv) < 16:
+                    return b""
+                raw = iv[16:]
+                iv = iv[:16]
+                cipher = Cipher(
+                    algorithms.AES(self.key), modes.CBC(iv), backend=default_backend()
+                )
+                decryptor = cipher.decryptor()
+            return unpadder.update(decryptor.update(raw))
+
+        for chunk in chunks:
+            encoded += chunk.translate(None, b" \r\n")
+            usable = len(encoded) - len(encoded) % 4
+            if usable:
+                data = decrypt(base64.b64decode(encoded[:usable]))
+                encoded = encoded[usable:]
+                if data:
+                    yield data
+
+        data = decrypt(base64.b64decode(encoded)) if encoded else b""
+        if decryptor is None:
+            raise ValueError("Encrypted data is truncated")
+        yield data + unpadder.update(decryptor.finalize()) + unpadder.finalize()
+
 
 def get_encryption_service() -> AESEncryption:
     """Get encryption service instance."""
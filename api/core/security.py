@@ -1,19 +1,45 @@
-from datetime import datetime, timedelta
-from typing import Optional
+import asyncio
+import hashlib
+import hmac
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
 
 from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
+from fastapi.security import APIKeyHeader, OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy import select
+from sqlalchemy import bindparam, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from api.core.config import settings
-from api.core.database import get_db
-from api.models.models import User
+from api.core.database import AsyncSessionLocal, get_db
+from api.models.models import APIKey, User
+
+logger = logging.getLogger(__name__)
 
 pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login", auto_error=False)
+api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
+
+# Password hashing is CPU-bound; run it off the event loop. hashlib's PBKDF2
+# releases the GIL, so a thread pool gives real parallelism here.
+_hashing_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+
+# Legacy API keys were stored as bcrypt hashes
+legacy_api_key_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+API_KEY_PREFIX_LENGTH = 10
+
+# Verified API keys: key digest -> (key id, user id, expires_at, cached_at)
+_api_key_cache: Dict[str, Tuple[int, int, Optional[datetime], float]] = {}
+
+# API key usage waiting to be written: key id -> last used timestamp
+_pending_api_key_usage: Dict[int, datetime] = {}
 
 
 def _normalize_password(password: str) -> str:
@@ -34,6 +60,20 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(_normalize_password(password))
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against a hash without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _hashing_executor, verify_password, plain_password, hashed_password
+    )
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hashing_executor, get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -61,12 +101,176 @@ def decode_access_token(token: str) -> Optional[dict]:
         return None
 
 
+def hash_api_key(api_key: str) -> str:
+    """Hash an API key with HMAC-SHA256 keyed on the application secret.
+
+    API keys are long random tokens, so a fast keyed digest is sufficient
+    and keeps per-request verification cheap.
+    """
+    return hmac.new(
+        settings.SECRET_KEY.encode("utf-8"), api_key.encode("utf-8"), hashlib.sha256
+    ).hexdigest()
+
+
+def _is_legacy_api_key_hash(key_hash: str) -> bool:
+    """Check whether a stored API key hash is a legacy bcrypt hash."""
+    return key_hash.startswith("$2")
+
+
+def verify_api_key(api_key: str, key_hash: str) -> bool:
+    """Verify an API key against a stored hash in constant time."""
+    if _is_legacy_api_key_hash(key_hash):
+        return legacy_api_key_context.verify(api_key, key_hash)
+    return hmac.compare_digest(hash_api_key(api_key), key_hash)
+
+
+async def verify_api_key_async(api_key: str, key_hash: str) -> bool:
+    """Verify an API key, checking legacy bcrypt hashes on the hashing pool."""
+    if not _is_legacy_api_key_hash(key_hash):
+        return verify_api_key(api_key, key_hash)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _hashing_executor, verify_api_key, api_key, key_hash
+    )
+
+
+def get_api_key_prefix(api_key: str) -> str:
+    """Get the indexed lookup prefix of an API key."""
+    return api_key[:API_KEY_PREFIX_LENGTH]
+
+
+def invalidate_api_key_cache(key_id: Optional[int] = None):
+    """Drop cached verifications for one API key, or for all keys."""
+    if key_id is None:
+        _api_key_cache.clear()
+        return
+
+    for digest, cached in list(_api_key_cache.items()):
+        if cached[0] == key_id:
+            _api_key_cache.pop(digest, None)
+
+
+def _is_expired(expires_at: Optional[datetime]) -> bool:
+    """Check whether an API key expiry timestamp has passed."""
+    if expires_at is None:
+        return False
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    return expires_at <= datetime.now(timezone.utc)
+
+
+async def authenticate_api_key(api_key: str, db: AsyncSession) -> Optional[User]:
+    """Resolve an API key to its owning user.
+
+    Candidates are looked up by the indexed key prefix, so the cost does not
+    grow with the number of keys. Successful verifications are cached for
+    API_KEY_CACHE_TTL_SECONDS.
+    """
+    digest = hash_api_key(api_key)
+    cached = _api_key_cache.get(digest)
+    now = time.monotonic()
+
+    if cached and now - cached[3] < settings.API_KEY_CACHE_TTL_SECONDS:
+        key_id, user_id, expires_at, _ = cached
+        if _is_expired(expires_at):
+            _api_key_cache.pop(digest, None)
+            return None
+        _pending_api_key_usage[key_id] = datetime.now(timezone.utc)
+        return await db.get(User, user_id)
+
+    result = await db.execute(
+        select(APIKey).where(
+            APIKey.key_prefix == get_api_key_prefix(api_key),
+            APIKey.is_active.is_(True),
+        )
+    )
+
+    for candidate in result.scalars().all():
+        if not await verify_api_key_async(api_key, candidate.key_hash):
+            continue
+        if _is_expired(candidate.expires_at):
+            return None
+
+        # Upgrade legacy bcrypt hashes so later lookups stay fast
+        if candidate.key_hash != digest:
+            candidate.key_hash = digest
+            await db.commit()
+
+        candidate_id: int = candidate.id
+        _api_key_cache[digest] = (
+            candidate_id,
+            candidate.created_by,
+            candidate.expires_at,
+            now,
+        )
+        _pending_api_key_usage[candidate_id] = datetime.now(timezone.utc)
+        return await db.get(User, candidate.created_by)
+
+    return None
+
+
+async def flush_api_key_usage():
+    """Write coalesced API key last_used_at timestamps in one batch.
+
+    Each key gets its own last use, sent as one executemany UPDATE.
+    """
+    if not _pending_api_key_usage:
+        return
+
+    pending = dict(_pending_api_key_usage)
+    _pending_api_key_usage.clear()
+
+    try:
+        async with AsyncSessionLocal() as db:
+            table = APIKey.__table__
+            await db.execute(
+                update(table)
+                .where(table.c.id == bindparam("key_id"))
+                .values(last_used_at=bindparam("used_at")),
+                [
+                    {"key_id": key_id, "used_at": used_at}
+                    for key_id, used_at in pending.items()
+                ],
+            )
+            await db.commit()
+    except Exception as e:
+        logger.error(f"Failed to record API key usage: {e}")
+        for key_id, used_at in pending.items():
+            _pending_api_key_usage.setdefault(key_id, used_at)
+
+
+async def api_key_usage_flush_loop():
+    """Periodically flush API key usage until cancelled."""
+    try:
+        while True:
+            await asyncio.sleep(settings.API_KEY_USAGE_FLUSH_SECONDS)
+            await flush_api_key_usage()
+    except asyncio.CancelledError:
+        await flush_api_key_usage()
+        raise
+
+
 async def get_current_user(
-    token: str = Depends(oauth2_scheme),
+    token: Optional[str] = Depends(oauth2_scheme),
+    api_key: Optional[str] = Depends(api_key_header),
     db: AsyncSession = Depends(get_db),
 ) -> User:
-    """Get current authenticated user from JWT token."""
-    payload = decode_access_token(token)
+    """Get current authenticated user from an API key or JWT token."""
+    if api_key:
+        user = await authenticate_api_key(api_key, db)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid API key",
+            )
+        if not user.is_active:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="User account is disabled",
+            )
+        return user
+
+    payload = decode_access_token(token) if token else None
 
     if not payload or "sub" not in payload:
         raise HTTPException(
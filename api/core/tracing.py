@@ -0,0 +1,239 @@
+import json
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from api.core.config import settings
+
+try:
+    from opentelemetry import propagate, trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import (
+        BatchSpanProcessor,
+        ConsoleSpanExporter,
+        SpanExporter,
+    )
+    from opentelemetry.sdk.trace.sampling import (
+        Decision,
+        ParentBased,
+        Sampler,
+        SamplingResult,
+        TraceIdRatioBased,
+    )
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+except ImportError:  # pragma: no cover - OpenTelemetry is only needed for tracing
+    trace = None
+
+logger = logging.getLogger(__name__)
+
+TRACER_NAME = "ldapguard"
+
+_provider = None
+
+
+if trace is not None:
+
+    class _ClientRootFilter(Sampler):
+        """Samples root spans by ratio, except those of instrumented clients.
+
+        A Redis, database or HTTP call outside any request or job, such as
+        the worker polling its queues, would otherwise start a trace of its
+        own every few seconds.
+        """
+
+        def __init__(self, ratio: float):
+            self._ratio = TraceIdRatioBased(ratio)
+
+        def should_sample(
+            self,
+            parent_context,
+            trace_id,
+            name,
+            kind=None,
+            attributes=None,
+            links=None,
+            trace_state=None,
+        ):
+            if kind == SpanKind.CLIENT:
+                return SamplingResult(Decision.DROP)
+            return self._ratio.should_sample(
+                parent_context, trace_id, name, kind, attributes, links, trace_state
+            )
+
+        def get_description(self) -> str:
+            return f"ClientRootFilter{{{self._ratio.get_description()}}}"
+
+
+def _create_exporter() -> Optional["SpanExporter"]:
+    """Create the exporter chosen by TRACING_EXPORTER."""
+    if settings.TRACING_EXPORTER == "none":
+        return None
+    if settings.TRACING_EXPORTER == "console":
+        return ConsoleSpanExporter()
+
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+        OTLPSpanExporter,
+    )
+
+    endpoint = settings.TRACING_OTLP_ENDPOINT.rstrip("/")
+    return OTLPSpanExporter(endpoint=f"{endpoint}/v1/traces")
+
+
+def setup_tracing(
+    component: str, app: Any = None, exporter: Optional["SpanExporter"] = None
+) -> bool:
+    """Install the tracer provider and instrument the libraries in use.
+
+    ``exporter`` overrides TRACING_EXPORTER, e.g. with an in-memory
+    exporter in tests. Returns whether tracing is active.
+    """
+    global _provider
+
+    if not settings.TRACING_ENABLED:
+        return False
+    if trace is None:
+        logger.warning("TRACING_ENABLED is set but OpenTelemetry is not installed")
+        return False
+    if _provider is not None:
+        return True
+
+    _provider = TracerProvider(
+        resource=Resource.create(
+            {
+                "service.name": f"{settings.TRACING_SERVICE_NAME}-{component}",
+                "service.version": settings.APP_VERSION,
+            }
+        ),
+        sampler=ParentBased(root=_ClientRootFilter(settings.TRACING_SAMPLE_RATIO)),
+    )
+    exporter = exporter or _create_exporter()
+    if exporter is not None:
+        _provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(_provider)
+
+    _instrument(app)
+    logger.info(f"Tracing enabled for {component}")
+    return True
+
+
+def _instrument(app: Any = None):
+    """Instrument FastAPI, SQLAlchemy, Redis and httpx where available."""
+    from api.core.database import engine
+
+    try:
+        from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
+
+        SQLAlchemyInstrumentor().instrument(engine=engine.sync_engine)
+    except ImportError:
+        logger.warning("SQLAlchemy instrumentation is not installed")
+
+    try:
+        from opentelemetry.instrumentation.redis import RedisInstrumentor
+
+        RedisInstrumentor().instrument()
+    except ImportError:
+        logger.warning("Redis instrumentation is not installed")
+
+    try:
+        from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
+
+        HTTPXClientInstrumentor().instrument()
+    except ImportError:
+        logger.warning("httpx instrumentation is not installed")
+
+    if app is not None:
+        try:
+            from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+
+            FastAPIInstrumentor.instrument_app(app, excluded_urls="health,metrics")
+        except ImportError:
+            logger.warning("FastAPI instrumentation is not installed")
+
+
+def shutdown_tracing():
+    """Export spans still buffered and stop the provider."""
+    global _provider
+
+    if _provider is not None:
+        _provider.shutdown()
+        _provider = None
+
+
+def get_tracer():
+    """Get the tracer, a no-op one until tracing is set up."""
+    return trace.get_tracer(TRACER_NAME) if trace is not None else None
+
+
+def encode_job(job_id: int) -> str:
+    """Build a queue payload carrying the current trace context.
+
+    Without an active trace the payload is the bare id, as before.
+    """
+    carrier: Dict[str, str] = {}
+    if trace is not None:
+        propagate.inject(carrier)
+    if not carrier:
+        return str(job_id)
+    return json.dumps({"id": job_id, "trace": carrier})
+
+
+def decode_job(payload: str) -> Tuple[int, Dict[str, str]]:
+    """Get the job id and trace context from a queue payload."""
+    if payload.startswith("{"):
+        data = json.loads(payload)
+        return int(data["id"]), data.get("trace") or {}
+    return int(payload), {}
+
+
+@contextmanager
+def job_span(
+    name: str,
+    carrier: Optional[Dict[str, str]] = None,
+    attributes: Optional[Dict[str, Any]] = None,
+) -> Iterator[Any]:
+    """Run a queued job in a span continuing the trace that queued it."""
+    if trace is None:
+        yield None
+        return
+
+    context = propagate.extract(carrier) if carrier else None
+    with get_tracer().start_as_current_span(
+        name, context=context, kind=SpanKind.CONSUMER, attributes=attributes
+    ) as span:
+        yield span
+
+
+def start_span(name: str, attributes: Optional[Dict[str, Any]] = None) -> Any:
+    """Start a span under the current one, to be ended with end_span()."""
+    if trace is None:
+        return None
+    return get_tracer().start_span(name, attributes=attributes)
+
+
+def end_span(span: Any, error: Optional[str] = None):
+    """End a span from start_span(), marking it failed if there was an error."""
+    if span is None:
+        return
+    if error:
+        span.set_status(Status(StatusCode.ERROR, error))
+    span.end()
+
+
+def record_span(name: str, seconds: float, attributes: Optional[Dict[str, Any]] = None):
+    """Record a span for an operation that just took ``seconds``.
+
+    Lets code that already times an operation, such as LDAP round trips,
+    emit a span without wrapping the call.
+    """
+    if trace is None:
+        return
+    end = time.time_ns()
+    span = get_tracer().start_span(
+        name,
+        kind=SpanKind.CLIENT,
+        start_time=end - int(seconds * 1e9),
+        attributes=attributes,
+    )
+    span.end(end_time=end)
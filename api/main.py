@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import sys
 
@@ -9,18 +10,25 @@ from slowapi.util import get_remote_address
 
 from api.core.config import settings
 from api.core.redis import close_redis_client, get_redis_client
+from api.core.security import api_key_usage_flush_loop
+from api.core.tracing import setup_tracing, shutdown_tracing
 from api.routes import (
     api_keys,
     audit_logs,
     auth,
     backups,
     config,
+    dashboard,
+    events,
     ldap_servers,
     restores,
     scheduled_backups,
     settings as settings_routes,
 )
+from api.services.backup_index import clear_index_cache
+from api.services.ldap_pool import ldap_pools
 from api.services.metrics_service import MetricsService
+from api.services.progress_service import progress_broker
 
 # Configure logging
 logging.basicConfig(
@@ -39,6 +47,9 @@ app = FastAPI(
     description="Multi-container Podman app for centralized LDAP backup/restore",
 )
 
+# Trace requests, and the jobs they queue, when enabled
+setup_tracing("api", app)
+
 # Add rate limiting
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
@@ -109,6 +120,8 @@ app.include_router(audit_logs.router)
 app.include_router(api_keys.router)
 app.include_router(settings_routes.router)
 app.include_router(config.router)
+app.include_router(dashboard.router)
+app.include_router(events.router)
 
 
 @app.get("/")
@@ -139,6 +152,16 @@ async def metrics():
     return {"error": "Metrics disabled"}
 
 
+async def ldap_pool_eviction_loop():
+    """Close LDAP connections left idle by requests until cancelled."""
+    while True:
+        await asyncio.sleep(settings.LDAP_POOL_IDLE_SECONDS)
+        try:
+            await asyncio.to_thread(ldap_pools.evict_idle)
+        except Exception as e:
+            logger.warning(f"LDAP pool eviction failed: {e}")
+
+
 @app.on_event("startup")
 async def startup_event():
     """Startup event handler."""
@@ -152,11 +175,50 @@ async def startup_event():
     except Exception as e:
         logger.warning(f"Redis client initialization failed: {e}")
 
+    # Start coalesced API key usage writer
+    app.state.api_key_usage_task = asyncio.create_task(api_key_usage_flush_loop())
+
+    # Drop index copies a previous run left behind
+    clear_index_cache()
+
+    # Start closing idle pooled LDAP connections
+    app.state.ldap_pool_eviction_task = asyncio.create_task(ldap_pool_eviction_loop())
+
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Shutdown event handler."""
     logger.info(f"Shutting down {settings.APP_NAME}")
 
+    # Stop API key usage writer (flushes pending usage on cancel)
+    task = getattr(app.state, "api_key_usage_task", None)
+    if task:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    # Stop closing idle LDAP connections (shutdown closes them all)
+    task = getattr(app.state, "ldap_pool_eviction_task", None)
+    if task:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    # Stop relaying job progress to event streams
+    await progress_broker.close()
+
+    # Unbind pooled LDAP connections
+    await asyncio.to_thread(ldap_pools.close_all)
+
     # Close Redis connection
     await close_redis_client()
+
+    # Stop counting this process's live gauges in shared metrics
+    MetricsService.mark_process_dead()
+
+    # Export buffered spans
+    shutdown_tracing()
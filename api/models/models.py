@@ -1,11 +1,14 @@
 import enum
 
 from sqlalchemy import (
+    BigInteger,
     Boolean,
     Column,
     DateTime,
     Enum,
+    Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
@@ -34,6 +37,12 @@ class BackupStatus(str, enum.Enum):
     FAILED = "failed"
 
 
+class VerificationStatus(str, enum.Enum):
+    UNVERIFIED = "unverified"
+    VERIFIED = "verified"
+    CORRUPT = "corrupt"
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -93,15 +102,37 @@ class Backup(Base):
         nullable=False,
     )
     file_path = Column(String(1000))
+    index_path = Column(String(1000))  # Entry index sidecar for browsing
     file_size = Column(Integer)  # Size in bytes
     encrypted = Column(Boolean, default=True, nullable=False)
     compression_enabled = Column(Boolean, default=True, nullable=False)
     entry_count = Column(Integer)  # Number of LDAP entries backed up
+    checksum = Column(String(64))  # SHA-256 of the stored artifact
+    content_checksum = Column(String(64))  # SHA-256 of the plain LDIF
+    verification_status = Column(
+        Enum(VerificationStatus, values_callable=lambda x: [e.value for e in x]),
+        default=VerificationStatus.UNVERIFIED,
+        nullable=False,
+    )
+    verified_at = Column(DateTime(timezone=True))
+    verification_error = Column(Text)
     parent_backup_id = Column(
-        Integer, ForeignKey("backups.id")
+        Integer, ForeignKey("backups.id"), index=True
     )  # For incremental backups
+    scheduled_backup_id = Column(
+        Integer, ForeignKey("scheduled_backups.id", ondelete="SET NULL")
+    )  # Schedule that produced this backup, for retention
     created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
     error_message = Column(Text)
+    attempts = Column(Integer, default=0, nullable=False)  # Runs started so far
+    # Live progress, written periodically while the job runs
+    progress_phase = Column(String(50))
+    progress_entries = Column(Integer)
+    progress_bytes = Column(BigInteger)
+    entries_per_second = Column(Float)
+    bytes_per_second = Column(Float)
+    progress_updated_at = Column(DateTime(timezone=True))
+    checkpoint = Column(Text)  # JSON resume point of an interrupted run
     started_at = Column(DateTime(timezone=True))
     completed_at = Column(DateTime(timezone=True))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -113,12 +144,18 @@ class Backup(Base):
         "Backup", remote_side=[id], backref="incremental_backups"
     )
 
+    __table_args__ = (
+        Index("ix_backups_schedule_created", "scheduled_backup_id", "created_at"),
+        Index("ix_backups_verified_at", "verified_at"),
+    )
+
 
 class RestoreJob(Base):
     __tablename__ = "restore_jobs"
 
     id = Column(Integer, primary_key=True, index=True)
-    backup_id = Column(Integer, ForeignKey("backups.id"), nullable=False)
+    # Cleared when the backup expires, keeping the restore's history
+    backup_id = Column(Integer, ForeignKey("backups.id", ondelete="SET NULL"))
     ldap_server_id = Column(Integer, ForeignKey("ldap_servers.id"), nullable=False)
     status = Column(
         Enum(BackupStatus, values_callable=lambda x: [e.value for e in x]),
@@ -131,6 +168,15 @@ class RestoreJob(Base):
     entries_restored = Column(Integer)
     created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
     error_message = Column(Text)
+    attempts = Column(Integer, default=0, nullable=False)  # Runs started so far
+    # Live progress, written periodically while the job runs
+    progress_phase = Column(String(50))
+    progress_entries = Column(Integer)
+    progress_bytes = Column(BigInteger)
+    entries_per_second = Column(Float)
+    bytes_per_second = Column(Float)
+    progress_updated_at = Column(DateTime(timezone=True))
+    checkpoint = Column(Text)  # JSON resume point of an interrupted run
     started_at = Column(DateTime(timezone=True))
     completed_at = Column(DateTime(timezone=True))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -150,6 +196,11 @@ class ScheduledBackup(Base):
     cron_expression = Column(String(100), nullable=False)  # Cron schedule
     is_active = Column(Boolean, default=True, nullable=False)
     retention_days = Column(Integer, default=30, nullable=False)
+    # Optional retention beyond retention_days: newest N, plus GFS buckets
+    keep_last = Column(Integer)
+    keep_daily = Column(Integer)
+    keep_weekly = Column(Integer)
+    keep_monthly = Column(Integer)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -173,7 +224,9 @@ class APIKey(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
     key_hash = Column(String(255), nullable=False, unique=True)  # Hashed API key
-    key_prefix = Column(String(10), nullable=False)  # First few chars for display
+    key_prefix = Column(
+        String(10), nullable=False, index=True
+    )  # First few chars, used for display and lookup
     permissions = Column(String(255))  # Comma-separated permissions
     created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
     expires_at = Column(DateTime(timezone=True))
@@ -3,20 +3,21 @@ from datetime import datetime, timedelta
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from passlib.context import CryptContext
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from api.core.database import get_db
-from api.core.security import get_current_user
+from api.core.security import (
+    get_api_key_prefix,
+    get_current_user,
+    hash_api_key,
+    invalidate_api_key_cache,
+)
 from api.models.models import APIKey, User
 from api.schemas.schemas import APIKeyCreate, APIKeyResponse, APIKeyWithSecret
 
 router = APIRouter(prefix="/api-keys", tags=["API Keys"])
 
-# For hashing API keys
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 
 def generate_api_key() -> str:
     """Generate a secure API key."""
@@ -59,8 +60,8 @@ async def create_api_key(
 
     # Generate API key
     api_key = generate_api_key()
-    key_hash = pwd_context.hash(api_key)
-    key_prefix = api_key[:10]  # Store prefix for display
+    key_hash = hash_api_key(api_key)
+    key_prefix = get_api_key_prefix(api_key)  # Store prefix for display/lookup
 
     # Calculate expiration
     expires_at = None
@@ -122,6 +123,7 @@ async def delete_api_key(
 
     await db.delete(api_key)
     await db.commit()
+    invalidate_api_key_cache(key_id)
 
     return None
 
@@ -149,6 +151,7 @@ async def revoke_api_key(
 
     api_key.is_active = False
     await db.commit()
+    invalidate_api_key_cache(key_id)
     await db.refresh(api_key)
 
     return api_key
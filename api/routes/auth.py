@@ -11,8 +11,8 @@ from api.core.database import get_db
 from api.core.security import (
     create_access_token,
     get_current_user,
-    get_password_hash,
-    verify_password,
+    get_password_hash_async,
+    verify_password_async,
 )
 from api.models.models import User
 from api.schemas.schemas import (
@@ -55,7 +55,7 @@ async def register(
         )
 
     # Create user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password)
     new_user = User(
         username=user_data.username,
         email=user_data.email,
@@ -82,7 +82,9 @@ async def login(
     result = await db.execute(select(User).where(User.username == login_data.username))
     user = result.scalar_one_or_none()
 
-    if not user or not verify_password(login_data.password, user.hashed_password):
+    if not user or not await verify_password_async(
+        login_data.password, user.hashed_password
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -1,16 +1,51 @@
+import asyncio
 import logging
-from pathlib import Path
-from typing import List, Optional
-
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
+import os
+import threading
+from typing import Iterator, List, Optional
+
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    status,
+)
+from fastapi.responses import (
+    FileResponse,
+    RedirectResponse,
+    Response,
+    StreamingResponse,
+)
 from pydantic import BaseModel
-from sqlalchemy import or_, select
+from sqlalchemy import delete, func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from api.core.config import settings
 from api.core.database import get_db
+from api.core.encryption import decrypt_ldap_password
+from api.core.redis import get_redis_client
 from api.core.security import get_current_user
+from api.core.tracing import encode_job
 from api.models.models import Backup, BackupStatus, BackupType, LDAPServer
 from api.schemas.schemas import BackupCreate, BackupResponse
+from api.services.backup_index import BackupIndex, SearchFilter, backup_index_cache
+from api.services.backup_service import BackupService
+from api.services.diff_service import (
+    LiveSnapshot,
+    diff_entries,
+    iter_json_changes,
+    iter_ldif_changes,
+)
+from api.services.file_reaper import FileReaperService
+from api.services.ldap_service import LDAPService
+from api.services.storage_service import (
+    S3StorageBackend,
+    get_storage_backend,
+    parse_byte_range,
+)
 
 router = APIRouter(prefix="/backups", tags=["Backups"])
 logger = logging.getLogger(__name__)
@@ -72,6 +107,326 @@ async def get_backup(backup_id: int, db: AsyncSession = Depends(get_db)):
     return backup
 
 
+@router.get("/{backup_id}/download")
+async def download_backup(
+    backup_id: int,
+    request: Request,
+    decoded: bool = Query(
+        False, description="Decrypt and decompress to plain LDIF on the fly"
+    ),
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """Download a backup artifact.
+
+    Raw downloads support HTTP Range requests. Local files are served from
+    disk and object storage is either redirected to a presigned URL or
+    proxied in chunks, so the artifact is never read into memory.
+    """
+    result = await db.execute(select(Backup).where(Backup.id == backup_id))
+    backup = result.scalar_one_or_none()
+
+    if not backup:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Backup not found"
+        )
+
+    if backup.status != BackupStatus.COMPLETED or not backup.file_path:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Backup file is not available",
+        )
+
+    if decoded and current_user.role.value not in ("admin", "operator"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions to download decrypted backups",
+        )
+
+    location = backup.file_path
+    storage = get_storage_backend(location)
+    filename = os.path.basename(location)
+
+    if storage.is_local(location) and not os.path.isfile(location):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Backup file not found"
+        )
+
+    if decoded:
+        if backup.encrypted:
+            filename = filename.removesuffix(".enc")
+        if backup.compression_enabled:
+            filename = filename.removesuffix(".gz")
+        return StreamingResponse(
+            BackupService().iter_decoded(
+                storage.iter_range(location),
+                backup.encrypted,
+                backup.compression_enabled,
+            ),
+            media_type="text/plain; charset=utf-8",
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        )
+
+    if storage.is_local(location):
+        # Starlette answers Range requests for files itself
+        return FileResponse(
+            location, media_type="application/octet-stream", filename=filename
+        )
+
+    if settings.S3_PRESIGNED_DOWNLOADS and isinstance(storage, S3StorageBackend):
+        url = storage.presigned_url(
+            location, expires_in=settings.DOWNLOAD_URL_EXPIRE_SECONDS
+        )
+        return RedirectResponse(url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+
+    size = await asyncio.to_thread(storage.size, location)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f'attachment; filename="{filename}"',
+    }
+    try:
+        byte_range = parse_byte_range(request.headers.get("range"), size)
+    except ValueError:
+        return Response(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+
+    if byte_range is None:
+        chunks = storage.iter_range(location)
+        status_code = status.HTTP_200_OK
+        headers["Content-Length"] = str(size)
+    else:
+        start, end = byte_range
+        chunks = storage.iter_range(location, start, end)
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(end - start + 1)
+
+    return StreamingResponse(
+        chunks,
+        status_code=status_code,
+        media_type="application/octet-stream",
+        headers=headers,
+    )
+
+
+async def _get_indexed_backup(backup_id: int, db: AsyncSession) -> Backup:
+    """Get a completed backup that has an entry index."""
+    result = await db.execute(select(Backup).where(Backup.id == backup_id))
+    backup = result.scalar_one_or_none()
+
+    if not backup:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Backup not found"
+        )
+
+    if backup.status != BackupStatus.COMPLETED or not backup.index_path:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Index of backup {backup_id} is not available",
+        )
+
+    return backup
+
+
+async def _acquire_index(backup: Backup) -> BackupIndex:
+    """Open a backup's index through the cache. Release it when done."""
+    try:
+        return await backup_index_cache.acquire(backup.id, backup.index_path)
+    except Exception as e:
+        logger.error(f"Failed to open index of backup {backup.id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Index of backup {backup.id} is not available",
+        )
+
+
+@router.get("/{backup_id}/entries")
+async def list_backup_entries(
+    backup_id: int,
+    base: Optional[str] = Query(None, description="Base DN to browse from"),
+    scope: str = Query("one", pattern="^(one|sub)$", description="one or sub"),
+    filter: Optional[str] = Query(None, description="LDAP search filter"),
+    cursor: Optional[str] = Query(None, description="next_cursor of a prior page"),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """Browse the entries contained in a backup without restoring it."""
+    search_filter = None
+    if filter:
+        try:
+            search_filter = SearchFilter(filter)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid filter: {str(e)}",
+            )
+
+    backup = await _get_indexed_backup(backup_id, db)
+    if search_filter is not None and (
+        backup.encrypted and current_user.role.value not in ("admin", "operator")
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions to search encrypted backups",
+        )
+
+    index = await _acquire_index(backup)
+    try:
+        page = await asyncio.to_thread(
+            index.list_entries, base, scope, search_filter, cursor, limit
+        )
+    finally:
+        backup_index_cache.release(index)
+
+    return {"backup_id": backup.id, "total_entries": index.entry_count, **page}
+
+
+@router.get("/{backup_id}/entry")
+async def get_backup_entry(
+    backup_id: int,
+    dn: str = Query(..., description="DN of the entry"),
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """Get one entry and its attributes from a backup."""
+    backup = await _get_indexed_backup(backup_id, db)
+
+    if backup.encrypted and current_user.role.value not in ("admin", "operator"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions to read encrypted backups",
+        )
+
+    index = await _acquire_index(backup)
+    try:
+        entry = await asyncio.to_thread(index.get_entry, dn)
+    finally:
+        backup_index_cache.release(index)
+
+    if entry is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Entry not found"
+        )
+
+    return entry
+
+
+@router.get("/{backup_id}/diff")
+async def diff_backup(
+    backup_id: int,
+    against_backup_id: Optional[int] = Query(
+        None, description="Newer backup to compare with"
+    ),
+    live: bool = Query(False, description="Compare with the live directory"),
+    format: str = Query("ndjson", pattern="^(ndjson|ldif)$"),
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """Stream what changed since a backup.
+
+    Compares the backup with a newer backup or with its server's live
+    directory. Both sides are merge-joined in DN order from their indexes,
+    so memory use does not grow with directory size. ``format=ndjson``
+    streams one change per line with attribute-level deltas and a summary;
+    ``format=ldif`` streams an LDIF change file that ldapmodify can apply.
+    A client that disconnects stops the live directory export.
+    """
+    if live == (against_backup_id is not None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Specify either against_backup_id or live=true",
+        )
+
+    if current_user.role.value not in ("admin", "operator"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions to diff backups",
+        )
+
+    backup = await _get_indexed_backup(backup_id, db)
+    against = None
+    ldap_service = None
+    if against_backup_id is not None:
+        against = await _get_indexed_backup(against_backup_id, db)
+    else:
+        result = await db.execute(
+            select(LDAPServer).where(LDAPServer.id == backup.ldap_server_id)
+        )
+        ldap_server = result.scalar_one_or_none()
+        if not ldap_server:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="LDAP server not found"
+            )
+        ldap_service = LDAPService(
+            host=ldap_server.host,
+            port=ldap_server.port,
+            use_ssl=ldap_server.use_ssl,
+            base_dn=ldap_server.base_dn,
+            bind_dn=ldap_server.bind_dn,
+            bind_password=decrypt_ldap_password(
+                ldap_server.bind_password, ldap_server.password_encrypted
+            ),
+            pooled=True,
+        )
+
+    indexes = [await _acquire_index(backup)]
+    if against is not None:
+        try:
+            indexes.append(await _acquire_index(against))
+        except HTTPException:
+            backup_index_cache.release(indexes[0])
+            raise
+
+    render = iter_ldif_changes if format == "ldif" else iter_json_changes
+    cancelled = threading.Event()
+
+    def changes() -> Iterator[str]:
+        old_entries = indexes[0].iter_entries()
+        if ldap_service is None:
+            yield from render(diff_entries(old_entries, indexes[1].iter_entries()))
+            return
+        with LiveSnapshot(ldap_service, cancelled=cancelled) as live_index:
+            yield from render(diff_entries(old_entries, live_index.iter_entries()))
+
+    diff_changes = changes()
+
+    async def stream():
+        # asyncio.to_thread, unlike iterate_in_threadpool, lets a disconnect
+        # cancel the wait while the live export is still running
+        try:
+            while True:
+                chunk = await asyncio.to_thread(next, diff_changes, None)
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            cancelled.set()
+            try:
+                diff_changes.close()
+            except ValueError:
+                # Still running in its thread: the export stops at its next
+                # progress report and removes its scratch files
+                pass
+            for index in indexes:
+                backup_index_cache.release(index)
+
+    target = f"backup_{against_backup_id}" if against else "live"
+    if format == "ldif":
+        return StreamingResponse(
+            stream(),
+            media_type="text/plain; charset=utf-8",
+            headers={
+                "Content-Disposition": (
+                    f'attachment; filename="backup_{backup_id}_to_{target}.ldif"'
+                )
+            },
+        )
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
 @router.post("/", response_model=BackupResponse, status_code=status.HTTP_201_CREATED)
 async def create_backup(
     backup_data: BackupCreate,
@@ -111,6 +466,58 @@ async def create_backup(
     return new_backup
 
 
+@router.post("/{backup_id}/retry", response_model=BackupResponse)
+async def retry_backup(
+    backup_id: int,
+    db: AsyncSession = Depends(get_db),
+    _current_user=Depends(get_current_user),
+):
+    """Queue a failed backup again.
+
+    A backup that failed for good has had its partial export removed, so
+    the retry exports from scratch; only automatic retries resume from a
+    checkpoint.
+    """
+    result = await db.execute(select(Backup).where(Backup.id == backup_id))
+    backup = result.scalar_one_or_none()
+
+    if not backup:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Backup not found"
+        )
+
+    if backup.status != BackupStatus.FAILED:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only failed backups can be retried",
+        )
+
+    error_message, completed_at = backup.error_message, backup.completed_at
+    backup.status = BackupStatus.PENDING
+    backup.error_message = None
+    backup.completed_at = None
+    await db.commit()
+    await db.refresh(backup)
+
+    try:
+        redis_client = await get_redis_client()
+        await redis_client.rpush("backup_queue", encode_job(backup.id))
+    except Exception as e:
+        logger.error(f"Failed to queue backup retry: {str(e)}")
+        # Leave it failed, so it can be retried, rather than stuck pending
+        backup.status = BackupStatus.FAILED
+        backup.error_message = error_message
+        backup.completed_at = completed_at
+        await db.commit()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Could not queue the retry, please try again later",
+        )
+
+    logger.info(f"Queued retry of backup {backup.id}")
+    return backup
+
+
 @router.delete("/{backup_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_backup(
     backup_id: int,
@@ -126,15 +533,16 @@ async def delete_backup(
             status_code=status.HTTP_404_NOT_FOUND, detail="Backup not found"
         )
 
-    # Delete backup file from disk if it exists
-    if backup.file_path:
+    # Delete backup file and entry index from storage if they exist
+    backup_index_cache.evict([backup_id])
+    for path in (backup.file_path, backup.index_path):
+        if not path:
+            continue
         try:
-            file_path = Path(backup.file_path)
-            if file_path.exists():
-                file_path.unlink()
-                logger.info(f"Deleted backup file: {backup.file_path}")
+            if await asyncio.to_thread(get_storage_backend(path).delete, path):
+                logger.info(f"Deleted backup file: {path}")
         except Exception as e:
-            logger.error(f"Failed to delete backup file {backup.file_path}: {str(e)}")
+            logger.error(f"Failed to delete backup file {path}: {str(e)}")
             # Continue with database deletion even if file deletion fails
 
     await db.delete(backup)
@@ -146,33 +554,60 @@ async def delete_backup(
 @router.post("/batch-delete", status_code=status.HTTP_200_OK)
 async def batch_delete_backups(
     request: BatchDeleteRequest,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
     _current_user=Depends(get_current_user),
 ):
-    """Delete multiple backups at once."""
+    """Delete multiple backups at once.
+
+    Incremental backups depending on a deleted backup are deleted with it.
+    Rows are removed with a single statement and the backup files are
+    cleaned up asynchronously.
+    """
     if not request.backup_ids:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="No backup IDs provided"
         )
 
-    # Fetch all backups
-    result = await db.execute(select(Backup).where(Backup.id.in_(request.backup_ids)))
-    backups = result.scalars().all()
+    backup_ids = set(request.backup_ids)
+    found = await db.scalar(
+        select(func.count(Backup.id)).where(Backup.id.in_(backup_ids))
+    )
 
-    if len(backups) != len(request.backup_ids):
+    if found != len(backup_ids):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Some backups not found"
         )
 
-    # Delete all backups
-    deleted_count = 0
-    for backup in backups:
-        await db.delete(backup)
-        deleted_count += 1
+    # Requested backups plus every incremental chained from them
+    targets = select(Backup.id).where(Backup.id.in_(backup_ids)).cte(recursive=True)
+    targets = targets.union_all(
+        select(Backup.id).where(Backup.parent_backup_id == targets.c.id)
+    )
 
+    result = await db.execute(
+        delete(Backup)
+        .where(Backup.id.in_(select(targets.c.id)))
+        .returning(Backup.id, Backup.file_path, Backup.index_path)
+        .execution_options(synchronize_session=False)
+    )
+    deleted = result.all()
     await db.commit()
 
+    backup_index_cache.evict(row.id for row in deleted)
+    file_paths = [path for row in deleted for path in row[1:] if path]
+    try:
+        reaper = FileReaperService(await get_redis_client())
+        await reaper.enqueue(file_paths)
+    except Exception as e:
+        # Fall back to cleaning up in this process after the response
+        logger.warning(f"Failed to queue backup file cleanup: {str(e)}")
+        background_tasks.add_task(FileReaperService().reap, file_paths)
+
+    deleted_count = len(deleted)
     return {
         "deleted": deleted_count,
+        "dependents_deleted": deleted_count - len(backup_ids),
+        "files_queued": len(file_paths),
         "message": f"Successfully deleted {deleted_count} backups",
     }
@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from passlib.context import CryptContext
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from api.core.database import get_db
-from api.core.security import get_current_user
+from api.core.database import AsyncSessionLocal, get_db
+from api.core.security import get_current_user, get_password_hash_async
 from api.models.models import (
     LDAPServer,
     ScheduledBackup,
@@ -14,10 +16,23 @@ from api.schemas.schemas import (
     ConfigurationExport,
     ConfigurationImport,
 )
+from api.services.config_service import (
+    SCHEDULED_BACKUP,
+    SERVER,
+    USER,
+    ConfigImportService,
+    stream_configuration_export,
+)
+from api.services.response_cache import (
+    LDAP_SERVERS,
+    SCHEDULED_BACKUPS,
+    response_cache,
+)
 
 router = APIRouter(prefix="/config", tags=["Configuration"])
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Imported users get a default password (must be changed)
+DEFAULT_IMPORTED_USER_PASSWORD = "changeme123"
 
 
 @router.get("/export", response_model=ConfigurationExport)
@@ -82,6 +97,32 @@ async def export_configuration(
     )
 
 
+@router.get("/export/stream")
+async def export_configuration_stream(
+    current_user: User = Depends(get_current_user),
+):
+    """Export configuration as an NDJSON stream. Admin only.
+
+    Rows are read through server-side cursors and written as they arrive,
+    so the first bytes go out immediately and memory stays flat.
+    """
+    if current_user.role.value != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only administrators can export configuration",
+        )
+
+    # The stream opens its own session: request-scoped dependencies may be
+    # closed before the response body has been sent.
+    return StreamingResponse(
+        stream_configuration_export(AsyncSessionLocal),
+        media_type="application/x-ndjson",
+        headers={
+            "Content-Disposition": 'attachment; filename="ldapguard-config.ndjson"'
+        },
+    )
+
+
 @router.post("/import")
 async def import_configuration(
     config: ConfigurationImport,
@@ -95,101 +136,78 @@ async def import_configuration(
             detail="Only administrators can import configuration",
         )
 
-    imported_counts = {"servers": 0, "scheduled_backups": 0, "users": 0, "errors": []}
-
-    # Import servers
-    if config.servers:
-        for server_data in config.servers:
-            try:
-                # Check if server already exists
-                result = await db.execute(
-                    select(LDAPServer).where(LDAPServer.name == server_data.get("name"))
-                )
-                existing = result.scalar_one_or_none()
-
-                if not existing:
-                    server = LDAPServer(
-                        name=server_data.get("name"),
-                        host=server_data.get("host"),
-                        port=server_data.get("port", 389),
-                        use_ssl=server_data.get("use_ssl", False),
-                        base_dn=server_data.get("base_dn"),
-                        bind_dn=server_data.get("bind_dn"),
-                    )
-                    db.add(server)
-                    imported_counts["servers"] += 1
-            except Exception as e:
-                imported_counts["errors"].append(f"Server import error: {str(e)}")
-
-    # Commit servers first so we have IDs for scheduled backups
-    await db.commit()
-
-    # Import scheduled backups
-    if config.scheduled_backups:
-        for schedule_data in config.scheduled_backups:
-            try:
-                # Verify server exists
-                server_id = schedule_data.get("ldap_server_id")
-                if server_id:
-                    result = await db.execute(
-                        select(LDAPServer).where(LDAPServer.id == server_id)
-                    )
-                    server = result.scalar_one_or_none()
-
-                    if server:
-                        # Check if schedule already exists
-                        result = await db.execute(
-                            select(ScheduledBackup).where(
-                                ScheduledBackup.name == schedule_data.get("name")
-                            )
-                        )
-                        existing = result.scalar_one_or_none()
-
-                        if not existing:
-                            schedule = ScheduledBackup(
-                                name=schedule_data.get("name"),
-                                ldap_server_id=server_id,
-                                backup_type=schedule_data.get("backup_type", "full"),
-                                cron_expression=schedule_data.get("cron_expression"),
-                                retention_days=schedule_data.get("retention_days", 30),
-                                is_active=schedule_data.get("is_active", True),
-                            )
-                            db.add(schedule)
-                            imported_counts["scheduled_backups"] += 1
-            except Exception as e:
-                imported_counts["errors"].append(f"Schedule import error: {str(e)}")
-
-    # Import users
+    # Hash the shared default password once, off the event loop
+    hashed_password = None
     if config.users:
-        for user_data in config.users:
-            try:
-                # Check if user already exists
-                result = await db.execute(
-                    select(User).where(User.username == user_data.get("username"))
-                )
-                existing = result.scalar_one_or_none()
-
-                if not existing:
-                    # Create user with a default password (must be changed)
-                    default_password = "changeme123"
-                    hashed_password = pwd_context.hash(default_password)
-
-                    user = User(
-                        username=user_data.get("username"),
-                        email=user_data.get("email"),
-                        full_name=user_data.get("full_name"),
-                        role=user_data.get("role", "viewer"),
-                        is_active=user_data.get("is_active", True),
-                        hashed_password=hashed_password,
-                    )
-                    db.add(user)
-                    imported_counts["users"] += 1
-            except Exception as e:
-                imported_counts["errors"].append(f"User import error: {str(e)}")
-
-    await db.commit()
+        hashed_password = await get_password_hash_async(DEFAULT_IMPORTED_USER_PASSWORD)
+
+    importer = ConfigImportService(db, default_password_hash=hashed_password)
+    await importer.prefetch()
+
+    for server_data in config.servers or []:
+        await importer.add(SERVER, server_data)
+    for schedule_data in config.scheduled_backups or []:
+        await importer.add(SCHEDULED_BACKUP, schedule_data)
+    for user_data in config.users or []:
+        await importer.add(USER, user_data)
+
+    await importer.commit()
+    await response_cache.invalidate(LDAP_SERVERS, SCHEDULED_BACKUPS)
+
+    return {
+        "message": "Configuration import completed",
+        "imported": importer.report(),
+    }
+
+
+@router.post("/import/stream")
+async def import_configuration_stream(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Import configuration from an NDJSON stream. Admin only.
+
+    Each line is a JSON object of the form ``{"type": ..., "data": {...}}``
+    where type is ``server``, ``scheduled_backup`` or ``user``. The body is
+    consumed incrementally, so memory use is bounded by the batch size.
+    """
+    if current_user.role.value != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only administrators can import configuration",
+        )
+
+    hashed_password = await get_password_hash_async(DEFAULT_IMPORTED_USER_PASSWORD)
+    importer = ConfigImportService(db, default_password_hash=hashed_password)
+    await importer.prefetch()
+
+    async def import_line(line: bytes, line_number: int):
+        if not line.strip():
+            return
+        try:
+            record = json.loads(line)
+            kind, data = record["type"], record.get("data", {})
+        except (ValueError, KeyError, TypeError) as e:
+            importer.errors.append(f"Line {line_number}: invalid record ({e})")
+            return
+        await importer.add(kind, data)
+
+    buffer = b""
+    line_number = 0
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            await import_line(line, line_number)
+    if buffer:
+        await import_line(buffer, line_number + 1)
+
+    await importer.commit()
+    await response_cache.invalidate(LDAP_SERVERS, SCHEDULED_BACKUPS)
 
     return {
         "message": "Configuration import completed",
-        "imported": imported_counts,
+        "imported": importer.report(),
     }
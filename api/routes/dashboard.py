@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.core.config import settings
+from api.core.database import get_db
+from api.core.redis import get_redis_client
+from api.core.security import get_current_user
+from api.schemas.schemas import DashboardSummary
+from api.services.dashboard_service import DashboardService
+
+router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
+
+
+@router.get("/summary", response_model=DashboardSummary)
+async def get_dashboard_summary(
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    _current_user=Depends(get_current_user),
+):
+    """Get counts, storage use and recent failure rate for the dashboard."""
+    try:
+        redis_client = await get_redis_client()
+    except Exception:
+        redis_client = None
+
+    response.headers["Cache-Control"] = (
+        f"private, max-age={settings.DASHBOARD_CACHE_SECONDS}"
+    )
+    return await DashboardService(db, redis_client).get_summary()
@@ -0,0 +1,64 @@
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.core.config import settings
+from api.core.database import get_db
+from api.core.security import get_current_user
+from api.services.progress_service import coalesce, format_event, progress_broker
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+
+@router.get("/jobs")
+async def stream_job_progress(
+    request: Request,
+    kind: Optional[str] = Query(
+        None, pattern="^(backup|restore)$", description="Filter by job kind"
+    ),
+    job_id: Optional[int] = Query(None, description="Filter by job ID"),
+    db: AsyncSession = Depends(get_db),
+    _current_user=Depends(get_current_user),
+):
+    """Stream live backup and restore progress as server-sent events."""
+    # The stream can stay open for hours; don't hold a database connection
+    await db.close()
+    queue = progress_broker.subscribe()
+
+    def wanted(event) -> bool:
+        if kind and event.get("kind") != kind:
+            return False
+        return job_id is None or event.get("id") == job_id
+
+    async def stream():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        queue.get(), settings.EVENT_STREAM_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+
+                # Send only the latest of whatever queued up while this
+                # client was being written to
+                events = [event]
+                while not queue.empty():
+                    events.append(queue.get_nowait())
+                for event in coalesce([e for e in events if wanted(e)]):
+                    yield format_event(event)
+        finally:
+            progress_broker.unsubscribe(queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
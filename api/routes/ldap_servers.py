@@ -1,6 +1,6 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from pydantic import BaseModel
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -8,10 +8,19 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from api.core.config import settings
 from api.core.database import get_db
 from api.core.encryption import AESEncryption
+from api.core.redis import get_redis_client
 from api.core.security import get_current_user
 from api.models.models import LDAPServer
-from api.schemas.schemas import LDAPServerCreate, LDAPServerResponse, LDAPServerUpdate
+from api.schemas.schemas import (
+    FleetHealthResponse,
+    LDAPServerCreate,
+    LDAPServerResponse,
+    LDAPServerUpdate,
+)
+from api.services.async_ldap_service import AsyncLDAPService
+from api.services.health_service import FleetHealthService
 from api.services.ldap_service import LDAPService
+from api.services.response_cache import LDAP_SERVERS, response_cache
 
 router = APIRouter(prefix="/ldap-servers", tags=["LDAP Servers"])
 
@@ -31,11 +40,36 @@ class LDAPTestConnection(BaseModel):
 
 
 @router.get("/", response_model=List[LDAPServerResponse])
-async def list_ldap_servers(db: AsyncSession = Depends(get_db)):
-    """List all LDAP servers."""
-    result = await db.execute(select(LDAPServer))
-    servers = result.scalars().all()
-    return servers
+async def list_ldap_servers(request: Request, db: AsyncSession = Depends(get_db)):
+    """List all LDAP servers.
+
+    Served from the response cache, with ETag revalidation.
+    """
+
+    async def load():
+        result = await db.execute(select(LDAPServer))
+        return result.scalars().all()
+
+    return await response_cache.respond(
+        request, LDAP_SERVERS, List[LDAPServerResponse], load
+    )
+
+
+@router.get("/health", response_model=FleetHealthResponse)
+async def get_fleet_health(_current_user=Depends(get_current_user)):
+    """Get the latest health probe results for all active LDAP servers.
+
+    Results are recorded by the worker on an interval; nothing is probed
+    on the request path.
+    """
+    try:
+        redis_client = await get_redis_client()
+        return await FleetHealthService.get_cached(redis_client)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Health results unavailable: {str(e)}",
+        )
 
 
 @router.get("/{server_id}", response_model=LDAPServerResponse)
@@ -73,17 +107,19 @@ async def create_ldap_server(
             detail="LDAP server with this name already exists",
         )
 
-    # Test connection before saving
-    ldap_service = LDAPService(
-        host=server_data.host,
-        port=server_data.port,
-        use_ssl=server_data.use_ssl,
-        bind_dn=server_data.bind_dn,
-        bind_password=server_data.bind_password,
-        base_dn=server_data.base_dn,
+    # Test connection before saving, unpooled and off the event loop
+    ldap_service = AsyncLDAPService(
+        LDAPService(
+            host=server_data.host,
+            port=server_data.port,
+            use_ssl=server_data.use_ssl,
+            bind_dn=server_data.bind_dn,
+            bind_password=server_data.bind_password,
+            base_dn=server_data.base_dn,
+        )
     )
 
-    if not ldap_service.test_connection():
+    if not await ldap_service.test_connection():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Failed to connect to LDAP server. "
@@ -103,6 +139,7 @@ async def create_ldap_server(
     db.add(new_server)
     await db.commit()
     await db.refresh(new_server)
+    await response_cache.invalidate(LDAP_SERVERS)
 
     return new_server
 
@@ -137,6 +174,7 @@ async def update_ldap_server(
 
     await db.commit()
     await db.refresh(server)
+    await response_cache.invalidate(LDAP_SERVERS)
 
     return server
 
@@ -154,6 +192,7 @@ async def delete_ldap_server(server_id: int, db: AsyncSession = Depends(get_db))
 
     await db.delete(server)
     await db.commit()
+    await response_cache.invalidate(LDAP_SERVERS)
 
     return None
 
@@ -165,20 +204,23 @@ async def test_ldap_connection(
 ):
     """Test LDAP connection with provided credentials."""
     try:
-        # Create a temporary service instance to test the connection
-        ldap_service = LDAPService(
-            host=test_data.host,
-            port=test_data.port,
-            use_ssl=test_data.use_ssl,
-            base_dn=test_data.base_dn,
-            bind_dn=test_data.bind_dn,
-            bind_password=test_data.bind_password,
+        # Create a temporary, unpooled service instance to test the connection
+        ldap_service = AsyncLDAPService(
+            LDAPService(
+                host=test_data.host,
+                port=test_data.port,
+                use_ssl=test_data.use_ssl,
+                base_dn=test_data.base_dn,
+                bind_dn=test_data.bind_dn,
+                bind_password=test_data.bind_password,
+            )
         )
 
         # Try to connect and get basic info
-        entries = await ldap_service.search_entries(
-            search_filter="(objectClass=*)", attributes=["dn"], size_limit=1
-        )
+        async with ldap_service:
+            entries = await ldap_service.search_entries(
+                search_filter="(objectClass=*)", attributes=["1.1"], size_limit=1
+            )
 
         entry_count = len(entries) if entries else 0
 
@@ -8,6 +8,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from api.core.database import get_db
 from api.core.redis import get_redis_client
 from api.core.security import get_current_user
+from api.core.tracing import encode_job
 from api.models.models import Backup, BackupStatus, RestoreJob
 from api.schemas.schemas import RestoreJobCreate, RestoreJobResponse
 
@@ -85,10 +86,63 @@ async def create_restore_job(
     # Queue restore task to Redis for worker processing
     try:
         redis_client = await get_redis_client()
-        await redis_client.rpush("restore_queue", str(new_job.id))
+        await redis_client.rpush("restore_queue", encode_job(new_job.id))
         logger.info(f"Queued restore task for job {new_job.id}")
     except Exception as e:
         logger.error(f"Failed to queue restore task: {str(e)}")
         # Job is still created, can be processed later
 
     return new_job
+
+
+@router.post("/{restore_id}/retry", response_model=RestoreJobResponse)
+async def retry_restore_job(
+    restore_id: int,
+    db: AsyncSession = Depends(get_db),
+    _current_user=Depends(get_current_user),
+):
+    """Queue a failed restore job again, resuming from its last checkpoint."""
+    result = await db.execute(select(RestoreJob).where(RestoreJob.id == restore_id))
+    job = result.scalar_one_or_none()
+
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Restore job not found"
+        )
+
+    if job.status != BackupStatus.FAILED:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only failed restore jobs can be retried",
+        )
+
+    if job.backup_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The backup of this restore job no longer exists",
+        )
+
+    error_message, completed_at = job.error_message, job.completed_at
+    job.status = BackupStatus.PENDING
+    job.error_message = None
+    job.completed_at = None
+    await db.commit()
+    await db.refresh(job)
+
+    try:
+        redis_client = await get_redis_client()
+        await redis_client.rpush("restore_queue", encode_job(job.id))
+    except Exception as e:
+        logger.error(f"Failed to queue restore retry: {str(e)}")
+        # Leave it failed, so it can be retried, rather than stuck pending
+        job.status = BackupStatus.FAILED
+        job.error_message = error_message
+        job.completed_at = completed_at
+        await db.commit()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Could not queue the retry, please try again later",
+        )
+
+    logger.info(f"Queued retry of restore job {job.id}")
+    return job
@@ -1,6 +1,6 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from croniter import croniter
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -14,23 +14,39 @@ from api.schemas.schemas import (
     ScheduledBackupResponse,
     ScheduledBackupUpdate,
 )
+from api.services.response_cache import SCHEDULED_BACKUPS, response_cache
 
 router = APIRouter(prefix="/scheduled-backups", tags=["Scheduled Backups"])
 
 
 @router.get("/", response_model=List[ScheduledBackupResponse])
 async def list_scheduled_backups(
-    skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_db),
 ):
-    """List all scheduled backups."""
-    result = await db.execute(
-        select(ScheduledBackup)
-        .offset(skip)
-        .limit(limit)
-        .order_by(ScheduledBackup.created_at.desc())
+    """List all scheduled backups.
+
+    Served from the response cache, with ETag revalidation.
+    """
+
+    async def load():
+        result = await db.execute(
+            select(ScheduledBackup)
+            .offset(skip)
+            .limit(limit)
+            .order_by(ScheduledBackup.created_at.desc())
+        )
+        return result.scalars().all()
+
+    return await response_cache.respond(
+        request,
+        SCHEDULED_BACKUPS,
+        List[ScheduledBackupResponse],
+        load,
+        variant=f"{skip}:{limit}",
     )
-    scheduled = result.scalars().all()
-    return scheduled
 
 
 @router.get("/{schedule_id}", response_model=ScheduledBackupResponse)
@@ -78,6 +94,7 @@ async def create_scheduled_backup(
     db.add(new_schedule)
     await db.commit()
     await db.refresh(new_schedule)
+    await response_cache.invalidate(SCHEDULED_BACKUPS)
 
     return new_schedule
 
@@ -113,6 +130,7 @@ async def update_scheduled_backup(
 
     await db.commit()
     await db.refresh(schedule)
+    await response_cache.invalidate(SCHEDULED_BACKUPS)
 
     return schedule
 
@@ -137,6 +155,7 @@ async def delete_scheduled_backup(
 
     await db.delete(schedule)
     await db.commit()
+    await response_cache.invalidate(SCHEDULED_BACKUPS)
 
     return None
 
@@ -176,6 +195,7 @@ async def run_scheduled_backup(
         compression_enabled=True,
         status=BackupStatus.PENDING,
         created_by=current_user.id,
+        scheduled_backup_id=schedule.id,
     )
 
     db.add(new_backup)
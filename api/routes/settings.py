@@ -1,6 +1,6 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -8,25 +8,34 @@ from api.core.database import get_db
 from api.core.security import get_current_user
 from api.models.models import SystemSetting, User
 from api.schemas.schemas import SystemSettingResponse, SystemSettingUpdate
+from api.services.response_cache import SYSTEM_SETTINGS, response_cache
 
 router = APIRouter(prefix="/settings", tags=["System Settings"])
 
 
 @router.get("/", response_model=List[SystemSettingResponse])
 async def list_settings(
+    request: Request,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    """Get all system settings. Admin only."""
+    """Get all system settings. Admin only.
+
+    Served from the response cache, with ETag revalidation.
+    """
     if current_user.role.value != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only administrators can view settings",
         )
 
-    result = await db.execute(select(SystemSetting))
-    settings = result.scalars().all()
-    return settings
+    async def load():
+        result = await db.execute(select(SystemSetting))
+        return result.scalars().all()
+
+    return await response_cache.respond(
+        request, SYSTEM_SETTINGS, List[SystemSettingResponse], load
+    )
 
 
 @router.get("/{key}", response_model=SystemSettingResponse)
@@ -82,6 +91,7 @@ async def update_setting(
 
     await db.commit()
     await db.refresh(setting)
+    await response_cache.invalidate(SYSTEM_SETTINGS)
 
     return setting
 
@@ -117,6 +127,7 @@ async def batch_update_settings(
         updated_settings.append(setting)
 
     await db.commit()
+    await response_cache.invalidate(SYSTEM_SETTINGS)
 
     # Refresh all settings
     for setting in updated_settings:
@@ -148,5 +159,6 @@ async def delete_setting(
 
     await db.delete(setting)
     await db.commit()
+    await response_cache.invalidate(SYSTEM_SETTINGS)
 
     return None
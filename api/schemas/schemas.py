@@ -1,6 +1,6 @@
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel, EmailStr
 
@@ -23,6 +23,12 @@ class BackupStatus(str, Enum):
     FAILED = "failed"
 
 
+class VerificationStatus(str, Enum):
+    UNVERIFIED = "unverified"
+    VERIFIED = "verified"
+    CORRUPT = "corrupt"
+
+
 # User schemas
 class UserBase(BaseModel):
     username: str
@@ -95,6 +101,31 @@ class LDAPServerResponse(BaseModel):
         from_attributes = True
 
 
+class LDAPServerHealth(BaseModel):
+    server_id: int
+    name: str
+    host: str
+    port: int
+    reachable: bool
+    bind_ok: bool
+    latency_ms: Optional[float] = None
+    duration_ms: float
+    checked_at: datetime
+    error: Optional[str] = None
+    context_csn: List[str] = []
+    highest_usn: Optional[str] = None
+    subordinates: Optional[int] = None
+
+
+class FleetHealthResponse(BaseModel):
+    updated_at: Optional[datetime]
+    stale: bool
+    total: int
+    up: int
+    down: int
+    servers: List[LDAPServerHealth]
+
+
 # Backup schemas
 class BackupBase(BaseModel):
     ldap_server_id: int
@@ -111,11 +142,24 @@ class BackupResponse(BackupBase):
     id: int
     status: BackupStatus
     file_path: Optional[str]
+    index_path: Optional[str] = None
     file_size: Optional[int]
     entry_count: Optional[int]
+    checksum: Optional[str] = None
+    verification_status: VerificationStatus = VerificationStatus.UNVERIFIED
+    verified_at: Optional[datetime] = None
+    verification_error: Optional[str] = None
     parent_backup_id: Optional[int]
+    scheduled_backup_id: Optional[int] = None
     created_by: int
     error_message: Optional[str]
+    attempts: int = 0
+    progress_phase: Optional[str] = None
+    progress_entries: Optional[int] = None
+    progress_bytes: Optional[int] = None
+    entries_per_second: Optional[float] = None
+    bytes_per_second: Optional[float] = None
+    progress_updated_at: Optional[datetime] = None
     started_at: Optional[datetime]
     completed_at: Optional[datetime]
     created_at: datetime
@@ -139,10 +183,18 @@ class RestoreJobCreate(RestoreJobBase):
 
 class RestoreJobResponse(RestoreJobBase):
     id: int
+    backup_id: Optional[int]  # None once the backup has expired
     status: BackupStatus
     entries_restored: Optional[int]
     created_by: int
     error_message: Optional[str]
+    attempts: int = 0
+    progress_phase: Optional[str] = None
+    progress_entries: Optional[int] = None
+    progress_bytes: Optional[int] = None
+    entries_per_second: Optional[float] = None
+    bytes_per_second: Optional[float] = None
+    progress_updated_at: Optional[datetime] = None
     started_at: Optional[datetime]
     completed_at: Optional[datetime]
     created_at: datetime
@@ -158,6 +210,10 @@ class ScheduledBackupBase(BaseModel):
     backup_type: BackupType = BackupType.FULL
     cron_expression: str
     retention_days: int = 30
+    keep_last: Optional[int] = None
+    keep_daily: Optional[int] = None
+    keep_weekly: Optional[int] = None
+    keep_monthly: Optional[int] = None
 
 
 class ScheduledBackupCreate(ScheduledBackupBase):
@@ -170,6 +226,10 @@ class ScheduledBackupUpdate(BaseModel):
     cron_expression: Optional[str] = None
     is_active: Optional[bool] = None
     retention_days: Optional[int] = None
+    keep_last: Optional[int] = None
+    keep_daily: Optional[int] = None
+    keep_weekly: Optional[int] = None
+    keep_monthly: Optional[int] = None
 
 
 class ScheduledBackupResponse(ScheduledBackupBase):
@@ -267,3 +327,46 @@ class ConfigurationImport(BaseModel):
     servers: Optional[list] = []
     scheduled_backups: Optional[list] = []
     users: Optional[list] = []
+
+
+# Dashboard schemas
+class ServerCounts(BaseModel):
+    total: int
+    active: int
+
+
+class BackupCounts(BaseModel):
+    total: int
+    by_status: Dict[str, int]
+    by_type: Dict[str, int]
+    bytes_stored: int
+    corrupt: int
+
+
+class RestoreCounts(BaseModel):
+    total: int
+    by_status: Dict[str, int]
+
+
+class FailureRate(BaseModel):
+    window_days: int
+    completed: int
+    failed: int
+    rate: float
+
+
+class ServerLastBackup(BaseModel):
+    server_id: int
+    name: str
+    last_success_at: Optional[datetime]
+
+
+class DashboardSummary(BaseModel):
+    generated_at: datetime
+    servers: ServerCounts
+    backups: BackupCounts
+    restores: RestoreCounts
+    active_jobs: int
+    last_backup_at: Optional[datetime]
+    failure_rate: FailureRate
+    last_backups: List[ServerLastBackup]
@@ -0,0 +1,113 @@
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from api.core.config import settings
+from api.services.ldap_service import LDAPService
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# python-ldap calls block, so the API runs them on a dedicated pool sized
+# for LDAP round trips rather than on the loop or the default executor
+_ldap_executor = ThreadPoolExecutor(
+    max_workers=settings.LDAP_ASYNC_WORKERS, thread_name_prefix="ldap"
+)
+
+# Headroom over the libldap-level timeout before the event loop gives up
+TIMEOUT_GRACE_SECONDS = 1.0
+
+
+class LDAPTimeoutError(TimeoutError):
+    """An LDAP operation did not finish within its timeout."""
+
+
+class AsyncLDAPService:
+    """Event-loop-friendly facade over LDAPService for the API process.
+
+    Every operation runs on the LDAP thread pool under a per-operation
+    timeout, so a slow or unreachable directory only delays the request
+    that asked for it. An operation that overruns its timeout leaves its
+    connection to be discarded once the underlying call returns, and only
+    then, so it is never released while still in use.
+    """
+
+    def __init__(self, service: LDAPService, timeout: Optional[float] = None):
+        self.service = service
+        self.timeout = settings.LDAP_TIMEOUT_SECONDS if timeout is None else timeout
+        self._abandoned = False
+
+    async def __aenter__(self) -> "AsyncLDAPService":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.disconnect(discard=exc_type is not None)
+
+    async def _run(
+        self, func: Callable[..., T], *args: Any, timeout: Optional[float] = None
+    ) -> T:
+        """Run a blocking call on the LDAP pool, bounded by a timeout."""
+        timeout = self.timeout if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(_ldap_executor, functools.partial(func, *args))
+
+        try:
+            return await asyncio.wait_for(
+                asyncio.shield(future), timeout + TIMEOUT_GRACE_SECONDS
+            )
+        except asyncio.TimeoutError:
+            # The thread cannot be interrupted; close its connection once it
+            # returns so a half-finished operation is never reused
+            self._abandoned = True
+            future.add_done_callback(
+                lambda _: _ldap_executor.submit(self.service.disconnect, True)
+            )
+            raise LDAPTimeoutError(
+                f"LDAP operation on {self.service.host} timed out after {timeout}s"
+            )
+
+    async def connect(self):
+        """Connect and bind."""
+        # TCP connect and bind are each bounded by LDAP_TIMEOUT_SECONDS
+        await self._run(self.service.connect, timeout=2 * self.timeout)
+
+    async def disconnect(self, discard: bool = False):
+        """Close the connection, or return it to its pool."""
+        if self._abandoned:
+            # A timed-out operation still holds the connection and discards
+            # it when it returns
+            return
+        await self._run(self.service.disconnect, discard)
+
+    async def test_connection(self) -> bool:
+        """Check that the server accepts a bind with these credentials."""
+        try:
+            return await self._run(
+                self.service.test_connection, timeout=3 * self.timeout
+            )
+        except LDAPTimeoutError as e:
+            logger.warning(str(e))
+            return False
+
+    async def search_entries(
+        self,
+        search_filter: str = "(objectClass=*)",
+        attributes: Optional[List[str]] = None,
+        size_limit: int = 0,
+        timeout: Optional[float] = None,
+    ) -> List[Tuple[str, Dict]]:
+        """Run one bounded search under the base DN."""
+        timeout = self.timeout if timeout is None else timeout
+        if self.service.conn is None:
+            await self.connect()
+        return await self._run(
+            self.service.search_entries,
+            search_filter,
+            attributes,
+            size_limit,
+            timeout,
+            timeout=timeout,
+        )
@@ -0,0 +1,703 @@
+import asyncio
+import base64
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from api.core.config import settings
+from api.core.encryption import AESEncryption
+from api.services.storage_service import get_storage_backend
+
+logger = logging.getLogger(__name__)
+
+INDEX_SUFFIX = ".idx.sqlite"
+INDEX_VERSION = "2"
+
+# Index files start with this unless they are encrypted
+SQLITE_HEADER = b"SQLite format 3\x00"
+
+# Read size when encrypting and decrypting index files
+INDEX_CHUNK_SIZE = 1024 * 1024
+
+# Rows inserted per executemany() while building an index
+INDEX_BATCH_SIZE = 10000
+
+# Seconds a filtered listing may scan before returning a continuation cursor
+SCAN_BUDGET_SECONDS = 1.0
+
+AttributeValue = Union[str, bytes]
+Attributes = Dict[str, List[AttributeValue]]
+
+
+def split_dn(dn: str) -> List[str]:
+    """Split a DN into its RDNs, honouring backslash escapes."""
+    rdns: List[str] = []
+    current: List[str] = []
+    escaped = False
+    for char in dn:
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == ",":
+            rdns.append("".join(current).strip())
+            current = []
+            continue
+        current.append(char)
+    rdns.append("".join(current).strip())
+    return [rdn for rdn in rdns if rdn]
+
+
+def _normalize_rdn(rdn: str) -> str:
+    """Lower-case an RDN and drop spaces around '='."""
+    attr, _, value = rdn.partition("=")
+    return f"{attr.strip()}={value.strip()}".lower()
+
+
+def dn_sort_key(dn: str) -> str:
+    """Get the index key for a DN.
+
+    RDNs are normalised and reversed, so every descendant of an entry has
+    the entry's key followed by ',' as a prefix and a subtree is a single
+    key range.
+    """
+    return ",".join(_normalize_rdn(rdn) for rdn in reversed(split_dn(dn)))
+
+
+def parent_sort_key(sort_key: str) -> str:
+    """Get the key of an entry's parent from its own key."""
+    rdns = split_dn(sort_key)
+    return ",".join(rdns[:-1])
+
+
+def iter_ldif_records(stream: Iterable[bytes]) -> Iterator[Tuple[int, bytes]]:
+    """Yield the byte offset and raw text of each entry in LDIF lines."""
+    offset = 0
+    start = 0
+    lines: List[bytes] = []
+    for line in stream:
+        if not line.strip():
+            if lines:
+                yield start, b"".join(lines)
+                lines = []
+        elif not line.startswith(b"#"):
+            if not lines:
+                start = offset
+            lines.append(line)
+        offset += len(line)
+
+    if lines:
+        yield start, b"".join(lines)
+
+
+def parse_ldif_record(raw: bytes) -> Tuple[str, Attributes]:
+    """Parse one LDIF entry into its DN and attributes.
+
+    Base64 values that are not UTF-8 text are returned as bytes.
+    """
+    lines: List[str] = []
+    for line in raw.decode("utf-8").splitlines():
+        if line.startswith(" ") and lines:
+            # Folded continuation line
+            lines[-1] += line[1:]
+        elif line and not line.startswith("#"):
+            lines.append(line)
+
+    dn = ""
+    attrs: Attributes = {}
+    for line in lines:
+        attr, sep, value = line.partition(":")
+        if not sep:
+            continue
+
+        parsed: AttributeValue
+        if value.startswith(":"):
+            decoded = base64.b64decode(value[1:].strip())
+            try:
+                parsed = decoded.decode("utf-8")
+            except UnicodeDecodeError:
+                parsed = decoded
+        else:
+            parsed = value.removeprefix(" ")
+
+        if attr.lower() == "dn":
+            dn = parsed if isinstance(parsed, str) else parsed.decode("latin-1")
+        else:
+            attrs.setdefault(attr, []).append(parsed)
+
+    return dn, attrs
+
+
+def get_values(attrs: Attributes, name: str) -> List[AttributeValue]:
+    """Get an attribute's values regardless of the attribute name's case."""
+    name = name.lower()
+    for attr, values in attrs.items():
+        if attr.lower() == name:
+            return values
+    return []
+
+
+def attributes_to_json(attrs: Attributes) -> Dict[str, List[Any]]:
+    """Convert attributes to JSON, with binary values base64 encoded."""
+    return {
+        attr: [
+            (
+                {"binary": base64.b64encode(value).decode("utf-8")}
+                if isinstance(value, bytes)
+                else value
+            )
+            for value in values
+        ]
+        for attr, values in attrs.items()
+    }
+
+
+# LDAP search filters (RFC 4515), evaluated against indexed entries
+
+FilterNode = Tuple[Any, ...]
+
+
+class _FilterParser:
+    """Recursive-descent parser for LDAP search filter strings."""
+
+    def __init__(self, text: str):
+        self.text = text.strip()
+        self.pos = 0
+
+    def parse(self) -> FilterNode:
+        if not self.text.startswith("("):
+            self.text = f"({self.text})"
+        node = self._filter()
+        if self.pos != len(self.text):
+            raise ValueError("Unexpected characters after filter")
+        return node
+
+    def _expect(self, char: str):
+        if self.pos >= len(self.text) or self.text[self.pos] != char:
+            raise ValueError(f"Expected '{char}' at position {self.pos}")
+        self.pos += 1
+
+    def _filter(self) -> FilterNode:
+        self._expect("(")
+        if self.pos >= len(self.text):
+            raise ValueError("Unterminated filter")
+
+        char = self.text[self.pos]
+        if char in "&|":
+            self.pos += 1
+            children = []
+            while self.pos < len(self.text) and self.text[self.pos] == "(":
+                children.append(self._filter())
+            node: FilterNode = (char, children)
+        elif char == "!":
+            self.pos += 1
+            node = ("!", self._filter())
+        else:
+            node = self._item()
+
+        self._expect(")")
+        return node
+
+    def _item(self) -> FilterNode:
+        end = self.text.find(")", self.pos)
+        if end == -1:
+            raise ValueError("Unterminated filter")
+        start = self.pos
+        item = self.text[start:end]
+        self.pos = end
+
+        attr, sep, value = item.partition("=")
+        op = "="
+        if attr[-1:] in ("~", ">", "<"):
+            op = f"{attr[-1]}="
+            attr = attr[:-1]
+        if not sep or not attr:
+            raise ValueError(f"Invalid filter item: {item}")
+
+        if op == "=" and value == "*":
+            return ("present", attr)
+        if op == "=" and "*" in value:
+            parts = [_unescape(part).lower() for part in value.split("*")]
+            return ("substring", attr, parts)
+        return (op, attr, _unescape(value).lower())
+
+
+def _unescape(value: str) -> str:
+    """Decode \\XX hex escapes in a filter assertion value."""
+    if "\\" not in value:
+        return value
+    raw = re.sub(
+        rb"\\([0-9A-Fa-f]{2})",
+        lambda match: bytes.fromhex(match.group(1).decode("ascii")),
+        value.encode("utf-8"),
+    )
+    return raw.decode("utf-8", errors="replace")
+
+
+def _match_substring(value: str, parts: List[str]) -> bool:
+    """Match a value against initial*any*final substring parts."""
+    if not value.startswith(parts[0]):
+        return False
+    pos = len(parts[0])
+    for part in parts[1:-1]:
+        found = value.find(part, pos)
+        if found == -1:
+            return False
+        pos = found + len(part)
+    return value.endswith(parts[-1]) and len(value) - len(parts[-1]) >= pos
+
+
+def _match(node: FilterNode, attrs: Attributes) -> bool:
+    """Evaluate a parsed filter against an entry."""
+    op = node[0]
+    if op == "&":
+        return all(_match(child, attrs) for child in node[1])
+    if op == "|":
+        return any(_match(child, attrs) for child in node[1])
+    if op == "!":
+        return not _match(node[1], attrs)
+
+    values = [
+        value.lower() for value in get_values(attrs, node[1]) if isinstance(value, str)
+    ]
+    if op == "present":
+        return bool(get_values(attrs, node[1]))
+    if op == "substring":
+        return any(_match_substring(value, node[2]) for value in values)
+    if op in ("=", "~="):
+        return node[2] in values
+    if op == ">=":
+        return any(value >= node[2] for value in values)
+    return any(value <= node[2] for value in values)
+
+
+class SearchFilter:
+    """A compiled LDAP search filter."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.node = _FilterParser(text).parse()
+
+    def matches(self, attrs: Attributes) -> bool:
+        """Whether an entry matches the filter."""
+        return _match(self.node, attrs)
+
+    @property
+    def object_class(self) -> Optional[str]:
+        """An objectClass every match must have, usable as an index lookup."""
+        nodes = self.node[1] if self.node[0] == "&" else [self.node]
+        for node in nodes:
+            if node[0] == "=" and node[1].lower() == "objectclass":
+                return node[2]
+        return None
+
+    @property
+    def matches_everything(self) -> bool:
+        """Whether the filter is the usual (objectClass=*)."""
+        return self.node[0] == "present" and self.node[1].lower() == "objectclass"
+
+
+# Index files
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE entries (
+    id INTEGER PRIMARY KEY,
+    dn TEXT NOT NULL,
+    sort_key TEXT NOT NULL,
+    parent_key TEXT NOT NULL,
+    object_classes TEXT NOT NULL,
+    data BLOB NOT NULL,
+    root INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE object_classes (object_class TEXT NOT NULL, entry_id INTEGER NOT NULL);
+"""
+
+INDEXES = """
+CREATE INDEX ix_entries_sort_key ON entries (sort_key);
+CREATE INDEX ix_entries_parent ON entries (parent_key, sort_key);
+CREATE INDEX ix_object_classes ON object_classes (object_class, entry_id);
+UPDATE entries SET root = 1
+    WHERE parent_key NOT IN (SELECT sort_key FROM entries);
+CREATE INDEX ix_entries_root ON entries (root, sort_key);
+"""
+
+
+def build_backup_index(ldif_path: str, index_path: str, encrypted: bool = False) -> int:
+    """Build the entry index for a plain LDIF backup file.
+
+    The index is a full copy of the backup rather than pointers into it:
+    artifacts are gzip streams, which cannot be read from an offset, so
+    each entry is stored compressed with its DN, parent and objectClasses
+    for browsing without unpacking the backup. For encrypted backups the
+    whole index file is encrypted, so it reveals neither the entries nor
+    the directory structure. Returns the number of indexed entries.
+    """
+    plain_path = f"{index_path}.plain" if encrypted else index_path
+    for path in {index_path, plain_path}:
+        if os.path.exists(path):
+            os.remove(path)
+
+    conn = sqlite3.connect(plain_path)
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.executescript(SCHEMA)
+
+        count = 0
+        entries: List[Tuple[Any, ...]] = []
+        classes: List[Tuple[str, int]] = []
+
+        def flush():
+            conn.executemany("INSERT INTO entries VALUES (?,?,?,?,?,?,0)", entries)
+            conn.executemany("INSERT INTO object_classes VALUES (?,?)", classes)
+            entries.clear()
+            classes.clear()
+
+        with open(ldif_path, "rb") as f:
+            for _, raw in iter_ldif_records(f):
+                dn, attrs = parse_ldif_record(raw)
+                if not dn:
+                    continue
+
+                count += 1
+                sort_key = dn_sort_key(dn)
+                object_classes = [
+                    value
+                    for value in get_values(attrs, "objectClass")
+                    if isinstance(value, str)
+                ]
+                entries.append(
+                    (
+                        count,
+                        dn,
+                        sort_key,
+                        parent_sort_key(sort_key),
+                        " ".join(object_classes),
+                        zlib.compress(raw),
+                    )
+                )
+                classes.extend((oc.lower(), count) for oc in object_classes)
+
+                if len(entries) >= INDEX_BATCH_SIZE:
+                    flush()
+
+        flush()
+        # Entries whose parent is not in the backup are marked as roots
+        conn.executescript(INDEXES)
+        conn.executemany(
+            "INSERT INTO meta VALUES (?, ?)",
+            [("version", INDEX_VERSION), ("entry_count", str(count))],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    if encrypted:
+        try:
+            _transform_file(
+                plain_path,
+                index_path,
+                AESEncryption(settings.ENCRYPTION_KEY).encrypt_stream,
+            )
+        finally:
+            os.remove(plain_path)
+
+    logger.info(f"Indexed {count} entries from {ldif_path}")
+    return count
+
+
+def _transform_file(
+    source: str, target: str, transform: Callable[[Iterable[bytes]], Iterator[bytes]]
+) -> None:
+    """Stream a file through an encryption or decryption function."""
+    with open(source, "rb") as f_in, open(target, "wb") as f_out:
+        for chunk in transform(iter(lambda: f_in.read(INDEX_CHUNK_SIZE), b"")):
+            f_out.write(chunk)
+
+
+def is_encrypted_index(path: str) -> bool:
+    """Whether an index file is encrypted rather than plain SQLite."""
+    with open(path, "rb") as f:
+        return f.read(len(SQLITE_HEADER)) != SQLITE_HEADER
+
+
+class BackupIndex:
+    """Read-only view of a backup's entry index."""
+
+    def __init__(
+        self, path: str, location: Optional[str] = None, data: Optional[bytes] = None
+    ):
+        self.path = path
+        self.location = location or path
+        self._lock = threading.Lock()
+        if data is None:
+            self._conn = sqlite3.connect(
+                f"file:{path}?mode=ro", uri=True, check_same_thread=False
+            )
+        else:
+            self._conn = sqlite3.connect(":memory:", check_same_thread=False)
+            self._conn.deserialize(data)
+        meta = dict(self._conn.execute("SELECT key, value FROM meta").fetchall())
+        self.entry_count = int(meta["entry_count"])
+        # Version 1 indexes encrypted each entry instead of the whole file
+        self.encryption = (
+            AESEncryption(settings.ENCRYPTION_KEY)
+            if meta.get("encrypted") == "1"
+            else None
+        )
+
+    def close(self):
+        """Close the index, removing local copies of remote indexes."""
+        with self._lock:
+            self._conn.close()
+        if self.location != self.path:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+    def _decode(self, data: bytes) -> Attributes:
+        """Decode a stored entry into its attributes."""
+        if self.encryption is not None:
+            data = self.encryption.decrypt(data.decode("ascii"))
+        return parse_ldif_record(zlib.decompress(data))[1]
+
+    def get_entry(self, dn: str) -> Optional[Dict[str, Any]]:
+        """Get an entry's attributes by DN."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT dn, data FROM entries WHERE sort_key = ?", (dn_sort_key(dn),)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"dn": row[0], "attributes": attributes_to_json(self._decode(row[1]))}
+
+    def list_entries(
+        self,
+        base: Optional[str] = None,
+        scope: str = "one",
+        search_filter: Optional[SearchFilter] = None,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+    ) -> Dict[str, Any]:
+        """List entries below a base DN in DN order.
+
+        ``scope`` is "one" for direct children or "sub" for the base entry and
+        its whole subtree. Without a base, the top-level entries are listed.
+        Filters on objectClass use the index; other filters are checked
+        against the stored entries, for at most SCAN_BUDGET_SECONDS per call;
+        ``next_cursor`` continues where the listing stopped.
+        """
+        if search_filter is not None and search_filter.matches_everything:
+            search_filter = None
+
+        conditions: List[str] = []
+        params: List[Any] = []
+        if base is None:
+            if scope == "one":
+                conditions.append("root = 1")
+        else:
+            base_key = dn_sort_key(base)
+            if scope == "one":
+                conditions.append("parent_key = ?")
+                params.append(base_key)
+            else:
+                conditions.append("(sort_key = ? OR (sort_key > ? AND sort_key < ?))")
+                params.extend([base_key, f"{base_key},", f"{base_key}-"])
+
+        object_class = search_filter.object_class if search_filter else None
+        if object_class is not None:
+            conditions.append(
+                "id IN (SELECT entry_id FROM object_classes WHERE object_class = ?)"
+            )
+            params.append(object_class)
+
+        where = " AND ".join(conditions + ["sort_key > ?"])
+        query = (
+            "SELECT sort_key, dn, object_classes, data, EXISTS("
+            "SELECT 1 FROM entries c WHERE c.parent_key = e.sort_key) "
+            f"FROM entries e WHERE {where} ORDER BY sort_key LIMIT ?"
+        )
+        page_size = limit + 1 if search_filter is None else max(limit, 500)
+
+        results: List[Dict[str, Any]] = []
+        after = cursor or ""
+        deadline = time.monotonic() + SCAN_BUDGET_SECONDS
+        exhausted = False
+        while len(results) <= limit and time.monotonic() < deadline:
+            with self._lock:
+                rows = self._conn.execute(query, params + [after, page_size]).fetchall()
+            if not rows:
+                exhausted = True
+                break
+
+            for sort_key, dn, object_classes, data, has_children in rows:
+                after = sort_key
+                if search_filter is not None and not search_filter.matches(
+                    self._decode(data)
+                ):
+                    continue
+                results.append(
+                    {
+                        "dn": dn,
+                        "object_classes": object_classes.split(),
+                        "has_children": bool(has_children),
+                        "cursor": sort_key,
+                    }
+                )
+                if len(results) > limit:
+                    break
+
+            if len(rows) < page_size:
+                exhausted = True
+                break
+
+        next_cursor = None
+        if len(results) > limit:
+            results = results[:limit]
+            next_cursor = results[-1]["cursor"]
+        elif not exhausted:
+            next_cursor = after
+
+        for result in results:
+            del result["cursor"]
+        return {"entries": results, "next_cursor": next_cursor}
+
+    def iter_entries(self) -> Iterator[Tuple[str, str, Attributes]]:
+        """Yield (sort key, DN, attributes) for every entry in key order."""
+        after = ""
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT sort_key, dn, data FROM entries WHERE sort_key > ? "
+                    "ORDER BY sort_key LIMIT ?",
+                    (after, INDEX_BATCH_SIZE),
+                ).fetchall()
+            if not rows:
+                return
+            for sort_key, dn, data in rows:
+                yield sort_key, dn, self._decode(data)
+            after = rows[-1][0]
+
+
+def _index_cache_dir() -> str:
+    """Directory holding downloaded copies of remote indexes."""
+    return os.path.join(settings.BACKUP_DIR, ".index-cache")
+
+
+def clear_index_cache() -> None:
+    """Remove index copies left behind by a process that did not close them."""
+    shutil.rmtree(_index_cache_dir(), ignore_errors=True)
+
+
+def open_backup_index(location: str) -> BackupIndex:
+    """Open an index, downloading it first if it lives in object storage.
+
+    Encrypted indexes are decrypted into memory only, so their plaintext
+    never reaches the disk. Plain remote indexes are downloaded to a fresh
+    file in the index cache, which is removed when the index is closed and
+    never reused by another open.
+    """
+    storage = get_storage_backend(location)
+    if storage.is_local(location) and not is_encrypted_index(location):
+        return BackupIndex(location)
+
+    cache_dir = _index_cache_dir()
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, local_path = tempfile.mkstemp(dir=cache_dir, suffix=INDEX_SUFFIX)
+    os.close(fd)
+    try:
+        fetched = storage.fetch(location, local_path)
+        if not is_encrypted_index(fetched):
+            return BackupIndex(local_path, location)
+
+        decrypt = AESEncryption(settings.ENCRYPTION_KEY).decrypt_stream
+        with open(fetched, "rb") as f:
+            data = b"".join(decrypt(iter(lambda: f.read(INDEX_CHUNK_SIZE), b"")))
+    except BaseException:
+        os.remove(local_path)
+        raise
+    os.remove(local_path)
+    return BackupIndex(location, data=data)
+
+
+class BackupIndexCache:
+    """LRU cache of open backup indexes in the API process.
+
+    Indexes are reference counted, so one evicted while a request is still
+    reading it is closed when that request releases it.
+    """
+
+    def __init__(self, max_size: Optional[int] = None):
+        self.max_size = max_size or settings.BACKUP_INDEX_CACHE_SIZE
+        self._indexes: "OrderedDict[int, BackupIndex]" = OrderedDict()
+        self._users: Dict[int, int] = {}
+        self._retired: List[BackupIndex] = []
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, backup_id: int, location: str) -> BackupIndex:
+        """Get the open index for a backup, opening it if needed.
+
+        Every acquire() must be paired with a release().
+        """
+        async with self._lock:
+            index = self._indexes.get(backup_id)
+            if index is not None and index.location != location:
+                self.evict([backup_id])
+                index = None
+
+            if index is None:
+                index = await asyncio.to_thread(open_backup_index, location)
+                self._indexes[backup_id] = index
+                while len(self._indexes) > self.max_size:
+                    evicted_id = next(iter(self._indexes))
+                    self.evict([evicted_id])
+
+            self._indexes.move_to_end(backup_id)
+            self._users[id(index)] = self._users.get(id(index), 0) + 1
+            return index
+
+    def release(self, index: BackupIndex):
+        """Release an index obtained from acquire()."""
+        users = self._users.get(id(index), 1) - 1
+        if users > 0:
+            self._users[id(index)] = users
+            return
+
+        self._users.pop(id(index), None)
+        if index in self._retired:
+            self._retired.remove(index)
+            index.close()
+
+    def evict(self, backup_ids: Iterable[int]):
+        """Drop indexes from the cache, closing them once unused."""
+        for backup_id in backup_ids:
+            index = self._indexes.pop(backup_id, None)
+            if index is None:
+                continue
+            if self._users.get(id(index)):
+                self._retired.append(index)
+            else:
+                index.close()
+
+
+backup_index_cache = BackupIndexCache()
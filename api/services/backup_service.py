@@ -1,19 +1,31 @@
 import gzip
+import hashlib
 import os
 import shutil
-from datetime import datetime, timedelta
-from typing import Optional
+import time
+import zlib
+from datetime import datetime
+from typing import Iterable, Iterator, Optional, Tuple
 
 from api.core.config import settings
 from api.core.encryption import AESEncryption
+from api.services.metrics_service import StageTimer
+
+# Read size for streaming backup files
+CHUNK_SIZE = 1024 * 1024
 
 
 class BackupService:
-    """Service for managing backup operations."""
+    """Service for managing backup operations.
+
+    ``timer`` collects the time spent reading, compressing, encrypting and
+    writing while packaging.
+    """
 
     def __init__(self):
         self.backup_dir = settings.BACKUP_DIR
         self.encryption = AESEncryption(settings.ENCRYPTION_KEY)
+        self.timer = StageTimer()
 
     def compress_file(self, input_path: str, output_path: Optional[str] = None) -> str:
         """Compress a file using gzip."""
@@ -75,6 +87,94 @@ class BackupService:
 
         return output_path
 
+    def iter_encoded(
+        self, chunks: Iterable[bytes], encrypted: bool, compressed: bool
+    ) -> Iterator[bytes]:
+        """Stream plain LDIF into the stored artifact format.
+
+        Produces the same format as compress_file() followed by
+        encrypt_file(), chunk by chunk.
+        """
+        chunks = self.timer.wrap(chunks, "read")
+        if compressed:
+            chunks = self.timer.wrap(self._iter_gzip(chunks), "compress")
+        if encrypted:
+            chunks = self.timer.wrap(self.encryption.encrypt_stream(chunks), "encrypt")
+        return iter(chunks)
+
+    @staticmethod
+    def _iter_gzip(chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Gzip-compress a stream of chunks."""
+        compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+    def package_file(
+        self, input_path: str, compress: bool, encrypt: bool
+    ) -> Tuple[str, str, str]:
+        """Compress and encrypt a backup file in a single streaming pass.
+
+        Returns the artifact path, the SHA-256 of the artifact and the
+        SHA-256 of the plain LDIF, both computed as the data streams through.
+        """
+        output_path = input_path
+        if compress:
+            output_path = f"{output_path}.gz"
+        if encrypt:
+            output_path = f"{output_path}.enc"
+
+        content_hash = hashlib.sha256()
+
+        def read() -> Iterator[bytes]:
+            with open(input_path, "rb") as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    content_hash.update(chunk)
+                    yield chunk
+
+        if output_path == input_path:
+            for _ in read():
+                pass
+            return input_path, content_hash.hexdigest(), content_hash.hexdigest()
+
+        artifact_hash = hashlib.sha256()
+        with open(output_path, "wb") as f:
+            for chunk in self.iter_encoded(read(), encrypt, compress):
+                started = time.perf_counter()
+                artifact_hash.update(chunk)
+                f.write(chunk)
+                self.timer.add("write", time.perf_counter() - started)
+
+        # Remove original file
+        os.remove(input_path)
+
+        return output_path, artifact_hash.hexdigest(), content_hash.hexdigest()
+
+    def iter_decoded(
+        self, chunks: Iterable[bytes], encrypted: bool, compressed: bool
+    ) -> Iterator[bytes]:
+        """Stream a stored artifact back to plain LDIF.
+
+        Reverses encrypt_file() and compress_file() chunk by chunk instead of
+        writing intermediate files.
+        """
+        if encrypted:
+            chunks = self.encryption.decrypt_stream(chunks)
+        if not compressed:
+            yield from chunks
+            return
+
+        decompressor = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            data = decompressor.decompress(chunk)
+            if data:
+                yield data
+        data = decompressor.flush()
+        if data:
+            yield data
+
     def generate_backup_filename(self, server_name: str, backup_type: str) -> str:
         """Generate a unique backup filename."""
         timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
@@ -84,22 +184,6 @@ class BackupService:
         """Get full path for a backup file."""
         return os.path.join(self.backup_dir, filename)
 
-    def cleanup_old_backups(self, retention_days: int):
-        """Delete backups older than retention period."""
-        if not os.path.exists(self.backup_dir):
-            return
-
-        cutoff_date = datetime.utcnow() - timedelta(days=retention_days)
-
-        for filename in os.listdir(self.backup_dir):
-            file_path = os.path.join(self.backup_dir, filename)
-
-            if os.path.isfile(file_path):
-                file_mtime = datetime.fromtimestamp(os.path.getmtime(file_path))
-
-                if file_mtime < cutoff_date:
-                    os.remove(file_path)
-
     def get_file_size(self, file_path: str) -> int:
         """Get file size in bytes."""
         return os.path.getsize(file_path)
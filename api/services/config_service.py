@@ -0,0 +1,337 @@
+import enum
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from croniter import croniter
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from api.core.config import settings
+from api.models.models import (
+    BackupType,
+    LDAPServer,
+    ScheduledBackup,
+    User,
+    UserRole,
+)
+
+logger = logging.getLogger(__name__)
+
+# Record kinds accepted by the importer, in dependency order
+SERVER = "server"
+SCHEDULED_BACKUP = "scheduled_backup"
+USER = "user"
+RECORD_KINDS = (SERVER, SCHEDULED_BACKUP, USER)
+
+# Exported columns per record kind (bind passwords and hashes are never exported)
+EXPORT_COLUMNS: Dict[str, Tuple[Any, ...]] = {
+    SERVER: (
+        LDAPServer.name,
+        LDAPServer.host,
+        LDAPServer.port,
+        LDAPServer.use_ssl,
+        LDAPServer.base_dn,
+        LDAPServer.bind_dn,
+    ),
+    SCHEDULED_BACKUP: (
+        ScheduledBackup.name,
+        ScheduledBackup.ldap_server_id,
+        ScheduledBackup.backup_type,
+        ScheduledBackup.cron_expression,
+        ScheduledBackup.retention_days,
+        ScheduledBackup.is_active,
+    ),
+    USER: (
+        User.username,
+        User.email,
+        User.full_name,
+        User.role,
+        User.is_active,
+    ),
+}
+
+
+class ConfigImportService:
+    """Set-based configuration importer.
+
+    Existing names are prefetched with one query per table, rows are
+    buffered and written with multi-row ``INSERT ... ON CONFLICT DO NOTHING``
+    statements, so the number of round-trips depends on the batch count
+    rather than the number of rows. Batches are only flushed as they fill;
+    the whole import is committed once by commit(), so a failure part way
+    through leaves nothing applied.
+    """
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        default_password_hash: Optional[str] = None,
+        batch_size: Optional[int] = None,
+    ):
+        self.db = db
+        self.default_password_hash = default_password_hash
+        self.batch_size = batch_size or settings.CONFIG_IMPORT_BATCH_SIZE
+        self.server_names: Set[str] = set()
+        self.server_ids: Set[int] = set()
+        self.schedule_names: Set[str] = set()
+        self.usernames: Set[str] = set()
+        self.emails: Set[str] = set()
+        self.pending: Dict[str, List[Dict[str, Any]]] = {
+            kind: [] for kind in RECORD_KINDS
+        }
+        self.counts = {SERVER: 0, SCHEDULED_BACKUP: 0, USER: 0}
+        self.results: List[Dict[str, Any]] = []
+        self.errors: List[str] = []
+
+    async def prefetch(self):
+        """Load existing natural keys, one query per table."""
+        result = await self.db.execute(select(LDAPServer.id, LDAPServer.name))
+        for server_id, name in result.all():
+            self.server_ids.add(server_id)
+            self.server_names.add(name)
+
+        result = await self.db.execute(select(ScheduledBackup.name))
+        self.schedule_names.update(result.scalars().all())
+
+        result = await self.db.execute(select(User.username, User.email))
+        for username, email in result.all():
+            self.usernames.add(username)
+            self.emails.add(email)
+
+    async def add(self, kind: str, data: Dict[str, Any]):
+        """Validate and buffer one record, flushing when the batch is full."""
+        if kind not in RECORD_KINDS:
+            self._record(kind, None, "error", f"Unknown record type '{kind}'")
+            return
+        if not isinstance(data, dict):
+            self._record(kind, None, "error", "Record must be an object")
+            return
+
+        try:
+            row = getattr(self, f"_prepare_{kind}")(data)
+        except (KeyError, TypeError, ValueError) as e:
+            key = data.get("username" if kind == USER else "name")
+            self._record(kind, key, "error", str(e))
+            return
+
+        if row is None:
+            return
+
+        self.pending[kind].append(row)
+        if len(self.pending[kind]) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self):
+        """Write all buffered rows, servers first so schedules can use them."""
+        await self._flush_servers()
+        await self._flush_schedules()
+        await self._flush_users()
+
+    async def commit(self):
+        """Write the remaining rows and commit the import as a whole."""
+        try:
+            await self.flush()
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+
+    def report(self) -> Dict[str, Any]:
+        """Return import counts and the per-row result report."""
+        return {
+            "servers": self.counts[SERVER],
+            "scheduled_backups": self.counts[SCHEDULED_BACKUP],
+            "users": self.counts[USER],
+            "errors": self.errors,
+            "results": self.results,
+        }
+
+    def _record(
+        self, kind: str, key: Optional[str], status: str, detail: Optional[str] = None
+    ):
+        """Append one row to the result report."""
+        entry: Dict[str, Any] = {"type": kind, "key": key, "status": status}
+        if detail:
+            entry["detail"] = detail
+        if status == "error":
+            label = kind.replace("_", " ").capitalize()
+            self.errors.append(f"{label} import error ({key}): {detail}")
+        self.results.append(entry)
+
+    def _prepare_server(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Build an insert row for an LDAP server."""
+        name = data["name"]
+        if not data.get("host") or not data.get("base_dn"):
+            raise ValueError("host and base_dn are required")
+
+        row = {
+            "name": name,
+            "host": data["host"],
+            "port": int(data.get("port", 389)),
+            "use_ssl": bool(data.get("use_ssl", False)),
+            "base_dn": data["base_dn"],
+            "bind_dn": data.get("bind_dn"),
+            "description": data.get("description"),
+        }
+
+        if name in self.server_names:
+            self._record(SERVER, name, "skipped", "already exists")
+            return None
+        self.server_names.add(name)
+
+        return row
+
+    def _prepare_scheduled_backup(
+        self, data: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """Build an insert row for a scheduled backup."""
+        name = data["name"]
+        server_id = data.get("ldap_server_id")
+        cron_expression = data.get("cron_expression")
+
+        if not cron_expression or not croniter.is_valid(cron_expression):
+            raise ValueError("invalid cron expression")
+
+        row = {
+            "name": name,
+            "ldap_server_id": int(server_id) if server_id is not None else None,
+            "backup_type": BackupType(data.get("backup_type", "full")),
+            "cron_expression": cron_expression,
+            "retention_days": int(data.get("retention_days", 30)),
+            "is_active": bool(data.get("is_active", True)),
+        }
+
+        if name in self.schedule_names:
+            self._record(SCHEDULED_BACKUP, name, "skipped", "already exists")
+            return None
+
+        # The server check is deferred until servers in this batch are written
+        return row
+
+    def _prepare_user(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Build an insert row for a user."""
+        username = data["username"]
+        email = data.get("email")
+        if not email:
+            raise ValueError("email is required")
+        if not self.default_password_hash:
+            raise ValueError("no default password available")
+
+        row = {
+            "username": username,
+            "email": email,
+            "full_name": data.get("full_name"),
+            "role": UserRole(data.get("role", "viewer")),
+            "is_active": bool(data.get("is_active", True)),
+            "hashed_password": self.default_password_hash,
+        }
+
+        if username in self.usernames:
+            self._record(USER, username, "skipped", "already exists")
+            return None
+        if email in self.emails:
+            self._record(USER, username, "skipped", "email already in use")
+            return None
+        self.usernames.add(username)
+        self.emails.add(email)
+
+        return row
+
+    def _insert(self, model):
+        """Get an INSERT ... ON CONFLICT DO NOTHING for the session dialect."""
+        if self.db.bind.dialect.name == "sqlite":
+            return sqlite_insert(model).on_conflict_do_nothing()
+        return pg_insert(model).on_conflict_do_nothing()
+
+    async def _flush_servers(self):
+        """Insert buffered servers in one statement."""
+        rows, self.pending[SERVER] = self.pending[SERVER], []
+        if not rows:
+            return
+
+        result = await self.db.execute(
+            self._insert(LDAPServer)
+            .values(rows)
+            .returning(LDAPServer.id, LDAPServer.name)
+        )
+        inserted = {name: server_id for server_id, name in result.all()}
+        self.server_ids.update(inserted.values())
+
+        for row in rows:
+            if row["name"] in inserted:
+                self.counts[SERVER] += 1
+                self._record(SERVER, row["name"], "created")
+            else:
+                self._record(SERVER, row["name"], "skipped", "already exists")
+
+    async def _flush_schedules(self):
+        """Insert buffered scheduled backups whose server exists."""
+        rows, self.pending[SCHEDULED_BACKUP] = self.pending[SCHEDULED_BACKUP], []
+        valid = []
+        for row in rows:
+            if row["ldap_server_id"] not in self.server_ids:
+                self._record(
+                    SCHEDULED_BACKUP, row["name"], "skipped", "LDAP server not found"
+                )
+            elif row["name"] in self.schedule_names:
+                self._record(SCHEDULED_BACKUP, row["name"], "skipped", "duplicate")
+            else:
+                self.schedule_names.add(row["name"])
+                valid.append(row)
+
+        if not valid:
+            return
+
+        await self.db.execute(self._insert(ScheduledBackup).values(valid))
+        for row in valid:
+            self.counts[SCHEDULED_BACKUP] += 1
+            self._record(SCHEDULED_BACKUP, row["name"], "created")
+
+    async def _flush_users(self):
+        """Insert buffered users in one statement."""
+        rows, self.pending[USER] = self.pending[USER], []
+        if not rows:
+            return
+
+        result = await self.db.execute(
+            self._insert(User).values(rows).returning(User.username)
+        )
+        inserted = set(result.scalars().all())
+
+        for row in rows:
+            if row["username"] in inserted:
+                self.counts[USER] += 1
+                self._record(USER, row["username"], "created")
+            else:
+                self._record(USER, row["username"], "skipped", "already exists")
+
+
+async def stream_configuration_export(
+    session_factory: async_sessionmaker, batch_size: Optional[int] = None
+) -> AsyncIterator[bytes]:
+    """Yield the configuration as NDJSON records.
+
+    Each table is read through a server-side cursor in batches of
+    ``batch_size`` rows, so memory use stays flat regardless of fleet size.
+    Records use the same ``{"type": ..., "data": {...}}`` format accepted by
+    the streaming importer.
+    """
+    batch_size = batch_size or settings.CONFIG_EXPORT_BATCH_SIZE
+
+    async with session_factory() as session:
+        for kind, columns in EXPORT_COLUMNS.items():
+            result = await session.stream(
+                select(*columns).execution_options(yield_per=batch_size)
+            )
+            async for partition in result.mappings().partitions():
+                lines = []
+                for row in partition:
+                    data = {
+                        key: value.value if isinstance(value, enum.Enum) else value
+                        for key, value in row.items()
+                    }
+                    lines.append(json.dumps({"type": kind, "data": data}))
+                yield ("\n".join(lines) + "\n").encode("utf-8")
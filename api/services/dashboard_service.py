@@ -0,0 +1,163 @@
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.core.config import settings
+from api.models.models import (
+    Backup,
+    BackupStatus,
+    LDAPServer,
+    RestoreJob,
+    VerificationStatus,
+)
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_KEY = "dashboard:summary"
+
+ACTIVE_STATUSES = (BackupStatus.PENDING, BackupStatus.IN_PROGRESS)
+
+
+class DashboardService:
+    """Dashboard statistics computed with grouped aggregate queries.
+
+    The whole summary costs five queries regardless of how many servers
+    and backups there are, and is cached briefly in Redis so concurrent
+    dashboards share one computation.
+    """
+
+    def __init__(self, db: AsyncSession, redis_client=None):
+        self.db = db
+        self.redis_client = redis_client
+
+    async def compute(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Compute the summary from the database."""
+        now = now or datetime.now(timezone.utc)
+        since = now - timedelta(days=settings.DASHBOARD_FAILURE_WINDOW_DAYS)
+
+        servers = (
+            await self.db.execute(
+                select(
+                    func.count(LDAPServer.id),
+                    func.sum(case((LDAPServer.is_active.is_(True), 1), else_=0)),
+                )
+            )
+        ).one()
+
+        backups_by_status: Dict[str, int] = {s.value: 0 for s in BackupStatus}
+        backups_by_type: Dict[str, int] = {}
+        bytes_stored = 0
+        recent = {BackupStatus.COMPLETED: 0, BackupStatus.FAILED: 0}
+        for status, backup_type, count, size, in_window in await self.db.execute(
+            select(
+                Backup.status,
+                Backup.backup_type,
+                func.count(Backup.id),
+                func.sum(Backup.file_size),
+                func.sum(case((Backup.created_at >= since, 1), else_=0)),
+            ).group_by(Backup.status, Backup.backup_type)
+        ):
+            backups_by_status[status.value] += count
+            backups_by_type[backup_type.value] = (
+                backups_by_type.get(backup_type.value, 0) + count
+            )
+            if status == BackupStatus.COMPLETED:
+                bytes_stored += size or 0
+            if status in recent:
+                recent[status] += in_window or 0
+
+        corrupt = await self.db.scalar(
+            select(func.count(Backup.id)).where(
+                Backup.verification_status == VerificationStatus.CORRUPT
+            )
+        )
+
+        restores_by_status: Dict[str, int] = {s.value: 0 for s in BackupStatus}
+        for status, count in await self.db.execute(
+            select(RestoreJob.status, func.count(RestoreJob.id)).group_by(
+                RestoreJob.status
+            )
+        ):
+            restores_by_status[status.value] = count
+
+        last_success = (
+            select(
+                Backup.ldap_server_id.label("server_id"),
+                func.max(Backup.completed_at).label("completed_at"),
+            )
+            .where(Backup.status == BackupStatus.COMPLETED)
+            .group_by(Backup.ldap_server_id)
+            .subquery()
+        )
+        last_backups = [
+            {"server_id": server_id, "name": name, "last_success_at": completed_at}
+            for server_id, name, completed_at in await self.db.execute(
+                select(LDAPServer.id, LDAPServer.name, last_success.c.completed_at)
+                .outerjoin(last_success, last_success.c.server_id == LDAPServer.id)
+                .order_by(LDAPServer.name)
+            )
+        ]
+
+        finished = recent[BackupStatus.COMPLETED] + recent[BackupStatus.FAILED]
+        return {
+            "generated_at": now,
+            "servers": {"total": servers[0], "active": servers[1] or 0},
+            "backups": {
+                "total": sum(backups_by_status.values()),
+                "by_status": backups_by_status,
+                "by_type": backups_by_type,
+                "bytes_stored": bytes_stored,
+                "corrupt": corrupt or 0,
+            },
+            "restores": {
+                "total": sum(restores_by_status.values()),
+                "by_status": restores_by_status,
+            },
+            "active_jobs": sum(
+                backups_by_status[s.value] + restores_by_status[s.value]
+                for s in ACTIVE_STATUSES
+            ),
+            "last_backup_at": max(
+                (b["last_success_at"] for b in last_backups if b["last_success_at"]),
+                default=None,
+            ),
+            "failure_rate": {
+                "window_days": settings.DASHBOARD_FAILURE_WINDOW_DAYS,
+                "completed": recent[BackupStatus.COMPLETED],
+                "failed": recent[BackupStatus.FAILED],
+                "rate": (
+                    round(recent[BackupStatus.FAILED] / finished, 4)
+                    if finished
+                    else 0.0
+                ),
+            },
+            "last_backups": last_backups,
+        }
+
+    async def get_summary(self) -> Dict[str, Any]:
+        """Get the summary, from the short-lived cache when possible."""
+        if self.redis_client is not None:
+            try:
+                cached = await self.redis_client.get(SUMMARY_KEY)
+                if cached:
+                    return json.loads(cached)
+            except Exception as e:
+                logger.warning(f"Dashboard cache read failed: {e}")
+
+        summary = await self.compute()
+
+        if self.redis_client is not None:
+            try:
+                await self.redis_client.set(
+                    SUMMARY_KEY,
+                    json.dumps(jsonable_encoder(summary)),
+                    ex=settings.DASHBOARD_CACHE_SECONDS,
+                )
+            except Exception as e:
+                logger.warning(f"Dashboard cache write failed: {e}")
+        return summary
@@ -0,0 +1,259 @@
+import base64
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from api.core.config import settings
+from api.services.backup_index import (
+    INDEX_SUFFIX,
+    Attributes,
+    AttributeValue,
+    BackupIndex,
+    attributes_to_json,
+    build_backup_index,
+)
+
+if TYPE_CHECKING:
+    from api.services.ldap_service import LDAPService
+
+logger = logging.getLogger(__name__)
+
+ADD = "add"
+DELETE = "delete"
+MODIFY = "modify"
+
+IndexedEntry = Tuple[str, str, Attributes]
+
+
+@dataclass
+class AttributeDelta:
+    """Values added to and removed from one attribute."""
+
+    added: List[AttributeValue] = field(default_factory=list)
+    removed: List[AttributeValue] = field(default_factory=list)
+
+
+@dataclass
+class EntryChange:
+    """One entry that differs between two directory snapshots."""
+
+    change: str
+    dn: str
+    sort_key: str
+    attributes: Attributes = field(default_factory=dict)
+    deltas: Dict[str, AttributeDelta] = field(default_factory=dict)
+
+    def to_json(self) -> Dict[str, Any]:
+        """Convert to a JSON-serializable dict."""
+        data: Dict[str, Any] = {"type": self.change, "dn": self.dn}
+        if self.change == ADD:
+            data["attributes"] = attributes_to_json(self.attributes)
+        elif self.change == MODIFY:
+            data["attributes"] = {
+                attr: {
+                    "added": attributes_to_json({attr: delta.added})[attr],
+                    "removed": attributes_to_json({attr: delta.removed})[attr],
+                }
+                for attr, delta in self.deltas.items()
+            }
+        return data
+
+
+def attribute_deltas(old: Attributes, new: Attributes) -> Dict[str, AttributeDelta]:
+    """Compare two entries attribute by attribute.
+
+    Attribute names are compared case-insensitively and values exactly.
+    Values are matched through sets, so large groups diff in linear time,
+    and are reported in the order they appear in each entry.
+    """
+    old_by_name = {attr.lower(): (attr, values) for attr, values in old.items()}
+    new_by_name = {attr.lower(): (attr, values) for attr, values in new.items()}
+
+    deltas: Dict[str, AttributeDelta] = {}
+    for name in list(old_by_name) + [n for n in new_by_name if n not in old_by_name]:
+        old_attr, old_values = old_by_name.get(name, (None, []))
+        new_attr, new_values = new_by_name.get(name, (None, []))
+        old_set, new_set = set(old_values), set(new_values)
+        delta = AttributeDelta(
+            added=[v for v in new_values if v not in old_set],
+            removed=[v for v in old_values if v not in new_set],
+        )
+        if delta.added or delta.removed:
+            deltas[new_attr or old_attr or name] = delta
+    return deltas
+
+
+def diff_entries(
+    old: Iterable[IndexedEntry], new: Iterable[IndexedEntry]
+) -> Iterator[EntryChange]:
+    """Merge-join two entry streams sorted by index key.
+
+    Yields the changes that turn ``old`` into ``new``. Only the current
+    entry of each side is held in memory.
+    """
+    old_iter = iter(old)
+    new_iter = iter(new)
+    old_entry = next(old_iter, None)
+    new_entry = next(new_iter, None)
+
+    while old_entry is not None or new_entry is not None:
+        if old_entry is not None and (new_entry is None or old_entry[0] < new_entry[0]):
+            yield EntryChange(DELETE, old_entry[1], old_entry[0])
+            old_entry = next(old_iter, None)
+        elif new_entry is not None and (
+            old_entry is None or new_entry[0] < old_entry[0]
+        ):
+            yield EntryChange(ADD, new_entry[1], new_entry[0], new_entry[2])
+            new_entry = next(new_iter, None)
+        elif old_entry is not None and new_entry is not None:
+            deltas = attribute_deltas(old_entry[2], new_entry[2])
+            if deltas:
+                yield EntryChange(
+                    MODIFY, new_entry[1], new_entry[0], new_entry[2], deltas
+                )
+            old_entry = next(old_iter, None)
+            new_entry = next(new_iter, None)
+
+
+def _ldif_line(attr: str, value: AttributeValue) -> str:
+    """Format one attribute value, base64 encoding it when LDIF requires."""
+    if isinstance(value, str):
+        if (
+            value.isascii()
+            and value.isprintable()
+            and not value.startswith((" ", ":", "<"))
+            and not value.endswith(" ")
+        ):
+            return f"{attr}: {value}\n"
+        value = value.encode("utf-8")
+    return f"{attr}:: {base64.b64encode(value).decode('ascii')}\n"
+
+
+def format_ldif_change(change: EntryChange) -> str:
+    """Format a change as an LDIF change record."""
+    lines = [_ldif_line("dn", change.dn), f"changetype: {change.change}\n"]
+    if change.change == ADD:
+        for attr, values in change.attributes.items():
+            lines.extend(_ldif_line(attr, value) for value in values)
+    elif change.change == MODIFY:
+        for attr, delta in change.deltas.items():
+            for op, values in (("add", delta.added), ("delete", delta.removed)):
+                if values:
+                    lines.append(f"{op}: {attr}\n")
+                    lines.extend(_ldif_line(attr, value) for value in values)
+                    lines.append("-\n")
+    lines.append("\n")
+    return "".join(lines)
+
+
+def iter_ldif_changes(changes: Iterable[EntryChange]) -> Iterator[str]:
+    """Stream changes as an LDIF file that can be applied with ldapmodify.
+
+    Adds and modifies are emitted in key order, so parents come before
+    children. Deletes have to go children first, so their DNs are spooled
+    to a temporary database and emitted last in reverse key order.
+    """
+    yield "version: 1\n\n"
+
+    spool_dir = settings.BACKUP_DIR if os.path.isdir(settings.BACKUP_DIR) else None
+    with tempfile.NamedTemporaryFile(suffix=".sqlite", dir=spool_dir) as spool:
+        conn = sqlite3.connect(spool.name)
+        try:
+            conn.execute("CREATE TABLE deletes (sort_key TEXT, dn TEXT)")
+            for change in changes:
+                if change.change == DELETE:
+                    conn.execute(
+                        "INSERT INTO deletes VALUES (?, ?)",
+                        (change.sort_key, change.dn),
+                    )
+                else:
+                    yield format_ldif_change(change)
+
+            for sort_key, dn in conn.execute(
+                "SELECT sort_key, dn FROM deletes ORDER BY sort_key DESC"
+            ):
+                yield format_ldif_change(EntryChange(DELETE, dn, sort_key))
+        finally:
+            conn.close()
+
+
+def iter_json_changes(changes: Iterable[EntryChange]) -> Iterator[str]:
+    """Stream changes as NDJSON, ending with a summary line."""
+    counts = {ADD: 0, DELETE: 0, MODIFY: 0}
+    for change in changes:
+        counts[change.change] += 1
+        yield json.dumps(change.to_json()) + "\n"
+    yield json.dumps(
+        {
+            "type": "summary",
+            "added": counts[ADD],
+            "removed": counts[DELETE],
+            "modified": counts[MODIFY],
+        }
+    ) + "\n"
+
+
+class SnapshotCancelledError(Exception):
+    """Nobody is waiting for a live snapshot any more."""
+
+
+class LiveSnapshot:
+    """A temporary, indexed snapshot of a live directory.
+
+    The directory is streamed with a paged search into a scratch LDIF and
+    indexed on disk, which sorts it by key without holding it in memory.
+    Setting ``cancelled`` stops the export at its next progress report.
+    """
+
+    def __init__(
+        self,
+        ldap_service: "LDAPService",
+        scratch_dir: Optional[str] = None,
+        cancelled: Optional[threading.Event] = None,
+    ):
+        self.ldap_service = ldap_service
+        self.scratch_dir = scratch_dir or settings.BACKUP_DIR
+        self.cancelled = cancelled
+        self.index: Optional[BackupIndex] = None
+        self._paths: List[str] = []
+
+    def __enter__(self) -> BackupIndex:
+        os.makedirs(self.scratch_dir, exist_ok=True)
+        fd, ldif_path = tempfile.mkstemp(suffix=".ldif", dir=self.scratch_dir)
+        os.close(fd)
+        index_path = f"{ldif_path}{INDEX_SUFFIX}"
+        self._paths = [ldif_path, index_path]
+
+        try:
+            with self.ldap_service:
+                self.ldap_service.backup_to_ldif(
+                    ldif_path, progress=self._check_cancelled
+                )
+            self._check_cancelled()
+            build_backup_index(ldif_path, index_path)
+            self.index = BackupIndex(index_path)
+        except Exception:
+            self._cleanup()
+            raise
+        return self.index
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.index is not None:
+            self.index.close()
+        self._cleanup()
+
+    def _check_cancelled(self, *_):
+        if self.cancelled is not None and self.cancelled.is_set():
+            raise SnapshotCancelledError("Live snapshot cancelled")
+
+    def _cleanup(self):
+        for path in self._paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import os
+from typing import Iterable, List, Optional
+
+from api.core.config import settings
+from api.services.storage_service import S3_SCHEME, get_storage_backend
+from api.services.worker_registry import WORKER_ID
+
+logger = logging.getLogger(__name__)
+
+# Redis list of backup file paths waiting to be unlinked
+REAP_QUEUE = "backup_file_reap_queue"
+
+# Paths claimed by a worker but not yet deleted, so a crash cannot lose them;
+# each worker has its own list, "<REAP_PROCESSING>:<worker id>"
+REAP_PROCESSING = "backup_file_reap_processing"
+
+# Outcomes of deleting one path
+REMOVED = "removed"
+SKIPPED = "skipped"
+FAILED = "failed"
+
+
+class FileReaperService:
+    """Service for removing backup files off the request path.
+
+    Paths are queued in Redis so cleanup survives restarts, and the worker
+    unlinks them with bounded concurrency. A batch is moved to the worker's
+    own processing list while it is deleted and only dropped from it
+    afterwards; failed deletions go back on the queue. Claiming and
+    releasing a batch take one round trip each. Only files inside
+    BACKUP_DIR, or objects in the storage bucket, are ever removed.
+    """
+
+    def __init__(
+        self,
+        redis_client=None,
+        concurrency: Optional[int] = None,
+        worker_id: str = WORKER_ID,
+    ):
+        self.redis_client = redis_client
+        self.concurrency = concurrency or settings.FILE_REAPER_CONCURRENCY
+        self.backup_dir = os.path.realpath(settings.BACKUP_DIR)
+        self.processing = f"{REAP_PROCESSING}:{worker_id}"
+
+    async def enqueue(self, paths: Iterable[Optional[str]]) -> int:
+        """Queue file paths for deletion. Returns the number queued."""
+        queued = [path for path in paths if path]
+        if not queued:
+            return 0
+
+        if self.redis_client is None:
+            raise RuntimeError("Redis client required to queue file deletions")
+
+        await self.redis_client.rpush(REAP_QUEUE, *queued)
+        logger.info(f"Queued {len(queued)} backup files for deletion")
+        return len(queued)
+
+    async def reap(self, paths: Iterable[Optional[str]]) -> int:
+        """Unlink files concurrently. Returns the number removed."""
+        outcomes = await self._remove_all([path for path in paths if path])
+        return outcomes.count(REMOVED)
+
+    async def _remove_all(self, paths: List[str]) -> List[str]:
+        """Remove files concurrently, returning the outcome for each path."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def remove(path: str) -> str:
+            async with semaphore:
+                return await asyncio.to_thread(self._remove_file, path)
+
+        return list(await asyncio.gather(*(remove(path) for path in paths)))
+
+    async def process_queue(self, batch_size: Optional[int] = None) -> int:
+        """Claim one batch of queued paths and unlink them."""
+        if self.redis_client is None:
+            return 0
+
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            for _ in range(batch_size or settings.FILE_REAPER_BATCH_SIZE):
+                pipe.lmove(REAP_QUEUE, self.processing, "LEFT", "RIGHT")
+            claimed = await pipe.execute()
+        paths: List[str] = [path for path in claimed if path is not None]
+        if not paths:
+            return 0
+
+        outcomes = await self._remove_all(paths)
+        failed = [path for path, outcome in zip(paths, outcomes) if outcome == FAILED]
+        # Requeue failures and release the batch together
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            if failed:
+                pipe.rpush(REAP_QUEUE, *failed)
+            for path in paths:
+                pipe.lrem(self.processing, 1, path)
+            await pipe.execute()
+
+        removed = outcomes.count(REMOVED)
+        logger.info(f"Reaped {removed} of {len(paths)} queued backup files")
+        if failed:
+            logger.warning(f"Requeued {len(failed)} backup files that failed to delete")
+        return removed
+
+    async def requeue_in_flight(self, worker_id: str) -> int:
+        """Queue again the paths a stopped worker had claimed but not deleted."""
+        if self.redis_client is None:
+            return 0
+
+        processing = f"{REAP_PROCESSING}:{worker_id}"
+        count = 0
+        while await self.redis_client.lmove(processing, REAP_QUEUE, "RIGHT", "LEFT"):
+            count += 1
+        if count:
+            logger.info(
+                f"Requeued {count} backup files left by stopped worker {worker_id}"
+            )
+        return count
+
+    def _remove_file(self, path: str) -> str:
+        """Remove one file if it lives inside the backup directory."""
+        if path.startswith(S3_SCHEME):
+            if not path.startswith(f"{S3_SCHEME}{settings.S3_BUCKET}/"):
+                logger.warning(f"Refusing to delete object outside bucket: {path}")
+                return SKIPPED
+            try:
+                return REMOVED if get_storage_backend(path).delete(path) else SKIPPED
+            except Exception as e:
+                logger.error(f"Failed to delete backup object {path}: {str(e)}")
+                return FAILED
+
+        real_path = os.path.realpath(path)
+        if os.path.commonpath([real_path, self.backup_dir]) != self.backup_dir:
+            logger.warning(f"Refusing to delete file outside backup dir: {path}")
+            return SKIPPED
+
+        try:
+            os.unlink(real_path)
+            return REMOVED
+        except FileNotFoundError:
+            return SKIPPED
+        except OSError as e:
+            logger.error(f"Failed to delete backup file {path}: {str(e)}")
+            return FAILED
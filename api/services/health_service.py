@@ -0,0 +1,144 @@
+import asyncio
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.core.config import settings
+from api.models.models import LDAPServer
+from api.services.metrics_service import MetricsService
+
+logger = logging.getLogger(__name__)
+
+# Redis hash of server id -> JSON result of its last probe
+HEALTH_KEY = "ldap_server_health"
+HEALTH_UPDATED_KEY = "ldap_server_health:updated_at"
+
+Probe = Callable[[LDAPServer], Dict[str, Any]]
+
+
+class FleetHealthService:
+    """Concurrent health probing of every active LDAP server.
+
+    Probes run on a thread pool with bounded fan-out and a per-probe
+    timeout. Each round replaces the results in Redis, where the API serves
+    them without probing anything on the request path.
+    """
+
+    def __init__(
+        self,
+        redis_client=None,
+        probe: Optional[Probe] = None,
+        concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ):
+        self.redis_client = redis_client
+        self.probe = probe
+        self.concurrency = concurrency or settings.LDAP_HEALTH_CONCURRENCY
+        self.timeout = (
+            settings.LDAP_HEALTH_TIMEOUT_SECONDS if timeout is None else timeout
+        )
+
+    async def probe_all(self, servers: Sequence[LDAPServer]) -> List[Dict[str, Any]]:
+        """Probe servers concurrently and return one result per server."""
+        if self.probe is None:
+            raise RuntimeError("A probe function is required to check servers")
+        probe = self.probe
+
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="ldap-health"
+        )
+
+        async def check(server: LDAPServer) -> Dict[str, Any]:
+            started = time.monotonic()
+            try:
+                # Connect, bind and reads are each bounded by the timeout;
+                # this only guards against a probe that ignores it
+                result = await asyncio.wait_for(
+                    loop.run_in_executor(executor, probe, server),
+                    3 * self.timeout + 1,
+                )
+            except asyncio.TimeoutError:
+                result = {"reachable": False, "bind_ok": False, "error": "Timed out"}
+            except Exception as e:
+                result = {"reachable": False, "bind_ok": False, "error": str(e)}
+
+            result.update(
+                server_id=server.id,
+                name=server.name,
+                host=server.host,
+                port=server.port,
+                duration_ms=round((time.monotonic() - started) * 1000, 1),
+                checked_at=datetime.now(timezone.utc).isoformat(),
+            )
+            return result
+
+        try:
+            return list(await asyncio.gather(*(check(server) for server in servers)))
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def record(self, results: List[Dict[str, Any]]):
+        """Replace the stored results and update metrics."""
+        MetricsService.record_ldap_health(results)
+        if self.redis_client is None:
+            return
+
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.delete(HEALTH_KEY)
+            if results:
+                pipe.hset(
+                    HEALTH_KEY,
+                    mapping={str(r["server_id"]): json.dumps(r) for r in results},
+                )
+            pipe.set(HEALTH_UPDATED_KEY, datetime.now(timezone.utc).isoformat())
+            await pipe.execute()
+
+    async def run(self, db: AsyncSession) -> Dict[str, int]:
+        """Probe all active servers once and record the results."""
+        result = await db.execute(
+            select(LDAPServer).where(LDAPServer.is_active.is_(True))
+        )
+        servers = result.scalars().all()
+
+        results = await self.probe_all(servers)
+        await self.record(results)
+
+        return {
+            "total": len(results),
+            "up": sum(1 for r in results if r.get("bind_ok")),
+            "bind_failed": sum(
+                1 for r in results if r.get("reachable") and not r.get("bind_ok")
+            ),
+            "unreachable": sum(1 for r in results if not r.get("reachable")),
+        }
+
+    @staticmethod
+    async def get_cached(redis_client) -> Dict[str, Any]:
+        """Get the last recorded probe results."""
+        raw, updated_at = await asyncio.gather(
+            redis_client.hgetall(HEALTH_KEY), redis_client.get(HEALTH_UPDATED_KEY)
+        )
+        servers = sorted(
+            (json.loads(value) for value in raw.values()), key=lambda r: r["name"]
+        )
+
+        stale = True
+        if updated_at:
+            age = datetime.now(timezone.utc) - datetime.fromisoformat(updated_at)
+            stale = age.total_seconds() > 3 * settings.LDAP_HEALTH_INTERVAL_SECONDS
+
+        return {
+            "updated_at": updated_at,
+            "stale": stale,
+            "total": len(servers),
+            "up": sum(1 for s in servers if s.get("bind_ok")),
+            "down": sum(1 for s in servers if not s.get("bind_ok")),
+            "servers": servers,
+        }
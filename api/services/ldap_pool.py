@@ -0,0 +1,311 @@
+import hashlib
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from api.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PoolKey = Tuple[str, int, bool, str, str]
+
+
+class PoolTimeoutError(Exception):
+    """No pooled connection became available in time."""
+
+
+class PoolClosedError(RuntimeError):
+    """The pool was closed, by shutdown or idle eviction."""
+
+
+def pool_key(
+    host: str,
+    port: int,
+    use_ssl: bool,
+    bind_dn: Optional[str],
+    bind_password: Optional[str],
+) -> PoolKey:
+    """Build the key connections are pooled under.
+
+    Connections are only shared between identical server configs, so a
+    changed host or credential gets a fresh pool. The password is hashed
+    so it is not kept in the registry.
+    """
+    secret = hashlib.sha256((bind_password or "").encode("utf-8")).hexdigest()
+    return host.lower(), port, use_ssl, bind_dn or "", secret
+
+
+@dataclass(eq=False)
+class PooledConnection:
+    """A connection leased from a pool, with its bookkeeping."""
+
+    conn: Any
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+    last_checked: float = field(default_factory=time.monotonic)
+
+
+class ConnectionPool:
+    """Thread-safe pool of bound connections to one server.
+
+    At most ``max_size`` connections exist at once; acquire() waits for one
+    to be released beyond that. Idle connections are closed after
+    ``idle_seconds``, and one that has been idle longer than
+    ``check_interval`` is health checked before reuse and replaced by a
+    freshly bound connection if the check fails.
+    """
+
+    def __init__(
+        self,
+        create: Callable[[], Any],
+        check: Callable[[Any], None],
+        close: Callable[[Any], None],
+        max_size: Optional[int] = None,
+        idle_seconds: Optional[float] = None,
+        check_interval: Optional[float] = None,
+        acquire_timeout: Optional[float] = None,
+    ):
+        self._create = create
+        self._check = check
+        self._close = close
+        self.max_size = max_size or settings.LDAP_POOL_MAX_SIZE
+        self.idle_seconds = (
+            settings.LDAP_POOL_IDLE_SECONDS if idle_seconds is None else idle_seconds
+        )
+        self.check_interval = (
+            settings.LDAP_POOL_CHECK_INTERVAL_SECONDS
+            if check_interval is None
+            else check_interval
+        )
+        self.acquire_timeout = (
+            settings.LDAP_POOL_ACQUIRE_TIMEOUT_SECONDS
+            if acquire_timeout is None
+            else acquire_timeout
+        )
+        self._idle: List[PooledConnection] = []
+        self._size = 0
+        self._leases = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    @property
+    def size(self) -> int:
+        """Number of open connections, leased or idle."""
+        return self._size
+
+    @property
+    def idle(self) -> int:
+        """Number of idle connections."""
+        return len(self._idle)
+
+    @property
+    def leases(self) -> int:
+        """Number of leases not yet released, including ones still waiting."""
+        return self._leases
+
+    def acquire(self) -> PooledConnection:
+        """Lease a connection, reusing an idle one when possible.
+
+        Every acquire() must be paired with a release().
+        """
+        with self._cond:
+            if self._closed:
+                raise PoolClosedError("Connection pool is closed")
+            self._leases += 1
+        try:
+            return self._acquire()
+        except BaseException:
+            with self._cond:
+                self._leases -= 1
+            raise
+
+    def _acquire(self) -> PooledConnection:
+        """Get a connection for a lease that has already been counted."""
+        deadline = time.monotonic() + self.acquire_timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolClosedError("Connection pool is closed")
+                expired = self._take_expired(time.monotonic())
+                if self._idle:
+                    # Most recently used first: it is the least likely to
+                    # have been dropped by the server or a firewall
+                    pooled: Optional[PooledConnection] = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    pooled = None
+                    self._size += 1
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeoutError(
+                        f"No connection available after {self.acquire_timeout}s"
+                    )
+                self._cond.wait(remaining)
+
+        self._close_all(expired)
+
+        if pooled is not None:
+            if time.monotonic() - pooled.last_checked < self.check_interval:
+                return pooled
+            try:
+                self._check(pooled.conn)
+                pooled.last_checked = time.monotonic()
+                return pooled
+            except Exception as e:
+                logger.info(f"Pooled connection failed health check, rebinding: {e}")
+                self._close_all([pooled])
+
+        try:
+            return PooledConnection(self._create())
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, pooled: PooledConnection, discard: bool = False):
+        """Return a leased connection, or close it if it is no longer usable."""
+        with self._cond:
+            self._leases -= 1
+            keep = not (discard or self._closed)
+            if keep:
+                pooled.last_used = time.monotonic()
+                self._idle.append(pooled)
+            else:
+                self._size -= 1
+            self._cond.notify()
+
+        if not keep:
+            self._close_all([pooled])
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        """Lease a connection for a block, discarding it if the block fails."""
+        pooled = self.acquire()
+        try:
+            yield pooled.conn
+        except Exception:
+            self.release(pooled, discard=True)
+            raise
+        self.release(pooled)
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """Close connections idle for longer than idle_seconds."""
+        with self._cond:
+            expired = self._take_expired(now or time.monotonic())
+        self._close_all(expired)
+        return len(expired)
+
+    def close(self):
+        """Close idle connections; leased ones are closed when released."""
+        with self._cond:
+            self._closed = True
+            expired, self._idle = self._idle, []
+            self._size -= len(expired)
+            self._cond.notify_all()
+        self._close_all(expired)
+
+    def close_if_unused(self) -> bool:
+        """Close the pool if it has no connections and no leases."""
+        with self._cond:
+            if self._closed or self._size or self._leases:
+                return False
+            self._closed = True
+            return True
+
+    def _take_expired(self, now: float) -> List[PooledConnection]:
+        """Remove idle connections past their idle timeout. Needs the lock."""
+        expired = [p for p in self._idle if now - p.last_used > self.idle_seconds]
+        if expired:
+            self._idle = [p for p in self._idle if p not in expired]
+            self._size -= len(expired)
+            self._cond.notify(len(expired))
+        return expired
+
+    def _close_all(self, connections: List[PooledConnection]):
+        """Close connections outside the lock, ignoring errors."""
+        for pooled in connections:
+            try:
+                self._close(pooled.conn)
+            except Exception as e:
+                logger.debug(f"Error closing pooled connection: {e}")
+
+
+class ConnectionPoolRegistry:
+    """Process-wide pools, one per server config.
+
+    Shared by the API and worker tasks in the same process, so repeated
+    jobs against one server reuse bound connections.
+    """
+
+    def __init__(self) -> None:
+        self._pools: Dict[PoolKey, ConnectionPool] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        key: PoolKey,
+        create: Callable[[], Any],
+        check: Callable[[Any], None],
+        close: Callable[[Any], None],
+    ) -> ConnectionPool:
+        """Get the pool for a server config, creating it on first use."""
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = ConnectionPool(create, check, close)
+                self._pools[key] = pool
+            return pool
+
+    def acquire(
+        self,
+        key: PoolKey,
+        create: Callable[[], Any],
+        check: Callable[[Any], None],
+        close: Callable[[Any], None],
+    ) -> Tuple[ConnectionPool, PooledConnection]:
+        """Lease a connection from the pool for a server config.
+
+        Returns the pool with the lease, which must be released to it. A
+        pool closed by eviction between lookup and acquire is replaced.
+        """
+        while True:
+            pool = self.get(key, create, check, close)
+            try:
+                return pool, pool.acquire()
+            except PoolClosedError:
+                with self._lock:
+                    if self._pools.get(key) is pool:
+                        raise
+
+    def evict_idle(self) -> int:
+        """Close idle connections in every pool and drop unused pools."""
+        with self._lock:
+            pools = list(self._pools.items())
+
+        evicted = sum(pool.evict_idle() for _, pool in pools)
+
+        with self._lock:
+            # A pool is only dropped once nothing holds or awaits a lease,
+            # checked and closed under its lock so no acquire slips in
+            for key, pool in pools:
+                if self._pools.get(key) is pool and pool.close_if_unused():
+                    del self._pools[key]
+        if evicted:
+            logger.info(f"Closed {evicted} idle LDAP connections")
+        return evicted
+
+    def close_all(self):
+        """Close every pool."""
+        with self._lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            pool.close()
+
+
+ldap_pools = ConnectionPoolRegistry()
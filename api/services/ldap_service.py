@@ -1,14 +1,103 @@
+import base64
 import json
+import logging
+import os
+import time
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
 
 import ldap
 import ldap.ldapobject
 import ldap.modlist as modlist
+from ldap.controls import SimplePagedResultsControl
+
+from api.core.config import settings
+from api.core.tracing import record_span
+from api.services.ldap_pool import (
+    ConnectionPool,
+    PooledConnection,
+    PoolTimeoutError,
+    ldap_pools,
+    pool_key,
+)
+from api.services.metrics_service import MetricsService, StageTimer
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Errors after which a connection is dropped and the operation retried once
+RECONNECT_ERRORS = (ldap.SERVER_DOWN, ldap.CONNECT_ERROR)
+
+# Failures of the server or network rather than of the data or config,
+# which a later attempt may not hit
+TRANSIENT_ERRORS = RECONNECT_ERRORS + (
+    ldap.TIMEOUT,
+    ldap.BUSY,
+    ldap.UNAVAILABLE,
+    ConnectionError,
+    TimeoutError,
+    PoolTimeoutError,
+)
+
+# Called with (entries, bytes) processed so far during backup and restore
+ProgressCallback = Callable[[int, int], None]
+
+# Entries between progress callbacks
+PROGRESS_EVERY = 100
+
+# Called with a resume point once everything before it is on disk
+CheckpointCallback = Callable[[Dict[str, Any]], None]
+
+
+class CheckpointMismatchError(Exception):
+    """The directory no longer matches an export checkpoint."""
+
+
+def _error_message(error: ldap.LDAPError) -> str:
+    """Get the readable description from a python-ldap error."""
+    info = error.args[0] if error.args and isinstance(error.args[0], dict) else {}
+    return info.get("desc") or str(error)
+
+
+def is_transient_error(error: Optional[BaseException]) -> bool:
+    """Check whether an error, or one it was raised from, is transient."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        if isinstance(error, TRANSIENT_ERRORS):
+            return True
+        seen.add(id(error))
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def is_server_error(error: Optional[BaseException]) -> bool:
+    """Check whether a transient error says the server itself is failing.
+
+    Running out of local pool slots is worth a retry but says nothing
+    about the server, so it must not open the server's circuit.
+    """
+    seen = set()
+    cause = error
+    while cause is not None and id(cause) not in seen:
+        if isinstance(cause, PoolTimeoutError):
+            return False
+        seen.add(id(cause))
+        cause = cause.__cause__ or cause.__context__
+    return is_transient_error(error)
 
 
 class LDAPService:
-    """Service for LDAP operations including backup and restore."""
+    """Service for LDAP operations including backup and restore.
+
+    With ``pooled=True`` bound connections are leased from a process-wide
+    pool keyed on the server config, and disconnect() hands them back for
+    the next job instead of unbinding.
+
+    Binds, search pages and adds are timed per ``server_name``, and
+    ``timer`` collects the time backups and restores spend in LDAP calls
+    and in LDIF serialisation or parsing.
+    """
 
     def __init__(
         self,
@@ -18,6 +107,8 @@ class LDAPService:
         base_dn: str,
         bind_dn: Optional[str] = None,
         bind_password: Optional[str] = None,
+        pooled: bool = False,
+        server_name: Optional[str] = None,
     ):
         self.host = host
         self.port = port
@@ -25,77 +116,341 @@ class LDAPService:
         self.base_dn = base_dn
         self.bind_dn = bind_dn
         self.bind_password = bind_password
+        self.pooled = pooled and settings.LDAP_POOL_ENABLED
+        self.server_name = server_name or host
+        self.timer = StageTimer()
         self.conn: Optional[ldap.ldapobject.LDAPObject] = None
+        self._lease: Optional[PooledConnection] = None
+        self._lease_pool: Optional[ConnectionPool] = None
 
-    def connect(self):
-        """Establish connection to LDAP server."""
+    def __enter__(self) -> "LDAPService":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # A failed operation may leave results pending, so don't reuse it
+        self.disconnect(discard=exc_type is not None)
+
+    def _open_connection(
+        self, timeout: Optional[float] = None
+    ) -> ldap.ldapobject.LDAPObject:
+        """Open and bind a new connection."""
+        timeout = settings.LDAP_TIMEOUT_SECONDS if timeout is None else timeout
         protocol = "ldaps" if self.use_ssl else "ldap"
         ldap_url = f"{protocol}://{self.host}:{self.port}"
 
-        self.conn = ldap.initialize(ldap_url)
-        self.conn.set_option(ldap.OPT_REFERRALS, 0)
+        conn = ldap.initialize(ldap_url)
+        conn.set_option(ldap.OPT_REFERRALS, 0)
+        conn.set_option(ldap.OPT_NETWORK_TIMEOUT, timeout)
 
-        if self.bind_dn and self.bind_password:
-            self.conn.simple_bind_s(self.bind_dn, self.bind_password)
-        else:
-            self.conn.simple_bind_s()
+        # Bound the bind only: later operations such as full-directory
+        # searches may legitimately run far longer
+        conn.timeout = timeout
+        started = time.perf_counter()
+        try:
+            if self.bind_dn and self.bind_password:
+                conn.simple_bind_s(self.bind_dn, self.bind_password)
+            else:
+                conn.simple_bind_s()
+        finally:
+            conn.timeout = -1
+        self._observe("bind", started)
+        return conn
+
+    def _observe(self, operation: str, started: float, traced: bool = True) -> float:
+        """Record the round trip of an operation, returning its duration.
+
+        Adds are too many to trace one by one; their latency is only
+        measured.
+        """
+        elapsed = time.perf_counter() - started
+        MetricsService.record_ldap_operation(self.server_name, operation, elapsed)
+        if traced:
+            record_span(
+                f"ldap.{operation}",
+                elapsed,
+                {
+                    "server.address": self.host,
+                    "server.port": self.port,
+                    "ldapguard.server_name": self.server_name,
+                },
+            )
+        return elapsed
+
+    @staticmethod
+    def _check_connection(conn: ldap.ldapobject.LDAPObject) -> None:
+        """Read the root DSE to check that a connection is still usable."""
+        conn.search_ext_s(
+            "",
+            ldap.SCOPE_BASE,
+            "(objectClass=*)",
+            ["1.1"],
+            timeout=settings.LDAP_POOL_CHECK_TIMEOUT_SECONDS,
+        )
+
+    @staticmethod
+    def _close_connection(conn: ldap.ldapobject.LDAPObject) -> None:
+        """Unbind a connection."""
+        conn.unbind_s()
 
-    def disconnect(self):
-        """Close LDAP connection."""
-        if self.conn:
+    def connect(self):
+        """Establish connection to LDAP server."""
+        if not self.pooled:
+            self.conn = self._open_connection()
+            return
+
+        self._lease_pool, self._lease = ldap_pools.acquire(
+            pool_key(
+                self.host, self.port, self.use_ssl, self.bind_dn, self.bind_password
+            ),
+            self._open_connection,
+            self._check_connection,
+            self._close_connection,
+        )
+        self.conn = self._lease.conn
+
+    def disconnect(self, discard: bool = False):
+        """Close LDAP connection, or return it to the pool.
+
+        ``discard`` closes a pooled connection instead of reusing it.
+        """
+        if self._lease is not None and self._lease_pool is not None:
+            lease, self._lease = self._lease, None
+            pool, self._lease_pool = self._lease_pool, None
+            self.conn = None
+            pool.release(lease, discard=discard)
+        elif self.conn:
             self.conn.unbind_s()
             self.conn = None
 
+    def _run(self, operation: Callable[[ldap.ldapobject.LDAPObject], T]) -> T:
+        """Run an operation, rebinding once if the connection was dropped."""
+        if not self.conn:
+            self.connect()
+
+        try:
+            return operation(self.conn)  # type: ignore[arg-type]
+        except RECONNECT_ERRORS:
+            self.disconnect(discard=True)
+            self.connect()
+            return operation(self.conn)  # type: ignore[arg-type]
+
     def search_all_entries(
         self, search_filter: str = "(objectClass=*)"
     ) -> List[Tuple[str, Dict]]:
         """Search all entries in LDAP directory."""
-        if not self.conn:
-            self.connect()
-
         try:
-            result: List[Tuple[str, Dict]] = self.conn.search_s(  # type: ignore
-                self.base_dn, ldap.SCOPE_SUBTREE, search_filter, None
+            result: List[Tuple[str, Dict]] = self._run(
+                lambda conn: conn.search_s(
+                    self.base_dn, ldap.SCOPE_SUBTREE, search_filter, None
+                )
             )
             return result
         except ldap.LDAPError as e:
             raise Exception(f"LDAP search failed: {str(e)}")
 
-    def backup_to_ldif(
-        self, output_path: str, search_filter: str = "(objectClass=*)"
-    ) -> int:
-        """Backup LDAP entries to LDIF format."""
-        entries = self.search_all_entries(search_filter)
+    def search_entries(
+        self,
+        search_filter: str = "(objectClass=*)",
+        attributes: Optional[List[str]] = None,
+        size_limit: int = 0,
+        timeout: Optional[float] = None,
+    ) -> List[Tuple[str, Dict]]:
+        """Run one bounded search with the message-ID API.
+
+        Returns at most ``size_limit`` entries (0 for no limit) without
+        failing when the limit cuts the result short, and abandons the
+        search if it takes longer than ``timeout`` seconds overall.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        msgid = self._run(
+            lambda conn: conn.search_ext(
+                self.base_dn,
+                ldap.SCOPE_SUBTREE,
+                search_filter,
+                attributes,
+                sizelimit=size_limit,
+                timeout=-1 if timeout is None else timeout,
+            )
+        )
 
-        with open(output_path, "w", encoding="utf-8") as f:
-            for dn, attrs in entries:
-                if dn is None:
-                    continue
+        entries: List[Tuple[str, Dict]] = []
+        try:
+            while True:
+                remaining = -1.0
+                if deadline is not None:
+                    remaining = max(deadline - time.monotonic(), 0.0)
+                rtype, results, _, _ = self.conn.result3(  # type: ignore
+                    msgid, all=0, timeout=remaining
+                )
+                if rtype == ldap.RES_SEARCH_RESULT:
+                    break
+                entries.extend((dn, attrs) for dn, attrs in results if dn is not None)
+        except ldap.SIZELIMIT_EXCEEDED:
+            pass
+        except ldap.TIMEOUT:
+            self.conn.abandon_ext(msgid)  # type: ignore[union-attr]
+            raise
+        except ldap.LDAPError as e:
+            raise Exception(f"LDAP search failed: {str(e)}")
+        return entries
+
+    def iter_entries(
+        self, search_filter: str = "(objectClass=*)", page_size: Optional[int] = None
+    ) -> Iterator[Tuple[str, Dict]]:
+        """Stream entries with the paged results control.
+
+        Only one page is held in memory at a time, and server size limits
+        do not cut large directories short.
+        """
+        control = SimplePagedResultsControl(
+            True, size=page_size or settings.LDAP_PAGE_SIZE, cookie=""
+        )
+
+        def search(conn: ldap.ldapobject.LDAPObject) -> int:
+            return conn.search_ext(
+                self.base_dn,
+                ldap.SCOPE_SUBTREE,
+                search_filter,
+                None,
+                serverctrls=[control],
+            )
 
-                # Write DN
-                f.write(f"dn: {dn}\n")
+        try:
+            # Only the first page can be retried on a new connection: the
+            # paging cookie belongs to the connection that issued it
+            started = time.perf_counter()
+            msgid = self._run(search)
+            while True:
+                _, results, _, controls = self.conn.result3(msgid)  # type: ignore
+                self._observe("search_page", started)
+                for dn, attrs in results:
+                    if dn is not None:
+                        yield dn, attrs
+
+                cookie = next(
+                    (
+                        c.cookie
+                        for c in controls
+                        if c.controlType == SimplePagedResultsControl.controlType
+                    ),
+                    None,
+                )
+                if not cookie:
+                    return
+                control.cookie = cookie
+                started = time.perf_counter()
+                msgid = search(self.conn)  # type: ignore[arg-type]
+        except ldap.LDAPError as e:
+            raise Exception(f"LDAP search failed: {str(e)}")
 
-                # Write attributes
-                for attr, values in attrs.items():
-                    for value in values:
-                        if isinstance(value, bytes):
-                            # Handle binary data
-                            try:
-                                value_str = value.decode("utf-8")
-                            except UnicodeDecodeError:
-                                # Base64 encode binary data
-                                import base64
+    @staticmethod
+    def write_ldif_entry(f: IO[str], dn: str, attrs: Dict) -> None:
+        """Write one entry in LDIF format."""
+        # Write DN
+        f.write(f"dn: {dn}\n")
+
+        # Write attributes
+        for attr, values in attrs.items():
+            for value in values:
+                if isinstance(value, bytes):
+                    # Handle binary data
+                    try:
+                        value_str = value.decode("utf-8")
+                    except UnicodeDecodeError:
+                        # Base64 encode binary data
+                        value_str = base64.b64encode(value).decode("utf-8")
+                        f.write(f"{attr}:: {value_str}\n")
+                        continue
+                else:
+                    value_str = str(value)
+                f.write(f"{attr}: {value_str}\n")
+
+        f.write("\n")
 
-                                value_str = base64.b64encode(value).decode("utf-8")
-                                f.write(f"{attr}:: {value_str}\n")
-                                continue
-                        else:
-                            value_str = str(value)
-                        f.write(f"{attr}: {value_str}\n")
+    def backup_to_ldif(
+        self,
+        output_path: str,
+        search_filter: str = "(objectClass=*)",
+        progress: Optional[ProgressCallback] = None,
+        checkpoint: Optional[Dict[str, Any]] = None,
+        on_checkpoint: Optional[CheckpointCallback] = None,
+    ) -> int:
+        """Backup LDAP entries to LDIF format.
+
+        Every LDAP_CHECKPOINT_ENTRIES entries the file is synced and
+        ``on_checkpoint`` gets the resume point. Given such a checkpoint the
+        file is truncated back to it and the export continues after it.
+        Paging cookies die with their connection, so the search is re-run
+        and the entries already exported are skipped; if the entry at the
+        checkpoint is not the one recorded there, the export starts over.
+        """
+        if checkpoint:
+            try:
+                return self._export_ldif(
+                    output_path, search_filter, progress, checkpoint, on_checkpoint
+                )
+            except CheckpointMismatchError:
+                pass
+        return self._export_ldif(
+            output_path, search_filter, progress, None, on_checkpoint
+        )
 
-                f.write("\n")
+    def _export_ldif(
+        self,
+        output_path: str,
+        search_filter: str,
+        progress: Optional[ProgressCallback],
+        checkpoint: Optional[Dict[str, Any]],
+        on_checkpoint: Optional[CheckpointCallback],
+    ) -> int:
+        count = 0
+        skip = 0
+        last_dn = None
+        mode = "w"
+        if checkpoint:
+            if (
+                not os.path.exists(output_path)
+                or os.path.getsize(output_path) < checkpoint["offset"]
+            ):
+                raise CheckpointMismatchError("Partial export is missing")
+            count = skip = checkpoint["entries"]
+            last_dn = checkpoint["last_dn"]
+            mode = "r+"
+
+        with open(output_path, mode, encoding="utf-8") as f:
+            if checkpoint:
+                f.seek(checkpoint["offset"])
+                f.truncate()
+
+            entries = self.timer.wrap(self.iter_entries(search_filter), "ldap_search")
+            for dn, attrs in entries:
+                if skip:
+                    skip -= 1
+                    if not skip and dn != last_dn:
+                        raise CheckpointMismatchError(
+                            f"Expected {last_dn} at the checkpoint, found {dn}"
+                        )
+                    continue
 
-        return len(entries)
+                started = time.perf_counter()
+                self.write_ldif_entry(f, dn, attrs)
+                self.timer.add("ldif_serialize", time.perf_counter() - started)
+                count += 1
+                if progress and count % PROGRESS_EVERY == 0:
+                    progress(count, f.tell())
+                if on_checkpoint and count % settings.LDAP_CHECKPOINT_ENTRIES == 0:
+                    started = time.perf_counter()
+                    f.flush()
+                    os.fsync(f.fileno())
+                    self.timer.add("disk_sync", time.perf_counter() - started)
+                    on_checkpoint({"offset": f.tell(), "entries": count, "last_dn": dn})
+
+            if skip:
+                raise CheckpointMismatchError("Directory has fewer entries than before")
+            if progress:
+                progress(count, f.tell())
+
+        return count
 
     def backup_to_json(
         self, output_path: str, search_filter: str = "(objectClass=*)"
@@ -121,8 +476,6 @@ class LDAPService:
                         try:
                             entry["attributes"][attr].append(value.decode("utf-8"))
                         except UnicodeDecodeError:
-                            import base64
-
                             entry["attributes"][attr].append(
                                 {"binary": base64.b64encode(value).decode("utf-8")}
                             )
@@ -136,23 +489,49 @@ class LDAPService:
 
         return len(json_data)
 
-    def restore_from_ldif(self, input_path: str) -> int:
-        """Restore LDAP entries from LDIF format."""
+    def restore_from_ldif(
+        self,
+        input_path: str,
+        progress: Optional[ProgressCallback] = None,
+        checkpoint: Optional[Dict[str, Any]] = None,
+        on_checkpoint: Optional[CheckpointCallback] = None,
+    ) -> int:
+        """Restore LDAP entries from LDIF format.
+
+        Every LDAP_CHECKPOINT_ENTRIES entries ``on_checkpoint`` gets the
+        byte offset of the next entry; given such a checkpoint the restore
+        continues from there. Entries replayed after an older checkpoint
+        already exist and are skipped.
+        """
         if not self.conn:
             self.connect()
 
         restored_count = 0
+        processed = 0
+        bytes_read = 0
+        adding = 0.0
+        started = time.perf_counter()
+
+        with open(input_path, "rb") as f:
+            if checkpoint:
+                f.seek(checkpoint["offset"])
+                bytes_read = checkpoint["offset"]
+                processed = checkpoint["entries"]
+                restored_count = checkpoint["restored"]
 
-        with open(input_path, "r", encoding="utf-8") as f:
             current_dn: Optional[str] = None
             current_attrs: Dict[str, List[str]] = {}
 
-            for line in f:
-                line = line.rstrip("\n")
+            for raw_line in f:
+                bytes_read += len(raw_line)
+                line = raw_line.decode("utf-8").rstrip("\r\n")
 
                 if not line:
                     # End of entry
                     if current_dn and current_attrs:
+                        processed += 1
+                        if progress and processed % PROGRESS_EVERY == 0:
+                            progress(processed, bytes_read)
                         try:
                             # Convert to LDAP modlist format
                             ldif_attrs: Dict[str, List[bytes]] = {}
@@ -163,16 +542,40 @@ class LDAPService:
                                 ]
 
                             # Add entry
-                            self.conn.add_s(  # type: ignore[union-attr]
-                                current_dn, modlist.addModlist(ldif_attrs)
-                            )
+                            add_modlist = modlist.addModlist(ldif_attrs)
+                            add_started = time.perf_counter()
+                            try:
+                                self._run(
+                                    lambda conn: conn.add_s(current_dn, add_modlist)
+                                )
+                            finally:
+                                adding += self._observe(
+                                    "add", add_started, traced=False
+                                )
                             restored_count += 1
                         except ldap.ALREADY_EXISTS:
                             # Entry exists, skip
                             pass
+                        except TRANSIENT_ERRORS:
+                            # The server, not the entry, failed even after a
+                            # rebind, so stop for the job to retry from its
+                            # last checkpoint rather than skip the rest
+                            raise
                         except ldap.LDAPError as e:
-                            # Log error but continue
-                            print(f"Error restoring {current_dn}: {str(e)}")
+                            # Log the rejected entry but continue
+                            logger.warning(f"Error restoring {current_dn}: {str(e)}")
+
+                        if (
+                            on_checkpoint
+                            and processed % settings.LDAP_CHECKPOINT_ENTRIES == 0
+                        ):
+                            on_checkpoint(
+                                {
+                                    "offset": bytes_read,
+                                    "entries": processed,
+                                    "restored": restored_count,
+                                }
+                            )
 
                     current_dn = None
                     current_attrs = {}
@@ -186,6 +589,13 @@ class LDAPService:
                         current_attrs[attr] = []
                     current_attrs[attr].append(value)
 
+        # Everything but the adds is reading and parsing the LDIF
+        self.timer.add("ldap_add", adding)
+        self.timer.add("ldif_parse", time.perf_counter() - started - adding)
+
+        if progress:
+            progress(processed, bytes_read)
+
         return restored_count
 
     def get_modified_entries(
@@ -198,11 +608,85 @@ class LDAPService:
 
         return self.search_all_entries(filter_str)
 
+    def probe(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Check reachability and bind on a fresh, unpooled connection.
+
+        Returns the connect and bind latency and, when the server publishes
+        them, replication hints (contextCSN, highestCommittedUSN) and the
+        number of entries directly below the base DN. Never raises.
+        """
+        timeout = settings.LDAP_HEALTH_TIMEOUT_SECONDS if timeout is None else timeout
+        result: Dict[str, Any] = {
+            "reachable": False,
+            "bind_ok": False,
+            "latency_ms": None,
+            "error": None,
+            "context_csn": [],
+            "highest_usn": None,
+            "subordinates": None,
+        }
+
+        started = time.monotonic()
+        try:
+            conn = self._open_connection(timeout)
+        except ldap.INVALID_CREDENTIALS:
+            result["reachable"] = True
+            result["error"] = "Invalid credentials"
+            return result
+        except ldap.LDAPError as e:
+            result["error"] = _error_message(e)
+            return result
+        result.update(
+            reachable=True,
+            bind_ok=True,
+            latency_ms=round((time.monotonic() - started) * 1000, 1),
+        )
+
+        def read(dn: str, attributes: List[str]) -> Dict[str, List[str]]:
+            entries = conn.search_ext_s(
+                dn, ldap.SCOPE_BASE, "(objectClass=*)", attributes, timeout=timeout
+            )
+            attrs = entries[0][1] if entries else {}
+            return {
+                name.lower(): [v.decode("utf-8", "replace") for v in values]
+                for name, values in attrs.items()
+            }
+
+        # The hints are best effort: servers publish different subsets
+        try:
+            root = read("", ["highestCommittedUSN"])
+            base = read(self.base_dn, ["contextCSN", "numSubordinates"])
+            result["context_csn"] = base.get("contextcsn", [])
+            result["highest_usn"] = next(
+                iter(root.get("highestcommittedusn", [])), None
+            )
+            subordinates = base.get("numsubordinates")
+            if subordinates and subordinates[0].isdigit():
+                result["subordinates"] = int(subordinates[0])
+        except ldap.LDAPError as e:
+            result["error"] = (
+                f"Bound, but reading server state failed: {_error_message(e)}"
+            )
+        finally:
+            try:
+                conn.unbind_s()
+            except ldap.LDAPError:
+                pass
+        return result
+
     def test_connection(self) -> bool:
         """Test LDAP connection."""
         try:
             self.connect()
+        except Exception:
+            return False
+
+        try:
+            if self.pooled:
+                # A reused connection may not have been checked recently
+                self._check_connection(self.conn)  # type: ignore[arg-type]
             self.disconnect()
             return True
         except Exception:
+            self.disconnect(discard=True)
             return False
@@ -1,12 +1,31 @@
+import logging
+import os
+import time
+from typing import Any, Dict, Iterable, Iterator, Set, TypeVar
+
 from fastapi import Response
 from prometheus_client import (
     CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
     Counter,
     Gauge,
     Histogram,
     generate_latest,
+    multiprocess,
+    start_http_server,
 )
 
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# When set, prometheus_client keeps every process's values in memory-mapped
+# files in this directory and scrapes aggregate them. Gauges declare how
+# their per-process values combine; "live" modes leave out processes once
+# they are marked dead on shutdown.
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
 # Define metrics
 backup_total = Counter(
     "ldapguard_backup_total", "Total number of backups", ["status", "backup_type"]
@@ -17,11 +36,17 @@ backup_duration = Histogram(
 )
 
 backup_size_bytes = Gauge(
-    "ldapguard_backup_size_bytes", "Size of backup files in bytes", ["server_name"]
+    "ldapguard_backup_size_bytes",
+    "Size of backup files in bytes",
+    ["server_name"],
+    multiprocess_mode="mostrecent",
 )
 
 backup_entries = Gauge(
-    "ldapguard_backup_entries", "Number of entries in backup", ["server_name"]
+    "ldapguard_backup_entries",
+    "Number of entries in backup",
+    ["server_name"],
+    multiprocess_mode="mostrecent",
 )
 
 restore_total = Counter(
@@ -39,13 +64,129 @@ ldap_connection_errors = Counter(
 )
 
 active_backups = Gauge(
-    "ldapguard_active_backups", "Number of currently active backup operations"
+    "ldapguard_active_backups",
+    "Number of currently active backup operations",
+    multiprocess_mode="livesum",
 )
 
 active_restores = Gauge(
-    "ldapguard_active_restores", "Number of currently active restore operations"
+    "ldapguard_active_restores",
+    "Number of currently active restore operations",
+    multiprocess_mode="livesum",
+)
+
+backup_verifications_total = Counter(
+    "ldapguard_backup_verifications_total",
+    "Total number of backup integrity verifications",
+    ["result"],
+)
+
+backup_verification_duration = Histogram(
+    "ldapguard_backup_verification_duration_seconds",
+    "Backup verification duration in seconds",
+)
+
+backup_verification_bytes = Counter(
+    "ldapguard_backup_verification_bytes_total",
+    "Bytes read while verifying backups",
+)
+
+corrupt_backups = Gauge(
+    "ldapguard_corrupt_backups",
+    "Number of backups flagged as corrupt",
+    multiprocess_mode="mostrecent",
+)
+
+ldap_server_up = Gauge(
+    "ldapguard_ldap_server_up",
+    "Whether the last health probe could bind to the LDAP server",
+    ["server_name"],
+    multiprocess_mode="mostrecent",
+)
+
+ldap_server_bind_latency = Gauge(
+    "ldapguard_ldap_server_bind_latency_seconds",
+    "Connect and bind latency of the last health probe",
+    ["server_name"],
+    multiprocess_mode="mostrecent",
+)
+
+ldap_health_probe_duration = Histogram(
+    "ldapguard_ldap_health_probe_duration_seconds",
+    "LDAP server health probe duration in seconds",
+)
+
+unhealthy_ldap_servers = Gauge(
+    "ldapguard_unhealthy_ldap_servers",
+    "Number of active LDAP servers failing their health probe",
+    multiprocess_mode="mostrecent",
+)
+
+job_retries_total = Counter(
+    "ldapguard_job_retries_total",
+    "Failed job attempts scheduled for another try",
+    ["kind"],
+)
+
+jobs_deferred_total = Counter(
+    "ldapguard_jobs_deferred_total",
+    "Jobs postponed because their LDAP server's circuit was open",
+    ["kind"],
+)
+
+ldap_circuit_trips_total = Counter(
+    "ldapguard_ldap_circuit_trips_total",
+    "Times the circuit breaker of an LDAP server opened",
+    ["server_name"],
+)
+
+# Jobs run from seconds to hours, beyond the default buckets
+JOB_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 1800, 3600, 7200, 14400)
+
+job_phase_duration = Histogram(
+    "ldapguard_job_phase_duration_seconds",
+    "Wall-clock duration of each phase of backup and restore jobs",
+    ["kind", "phase"],
+    buckets=JOB_BUCKETS,
+)
+
+job_stage_duration = Histogram(
+    "ldapguard_job_stage_duration_seconds",
+    "Time a job spent in each stage of its pipeline, such as LDAP search, "
+    "LDIF serialisation, compression, encryption and disk writes",
+    ["kind", "stage"],
+    buckets=JOB_BUCKETS,
+)
+
+job_entries_per_second = Gauge(
+    "ldapguard_job_entries_per_second",
+    "Entry throughput of the last completed job per server",
+    ["kind", "server_name"],
+    multiprocess_mode="mostrecent",
+)
+
+job_bytes_per_second = Gauge(
+    "ldapguard_job_bytes_per_second",
+    "LDIF byte throughput of the last completed job per server",
+    ["kind", "server_name"],
+    multiprocess_mode="mostrecent",
+)
+
+ldap_operation_duration = Histogram(
+    "ldapguard_ldap_operation_duration_seconds",
+    "Round-trip latency of LDAP operations made by jobs",
+    ["server_name", "operation"],
+)
+
+webhook_deliveries_total = Counter(
+    "ldapguard_webhook_deliveries_total",
+    "Webhook events by delivery outcome",
+    ["outcome"],
 )
 
+# Servers with per-server health series, so removed servers can be dropped
+_health_server_names: Set[str] = set()
+
 
 class MetricsService:
     """Service for Prometheus metrics."""
@@ -90,12 +231,182 @@ class MetricsService:
         restore_total.labels(status="failed").inc()
         active_restores.dec()
 
+    @staticmethod
+    def record_backup_verification(result: str, duration: float, bytes_read: int):
+        """Record one backup verification."""
+        backup_verifications_total.labels(result=result).inc()
+        backup_verification_duration.observe(duration)
+        backup_verification_bytes.inc(bytes_read)
+
+    @staticmethod
+    def set_corrupt_backups(count: int):
+        """Set the number of backups flagged as corrupt."""
+        corrupt_backups.set(count)
+
     @staticmethod
     def record_ldap_connection_error(server_name: str):
         """Record LDAP connection error."""
         ldap_connection_errors.labels(server_name=server_name).inc()
 
+    @staticmethod
+    def record_job_retry(kind: str):
+        """Record a failed attempt of a started job that will be retried."""
+        job_retries_total.labels(kind=kind).inc()
+        (active_backups if kind == "backup" else active_restores).dec()
+
+    @staticmethod
+    def record_job_deferred(kind: str):
+        """Record a job postponed by an open circuit."""
+        jobs_deferred_total.labels(kind=kind).inc()
+
+    @staticmethod
+    def record_circuit_opened(server_name: str):
+        """Record an LDAP server's circuit opening."""
+        ldap_circuit_trips_total.labels(server_name=server_name).inc()
+
+    @staticmethod
+    def record_webhook_deliveries(outcome: str, count: int = 1):
+        """Record webhook events delivered, retried or dead-lettered."""
+        webhook_deliveries_total.labels(outcome=outcome).inc(count)
+
+    @staticmethod
+    def record_job_phase(kind: str, phase: str, seconds: float):
+        """Record how long one phase of a job took."""
+        job_phase_duration.labels(kind=kind, phase=phase).observe(seconds)
+
+    @staticmethod
+    def record_job_stages(kind: str, seconds: Dict[str, float]):
+        """Record the time a job spent in each pipeline stage."""
+        for stage, spent in seconds.items():
+            job_stage_duration.labels(kind=kind, stage=stage).observe(spent)
+
+    @staticmethod
+    def record_job_throughput(
+        kind: str, server_name: str, entries_per_second: float, bytes_per_second: float
+    ):
+        """Record the throughput of a completed job."""
+        job_entries_per_second.labels(kind=kind, server_name=server_name).set(
+            entries_per_second
+        )
+        job_bytes_per_second.labels(kind=kind, server_name=server_name).set(
+            bytes_per_second
+        )
+
+    @staticmethod
+    def record_ldap_operation(server_name: str, operation: str, seconds: float):
+        """Record the round trip of one LDAP operation."""
+        ldap_operation_duration.labels(
+            server_name=server_name, operation=operation
+        ).observe(seconds)
+
+    @staticmethod
+    def record_ldap_health(results: Iterable[Dict[str, Any]]):
+        """Record one round of fleet health probes.
+
+        Probe state is only reported through ldap_server_up and
+        unhealthy_ldap_servers; ldap_connection_errors is left to jobs, so
+        a server that stays down does not drown out real job failures.
+
+        Series for servers that were not probed this round are removed.
+        In multiprocess mode that only drops them from this process: the
+        last value stays in the shared files until the worker restarts.
+        """
+        names = set()
+        unhealthy = 0
+        for result in results:
+            name = result["name"]
+            names.add(name)
+            ldap_server_up.labels(server_name=name).set(1 if result["bind_ok"] else 0)
+            if result.get("latency_ms") is not None:
+                ldap_server_bind_latency.labels(server_name=name).set(
+                    result["latency_ms"] / 1000
+                )
+            ldap_health_probe_duration.observe(result["duration_ms"] / 1000)
+            if not result["bind_ok"]:
+                unhealthy += 1
+
+        for name in _health_server_names - names:
+            for gauge in (ldap_server_up, ldap_server_bind_latency):
+                try:
+                    gauge.remove(name)
+                except KeyError:
+                    pass
+        _health_server_names.clear()
+        _health_server_names.update(names)
+        unhealthy_ldap_servers.set(unhealthy)
+
     @staticmethod
     def get_metrics() -> Response:
         """Get metrics in Prometheus format."""
-        return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+        return Response(
+            content=generate_latest(get_registry()), media_type=CONTENT_TYPE_LATEST
+        )
+
+    @staticmethod
+    def start_exporter(port: int):
+        """Serve metrics of this process, or all processes, on their own port."""
+        start_http_server(port, registry=get_registry())
+        logger.info(f"Prometheus exporter listening on port {port}")
+
+    @staticmethod
+    def mark_process_dead():
+        """Drop this process's live gauges from the multiprocess aggregate."""
+        if multiprocess_enabled():
+            multiprocess.mark_process_dead(os.getpid())
+
+
+class StageTimer:
+    """Accumulates the time a job spends in each stage of its pipeline.
+
+    Stages can be generators wrapped around each other, such as reading,
+    compressing and encrypting chunks; each is charged only its own time,
+    not that of the stages it pulls from.
+    """
+
+    def __init__(self) -> None:
+        self.seconds: Dict[str, float] = {}
+        self._reported = 0.0  # Time charged so far, seen by enclosing stages
+
+    def add(self, stage: str, seconds: float):
+        """Charge time measured by the caller to a stage."""
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+        self._reported += seconds
+
+    def wrap(self, items: Iterable[T], stage: str) -> Iterator[T]:
+        """Charge the time spent producing each item to a stage."""
+        iterator = iter(items)
+        while True:
+            reported = self._reported
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self._charge(stage, started, reported)
+                return
+            self._charge(stage, started, reported)
+            yield item
+
+    def _charge(self, stage: str, started: float, reported: float):
+        elapsed = time.perf_counter() - started
+        nested = self._reported - reported
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + elapsed - nested
+        self._reported = reported + elapsed
+
+
+def multiprocess_enabled() -> bool:
+    """Check whether metrics are shared between processes."""
+    return bool(os.environ.get(MULTIPROC_DIR_ENV))
+
+
+def get_registry() -> CollectorRegistry:
+    """Get the registry to scrape.
+
+    In multiprocess mode this aggregates the values of every process
+    writing to the shared directory, read only when scraped, so recording
+    a metric never touches another process.
+    """
+    if not multiprocess_enabled():
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
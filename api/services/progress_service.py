@@ -0,0 +1,420 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import bindparam, update
+
+from api.core.config import settings
+from api.core.database import AsyncSessionLocal
+from api.core.redis import get_redis_client
+from api.core.tracing import end_span, start_span
+from api.models.models import Backup, BackupStatus, RestoreJob
+from api.services.metrics_service import MetricsService
+
+logger = logging.getLogger(__name__)
+
+# Redis pub/sub channel carrying progress events of all jobs
+PROGRESS_CHANNEL = "job_progress"
+
+BACKUP = "backup"
+RESTORE = "restore"
+
+COMPLETED = "completed"
+FAILED = "failed"
+RETRYING = "retrying"  # This attempt failed and another is scheduled
+TERMINAL_PHASES = {COMPLETED, FAILED, RETRYING}
+
+# Progress columns shared by backups and restore_jobs
+FIELDS = (
+    "progress_phase",
+    "progress_entries",
+    "progress_bytes",
+    "entries_per_second",
+    "bytes_per_second",
+    "progress_updated_at",
+    "checkpoint",
+)
+
+
+class ProgressTracker:
+    """Progress of one backup or restore job, published to Redis.
+
+    update() is cheap and thread-safe so export and restore loops can call
+    it for every batch of entries from a worker thread. Events go out at
+    most every PROGRESS_PUBLISH_INTERVAL_SECONDS, and immediately when the
+    phase changes or the job finishes. With a writer the progress is also
+    persisted on the job row while the job runs. The duration of every
+    phase is recorded in the job phase histogram, and traced as a span
+    under the job's span when tracing is enabled.
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        job_id: int,
+        redis_client=None,
+        expected_entries: Optional[int] = None,
+        expected_bytes: Optional[int] = None,
+        interval: Optional[float] = None,
+        writer: Optional["ProgressWriter"] = None,
+    ):
+        self.kind = kind
+        self.job_id = job_id
+        self.redis_client = redis_client
+        self.expected_entries = expected_entries
+        self.expected_bytes = expected_bytes
+        self.interval = (
+            settings.PROGRESS_PUBLISH_INTERVAL_SECONDS if interval is None else interval
+        )
+        self.writer = writer
+        self.phase = "starting"
+        self.entries = 0
+        self.bytes = 0
+        self.error: Optional[str] = None
+        self.checkpoint: Optional[Dict[str, Any]] = None
+        self.version = 0  # Bumped on every change, for the writer
+        self.started = time.monotonic()
+        self._phase_started = self.started
+        self._counting_started: Optional[float] = None
+        self._last_counted = self.started
+        self._last_published = 0.0
+        self._lock = threading.Lock()
+        self._loop = asyncio.get_running_loop()
+        self._pending: Set[asyncio.Task] = set()
+        self._span: Any = None
+
+        if writer is not None:
+            writer.track(self)
+
+    def update(self, entries: Optional[int] = None, bytes_done: Optional[int] = None):
+        """Record entries and bytes processed so far, from any thread."""
+        now = time.monotonic()
+        with self._lock:
+            if entries is not None:
+                self.entries = entries
+            if bytes_done is not None:
+                self.bytes = bytes_done
+            if self._counting_started is None:
+                self._counting_started = self._phase_started
+            self._last_counted = now
+            self.version += 1
+            due = now - self._last_published >= self.interval
+            if due:
+                self._last_published = now
+        if due:
+            self._publish()
+
+    def set_phase(
+        self,
+        phase: str,
+        expected_entries: Optional[int] = None,
+        expected_bytes: Optional[int] = None,
+        reset: bool = False,
+    ):
+        """Start a new phase and publish it.
+
+        Counters carry over, so a finished export keeps its totals and
+        throughput through packaging and storing. ``reset`` starts them
+        over for a phase that counts different work.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._end_phase(now)
+            self.phase = phase
+            self.expected_entries = expected_entries
+            self.expected_bytes = expected_bytes
+            if reset:
+                self.entries = 0
+                self.bytes = 0
+                self._counting_started = None
+            self.version += 1
+            self._phase_started = now
+            self._last_published = now
+            self._span = start_span(f"{self.kind}.{phase}")
+        self._publish()
+
+    def save_checkpoint(self, checkpoint: Dict[str, Any]):
+        """Record where an interrupted run can resume, from any thread."""
+        with self._lock:
+            self.checkpoint = checkpoint
+            self.version += 1
+
+    async def finish(self, phase: str = COMPLETED, error: Optional[str] = None):
+        """Publish the final event and wait for pending ones to go out."""
+        with self._lock:
+            self._end_phase(time.monotonic(), error)
+            self.phase = phase
+            self.error = error
+            self.version += 1
+        if self.writer is not None:
+            self.writer.untrack(self)
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        await self._send(self.snapshot())
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get the current progress as an event."""
+        now = time.monotonic()
+        with self._lock:
+            counting = 0.0
+            if self._counting_started is not None:
+                counting = self._last_counted - self._counting_started
+            elapsed = max(counting, 1e-6)
+            entries_per_second = self.entries / elapsed
+            bytes_per_second = self.bytes / elapsed
+
+            eta = None
+            if self.phase not in TERMINAL_PHASES:
+                if self.expected_entries and entries_per_second > 0:
+                    remaining = max(self.expected_entries - self.entries, 0)
+                    eta = round(remaining / entries_per_second, 1)
+                elif self.expected_bytes and bytes_per_second > 0:
+                    remaining = max(self.expected_bytes - self.bytes, 0)
+                    eta = round(remaining / bytes_per_second, 1)
+
+            return {
+                "kind": self.kind,
+                "id": self.job_id,
+                "phase": self.phase,
+                "entries": self.entries,
+                "bytes": self.bytes,
+                "expected_entries": self.expected_entries,
+                "expected_bytes": self.expected_bytes,
+                "entries_per_second": round(entries_per_second, 1),
+                "bytes_per_second": round(bytes_per_second, 1),
+                "eta_seconds": eta,
+                "elapsed_seconds": round(now - self.started, 1),
+                "error": self.error,
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+            }
+
+    def fields(self) -> Dict[str, Any]:
+        """Get the progress columns of the job row."""
+        event = self.snapshot()
+        return {
+            "progress_phase": event["phase"],
+            "progress_entries": event["entries"],
+            "progress_bytes": event["bytes"],
+            "entries_per_second": event["entries_per_second"],
+            "bytes_per_second": event["bytes_per_second"],
+            "progress_updated_at": datetime.now(timezone.utc),
+            "checkpoint": json.dumps(self.checkpoint) if self.checkpoint else None,
+        }
+
+    def apply(self, row: Any, phase: str):
+        """Set the final phase and copy the progress onto the job row.
+
+        Used with the job's own final commit, which the writer's periodic
+        updates never overwrite. A completed job drops its checkpoint; a
+        failed one keeps it for a retry to resume from.
+        """
+        error = None if phase == COMPLETED else getattr(row, "error_message", None)
+        with self._lock:
+            self._end_phase(time.monotonic(), error)
+            self.phase = phase
+            if phase == COMPLETED:
+                self.checkpoint = None
+        for column, value in self.fields().items():
+            setattr(row, column, value)
+
+    def _end_phase(self, now: float, error: Optional[str] = None):
+        """Record the duration of the current phase; call with the lock held."""
+        if self.phase != "starting" and self.phase not in TERMINAL_PHASES:
+            MetricsService.record_job_phase(
+                self.kind, self.phase, now - self._phase_started
+            )
+        span, self._span = self._span, None
+        end_span(span, error)
+
+    def _publish(self):
+        """Publish a snapshot from whichever thread made progress."""
+        if self.redis_client is None:
+            return
+        event = self.snapshot()
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+
+        if on_loop:
+            self._schedule(event)
+        else:
+            self._loop.call_soon_threadsafe(self._schedule, event)
+
+    def _schedule(self, event: Dict[str, Any]):
+        """Start sending an event; runs on the event loop."""
+        task = self._loop.create_task(self._send(event))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _send(self, event: Dict[str, Any]):
+        if self.redis_client is None:
+            return
+        try:
+            await self.redis_client.publish(PROGRESS_CHANNEL, json.dumps(event))
+        except Exception as e:
+            logger.debug(
+                f"Failed to publish progress of {self.kind} {self.job_id}: {e}"
+            )
+
+
+class ProgressBroker:
+    """Fans progress events out to the event-stream clients of this process.
+
+    One Redis subscription is shared by every client; each gets a bounded
+    queue, and a client that falls behind loses its oldest events rather
+    than slowing the others.
+    """
+
+    def __init__(self, queue_size: int = 256):
+        self.queue_size = queue_size
+        self._queues: Set[asyncio.Queue] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self) -> asyncio.Queue:
+        """Register a client queue, starting the subscription if needed."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._queues.add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._listen())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        """Remove a client queue, stopping the subscription when none remain."""
+        self._queues.discard(queue)
+        if not self._queues and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def publish_local(self, event: Dict[str, Any]):
+        """Deliver an event to every client queue."""
+        for queue in list(self._queues):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    async def close(self):
+        """Stop the subscription."""
+        self._queues.clear()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _listen(self):
+        """Relay events from Redis, resubscribing after connection errors."""
+        while self._queues:
+            try:
+                redis_client = await get_redis_client()
+                async with redis_client.pubsub() as pubsub:
+                    await pubsub.subscribe(PROGRESS_CHANNEL)
+                    async for message in pubsub.listen():
+                        if message.get("type") != "message":
+                            continue
+                        try:
+                            self.publish_local(json.loads(message["data"]))
+                        except ValueError:
+                            logger.warning("Dropped malformed progress event")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Progress subscription failed, retrying: {e}")
+                await asyncio.sleep(1)
+
+
+def coalesce(events: list) -> list:
+    """Keep only the latest event of each job, in arrival order.
+
+    Terminal events are always kept so clients see every job finish.
+    """
+    latest: Dict[Any, Dict[str, Any]] = {}
+    for event in events:
+        key = (event.get("kind"), event.get("id"))
+        previous = latest.get(key)
+        if previous is not None and previous.get("phase") in TERMINAL_PHASES:
+            continue
+        latest.pop(key, None)
+        latest[key] = event
+    return list(latest.values())
+
+
+class ProgressWriter:
+    """Persists the progress of running jobs with coalesced writes.
+
+    Trackers register while their job runs. flush() writes every job whose
+    progress changed since the previous flush in one batched UPDATE per
+    table, so progress tracking costs at most two statements every
+    PROGRESS_PERSIST_INTERVAL_SECONDS however many jobs and updates there
+    are. Only rows still in progress are updated, so a late flush cannot
+    undo a job's final state.
+    """
+
+    def __init__(self, session_factory=None) -> None:
+        self.session_factory = session_factory or AsyncSessionLocal
+        self._trackers: Dict[Tuple[str, int], ProgressTracker] = {}
+        self._written: Dict[Tuple[str, int], int] = {}
+        self._lock = asyncio.Lock()
+
+    def track(self, tracker: ProgressTracker):
+        """Persist a tracker's progress until untracked."""
+        self._trackers[(tracker.kind, tracker.job_id)] = tracker
+
+    def untrack(self, tracker: ProgressTracker):
+        """Stop persisting a tracker's progress."""
+        key = (tracker.kind, tracker.job_id)
+        self._trackers.pop(key, None)
+        self._written.pop(key, None)
+
+    async def flush(self) -> int:
+        """Write progress of running jobs that changed, returning how many."""
+        async with self._lock:
+            rows: Dict[str, List[Dict[str, Any]]] = {BACKUP: [], RESTORE: []}
+            versions: Dict[Tuple[str, int], int] = {}
+            for key, tracker in list(self._trackers.items()):
+                version = tracker.version
+                if self._written.get(key) == version:
+                    continue
+                values = {f"b_{k}": v for k, v in tracker.fields().items()}
+                values["b_id"] = tracker.job_id
+                rows[tracker.kind].append(values)
+                versions[key] = version
+
+            if not versions:
+                return 0
+
+            async with self.session_factory() as db:
+                for kind, model in ((BACKUP, Backup), (RESTORE, RestoreJob)):
+                    if not rows[kind]:
+                        continue
+                    table = model.__table__
+                    statement = (
+                        update(table)
+                        .where(
+                            table.c.id == bindparam("b_id"),
+                            table.c.status == BackupStatus.IN_PROGRESS,
+                        )
+                        .values({column: bindparam(f"b_{column}") for column in FIELDS})
+                    )
+                    await db.execute(statement, rows[kind])
+                await db.commit()
+
+            for key, version in versions.items():
+                if key in self._trackers:
+                    self._written[key] = version
+            return len(versions)
+
+
+def format_event(event: Dict[str, Any]) -> str:
+    """Format a progress event as a server-sent event."""
+    return f"event: progress\ndata: {json.dumps(event)}\n\n"
+
+
+progress_broker = ProgressBroker()
+progress_writer = ProgressWriter()
@@ -0,0 +1,163 @@
+import hashlib
+import logging
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import Request, Response, status
+from pydantic import TypeAdapter
+
+from api.core.config import settings
+from api.core.redis import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+LDAP_SERVERS = "ldap_servers"
+SCHEDULED_BACKUPS = "scheduled_backups"
+SYSTEM_SETTINGS = "system_settings"
+
+VERSION_KEY = "response_cache:version:{resource}"
+BODY_KEY = "response_cache:body:{resource}:{version}:{variant}"
+
+# Clients may keep responses but must revalidate them on every use
+CACHE_CONTROL = "private, no-cache"
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag in tags
+
+
+class ResponseCache:
+    """Versioned cache of serialized responses for low-churn list endpoints.
+
+    Every resource has a version counter in Redis that writes bump. A
+    missing counter is seeded from the clock rather than zero, so after a
+    Redis flush or restart no earlier version, or ETag, is issued again. The
+    ETag is derived from the version, so a client revalidating with
+    If-None-Match gets a 304 after a single Redis read, and a changed
+    version serves the cached body without touching the database until it
+    expires. Without Redis every request is built, and the ETag falls back
+    to a hash of the body.
+    """
+
+    def __init__(self, redis_client=None, ttl: Optional[int] = None):
+        self.redis_client = redis_client
+        self.ttl = ttl or settings.RESPONSE_CACHE_TTL_SECONDS
+
+    async def _redis(self):
+        """Get the Redis client, or None when it is unavailable."""
+        if self.redis_client is not None:
+            return self.redis_client
+        try:
+            return await get_redis_client()
+        except Exception as e:
+            logger.debug(f"Response cache bypassed, Redis unavailable: {e}")
+            return None
+
+    @staticmethod
+    def _seed() -> str:
+        """Get a starting version later than any issued before."""
+        return str(time.time_ns())
+
+    async def invalidate(self, *resources: str):
+        """Bump resource versions after a write."""
+        redis_client = await self._redis()
+        if redis_client is None:
+            return
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for resource in resources:
+                    key = VERSION_KEY.format(resource=resource)
+                    pipe.set(key, self._seed(), nx=True)
+                    pipe.incr(key)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to invalidate cached {resources}: {e}")
+
+    async def respond(
+        self,
+        request: Request,
+        resource: str,
+        response_model: Any,
+        build: Callable[[], Awaitable[Any]],
+        variant: str = "",
+    ) -> Response:
+        """Serve a cached response, a 304, or build and cache a new one.
+
+        ``variant`` distinguishes responses of one resource that differ by
+        query parameters.
+        """
+        variant_hash = hashlib.sha256(variant.encode("utf-8")).hexdigest()[:16]
+        if_none_match = request.headers.get("if-none-match")
+
+        redis_client = await self._redis()
+        version = None
+        if redis_client is not None:
+            version_key = VERSION_KEY.format(resource=resource)
+            try:
+                version = await redis_client.get(version_key)
+                if version is None:
+                    seed = self._seed()
+                    if await redis_client.set(version_key, seed, nx=True):
+                        version = seed
+                    else:
+                        version = await redis_client.get(version_key)
+            except Exception as e:
+                logger.warning(f"Response cache read failed: {e}")
+                redis_client = None
+
+        if redis_client is not None:
+            etag = f'"{resource}-{version}-{variant_hash}"'
+            if _matches(if_none_match, etag):
+                return self._not_modified(etag)
+
+            body_key = BODY_KEY.format(
+                resource=resource, version=version, variant=variant_hash
+            )
+            try:
+                body = await redis_client.get(body_key)
+            except Exception as e:
+                logger.warning(f"Response cache read failed: {e}")
+                body = None
+
+            if body is None:
+                body = await self._serialize(response_model, build)
+                try:
+                    await redis_client.set(body_key, body, ex=self.ttl)
+                except Exception as e:
+                    logger.warning(f"Response cache write failed: {e}")
+        else:
+            body = await self._serialize(response_model, build)
+            etag = f'"{hashlib.sha256(body.encode("utf-8")).hexdigest()[:32]}"'
+            if _matches(if_none_match, etag):
+                return self._not_modified(etag)
+
+        return Response(
+            content=body,
+            media_type="application/json",
+            headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+        )
+
+    @staticmethod
+    async def _serialize(
+        response_model: Any, build: Callable[[], Awaitable[Any]]
+    ) -> str:
+        """Build a response and serialize it like FastAPI would."""
+        adapter = TypeAdapter(response_model)
+        data = adapter.validate_python(await build(), from_attributes=True)
+        return adapter.dump_json(data).decode("utf-8")
+
+    @staticmethod
+    def _not_modified(etag: str) -> Response:
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+        )
+
+
+response_cache = ResponseCache()
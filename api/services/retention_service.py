@@ -0,0 +1,253 @@
+import logging
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.core.config import settings
+from api.models.models import Backup, BackupStatus, RestoreJob, ScheduledBackup
+from api.services.file_reaper import FileReaperService
+
+logger = logging.getLogger(__name__)
+
+# Only finished backups are ever expired
+FINISHED_STATUSES = (BackupStatus.COMPLETED, BackupStatus.FAILED)
+ACTIVE_STATUSES = (BackupStatus.PENDING, BackupStatus.IN_PROGRESS)
+
+
+def _as_utc_naive(value: datetime) -> datetime:
+    """Normalise a timestamp to naive UTC for comparisons."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _week_start(day: date) -> date:
+    """Get the Monday of the ISO week containing a date."""
+    return day - timedelta(days=day.weekday())
+
+
+def _month_index(day: date) -> int:
+    """Get a monotonically increasing month number for a date."""
+    return day.year * 12 + day.month - 1
+
+
+def gfs_window_start(
+    now: datetime,
+    keep_daily: Optional[int] = None,
+    keep_weekly: Optional[int] = None,
+    keep_monthly: Optional[int] = None,
+) -> Optional[datetime]:
+    """Get the oldest timestamp a GFS policy can retain, or None if unset."""
+    today = now.date()
+    starts = []
+    if keep_daily:
+        starts.append(today - timedelta(days=keep_daily - 1))
+    if keep_weekly:
+        starts.append(_week_start(today) - timedelta(weeks=keep_weekly - 1))
+    if keep_monthly:
+        month = _month_index(today) - (keep_monthly - 1)
+        starts.append(date(month // 12, month % 12 + 1, 1))
+
+    if not starts:
+        return None
+    return datetime.combine(min(starts), datetime.min.time())
+
+
+def compute_gfs_retained(
+    backups: Sequence[Tuple[int, datetime]],
+    now: datetime,
+    keep_daily: Optional[int] = None,
+    keep_weekly: Optional[int] = None,
+    keep_monthly: Optional[int] = None,
+) -> Set[int]:
+    """Get backup IDs kept by a grandfather-father-son policy.
+
+    The newest backup in each of the last ``keep_daily`` calendar days,
+    ``keep_weekly`` ISO weeks and ``keep_monthly`` months is retained.
+    """
+    today = now.date()
+    rules = []
+    if keep_daily:
+        rules.append((keep_daily, lambda d: (today - d).days))
+    if keep_weekly:
+        rules.append(
+            (keep_weekly, lambda d: (_week_start(today) - _week_start(d)).days // 7)
+        )
+    if keep_monthly:
+        rules.append((keep_monthly, lambda d: _month_index(today) - _month_index(d)))
+
+    retained: Set[int] = set()
+    newest_first = sorted(backups, key=lambda b: _as_utc_naive(b[1]), reverse=True)
+    for count, bucket_of in rules:
+        seen: Set[int] = set()
+        for backup_id, created_at in newest_first:
+            bucket = bucket_of(_as_utc_naive(created_at).date())
+            if 0 <= bucket < count and bucket not in seen:
+                seen.add(bucket)
+                retained.add(backup_id)
+
+    return retained
+
+
+class RetentionService:
+    """Database-driven backup retention.
+
+    Expirable backups are selected per schedule with indexed queries, so the
+    cost follows the number of expiring backups rather than the size of the
+    backup directory. Backups that a retained incremental depends on, or that
+    are being restored, are never removed.
+    """
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        reaper: Optional[FileReaperService] = None,
+        batch_size: Optional[int] = None,
+    ):
+        self.db = db
+        self.reaper = reaper or FileReaperService()
+        self.batch_size = batch_size or settings.RETENTION_BATCH_SIZE
+
+    async def apply(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Apply retention to every schedule and to unscheduled backups."""
+        now = now or datetime.utcnow()
+        expired: Set[int] = set()
+
+        result = await self.db.execute(select(ScheduledBackup))
+        for schedule in result.scalars().all():
+            expired |= await self.find_expired(schedule, now)
+
+        if settings.BACKUP_RETENTION_DAYS > 0:
+            cutoff = now - timedelta(days=settings.BACKUP_RETENTION_DAYS)
+            result = await self.db.execute(
+                select(Backup.id).where(
+                    Backup.scheduled_backup_id.is_(None),
+                    Backup.created_at < cutoff,
+                    Backup.status.in_(FINISHED_STATUSES),
+                )
+            )
+            expired.update(result.scalars().all())
+
+        expired = await self.protect_dependencies(expired)
+        deleted, files = await self.delete_backups(expired)
+
+        logger.info(f"Retention removed {deleted} backups and {files} files")
+        return {"deleted": deleted, "files_removed": files}
+
+    async def find_expired(self, schedule: ScheduledBackup, now: datetime) -> Set[int]:
+        """Get IDs of a schedule's backups that its policy no longer keeps."""
+        cutoff = now - timedelta(days=schedule.retention_days)
+        result = await self.db.execute(
+            select(Backup.id).where(
+                Backup.scheduled_backup_id == schedule.id,
+                Backup.created_at < cutoff,
+                Backup.status.in_(FINISHED_STATUSES),
+            )
+        )
+        expired: Set[int] = set(result.scalars().all())
+        if not expired:
+            return expired
+
+        if schedule.keep_last:
+            result = await self.db.execute(
+                select(Backup.id)
+                .where(
+                    Backup.scheduled_backup_id == schedule.id,
+                    Backup.status == BackupStatus.COMPLETED,
+                )
+                .order_by(Backup.created_at.desc())
+                .limit(schedule.keep_last)
+            )
+            expired -= set(result.scalars().all())
+
+        window_start = gfs_window_start(
+            now, schedule.keep_daily, schedule.keep_weekly, schedule.keep_monthly
+        )
+        if window_start is not None:
+            result = await self.db.execute(
+                select(Backup.id, Backup.created_at).where(
+                    Backup.scheduled_backup_id == schedule.id,
+                    Backup.created_at >= window_start,
+                    Backup.status == BackupStatus.COMPLETED,
+                )
+            )
+            expired -= compute_gfs_retained(
+                [(row.id, row.created_at) for row in result.all()],
+                now,
+                schedule.keep_daily,
+                schedule.keep_weekly,
+                schedule.keep_monthly,
+            )
+
+        return expired
+
+    async def protect_dependencies(self, expired: Set[int]) -> Set[int]:
+        """Drop backups still needed by retained incrementals or restores."""
+        expired = set(expired)
+
+        for batch in self._batches(expired):
+            result = await self.db.execute(
+                select(RestoreJob.backup_id).where(
+                    RestoreJob.backup_id.in_(batch),
+                    RestoreJob.status.in_(ACTIVE_STATUSES),
+                )
+            )
+            expired -= set(result.scalars().all())
+
+        # A retained child keeps its parent, which may keep its own parent
+        while True:
+            protected = set()
+            for batch in self._batches(expired):
+                result = await self.db.execute(
+                    select(Backup.id, Backup.parent_backup_id).where(
+                        Backup.parent_backup_id.in_(batch)
+                    )
+                )
+                protected.update(
+                    parent_id
+                    for child_id, parent_id in result.all()
+                    if child_id not in expired
+                )
+            if not protected:
+                return expired
+            expired -= protected
+
+    async def delete_backups(self, backup_ids: Iterable[int]) -> Tuple[int, int]:
+        """Delete backup rows and files in batches, newest first."""
+        deleted = 0
+        files_removed = 0
+
+        # Incrementals are newer than their parents, so delete them first
+        for batch in self._batches(sorted(backup_ids, reverse=True)):
+            # Restore jobs are history, so only unlink them from the backup
+            await self.db.execute(
+                update(RestoreJob)
+                .where(RestoreJob.backup_id.in_(batch))
+                .values(backup_id=None)
+                .execution_options(synchronize_session=False)
+            )
+            result = await self.db.execute(
+                delete(Backup)
+                .where(Backup.id.in_(batch))
+                .returning(Backup.file_path, Backup.index_path)
+                .execution_options(synchronize_session=False)
+            )
+            rows = result.all()
+            await self.db.commit()
+
+            deleted += len(rows)
+            file_paths = [path for row in rows for path in row if path]
+            files_removed += await self.reaper.reap(file_paths)
+
+        return deleted, files_removed
+
+    def _batches(self, ids: Iterable[int]) -> List[List[int]]:
+        """Split IDs into lists of at most batch_size."""
+        batches: List[List[int]] = []
+        for backup_id in ids:
+            if not batches or len(batches[-1]) >= self.batch_size:
+                batches.append([])
+            batches[-1].append(backup_id)
+        return batches
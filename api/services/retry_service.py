@@ -0,0 +1,151 @@
+import logging
+import random
+import time
+from typing import Optional
+
+from api.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Sorted set of "<kind>:<id>" members scored by the time they become due
+RETRY_KEY = "job_retry_queue"
+
+# Queue each kind of job is handed back to when due
+QUEUES = {"backup": "backup_queue", "restore": "restore_queue"}
+
+CIRCUIT_FAILURES_KEY = "ldap_circuit:{server_id}:failures"
+CIRCUIT_OPEN_KEY = "ldap_circuit:{server_id}:open"
+CIRCUIT_PROBE_KEY = "ldap_circuit:{server_id}:probe"
+
+
+class RetryPolicy:
+    """Capped exponential backoff with full jitter."""
+
+    def __init__(
+        self,
+        max_attempts: Optional[int] = None,
+        base_delay: Optional[float] = None,
+        max_delay: Optional[float] = None,
+    ):
+        self.max_attempts = max_attempts or settings.JOB_RETRY_MAX_ATTEMPTS
+        self.base_delay = base_delay or settings.JOB_RETRY_BASE_DELAY_SECONDS
+        self.max_delay = max_delay or settings.JOB_RETRY_MAX_DELAY_SECONDS
+
+    def should_retry(self, attempts: int) -> bool:
+        """Check whether a job that failed its attempts-th try gets another."""
+        return attempts < self.max_attempts
+
+    def delay(self, attempts: int) -> float:
+        """Get the delay before the retry following the attempts-th try."""
+        ceiling = min(self.max_delay, self.base_delay * 2 ** max(attempts - 1, 0))
+        return random.uniform(0, ceiling)
+
+
+class RetryQueue:
+    """Delayed job retries in a Redis sorted set shared by all workers.
+
+    Jobs are scheduled with the time they become due and handed back to
+    their normal queue by whichever worker promotes them first.
+    """
+
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+
+    async def schedule(self, kind: str, job_id: int, delay: float):
+        """Queue a job again after a delay."""
+        await self.redis_client.zadd(
+            RETRY_KEY, {f"{kind}:{job_id}": time.time() + delay}
+        )
+
+    async def promote_due(self, now: Optional[float] = None) -> int:
+        """Move due jobs onto their queues, returning how many were moved."""
+        now = time.time() if now is None else now
+        due = await self.redis_client.zrangebyscore(RETRY_KEY, "-inf", now)
+
+        promoted = 0
+        for member in due:
+            # Only the worker whose ZREM succeeds hands the job back
+            if not await self.redis_client.zrem(RETRY_KEY, member):
+                continue
+            kind, job_id = member.split(":", 1)
+            queue = QUEUES.get(kind)
+            if queue is None:
+                logger.warning(f"Dropped retry of unknown job kind: {member}")
+                continue
+            await self.redis_client.rpush(queue, job_id)
+            promoted += 1
+        return promoted
+
+
+class CircuitBreaker:
+    """Per-LDAP-server circuit breaker shared by all workers through Redis.
+
+    CIRCUIT_FAILURE_THRESHOLD transient failures within the failure window
+    open the circuit for CIRCUIT_OPEN_SECONDS, during which jobs for the
+    server are deferred instead of run. After that a single job is let
+    through as a probe: success closes the circuit, failure opens it again.
+    """
+
+    def __init__(
+        self,
+        redis_client,
+        threshold: Optional[int] = None,
+        window: Optional[int] = None,
+        open_seconds: Optional[int] = None,
+    ):
+        self.redis_client = redis_client
+        self.threshold = threshold or settings.CIRCUIT_FAILURE_THRESHOLD
+        self.window = window or settings.CIRCUIT_FAILURE_WINDOW_SECONDS
+        self.open_seconds = open_seconds or settings.CIRCUIT_OPEN_SECONDS
+
+    async def allow(self, server_id: int) -> Optional[float]:
+        """Check whether a job may run against a server.
+
+        Returns None when it may, otherwise the seconds until it should be
+        tried again.
+        """
+        open_ttl = await self.redis_client.ttl(
+            CIRCUIT_OPEN_KEY.format(server_id=server_id)
+        )
+        if open_ttl and open_ttl > 0:
+            return float(open_ttl)
+
+        failures = await self.redis_client.get(
+            CIRCUIT_FAILURES_KEY.format(server_id=server_id)
+        )
+        if failures is None or int(failures) < self.threshold:
+            return None
+
+        # Half-open: one job probes the server, the rest wait for it
+        acquired = await self.redis_client.set(
+            CIRCUIT_PROBE_KEY.format(server_id=server_id),
+            "1",
+            nx=True,
+            ex=self.open_seconds,
+        )
+        return None if acquired else float(self.open_seconds)
+
+    async def record_success(self, server_id: int):
+        """Close the circuit after a job got through to the server."""
+        await self.redis_client.delete(
+            CIRCUIT_FAILURES_KEY.format(server_id=server_id),
+            CIRCUIT_OPEN_KEY.format(server_id=server_id),
+            CIRCUIT_PROBE_KEY.format(server_id=server_id),
+        )
+
+    async def record_failure(self, server_id: int) -> bool:
+        """Count a transient failure, returning True if the circuit opened."""
+        failures_key = CIRCUIT_FAILURES_KEY.format(server_id=server_id)
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.incr(failures_key)
+            pipe.expire(failures_key, self.window + self.open_seconds)
+            failures, _ = await pipe.execute()
+
+        if failures < self.threshold:
+            return False
+
+        await self.redis_client.set(
+            CIRCUIT_OPEN_KEY.format(server_id=server_id), "1", ex=self.open_seconds
+        )
+        await self.redis_client.delete(CIRCUIT_PROBE_KEY.format(server_id=server_id))
+        return True
@@ -0,0 +1,386 @@
+import logging
+import os
+import shutil
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+
+from api.core.config import settings
+
+try:
+    import boto3
+    from botocore.config import Config as BotoConfig
+except ImportError:  # pragma: no cover - boto3 is only needed for S3 storage
+    boto3 = None
+    BotoConfig = None
+
+logger = logging.getLogger(__name__)
+
+S3_SCHEME = "s3://"
+
+# S3 rejects multipart parts smaller than 5 MiB (except the last one)
+S3_MIN_PART_SIZE = 5 * 1024 * 1024
+
+
+def parse_byte_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single-range HTTP Range header into inclusive offsets.
+
+    Returns None when the header is absent or not a single byte range (the
+    full content is served then), and raises ValueError when the range cannot
+    be satisfied.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+
+    first, sep, last = header.removeprefix("bytes=").strip().partition("-")
+    if not sep or not (first.isdigit() or last.isdigit()):
+        return None
+    if first and last and not (first.isdigit() and last.isdigit()):
+        return None
+
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("Unsatisfiable range")
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("Unsatisfiable range")
+    return start, end
+
+
+class StorageBackend(ABC):
+    """Where finished backup artifacts are kept.
+
+    Backups are produced in a local scratch directory (BACKUP_DIR) and then
+    handed to the backend, which returns a location string stored in
+    ``Backup.file_path``.
+    """
+
+    @abstractmethod
+    def store(self, local_path: str, name: str) -> str:
+        """Persist a local file and return its location."""
+
+    @abstractmethod
+    def fetch(self, location: str, local_path: str) -> str:
+        """Make a stored artifact available locally and return its path."""
+
+    @abstractmethod
+    def delete(self, location: str) -> bool:
+        """Delete a stored artifact. Returns False if it did not exist."""
+
+    @abstractmethod
+    def size(self, location: str) -> int:
+        """Get the size of a stored artifact in bytes."""
+
+    @abstractmethod
+    def iter_range(
+        self, location: str, start: int = 0, end: Optional[int] = None
+    ) -> Iterator[bytes]:
+        """Yield the bytes of an artifact from start to end (inclusive)."""
+
+    def is_local(self, location: str) -> bool:
+        """Whether the location is a path on this host's filesystem."""
+        return False
+
+
+class LocalStorageBackend(StorageBackend):
+    """Backups kept on a local or shared filesystem under BACKUP_DIR."""
+
+    def __init__(self, base_dir: Optional[str] = None, chunk_size: int = 1024 * 1024):
+        self.base_dir = base_dir or settings.BACKUP_DIR
+        self.chunk_size = chunk_size
+
+    def store(self, local_path: str, name: str) -> str:
+        """Move a file into the backup directory if it is not already there."""
+        target = os.path.join(self.base_dir, name)
+        if os.path.abspath(local_path) != os.path.abspath(target):
+            os.makedirs(self.base_dir, exist_ok=True)
+            shutil.move(local_path, target)
+        return target
+
+    def fetch(self, location: str, local_path: str) -> str:
+        """Local artifacts are read in place."""
+        return location
+
+    def delete(self, location: str) -> bool:
+        """Remove a file."""
+        try:
+            os.unlink(location)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def size(self, location: str) -> int:
+        """Get file size in bytes."""
+        return os.path.getsize(location)
+
+    def iter_range(
+        self, location: str, start: int = 0, end: Optional[int] = None
+    ) -> Iterator[bytes]:
+        """Read a byte range of a file in chunks."""
+        remaining = None if end is None else end - start + 1
+        with open(location, "rb") as f:
+            f.seek(start)
+            while remaining is None or remaining > 0:
+                size = self.chunk_size
+                if remaining is not None:
+                    size = min(size, remaining)
+                chunk = f.read(size)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    def is_local(self, location: str) -> bool:
+        """Local artifacts are plain paths."""
+        return True
+
+
+class S3MultipartWriter:
+    """File-like writer that streams into an S3 multipart upload.
+
+    Parts are uploaded in parallel on a thread pool while the caller keeps
+    writing. At most ``max_concurrency`` parts are buffered or in flight, so
+    memory use is bounded by ``part_size * max_concurrency``.
+    """
+
+    def __init__(
+        self, client, bucket: str, key: str, part_size: int, max_concurrency: int
+    ):
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = max(part_size, S3_MIN_PART_SIZE)
+        self._buffer = bytearray()
+        self._upload_id: Optional[str] = None
+        self._part_number = 0
+        self._futures: List[Future] = []
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="s3-upload"
+        )
+
+    def write(self, data: bytes) -> int:
+        """Buffer data and upload every complete part."""
+        self._buffer.extend(data)
+        while len(self._buffer) >= self.part_size:
+            self._submit_part(bytes(self._buffer[: self.part_size]))
+            del self._buffer[: self.part_size]
+        return len(data)
+
+    def close(self):
+        """Upload the final part and complete the upload."""
+        try:
+            if self._upload_id is None:
+                # Small artifact: a single PUT is cheaper than a multipart upload
+                self.client.put_object(
+                    Bucket=self.bucket, Key=self.key, Body=bytes(self._buffer)
+                )
+                return
+
+            if self._buffer:
+                self._submit_part(bytes(self._buffer))
+                self._buffer.clear()
+
+            parts = [future.result() for future in self._futures]
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=self.key,
+                UploadId=self._upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+        except Exception:
+            self.abort()
+            raise
+        finally:
+            self._executor.shutdown(wait=True)
+
+    def abort(self):
+        """Abort the multipart upload and discard uploaded parts."""
+        for future in self._futures:
+            future.cancel()
+        if self._upload_id is not None:
+            try:
+                self.client.abort_multipart_upload(
+                    Bucket=self.bucket, Key=self.key, UploadId=self._upload_id
+                )
+            except Exception as e:
+                logger.error(f"Failed to abort upload of {self.key}: {str(e)}")
+            self._upload_id = None
+        self._executor.shutdown(wait=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _submit_part(self, body: bytes):
+        """Queue one part for upload, waiting if too many are in flight."""
+        if self._upload_id is None:
+            response = self.client.create_multipart_upload(
+                Bucket=self.bucket, Key=self.key
+            )
+            self._upload_id = response["UploadId"]
+
+        self._slots.acquire()
+        self._part_number += 1
+        self._futures.append(
+            self._executor.submit(self._upload_part, self._part_number, body)
+        )
+
+    def _upload_part(self, part_number: int, body: bytes) -> dict:
+        """Upload one part and release its slot."""
+        try:
+            response = self.client.upload_part(
+                Bucket=self.bucket,
+                Key=self.key,
+                UploadId=self._upload_id,
+                PartNumber=part_number,
+                Body=body,
+            )
+            return {"PartNumber": part_number, "ETag": response["ETag"]}
+        finally:
+            self._slots.release()
+
+
+class S3StorageBackend(StorageBackend):
+    """Backups kept in an S3-compatible object store (AWS S3, MinIO, Ceph)."""
+
+    def __init__(
+        self,
+        bucket: Optional[str] = None,
+        prefix: Optional[str] = None,
+        client=None,
+        part_size: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+    ):
+        self.bucket = bucket or settings.S3_BUCKET
+        self.prefix = settings.S3_PREFIX if prefix is None else prefix
+        self.part_size = part_size or settings.S3_PART_SIZE_MB * 1024 * 1024
+        self.max_concurrency = max_concurrency or settings.S3_MAX_CONCURRENCY
+        self.client = client or self._create_client()
+
+    def _create_client(self):
+        """Create a boto3 S3 client from settings."""
+        if boto3 is None:
+            raise RuntimeError("boto3 is required for S3 storage")
+        return boto3.client(
+            "s3",
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            region_name=settings.S3_REGION,
+            aws_access_key_id=settings.S3_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+            config=BotoConfig(max_pool_connections=self.max_concurrency * 2),
+        )
+
+    def location(self, key: str) -> str:
+        """Build a location string for an object key."""
+        return f"{S3_SCHEME}{self.bucket}/{key}"
+
+    def parse_location(self, location: str) -> Tuple[str, str]:
+        """Split a location string into bucket and key."""
+        bucket, _, key = location.removeprefix(S3_SCHEME).partition("/")
+        return bucket, key
+
+    def open_writer(self, name: str) -> S3MultipartWriter:
+        """Open a streaming multipart writer for a new object."""
+        return S3MultipartWriter(
+            self.client,
+            self.bucket,
+            f"{self.prefix}{name}",
+            self.part_size,
+            self.max_concurrency,
+        )
+
+    def store(self, local_path: str, name: str) -> str:
+        """Stream a local file into the bucket and remove the local copy."""
+        with open(local_path, "rb") as f:
+            self.upload_stream(f, name)
+        os.remove(local_path)
+        return self.location(f"{self.prefix}{name}")
+
+    def upload_stream(self, stream: BinaryIO, name: str) -> str:
+        """Stream any binary file object into a multipart upload."""
+        with self.open_writer(name) as writer:
+            shutil.copyfileobj(stream, writer, length=writer.part_size)
+        return self.location(f"{self.prefix}{name}")
+
+    def fetch(self, location: str, local_path: str) -> str:
+        """Download an object with parallel ranged GETs."""
+        bucket, key = self.parse_location(location)
+        size = self.size(location)
+
+        with open(local_path, "wb") as f:
+            f.truncate(size)
+
+        fd = os.open(local_path, os.O_WRONLY)
+        try:
+
+            def fetch_range(start: int):
+                end = min(start + self.part_size, size) - 1
+                response = self.client.get_object(
+                    Bucket=bucket, Key=key, Range=f"bytes={start}-{end}"
+                )
+                os.pwrite(fd, response["Body"].read(), start)
+
+            with ThreadPoolExecutor(
+                max_workers=self.max_concurrency, thread_name_prefix="s3-download"
+            ) as executor:
+                list(executor.map(fetch_range, range(0, size, self.part_size)))
+        finally:
+            os.close(fd)
+
+        return local_path
+
+    def delete(self, location: str) -> bool:
+        """Delete an object."""
+        bucket, key = self.parse_location(location)
+        self.client.delete_object(Bucket=bucket, Key=key)
+        return True
+
+    def size(self, location: str) -> int:
+        """Get object size in bytes."""
+        bucket, key = self.parse_location(location)
+        return self.client.head_object(Bucket=bucket, Key=key)["ContentLength"]
+
+    def iter_range(
+        self, location: str, start: int = 0, end: Optional[int] = None
+    ) -> Iterator[bytes]:
+        """Stream a byte range of an object with a ranged GET."""
+        bucket, key = self.parse_location(location)
+        byte_range = f"bytes={start}-" if end is None else f"bytes={start}-{end}"
+        response = self.client.get_object(Bucket=bucket, Key=key, Range=byte_range)
+        yield from response["Body"].iter_chunks(chunk_size=1024 * 1024)
+
+    def presigned_url(self, location: str, expires_in: int = 300) -> str:
+        """Create a temporary download URL for an object."""
+        bucket, key = self.parse_location(location)
+        return self.client.generate_presigned_url(
+            "get_object", Params={"Bucket": bucket, "Key": key}, ExpiresIn=expires_in
+        )
+
+
+@lru_cache(maxsize=None)
+def _get_backend(kind: str) -> StorageBackend:
+    """Create one backend instance per kind."""
+    if kind == "s3":
+        return S3StorageBackend()
+    return LocalStorageBackend()
+
+
+def get_storage_backend(location: Optional[str] = None) -> StorageBackend:
+    """Get the backend for an existing location, or the configured one."""
+    if location is not None:
+        return _get_backend("s3" if location.startswith(S3_SCHEME) else "local")
+    return _get_backend(settings.STORAGE_BACKEND)
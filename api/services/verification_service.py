@@ -0,0 +1,252 @@
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.core.config import settings
+from api.models.models import Backup, BackupStatus, VerificationStatus
+from api.services.backup_index import iter_ldif_records, parse_ldif_record
+from api.services.backup_service import BackupService
+from api.services.metrics_service import MetricsService
+from api.services.storage_service import get_storage_backend
+
+logger = logging.getLogger(__name__)
+
+
+class BackupCorruptError(Exception):
+    """A backup artifact failed its integrity checks."""
+
+
+class IORateLimiter:
+    """Limit the bytes per second read by any number of threads."""
+
+    def __init__(self, bytes_per_second: int):
+        self.bytes_per_second = bytes_per_second
+        self._lock = threading.Lock()
+        self._next_slot = time.monotonic()
+
+    def consume(self, size: int):
+        """Account for bytes just read, sleeping to stay within budget."""
+        if self.bytes_per_second <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._next_slot = max(now, self._next_slot) + size / self.bytes_per_second
+            delay = self._next_slot - now
+        time.sleep(delay)
+
+    def limit(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Rate limit a chunk stream."""
+        for chunk in chunks:
+            self.consume(len(chunk))
+            yield chunk
+
+
+def _iter_lines(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Split a byte stream into lines."""
+    pending = b""
+    for chunk in chunks:
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line + b"\n"
+    if pending:
+        yield pending
+
+
+def check_artifact(
+    chunks: Iterable[bytes],
+    encrypted: bool,
+    compressed: bool,
+    checksum: Optional[str] = None,
+    content_checksum: Optional[str] = None,
+    output: Optional[BinaryIO] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> Dict[str, Any]:
+    """Decrypt, decompress and parse a backup artifact in one streaming pass.
+
+    Checks the artifact and plain LDIF against their recorded SHA-256
+    checksums when known, and optionally writes the plain LDIF to
+    ``output``. ``progress`` gets the entries parsed and artifact bytes read
+    after every chunk. Raises BackupCorruptError if any step fails.
+    """
+    artifact_hash = hashlib.sha256()
+    content_hash = hashlib.sha256()
+    bytes_read = 0
+    entries = 0
+
+    def artifact() -> Iterator[bytes]:
+        nonlocal bytes_read
+        for chunk in chunks:
+            artifact_hash.update(chunk)
+            bytes_read += len(chunk)
+            if progress:
+                progress(entries, bytes_read)
+            yield chunk
+
+    def content() -> Iterator[bytes]:
+        decoded = BackupService().iter_decoded(artifact(), encrypted, compressed)
+        for chunk in decoded:
+            content_hash.update(chunk)
+            if output is not None:
+                output.write(chunk)
+            yield chunk
+
+    try:
+        for _, record in iter_ldif_records(_iter_lines(content())):
+            if not parse_ldif_record(record)[0]:
+                raise BackupCorruptError(f"LDIF record {entries + 1} has no DN")
+            entries += 1
+    except BackupCorruptError:
+        raise
+    except Exception as e:
+        raise BackupCorruptError(f"Backup could not be decoded: {str(e)}")
+
+    if checksum and artifact_hash.hexdigest() != checksum:
+        raise BackupCorruptError("Backup file checksum mismatch")
+    if content_checksum and content_hash.hexdigest() != content_checksum:
+        raise BackupCorruptError("Backup content checksum mismatch")
+
+    return {
+        "entries": entries,
+        "bytes_read": bytes_read,
+        "checksum": artifact_hash.hexdigest(),
+        "content_checksum": content_hash.hexdigest(),
+    }
+
+
+class BackupVerifier:
+    """Background integrity scanning of stored backups.
+
+    Backups that were never verified, or not within VERIFY_MAX_AGE_HOURS, are
+    re-read from storage with bounded parallelism and a shared IO budget, and
+    flagged corrupt when they no longer decrypt, decompress, parse or match
+    their checksums.
+    """
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        concurrency: Optional[int] = None,
+        io_budget_mb: Optional[float] = None,
+        batch_size: Optional[int] = None,
+    ):
+        self.db = db
+        self.concurrency = concurrency or settings.VERIFY_CONCURRENCY
+        self.batch_size = batch_size or settings.VERIFY_BATCH_SIZE
+        budget = settings.VERIFY_IO_BUDGET_MB if io_budget_mb is None else io_budget_mb
+        self.limiter = IORateLimiter(int(budget * 1024 * 1024))
+
+    async def find_due(self, now: datetime):
+        """Get completed backups due for verification, least recent first."""
+        cutoff = now - timedelta(hours=settings.VERIFY_MAX_AGE_HOURS)
+        result = await self.db.execute(
+            select(Backup)
+            .where(
+                Backup.status == BackupStatus.COMPLETED,
+                Backup.file_path.isnot(None),
+                or_(Backup.verified_at.is_(None), Backup.verified_at < cutoff),
+            )
+            .order_by(Backup.verified_at.asc().nulls_first())
+            .limit(self.batch_size)
+        )
+        return result.scalars().all()
+
+    def verify_file(
+        self,
+        location: str,
+        encrypted: bool,
+        compressed: bool,
+        checksum: Optional[str],
+        content_checksum: Optional[str],
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Verify one artifact. Returns the outcome and its details.
+
+        The outcome is "verified", "corrupt", or "error" when the artifact
+        could not be read for reasons unrelated to its content.
+        """
+        storage = get_storage_backend(location)
+        if storage.is_local(location):
+            try:
+                storage.size(location)
+            except FileNotFoundError:
+                return "corrupt", {"error": "Backup file is missing"}
+
+        try:
+            details = check_artifact(
+                self.limiter.limit(storage.iter_range(location)),
+                encrypted,
+                compressed,
+                checksum,
+                content_checksum,
+            )
+            return "verified", details
+        except BackupCorruptError as e:
+            return "corrupt", {"error": str(e)}
+        except Exception as e:
+            return "error", {"error": str(e)}
+
+    async def run(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Verify one batch of due backups and record the outcomes."""
+        now = now or datetime.now(timezone.utc)
+        backups = await self.find_due(now)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def verify(backup: Backup) -> Tuple[Backup, str, Dict[str, Any]]:
+            async with semaphore:
+                started = time.monotonic()
+                outcome, details = await asyncio.to_thread(
+                    self.verify_file,
+                    backup.file_path,
+                    backup.encrypted,
+                    backup.compression_enabled,
+                    backup.checksum,
+                    backup.content_checksum,
+                )
+                MetricsService.record_backup_verification(
+                    outcome, time.monotonic() - started, details.get("bytes_read", 0)
+                )
+                return backup, outcome, details
+
+        stats = {"verified": 0, "corrupt": 0, "errors": 0}
+        for backup, outcome, details in await asyncio.gather(
+            *(verify(backup) for backup in backups)
+        ):
+            if outcome == "error":
+                stats["errors"] += 1
+                logger.warning(
+                    f"Could not verify backup {backup.id}: {details['error']}"
+                )
+                continue
+
+            backup.verified_at = now
+            if outcome == "verified":
+                stats["verified"] += 1
+                backup.verification_status = VerificationStatus.VERIFIED
+                backup.verification_error = None
+                # Backups from before checksums were recorded get them now
+                backup.checksum = backup.checksum or details["checksum"]
+                backup.content_checksum = (
+                    backup.content_checksum or details["content_checksum"]
+                )
+            else:
+                stats["corrupt"] += 1
+                backup.verification_status = VerificationStatus.CORRUPT
+                backup.verification_error = details["error"]
+                logger.error(f"Backup {backup.id} is corrupt: {details['error']}")
+
+        await self.db.commit()
+
+        corrupt = await self.db.scalar(
+            select(func.count(Backup.id)).where(
+                Backup.verification_status == VerificationStatus.CORRUPT
+            )
+        )
+        MetricsService.set_corrupt_backups(corrupt or 0)
+        return stats
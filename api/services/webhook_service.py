@@ -1,23 +1,396 @@
+import asyncio
+import hashlib
+import hmac
+import json
 import logging
-from typing import Any, Dict
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from fnmatch import fnmatchcase
+from typing import Any, Dict, List, Optional, Set
 
 import httpx
 
 from api.core.config import settings
+from api.services.metrics_service import MetricsService
+from api.services.retry_service import RetryPolicy
+from api.services.worker_registry import WORKER_ID
+
+try:
+    import h2  # noqa: F401
+except ImportError:  # pragma: no cover - h2 is only needed for HTTP/2
+    h2 = None
 
 logger = logging.getLogger(__name__)
 
+# Redis list of deliveries waiting to be sent, one event for one endpoint each
+WEBHOOK_QUEUE = "webhook_queue"
+# Redis list of deliveries claimed by a worker and not yet acknowledged; each
+# worker has its own, "<WEBHOOK_PROCESSING>:<worker id>"
+WEBHOOK_PROCESSING = "webhook_processing"
+# Sorted set of failed deliveries scored by the time they are retried
+WEBHOOK_RETRY_KEY = "webhook_retry_queue"
+# Redis list of deliveries that exhausted their attempts, newest last
+WEBHOOK_DEAD_LETTER = "webhook_dead_letter"
+
+SIGNATURE_HEADER = "X-LDAPGuard-Signature"
+TIMESTAMP_HEADER = "X-LDAPGuard-Timestamp"
+EVENT_HEADER = "X-LDAPGuard-Event"
+DELIVERY_HEADER = "X-LDAPGuard-Delivery"
+
+# Responses worth retrying; other client errors are dead-lettered at once
+RETRYABLE_STATUSES = {408, 425, 429}
+
+
+@dataclass
+class Subscription:
+    """An endpoint and the events it receives."""
+
+    url: str
+    events: List[str] = field(default_factory=lambda: ["*"])
+    secret: Optional[str] = None
+    batch_size: int = 1  # Above 1, events are posted as {"events": [...]}
+
+    def matches(self, event: str) -> bool:
+        """Check whether an event name matches one of the patterns."""
+        return any(fnmatchcase(event, pattern) for pattern in self.events)
+
+
+def load_subscriptions() -> List[Subscription]:
+    """Build the subscriptions from settings.
+
+    WEBHOOK_URL subscribes to every event; WEBHOOK_SUBSCRIPTIONS adds a
+    JSON list of {"url", "events", "secret", "batch_size"} objects.
+    """
+    if not settings.WEBHOOK_ENABLED:
+        return []
+
+    subscriptions = []
+    if settings.WEBHOOK_URL:
+        subscriptions.append(
+            Subscription(
+                settings.WEBHOOK_URL,
+                secret=settings.WEBHOOK_SECRET,
+                batch_size=settings.WEBHOOK_BATCH_SIZE,
+            )
+        )
+
+    if settings.WEBHOOK_SUBSCRIPTIONS:
+        try:
+            entries = json.loads(settings.WEBHOOK_SUBSCRIPTIONS)
+            for entry in entries:
+                subscriptions.append(
+                    Subscription(
+                        entry["url"],
+                        events=entry.get("events") or ["*"],
+                        secret=entry.get("secret"),
+                        batch_size=entry.get("batch_size")
+                        or settings.WEBHOOK_BATCH_SIZE,
+                    )
+                )
+        except (ValueError, TypeError, KeyError) as e:
+            logger.error(f"Ignoring invalid WEBHOOK_SUBSCRIPTIONS: {e}")
+
+    return subscriptions
+
+
+def sign(secret: str, timestamp: str, body: bytes) -> str:
+    """Sign a request body, binding it to its timestamp against replays."""
+    message = timestamp.encode() + b"." + body
+    digest = hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+
+class WebhookDeliveryError(Exception):
+    """A delivery attempt failed."""
+
+    def __init__(self, message: str, retryable: bool, retry_after: float = 0):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+class WebhookDispatcher:
+    """Delivers queued webhook events over one pooled HTTP client.
+
+    Deliveries are claimed from Redis in batches, by moving them to the
+    worker's own processing list, and posted concurrently, with the events for an
+    endpoint combined up to its batch size. Failed deliveries are retried
+    with jittered backoff through a Redis sorted set and dead-lettered
+    after WEBHOOK_MAX_ATTEMPTS. A batch is only dropped from the processing
+    list once it was sent or its retries were scheduled, so nothing is lost
+    across crashes and a slow receiver only ever delays its own events.
+    """
+
+    def __init__(
+        self,
+        redis_client=None,
+        subscriptions: Optional[List[Subscription]] = None,
+        policy: Optional[RetryPolicy] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        worker_id: str = WORKER_ID,
+    ):
+        self.redis_client = redis_client
+        self.processing = f"{WEBHOOK_PROCESSING}:{worker_id}"
+        self.subscriptions = (
+            load_subscriptions() if subscriptions is None else subscriptions
+        )
+        self.policy = policy or RetryPolicy(
+            settings.WEBHOOK_MAX_ATTEMPTS,
+            settings.WEBHOOK_RETRY_BASE_DELAY_SECONDS,
+            settings.WEBHOOK_RETRY_MAX_DELAY_SECONDS,
+        )
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._background: Set[asyncio.Task] = set()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get the shared client, creating it on first use."""
+        if self._client is None:
+            http2 = settings.WEBHOOK_HTTP2 and h2 is not None
+            if settings.WEBHOOK_HTTP2 and not http2:
+                logger.warning("h2 is not installed, webhooks will use HTTP/1.1")
+            self._client = httpx.AsyncClient(
+                http2=http2,
+                timeout=settings.WEBHOOK_TIMEOUT_SECONDS,
+                limits=httpx.Limits(
+                    max_connections=settings.WEBHOOK_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.WEBHOOK_MAX_CONNECTIONS,
+                ),
+                transport=self.transport,
+            )
+        return self._client
+
+    async def close(self):
+        """Wait for background deliveries and close the client."""
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def enqueue(self, payload: Dict[str, Any]) -> int:
+        """Queue an event for every subscription that wants it.
+
+        Without Redis the event is sent once in the background instead.
+        Returns the number of deliveries created.
+        """
+        payload.setdefault("id", str(uuid.uuid4()))
+        deliveries = [
+            {"url": subscription.url, "event": payload, "attempts": 0}
+            for subscription in self.subscriptions
+            if subscription.matches(payload["event"])
+        ]
+        if not deliveries:
+            return 0
+
+        if self.redis_client is None:
+            task = asyncio.create_task(self.deliver(deliveries))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+            return len(deliveries)
+
+        await self.redis_client.rpush(
+            WEBHOOK_QUEUE, *(json.dumps(delivery) for delivery in deliveries)
+        )
+        return len(deliveries)
+
+    async def promote_due(self, now: Optional[float] = None) -> int:
+        """Move deliveries whose retry delay has passed back onto the queue."""
+        now = time.time() if now is None else now
+        due = await self.redis_client.zrangebyscore(WEBHOOK_RETRY_KEY, "-inf", now)
+
+        promoted = 0
+        for member in due:
+            # Only the worker whose ZREM succeeds requeues the delivery
+            if await self.redis_client.zrem(WEBHOOK_RETRY_KEY, member):
+                await self.redis_client.rpush(WEBHOOK_QUEUE, member)
+                promoted += 1
+        return promoted
+
+    async def process_queue(self, batch_size: Optional[int] = None) -> int:
+        """Send one batch of queued deliveries, returning how many were claimed."""
+        if self.redis_client is None:
+            return 0
+
+        await self.promote_due()
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            for _ in range(batch_size or settings.WEBHOOK_QUEUE_BATCH_SIZE):
+                pipe.lmove(WEBHOOK_QUEUE, self.processing, "LEFT", "RIGHT")
+            claimed = await pipe.execute()
+        raw: List[str] = [item for item in claimed if item is not None]
+        if not raw:
+            return 0
+
+        deliveries = []
+        for item in raw:
+            try:
+                deliveries.append(json.loads(item))
+            except ValueError:
+                logger.warning("Dropped malformed webhook delivery")
+        await self.deliver(deliveries)
+
+        # Every delivery was sent, scheduled for retry or dead-lettered
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            for item in raw:
+                pipe.lrem(self.processing, 1, item)
+            await pipe.execute()
+        return len(raw)
+
+    async def requeue_in_flight(self, worker_id: str) -> int:
+        """Queue again the deliveries a stopped worker had claimed."""
+        if self.redis_client is None:
+            return 0
+
+        processing = f"{WEBHOOK_PROCESSING}:{worker_id}"
+        count = 0
+        while await self.redis_client.lmove(processing, WEBHOOK_QUEUE, "RIGHT", "LEFT"):
+            count += 1
+        if count:
+            logger.info(
+                f"Requeued {count} webhook deliveries left by stopped worker "
+                f"{worker_id}"
+            )
+        return count
+
+    async def run(self):
+        """Send queued deliveries until cancelled."""
+        while True:
+            try:
+                popped = await self.process_queue()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error processing webhook queue: {e}")
+                popped = 0
+            if not popped:
+                await asyncio.sleep(settings.WEBHOOK_POLL_INTERVAL_SECONDS)
+
+    async def deliver(self, deliveries: List[Dict[str, Any]]):
+        """Post deliveries concurrently, batching those for the same endpoint."""
+        by_url: Dict[str, List[Dict[str, Any]]] = {}
+        for delivery in deliveries:
+            by_url.setdefault(delivery["url"], []).append(delivery)
+
+        subscriptions = {s.url: s for s in self.subscriptions}
+        sends = []
+        for url, pending in by_url.items():
+            subscription = subscriptions.get(url)
+            if subscription is None:
+                logger.warning(
+                    f"Dropped {len(pending)} webhook events for removed "
+                    f"subscription {url}"
+                )
+                continue
+            size = max(subscription.batch_size, 1)
+            for start in range(0, len(pending), size):
+                end = start + size
+                sends.append(self._send(subscription, pending[start:end]))
+
+        await asyncio.gather(*sends)
+
+    async def _send(self, subscription: Subscription, batch: List[Dict[str, Any]]):
+        """Post one batch, scheduling a retry or dead-lettering on failure."""
+        try:
+            await self._post(subscription, [delivery["event"] for delivery in batch])
+            MetricsService.record_webhook_deliveries("delivered", len(batch))
+            logger.info(f"Webhook sent to {subscription.url}: {len(batch)} events")
+        except WebhookDeliveryError as e:
+            for delivery in batch:
+                await self._fail(delivery, e)
+
+    async def _post(self, subscription: Subscription, events: List[Dict[str, Any]]):
+        """Post events to an endpoint, raising WebhookDeliveryError on failure."""
+        if subscription.batch_size > 1:
+            body = json.dumps({"events": events}).encode()
+            headers = {EVENT_HEADER: "batch"}
+        else:
+            body = json.dumps(events[0]).encode()
+            headers = {EVENT_HEADER: events[0]["event"]}
+            if "id" in events[0]:
+                headers[DELIVERY_HEADER] = str(events[0]["id"])
+
+        headers["Content-Type"] = "application/json"
+        if subscription.secret:
+            timestamp = str(int(time.time()))
+            headers[TIMESTAMP_HEADER] = timestamp
+            headers[SIGNATURE_HEADER] = sign(subscription.secret, timestamp, body)
+
+        try:
+            response = await self._get_client().post(
+                subscription.url, content=body, headers=headers
+            )
+        except httpx.HTTPError as e:
+            raise WebhookDeliveryError(str(e) or type(e).__name__, retryable=True)
+
+        if response.is_success:
+            return
+
+        retry_after = 0.0
+        try:
+            retry_after = float(response.headers.get("Retry-After", 0))
+        except ValueError:
+            pass
+        raise WebhookDeliveryError(
+            f"HTTP {response.status_code}",
+            retryable=response.status_code >= 500
+            or response.status_code in RETRYABLE_STATUSES,
+            retry_after=retry_after,
+        )
+
+    async def _fail(self, delivery: Dict[str, Any], error: WebhookDeliveryError):
+        """Retry a failed delivery later, or dead-letter it."""
+        delivery["attempts"] = delivery.get("attempts", 0) + 1
+        delivery["error"] = str(error)
+        event = delivery["event"].get("event")
+
+        if self.redis_client is None:
+            logger.error(
+                f"Failed to send webhook {event} to {delivery['url']}: {error}"
+            )
+            MetricsService.record_webhook_deliveries("dropped")
+            return
+
+        if error.retryable and self.policy.should_retry(delivery["attempts"]):
+            delay = max(self.policy.delay(delivery["attempts"]), error.retry_after)
+            await self.redis_client.zadd(
+                WEBHOOK_RETRY_KEY, {json.dumps(delivery): time.time() + delay}
+            )
+            MetricsService.record_webhook_deliveries("retried")
+            logger.warning(
+                f"Webhook {event} to {delivery['url']} failed "
+                f"(attempt {delivery['attempts']}), retrying in {delay:.0f}s: {error}"
+            )
+            return
+
+        await self.redis_client.rpush(WEBHOOK_DEAD_LETTER, json.dumps(delivery))
+        await self.redis_client.ltrim(
+            WEBHOOK_DEAD_LETTER, -settings.WEBHOOK_DEAD_LETTER_SIZE, -1
+        )
+        MetricsService.record_webhook_deliveries("dead_lettered")
+        logger.error(
+            f"Webhook {event} to {delivery['url']} dead-lettered after "
+            f"{delivery['attempts']} attempts: {error}"
+        )
+
 
 class WebhookService:
-    """Service for sending webhook notifications."""
+    """Service for sending webhook notifications.
+
+    Events are only queued here; the worker's dispatcher delivers them, so
+    jobs never wait on a receiver.
+    """
 
-    def __init__(self):
+    def __init__(self, redis_client=None):
         self.enabled = settings.WEBHOOK_ENABLED
-        self.url = settings.WEBHOOK_URL
+        self.dispatcher = (
+            WebhookDispatcher(redis_client) if redis_client else webhook_dispatcher
+        )
 
     async def send_backup_started(self, backup_id: int, server_name: str):
         """Send notification when backup starts."""
-        if not self.enabled or not self.url:
+        if not self.enabled or not self.dispatcher.subscriptions:
             return
 
         payload = {
@@ -33,7 +406,7 @@ class WebhookService:
         self, backup_id: int, server_name: str, entry_count: int, file_size: int
     ):
         """Send notification when backup completes."""
-        if not self.enabled or not self.url:
+        if not self.enabled or not self.dispatcher.subscriptions:
             return
 
         payload = {
@@ -49,7 +422,7 @@ class WebhookService:
 
     async def send_backup_failed(self, backup_id: int, server_name: str, error: str):
         """Send notification when backup fails."""
-        if not self.enabled or not self.url:
+        if not self.enabled or not self.dispatcher.subscriptions:
             return
 
         payload = {
@@ -64,7 +437,7 @@ class WebhookService:
 
     async def send_restore_started(self, restore_id: int, backup_id: int):
         """Send notification when restore starts."""
-        if not self.enabled or not self.url:
+        if not self.enabled or not self.dispatcher.subscriptions:
             return
 
         payload = {
@@ -80,7 +453,7 @@ class WebhookService:
         self, restore_id: int, backup_id: int, entries_restored: int
     ):
         """Send notification when restore completes."""
-        if not self.enabled or not self.url:
+        if not self.enabled or not self.dispatcher.subscriptions:
             return
 
         payload = {
@@ -94,17 +467,18 @@ class WebhookService:
         await self._send_webhook(payload)
 
     async def _send_webhook(self, payload: Dict[str, Any]):
-        """Send webhook HTTP POST request."""
+        """Queue a webhook event for delivery."""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(self.url, json=payload, timeout=10.0)
-                response.raise_for_status()
-                logger.info(f"Webhook sent successfully: {payload['event']}")
+            queued = await self.dispatcher.enqueue(payload)
+            if queued:
+                logger.info(f"Webhook queued: {payload['event']}")
         except Exception as e:
-            logger.error(f"Failed to send webhook: {str(e)}")
+            logger.error(f"Failed to queue webhook: {str(e)}")
 
     def _get_timestamp(self) -> str:
         """Get current timestamp in ISO format."""
-        from datetime import datetime
-
         return datetime.utcnow().isoformat()
+
+
+# Sends events directly when no Redis client is available
+webhook_dispatcher = WebhookDispatcher()
@@ -0,0 +1,69 @@
+import logging
+import os
+import socket
+import uuid
+from typing import List, Optional
+
+from api.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Set of the ids of workers that have sent a heartbeat
+WORKERS_KEY = "workers"
+
+# Refreshed by a live worker; once it expires the worker counts as dead
+HEARTBEAT_KEY = "worker:{worker_id}:heartbeat"
+
+# Identifies this process, and the processing lists it claims work into
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class WorkerRegistry:
+    """Heartbeats of the workers sharing the Redis queues.
+
+    Every worker claims queued work into processing lists of its own and
+    keeps a heartbeat key alive. Work claimed by a worker whose heartbeat
+    has expired will never be finished, so the other workers hand it back
+    to the queues, and only that work: claims of live workers are left
+    alone however long they take.
+    """
+
+    def __init__(
+        self,
+        redis_client,
+        worker_id: str = WORKER_ID,
+        ttl: Optional[int] = None,
+    ):
+        self.redis_client = redis_client
+        self.worker_id = worker_id
+        self.ttl = ttl or settings.WORKER_HEARTBEAT_TTL_SECONDS
+
+    async def heartbeat(self):
+        """Announce that this worker is alive for another TTL."""
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            pipe.sadd(WORKERS_KEY, self.worker_id)
+            pipe.set(HEARTBEAT_KEY.format(worker_id=self.worker_id), "1", ex=self.ttl)
+            await pipe.execute()
+
+    async def dead_workers(self) -> List[str]:
+        """Get the other workers whose heartbeat has expired."""
+        others = [
+            worker_id
+            for worker_id in await self.redis_client.smembers(WORKERS_KEY)
+            if worker_id != self.worker_id
+        ]
+        if not others:
+            return []
+
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            for worker_id in others:
+                pipe.exists(HEARTBEAT_KEY.format(worker_id=worker_id))
+            alive = await pipe.execute()
+        return [worker_id for worker_id, up in zip(others, alive) if not up]
+
+    async def forget(self, worker_id: str):
+        """Drop a worker whose claims have been handed back."""
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            pipe.srem(WORKERS_KEY, worker_id)
+            pipe.delete(HEARTBEAT_KEY.format(worker_id=worker_id))
+            await pipe.execute()
@@ -0,0 +1,170 @@
+"""Synthetic LDAP directories served by an in-process fake server.
+
+generate_directory() builds a reproducible tree of organizational units
+and people with configurable size, attribute sizes and binary photos.
+serve() makes ``ldap.initialize`` return a FakeLDAPObject over such a
+directory, so LDAPService can be benchmarked end to end, with a simulated
+network round-trip latency, without an LDAP server.
+"""
+
+import random
+import string
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import ldap
+from ldap.controls import SimplePagedResultsControl
+
+Entry = Tuple[str, Dict[str, List[bytes]]]
+
+BASE_DN = "dc=example,dc=com"
+
+
+@dataclass
+class DirectorySpec:
+    """Shape of a synthetic directory."""
+
+    entries: int = 10000  # People, in addition to the organizational units
+    depth: int = 3  # Levels of organizational units below the base
+    fanout: int = 4  # Organizational units per level
+    attribute_size: int = 64  # Characters per description value
+    values: int = 2  # Description values per person
+    binary_ratio: float = 0.1  # Share of people with a jpegPhoto
+    binary_size: int = 4096  # Bytes per jpegPhoto
+    seed: int = 0
+
+
+def _units(spec: DirectorySpec) -> List[str]:
+    """Get the DNs of all organizational units, parents first."""
+    units: List[str] = []
+    level = [BASE_DN]
+    for _ in range(spec.depth):
+        level = [
+            f"ou=unit{index},{parent}"
+            for parent in level
+            for index in range(spec.fanout)
+        ]
+        units.extend(level)
+    return units
+
+
+def generate_directory(spec: DirectorySpec) -> List[Entry]:
+    """Generate the entries of a directory, as python-ldap returns them.
+
+    People are spread evenly over the deepest organizational units, and
+    every entry precedes its children.
+    """
+    rng = random.Random(spec.seed)
+    letters = string.ascii_letters + string.digits + " "
+
+    entries: List[Entry] = [
+        (BASE_DN, {"objectClass": [b"top", b"domain"], "dc": [b"example"]})
+    ]
+    units = _units(spec)
+    for dn in units:
+        name = dn.split(",", 1)[0].split("=", 1)[1]
+        entries.append(
+            (dn, {"objectClass": [b"organizationalUnit"], "ou": [name.encode()]})
+        )
+
+    leaves = [dn for dn in units if dn.count(",") == spec.depth + 1] or [BASE_DN]
+    for index in range(spec.entries):
+        uid = f"user{index:07d}"
+        attrs: Dict[str, List[bytes]] = {
+            "objectClass": [b"top", b"person", b"inetOrgPerson"],
+            "uid": [uid.encode()],
+            "cn": [f"User {index}".encode()],
+            "sn": [f"Surname{index % 997}".encode()],
+            "mail": [f"{uid}@example.com".encode()],
+            "description": [
+                "".join(rng.choices(letters, k=spec.attribute_size)).encode()
+                for _ in range(spec.values)
+            ],
+        }
+        if rng.random() < spec.binary_ratio:
+            attrs["jpegPhoto"] = [rng.randbytes(spec.binary_size)]
+        entries.append((f"uid={uid},{leaves[index % len(leaves)]}", attrs))
+    return entries
+
+
+class FakeLDAPObject:
+    """The parts of python-ldap's LDAPObject that LDAPService uses.
+
+    Searches return the whole directory in pages, honouring the paged
+    results control; adds are recorded. Every round trip sleeps for
+    ``latency`` seconds.
+    """
+
+    def __init__(self, directory: List[Entry], latency: float = 0.0):
+        self.directory = directory
+        self.latency = latency
+        self.timeout = -1
+        self.added: Set[str] = set()
+        self.round_trips = 0
+        self._searches: Dict[int, Tuple[int, int]] = {}
+        self._next_msgid = 1
+
+    def _round_trip(self):
+        self.round_trips += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def set_option(self, option, value):
+        pass
+
+    def simple_bind_s(self, who: Optional[str] = None, cred: Optional[str] = None):
+        self._round_trip()
+
+    def unbind_s(self):
+        pass
+
+    def search_ext(self, base, scope, filterstr, attrlist=None, serverctrls=None, **kw):
+        control = next(
+            (
+                c
+                for c in serverctrls or []
+                if c.controlType == SimplePagedResultsControl.controlType
+            ),
+            None,
+        )
+        size = getattr(control, "size", 0) or len(self.directory)
+        cookie = getattr(control, "cookie", b"") or b"0"
+        msgid = self._next_msgid
+        self._next_msgid += 1
+        self._searches[msgid] = (int(cookie), size)
+        return msgid
+
+    def result3(self, msgid, all=1, timeout=None):
+        self._round_trip()
+        start, size = self._searches.pop(msgid)
+        end = min(start + size, len(self.directory))
+        control = SimplePagedResultsControl(False, size=0, cookie=b"")
+        control.cookie = str(end).encode() if end < len(self.directory) else b""
+        return ldap.RES_SEARCH_RESULT, self.directory[start:end], msgid, [control]
+
+    def search_ext_s(self, base, scope, filterstr, attrlist=None, **kw):
+        self._round_trip()
+        return self.directory[:1]
+
+    def abandon_ext(self, msgid, **kw):
+        self._searches.pop(msgid, None)
+
+    def add_s(self, dn, modlist):
+        self._round_trip()
+        if dn in self.added:
+            raise ldap.ALREADY_EXISTS({"desc": "Already exists"})
+        self.added.add(dn)
+
+
+@contextmanager
+def serve(directory: List[Entry], latency: float = 0.0) -> Iterator[FakeLDAPObject]:
+    """Serve a directory to every connection LDAPService opens."""
+    server = FakeLDAPObject(directory, latency)
+    initialize = ldap.initialize
+    ldap.initialize = lambda uri, *args, **kwargs: server
+    try:
+        yield server
+    finally:
+        ldap.initialize = initialize
@@ -0,0 +1,98 @@
+"""Event-loop latency of unrelated requests during a login storm.
+
+Simulates a burst of concurrent logins (password verification) while a
+probe coroutine stands in for an unrelated endpoint, and reports the probe's
+p50/p99 latency with hashing done inline versus on the hashing pool.
+
+Usage:
+    python -m benchmarks.login_storm --logins 200 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Awaitable, Callable, List
+
+from api.core.security import (
+    get_password_hash,
+    verify_password,
+    verify_password_async,
+)
+
+
+def _percentile(samples: List[float], percentile: float) -> float:
+    """Return the given percentile of a list of samples."""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def _inline_verify(password: str, hashed: str) -> bool:
+    """Verify on the event loop, as the handlers used to."""
+    return verify_password(password, hashed)
+
+
+async def _run_storm(
+    verify: Callable[[str, str], Awaitable[bool]],
+    hashed: str,
+    logins: int,
+    concurrency: int,
+    probe_interval: float,
+) -> dict:
+    """Run one login storm and measure probe latency."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    done = asyncio.Event()
+
+    async def login():
+        async with semaphore:
+            await verify("TestPassword123!", hashed)
+
+    async def probe():
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0)
+            latencies.append((time.perf_counter() - started) * 1000)
+            await asyncio.sleep(probe_interval)
+
+    probe_task = asyncio.create_task(probe())
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await probe_task
+
+    return {
+        "logins_per_second": round(logins / elapsed, 1),
+        "probe_samples": len(latencies),
+        "probe_p50_ms": round(statistics.median(latencies), 3),
+        "probe_p99_ms": round(_percentile(latencies, 99), 3),
+        "probe_max_ms": round(max(latencies), 3),
+    }
+
+
+async def main(logins: int, concurrency: int, probe_interval: float):
+    """Run the benchmark in both modes and print JSON results."""
+    hashed = get_password_hash("TestPassword123!")
+    results = {
+        "logins": logins,
+        "concurrency": concurrency,
+        "inline": await _run_storm(
+            _inline_verify, hashed, logins, concurrency, probe_interval
+        ),
+        "pooled": await _run_storm(
+            verify_password_async, hashed, logins, concurrency, probe_interval
+        ),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--probe-interval", type=float, default=0.005)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.concurrency, args.probe_interval))
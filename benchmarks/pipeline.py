@@ -0,0 +1,338 @@
+"""Throughput and memory of each stage of the backup and restore pipeline.
+
+Exports a synthetic directory from an in-process fake LDAP server, then
+times LDIF serialisation and parsing, compression, encryption, packaging
+and restoring it, each on its own. Every benchmark is run ``--repeat``
+times and reports its best time, then once more under tracemalloc for its
+peak Python memory. Results are JSON; save one run with ``--output`` and
+pass it to ``--compare`` on a later commit to see the changes.
+
+To measure an alternative engine for a stage, add a function taking the
+Workload to BENCHMARKS under a new name and select it with ``--only``.
+
+Usage:
+    python -m benchmarks.pipeline --entries 20000 --latency 0.001 \\
+        --output baseline.json
+    python -m benchmarks.pipeline --entries 20000 --latency 0.001 \\
+        --compare baseline.json
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from api.core.config import settings
+from api.core.encryption import AESEncryption
+from api.services.backup_index import iter_ldif_records, parse_ldif_record
+from api.services.backup_service import CHUNK_SIZE, BackupService
+from api.services.ldap_service import LDAPService
+from benchmarks.directory import (
+    BASE_DN,
+    DirectorySpec,
+    Entry,
+    generate_directory,
+    serve,
+)
+
+MB = 1024 * 1024
+
+
+@dataclass
+class Workload:
+    """The directory and files every benchmark works on."""
+
+    spec: DirectorySpec
+    directory: List[Entry]
+    latency: float
+    page_size: int
+    workdir: str
+    ldif_path: str
+
+    def service(self) -> LDAPService:
+        """Create an LDAPService for the fake server."""
+        return LDAPService(
+            host="benchmark",
+            port=389,
+            use_ssl=False,
+            base_dn=BASE_DN,
+            bind_dn="cn=admin,dc=example,dc=com",
+            bind_password="secret",
+        )
+
+    def chunks(self) -> Iterator[bytes]:
+        """Read the LDIF file in backup-sized chunks."""
+        with open(self.ldif_path, "rb") as f:
+            yield from iter(lambda: f.read(CHUNK_SIZE), b"")
+
+
+def _export(workload: Workload) -> Dict[str, Any]:
+    """Export the directory to LDIF through LDAPService."""
+    path = os.path.join(workload.workdir, "export.ldif")
+    with serve(workload.directory, workload.latency) as server:
+        service = workload.service()
+        page_size = settings.LDAP_PAGE_SIZE
+        settings.LDAP_PAGE_SIZE = workload.page_size
+        try:
+            with service:
+                entries = service.backup_to_ldif(path)
+        finally:
+            settings.LDAP_PAGE_SIZE = page_size
+    size = os.path.getsize(path)
+    os.remove(path)
+    return {
+        "entries": entries,
+        "bytes": size,
+        "round_trips": server.round_trips,
+        "stages": service.timer.seconds,
+    }
+
+
+def _serialize(workload: Workload) -> Dict[str, Any]:
+    """Write the directory as LDIF to memory."""
+    out = io.StringIO()
+    for dn, attrs in workload.directory:
+        LDAPService.write_ldif_entry(out, dn, attrs)
+    return {"entries": len(workload.directory), "bytes": out.tell()}
+
+
+def _parse(workload: Workload) -> Dict[str, Any]:
+    """Parse every record of the LDIF file."""
+    entries = 0
+    with open(workload.ldif_path, "rb") as f:
+        for _, raw in iter_ldif_records(f):
+            parse_ldif_record(raw)
+            entries += 1
+    return {"entries": entries, "bytes": os.path.getsize(workload.ldif_path)}
+
+
+def _compress(workload: Workload) -> Dict[str, Any]:
+    """Gzip the LDIF file as packaging does."""
+    compressed = sum(len(c) for c in BackupService._iter_gzip(workload.chunks()))
+    size = os.path.getsize(workload.ldif_path)
+    return {
+        "entries": len(workload.directory),
+        "bytes": size,
+        "ratio": round(compressed / size, 3),
+    }
+
+
+def _encrypt(workload: Workload) -> Dict[str, Any]:
+    """Encrypt the LDIF file as packaging does."""
+    encryption = AESEncryption(settings.ENCRYPTION_KEY)
+    for _ in encryption.encrypt_stream(workload.chunks()):
+        pass
+    return {
+        "entries": len(workload.directory),
+        "bytes": os.path.getsize(workload.ldif_path),
+    }
+
+
+def _package(workload: Workload) -> Dict[str, Any]:
+    """Compress, encrypt and write the LDIF file in one pass."""
+    path = os.path.join(workload.workdir, "package.ldif")
+    shutil.copyfile(workload.ldif_path, path)
+    service = BackupService()
+    artifact, _, _ = service.package_file(path, compress=True, encrypt=True)
+    os.remove(artifact)
+    return {
+        "entries": len(workload.directory),
+        "bytes": os.path.getsize(workload.ldif_path),
+        "stages": service.timer.seconds,
+    }
+
+
+def _restore(workload: Workload) -> Dict[str, Any]:
+    """Restore the LDIF file into an empty fake server."""
+    with serve([], workload.latency) as server:
+        service = workload.service()
+        with service:
+            entries = service.restore_from_ldif(workload.ldif_path)
+    return {
+        "entries": entries,
+        "bytes": os.path.getsize(workload.ldif_path),
+        "round_trips": server.round_trips,
+        "stages": service.timer.seconds,
+    }
+
+
+BENCHMARKS: Dict[str, Callable[[Workload], Dict[str, Any]]] = {
+    "export": _export,
+    "ldif_serialize": _serialize,
+    "ldif_parse": _parse,
+    "compress": _compress,
+    "encrypt": _encrypt,
+    "package": _package,
+    "restore": _restore,
+}
+
+
+def _measure(
+    benchmark: Callable[[Workload], Dict[str, Any]],
+    workload: Workload,
+    repeat: int,
+    memory: bool,
+) -> Dict[str, Any]:
+    """Run a benchmark, keeping its best time and measuring its peak memory."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = benchmark(workload)
+        best = min(best, time.perf_counter() - started)
+
+    result["seconds"] = round(best, 4)
+    result["entries_per_second"] = round(result["entries"] / best, 1)
+    result["mb_per_second"] = round(result["bytes"] / MB / best, 2)
+    if "stages" in result:
+        result["stages"] = {k: round(v, 4) for k, v in result["stages"].items()}
+
+    if memory:
+        tracemalloc.start()
+        try:
+            benchmark(workload)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        result["peak_memory_mb"] = round(peak / MB, 2)
+    return result
+
+
+def _git_commit() -> Optional[str]:
+    """Get the commit being measured, if run from a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _change(baseline: Optional[float], current: Optional[float]) -> Optional[float]:
+    """Get the relative change between two measurements, in percent."""
+    if not baseline or current is None:
+        return None
+    return round((current - baseline) / baseline * 100, 1)
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """Compare the benchmarks two runs have in common."""
+    comparison = {}
+    for name, result in current["benchmarks"].items():
+        before = baseline["benchmarks"].get(name)
+        if before is None:
+            continue
+        comparison[name] = {
+            metric: {
+                "baseline": before.get(metric),
+                "current": result.get(metric),
+                "change_pct": _change(before.get(metric), result.get(metric)),
+            }
+            for metric in ("entries_per_second", "mb_per_second", "peak_memory_mb")
+        }
+    return {
+        "baseline_commit": baseline.get("commit"),
+        "same_parameters": baseline.get("parameters") == current["parameters"],
+        "benchmarks": comparison,
+    }
+
+
+def main(
+    spec: DirectorySpec,
+    latency: float,
+    page_size: int,
+    repeat: int,
+    memory: bool,
+    only: Optional[List[str]],
+    output: Optional[str],
+    baseline: Optional[str],
+):
+    """Run the selected benchmarks and print JSON results."""
+    directory = generate_directory(spec)
+    workdir = tempfile.mkdtemp(prefix="ldapguard-bench-")
+    try:
+        ldif_path = os.path.join(workdir, "directory.ldif")
+        with open(ldif_path, "w", encoding="utf-8") as f:
+            for dn, attrs in directory:
+                LDAPService.write_ldif_entry(f, dn, attrs)
+        workload = Workload(spec, directory, latency, page_size, workdir, ldif_path)
+
+        results = {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "parameters": dict(
+                asdict(spec),
+                latency=latency,
+                page_size=page_size,
+                ldif_bytes=os.path.getsize(ldif_path),
+            ),
+            "benchmarks": {
+                name: _measure(BENCHMARKS[name], workload, repeat, memory)
+                for name in only or BENCHMARKS
+            },
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+    if baseline:
+        with open(baseline) as f:
+            results["comparison"] = compare(json.load(f), results)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--fanout", type=int, default=4)
+    parser.add_argument("--attribute-size", type=int, default=64)
+    parser.add_argument("--values", type=int, default=2)
+    parser.add_argument("--binary-ratio", type=float, default=0.1)
+    parser.add_argument("--binary-size", type=int, default=4096)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Seconds per LDAP round trip"
+    )
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS))
+    parser.add_argument("--output", help="Also write the results to this file")
+    parser.add_argument("--compare", help="Results of an earlier run to compare")
+    args = parser.parse_args()
+    main(
+        DirectorySpec(
+            entries=args.entries,
+            depth=args.depth,
+            fanout=args.fanout,
+            attribute_size=args.attribute_size,
+            values=args.values,
+            binary_ratio=args.binary_ratio,
+            binary_size=args.binary_size,
+            seed=args.seed,
+        ),
+        args.latency,
+        args.page_size,
+        args.repeat,
+        not args.no_memory,
+        args.only,
+        args.output,
+        args.compare,
+    )
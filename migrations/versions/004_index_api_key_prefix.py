@@ -0,0 +1,23 @@
+"""Index API key prefix for key lookup
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(op.f('ix_api_keys_key_prefix'), 'api_keys', ['key_prefix'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_api_keys_key_prefix'), table_name='api_keys')
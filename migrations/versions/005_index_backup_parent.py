@@ -0,0 +1,23 @@
+"""Index backup parent for incremental chain lookups
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(op.f('ix_backups_parent_backup_id'), 'backups', ['parent_backup_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_backups_parent_backup_id'), table_name='backups')
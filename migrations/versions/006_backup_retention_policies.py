@@ -0,0 +1,45 @@
+"""Add per-schedule retention policies
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Link backups to the schedule that produced them
+    op.add_column('backups',
+        sa.Column('scheduled_backup_id', sa.Integer(), nullable=True)
+    )
+    op.create_foreign_key(
+        'fk_backups_scheduled_backup_id', 'backups', 'scheduled_backups',
+        ['scheduled_backup_id'], ['id'], ondelete='SET NULL'
+    )
+    op.create_index('ix_backups_schedule_created', 'backups', ['scheduled_backup_id', 'created_at'], unique=False)
+
+    # Keep-last and grandfather-father-son retention
+    op.add_column('scheduled_backups', sa.Column('keep_last', sa.Integer(), nullable=True))
+    op.add_column('scheduled_backups', sa.Column('keep_daily', sa.Integer(), nullable=True))
+    op.add_column('scheduled_backups', sa.Column('keep_weekly', sa.Integer(), nullable=True))
+    op.add_column('scheduled_backups', sa.Column('keep_monthly', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('scheduled_backups', 'keep_monthly')
+    op.drop_column('scheduled_backups', 'keep_weekly')
+    op.drop_column('scheduled_backups', 'keep_daily')
+    op.drop_column('scheduled_backups', 'keep_last')
+
+    op.drop_index('ix_backups_schedule_created', table_name='backups')
+    op.drop_constraint('fk_backups_scheduled_backup_id', 'backups', type_='foreignkey')
+    op.drop_column('backups', 'scheduled_backup_id')
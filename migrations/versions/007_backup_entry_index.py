@@ -0,0 +1,24 @@
+"""Add entry index sidecar location to backups
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('backups', sa.Column('index_path', sa.String(length=1000), nullable=True))
+
+
+def downgrade():
+    op.drop_column('backups', 'index_path')
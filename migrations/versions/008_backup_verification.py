@@ -0,0 +1,42 @@
+"""Add backup checksums and verification status
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+verification_status = sa.Enum('unverified', 'verified', 'corrupt', name='verificationstatus')
+
+
+def upgrade():
+    verification_status.create(op.get_bind(), checkfirst=True)
+
+    op.add_column('backups', sa.Column('checksum', sa.String(length=64), nullable=True))
+    op.add_column('backups', sa.Column('content_checksum', sa.String(length=64), nullable=True))
+    op.add_column('backups',
+        sa.Column('verification_status', verification_status, nullable=False, server_default='unverified')
+    )
+    op.add_column('backups', sa.Column('verified_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('backups', sa.Column('verification_error', sa.Text(), nullable=True))
+    op.create_index('ix_backups_verified_at', 'backups', ['verified_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_backups_verified_at', table_name='backups')
+    op.drop_column('backups', 'verification_error')
+    op.drop_column('backups', 'verified_at')
+    op.drop_column('backups', 'verification_status')
+    op.drop_column('backups', 'content_checksum')
+    op.drop_column('backups', 'checksum')
+
+    verification_status.drop(op.get_bind(), checkfirst=True)
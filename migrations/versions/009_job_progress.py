@@ -0,0 +1,38 @@
+"""Add live progress columns to backups and restore jobs
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+tables = ('backups', 'restore_jobs')
+
+
+def upgrade():
+    for table in tables:
+        op.add_column(table, sa.Column('progress_phase', sa.String(length=50), nullable=True))
+        op.add_column(table, sa.Column('progress_entries', sa.Integer(), nullable=True))
+        op.add_column(table, sa.Column('progress_bytes', sa.BigInteger(), nullable=True))
+        op.add_column(table, sa.Column('entries_per_second', sa.Float(), nullable=True))
+        op.add_column(table, sa.Column('bytes_per_second', sa.Float(), nullable=True))
+        op.add_column(table, sa.Column('progress_updated_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade():
+    for table in tables:
+        op.drop_column(table, 'progress_updated_at')
+        op.drop_column(table, 'bytes_per_second')
+        op.drop_column(table, 'entries_per_second')
+        op.drop_column(table, 'progress_bytes')
+        op.drop_column(table, 'progress_entries')
+        op.drop_column(table, 'progress_phase')
@@ -0,0 +1,28 @@
+"""Add resume checkpoints to backups and restore jobs
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+tables = ('backups', 'restore_jobs')
+
+
+def upgrade():
+    for table in tables:
+        op.add_column(table, sa.Column('checkpoint', sa.Text(), nullable=True))
+
+
+def downgrade():
+    for table in tables:
+        op.drop_column(table, 'checkpoint')
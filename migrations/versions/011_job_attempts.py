@@ -0,0 +1,28 @@
+"""Add attempt counters to backups and restore jobs
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+tables = ('backups', 'restore_jobs')
+
+
+def upgrade():
+    for table in tables:
+        op.add_column(table, sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    for table in tables:
+        op.drop_column(table, 'attempts')
@@ -0,0 +1,37 @@
+"""Keep restore jobs when their backup is deleted
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '012'
+down_revision = '011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Retention expires backups, not the audit history of restores from them
+    op.alter_column('restore_jobs', 'backup_id', existing_type=sa.Integer(), nullable=True)
+    op.drop_constraint('restore_jobs_backup_id_fkey', 'restore_jobs', type_='foreignkey')
+    op.create_foreign_key(
+        'restore_jobs_backup_id_fkey', 'restore_jobs', 'backups',
+        ['backup_id'], ['id'], ondelete='SET NULL'
+    )
+
+
+def downgrade():
+    # Jobs whose backup is gone cannot satisfy the old constraint
+    op.execute('DELETE FROM restore_jobs WHERE backup_id IS NULL')
+    op.drop_constraint('restore_jobs_backup_id_fkey', 'restore_jobs', type_='foreignkey')
+    op.create_foreign_key(
+        'restore_jobs_backup_id_fkey', 'restore_jobs', 'backups',
+        ['backup_id'], ['id']
+    )
+    op.alter_column('restore_jobs', 'backup_id', existing_type=sa.Integer(), nullable=False)
@@ -1,5 +1,9 @@
 """Pytest configuration and fixtures."""
+import time
+import uuid
+
 import pytest
+import pytest_asyncio
 from fastapi.testclient import TestClient
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy import create_engine
@@ -7,6 +11,7 @@ from api.main import app
 from api.core.database import Base, get_db
 from api.models import models  # noqa: F401
 from unittest.mock import patch
+from redis.exceptions import LockNotOwnedError
 
 # Use SQLite database for async tests
 SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
@@ -49,6 +54,23 @@ def client():
     Base.metadata.drop_all(bind=sync_engine)
 
 
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    """Provide a session factory bound to a throwaway SQLite database."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/test.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def db_session(session_factory):
+    """Provide a session bound to a throwaway SQLite database."""
+    async with session_factory() as session:
+        yield session
+
+
 @pytest.fixture
 def mock_redis():
     """Create a mock Redis client."""
@@ -85,3 +107,205 @@ def test_ldap_server_data():
         "bind_dn": "cn=admin,dc=example,dc=com",
         "bind_password": "password123"
     }
+
+
+class FakeRedis:
+    """In-memory stand-in for the parts of redis.asyncio the app uses.
+
+    Each data type is kept in its own dict so tests can inspect it, and
+    keys given a TTL expire when next read.
+    """
+
+    def __init__(self):
+        self.values = {}
+        self.lists = {}
+        self.zsets = {}
+        self.hashes = {}
+        self.sets = {}
+        self.expiry = {}
+        self.published = []
+
+    def _expire_keys(self):
+        now = time.time()
+        for key, at in list(self.expiry.items()):
+            if at <= now:
+                self.values.pop(key, None)
+                del self.expiry[key]
+
+    def _stores(self):
+        return (self.values, self.lists, self.zsets, self.hashes, self.sets)
+
+    async def get(self, key):
+        self._expire_keys()
+        return self.values.get(key)
+
+    async def set(self, key, value, ex=None, nx=False):
+        self._expire_keys()
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        if ex:
+            self.expiry[key] = time.time() + ex
+        else:
+            self.expiry.pop(key, None)
+        return True
+
+    async def incr(self, key):
+        self.values[key] = str(int(self.values.get(key, 0)) + 1)
+        return int(self.values[key])
+
+    async def expire(self, key, seconds):
+        self.expiry[key] = time.time() + seconds
+
+    async def ttl(self, key):
+        self._expire_keys()
+        if key not in self.values:
+            return -2
+        if key not in self.expiry:
+            return -1
+        return int(self.expiry[key] - time.time())
+
+    async def exists(self, *keys):
+        self._expire_keys()
+        return sum(any(key in store for store in self._stores()) for key in keys)
+
+    async def delete(self, *keys):
+        deleted = 0
+        for key in keys:
+            self.expiry.pop(key, None)
+            for store in self._stores():
+                deleted += store.pop(key, None) is not None
+        return deleted
+
+    async def rpush(self, key, *values):
+        self.lists.setdefault(key, []).extend(values)
+        return len(self.lists[key])
+
+    async def lpop(self, key, count=None):
+        items = self.lists.get(key)
+        if not items:
+            return None
+        if count is None:
+            return items.pop(0)
+        popped, self.lists[key] = items[:count], items[count:]
+        return popped
+
+    async def lmove(self, source, destination, src_side, dest_side):
+        items = self.lists.get(source)
+        if not items:
+            return None
+        value = items.pop(0 if src_side == "LEFT" else -1)
+        target = self.lists.setdefault(destination, [])
+        if dest_side == "LEFT":
+            target.insert(0, value)
+        else:
+            target.append(value)
+        return value
+
+    async def lrem(self, key, count, value):
+        items = self.lists.get(key, [])
+        if value in items:
+            items.remove(value)
+            return 1
+        return 0
+
+    async def lrange(self, key, start, end):
+        items = self.lists.get(key, [])
+        return items[start:] if end == -1 else items[start:end + 1]
+
+    async def ltrim(self, key, start, end):
+        self.lists[key] = await self.lrange(key, start, end)
+
+    async def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    async def zrangebyscore(self, key, low, high):
+        members = self.zsets.get(key, {})
+        return sorted((m for m, s in members.items() if s <= high), key=members.get)
+
+    async def zrem(self, key, member):
+        return 1 if self.zsets.get(key, {}).pop(member, None) is not None else 0
+
+    async def hset(self, key, field=None, value=None, mapping=None):
+        fields = dict(mapping or {})
+        if field is not None:
+            fields[field] = value
+        self.hashes.setdefault(key, {}).update(fields)
+        return len(fields)
+
+    async def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    async def sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(members)
+
+    async def srem(self, key, *members):
+        self.sets.get(key, set()).difference_update(members)
+
+    async def smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+        return 0
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def lock(self, name, timeout=None, blocking=True):
+        return FakeLock(self, name, timeout)
+
+
+class FakePipeline:
+    """Queues commands and runs them in order on execute()."""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        command = getattr(self.redis, name)
+
+        def queue(*args, **kwargs):
+            self.commands.append((command, args, kwargs))
+            return self
+
+        return queue
+
+    async def execute(self):
+        commands, self.commands = self.commands, []
+        return [await command(*args, **kwargs) for command, args, kwargs in commands]
+
+
+class FakeLock:
+    """Token-owned lock, released only by the holder that acquired it."""
+
+    def __init__(self, redis, name, timeout):
+        self.redis = redis
+        self.name = name
+        self.timeout = timeout
+        self.token = None
+
+    async def acquire(self, blocking=None):
+        token = uuid.uuid4().hex
+        if await self.redis.set(self.name, token, nx=True, ex=self.timeout):
+            self.token = token
+            return True
+        return False
+
+    async def release(self):
+        if self.token is None or await self.redis.get(self.name) != self.token:
+            raise LockNotOwnedError("Cannot release a lock that's no longer owned")
+        await self.redis.delete(self.name)
+
+
+@pytest.fixture
+def fake_redis():
+    """Provide an empty in-memory Redis."""
+    return FakeRedis()
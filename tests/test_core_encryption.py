@@ -1,6 +1,11 @@
 """Tests for encryption utilities."""
 import pytest
-from api.core.encryption import encrypt_data, decrypt_data, decrypt_ldap_password
+from api.core.encryption import (
+    AESEncryption,
+    encrypt_data,
+    decrypt_data,
+    decrypt_ldap_password,
+)
 
 
 class TestEncryption:
@@ -99,3 +104,24 @@ class TestDecryptLDAPPassword:
         # Should return None instead of raising exception
         result = decrypt_ldap_password(invalid_encrypted, is_encrypted=True)
         assert result is None
+
+    def test_decrypt_stream_matches_decrypt(self):
+        """Test incremental decryption with uneven chunk sizes."""
+        encryption = AESEncryption("stream-key")
+        plaintext = bytes(range(256)) * 40
+        encrypted = encryption.encrypt(plaintext).encode()
+
+        for size in (1, 5, 64, len(encrypted)):
+            chunks = [encrypted[i:i + size] for i in range(0, len(encrypted), size)]
+            assert b"".join(encryption.decrypt_stream(chunks)) == plaintext
+
+    def test_encrypt_stream_matches_encrypt_format(self):
+        """Test that streamed encryption can be decrypted by decrypt()."""
+        encryption = AESEncryption("stream-key")
+        plaintext = bytes(range(256)) * 40
+        chunks = [plaintext[i:i + 1000] for i in range(0, len(plaintext), 1000)]
+
+        encrypted = b"".join(encryption.encrypt_stream(chunks)).decode()
+
+        assert encryption.decrypt(encrypted) == plaintext
+
@@ -1,11 +1,25 @@
 """Tests for security utilities."""
+import threading
+from datetime import datetime, timedelta, timezone
+
 import pytest
+from api.core import security
 from api.core.security import (
+    authenticate_api_key,
+    flush_api_key_usage,
+    invalidate_api_key_cache,
     verify_password,
     get_password_hash,
+    get_password_hash_async,
+    verify_password_async,
     create_access_token,
-    decode_access_token
+    decode_access_token,
+    get_api_key_prefix,
+    hash_api_key,
+    verify_api_key,
 )
+from api.models.models import APIKey, User
+from sqlalchemy import select
 
 
 class TestPasswordHashing:
@@ -41,6 +55,14 @@ class TestPasswordHashing:
         assert verify_password(password, hash1) is True
         assert verify_password(password, hash2) is True
 
+    @pytest.mark.asyncio
+    async def test_async_hash_and_verify(self):
+        """Test hashing and verifying on the hashing worker pool."""
+        password = "TestPassword123!"
+        hashed = await get_password_hash_async(password)
+        assert await verify_password_async(password, hashed) is True
+        assert await verify_password_async("WrongPassword", hashed) is False
+
 
 class TestJWTTokens:
     """Test JWT token creation and decoding."""
@@ -84,3 +106,129 @@ class TestJWTTokens:
         decoded = decode_access_token(token)
         assert decoded is not None
         assert "exp" in decoded
+
+
+class TestAPIKeyHashing:
+    """Test API key hashing and verification."""
+
+    def test_hash_api_key_is_deterministic(self):
+        """Test that the same key always produces the same digest."""
+        api_key = "ldapg_exampleapikeyvalue"
+        assert hash_api_key(api_key) == hash_api_key(api_key)
+        assert hash_api_key(api_key) != api_key
+
+    def test_verify_api_key(self):
+        """Test verifying correct and incorrect API keys."""
+        key_hash = hash_api_key("ldapg_correct")
+        assert verify_api_key("ldapg_correct", key_hash) is True
+        assert verify_api_key("ldapg_wrong", key_hash) is False
+
+    def test_get_api_key_prefix(self):
+        """Test that the lookup prefix fits the key_prefix column."""
+        prefix = get_api_key_prefix("ldapg_abcdefghijklmnop")
+        assert prefix == "ldapg_abcd"
+        assert len(prefix) == 10
+
+
+@pytest.fixture(autouse=True)
+def clear_api_key_state():
+    """Start every test without cached keys or pending usage."""
+    invalidate_api_key_cache()
+    security._pending_api_key_usage.clear()
+    yield
+    invalidate_api_key_cache()
+    security._pending_api_key_usage.clear()
+
+
+async def _add_key(db, api_key, key_hash=None, **kwargs):
+    """Store an API key for a new user and return the key row."""
+    user = User(username=f"user-{api_key}", email=f"{api_key}@example.com", hashed_password="x")
+    db.add(user)
+    await db.flush()
+    row = APIKey(
+        name=api_key,
+        key_hash=key_hash or hash_api_key(api_key),
+        key_prefix=get_api_key_prefix(api_key),
+        created_by=user.id,
+        **kwargs
+    )
+    db.add(row)
+    await db.commit()
+    return row
+
+
+class TestAuthenticateAPIKey:
+    """Test resolving API keys to users."""
+
+    @pytest.mark.asyncio
+    async def test_valid_key(self, db_session):
+        """Test that a valid key resolves to its owner and records its use."""
+        row = await _add_key(db_session, "ldapg_validkey123")
+
+        user = await authenticate_api_key("ldapg_validkey123", db_session)
+
+        assert user.id == row.created_by
+        assert row.id in security._pending_api_key_usage
+
+    @pytest.mark.asyncio
+    async def test_wrong_key(self, db_session):
+        """Test that a key sharing the prefix but not the secret is rejected."""
+        await _add_key(db_session, "ldapg_validkey123")
+
+        assert await authenticate_api_key("ldapg_validkey999", db_session) is None
+
+    @pytest.mark.asyncio
+    async def test_expired_key(self, db_session):
+        """Test that an expired key is rejected."""
+        expired = datetime.now(timezone.utc) - timedelta(minutes=1)
+        await _add_key(db_session, "ldapg_expiredkey", expires_at=expired)
+
+        assert await authenticate_api_key("ldapg_expiredkey", db_session) is None
+        assert not security._pending_api_key_usage
+
+    @pytest.mark.asyncio
+    async def test_revoked_key(self, db_session):
+        """Test that a revoked key is rejected."""
+        await _add_key(db_session, "ldapg_revokedkey", is_active=False)
+
+        assert await authenticate_api_key("ldapg_revokedkey", db_session) is None
+
+    @pytest.mark.asyncio
+    async def test_legacy_hash_verified_off_loop_and_upgraded(self, db_session, monkeypatch):
+        """Test that bcrypt hashes are checked on the hashing pool and replaced."""
+        threads = []
+
+        class LegacyContext:
+            def verify(self, api_key, key_hash):
+                threads.append(threading.current_thread().name)
+                return api_key == "ldapg_legacykey1"
+
+        monkeypatch.setattr(security, "legacy_api_key_context", LegacyContext())
+        row = await _add_key(db_session, "ldapg_legacykey1", key_hash="$2b$12$legacy")
+
+        user = await authenticate_api_key("ldapg_legacykey1", db_session)
+
+        assert user.id == row.created_by
+        assert threads and threads[0].startswith("password-hash")
+        await db_session.refresh(row)
+        assert row.key_hash == hash_api_key("ldapg_legacykey1")
+
+    @pytest.mark.asyncio
+    async def test_flush_writes_each_keys_last_use(self, db_session, session_factory, monkeypatch):
+        """Test that every key gets its own last use, not the newest one."""
+        first = await _add_key(db_session, "ldapg_firstkey00")
+        second = await _add_key(db_session, "ldapg_secondkey0")
+        earlier = datetime(2026, 10, 1, 8, 0, tzinfo=timezone.utc)
+        later = datetime(2026, 10, 2, 9, 30, tzinfo=timezone.utc)
+        security._pending_api_key_usage.update({first.id: earlier, second.id: later})
+        monkeypatch.setattr(security, "AsyncSessionLocal", session_factory)
+
+        await flush_api_key_usage()
+
+        assert not security._pending_api_key_usage
+        async with session_factory() as session:
+            used = {
+                key.id: key.last_used_at.replace(tzinfo=timezone.utc)
+                for key in (await session.execute(select(APIKey))).scalars()
+            }
+        assert used == {first.id: earlier, second.id: later}
@@ -0,0 +1,62 @@
+"""Tests for trace propagation through the job queues."""
+
+import json
+
+import pytest
+
+from api.core import tracing
+from api.core.config import settings
+from api.core.tracing import decode_job, encode_job
+
+
+class TestJobPayloads:
+    """Tests for queue payloads."""
+
+    def test_bare_ids_are_still_accepted(self):
+        """Test payloads queued before tracing decode without a context."""
+        assert decode_job("42") == (42, {})
+
+    def test_payload_without_trace_is_bare_id(self):
+        """Test nothing is added to the payload outside a trace."""
+        assert encode_job(42) == "42"
+
+    def test_decode_trace_payload(self):
+        """Test the id and context are read back from a traced payload."""
+        payload = json.dumps({"id": 7, "trace": {"traceparent": "00-abc-def-01"}})
+
+        assert decode_job(payload) == (7, {"traceparent": "00-abc-def-01"})
+
+
+class TestTracing:
+    """Tests for spans across the queue."""
+
+    def test_job_continues_trace_of_request(self, monkeypatch):
+        """Test a queued job and its LDAP calls join the request's trace."""
+        pytest.importorskip("opentelemetry.sdk")
+        from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+            InMemorySpanExporter,
+        )
+
+        exporter = InMemorySpanExporter()
+        monkeypatch.setattr(settings, "TRACING_ENABLED", True)
+        assert tracing.setup_tracing("test", exporter=exporter)
+
+        try:
+            with tracing.get_tracer().start_as_current_span("POST /restores"):
+                payload = encode_job(5)
+            # Client calls outside any request or job are not traced
+            tracing.record_span("ldap.bind", 0.01)
+
+            job_id, carrier = decode_job(payload)
+            with tracing.job_span("restore", carrier, {"ldapguard.restore_id": job_id}):
+                tracing.record_span("ldap.search_page", 0.01)
+        finally:
+            tracing.shutdown_tracing()
+
+        spans = {span.name: span for span in exporter.get_finished_spans()}
+        assert set(spans) == {"POST /restores", "restore", "ldap.search_page"}
+        request, job = spans["POST /restores"], spans["restore"]
+        assert job.context.trace_id == request.context.trace_id
+        assert job.parent.span_id == request.context.span_id
+        assert spans["ldap.search_page"].parent.span_id == job.context.span_id
+        assert job.attributes["ldapguard.restore_id"] == 5
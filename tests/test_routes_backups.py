@@ -1,5 +1,18 @@
 """Tests for backup routes."""
-from fastapi import status
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import Request, status
+from fastapi.testclient import TestClient
+
+from api.core.config import settings
+from api.models.models import Backup, BackupStatus, UserRole
+from api.routes import backups
+from api.services.backup_service import BackupService
+from api.services.storage_service import S3StorageBackend
+
+ADMIN = SimpleNamespace(id=1, role=UserRole.ADMIN)
 
 
 class TestBackupRoutes:
@@ -54,4 +67,84 @@ class TestBackupRoutes:
             status.HTTP_401_UNAUTHORIZED
         ]
 
-    
+
+LDIF = b"dn: dc=example,dc=com\nobjectClass: domain\ndc: example\n\n"
+
+
+def _serve(response, **headers):
+    """Send a route's response through a test client."""
+    return TestClient(response).get("/", headers=headers)
+
+
+@pytest.fixture
+def backup_dir(tmp_path, monkeypatch):
+    """Keep the backup files of each test in its own directory."""
+    monkeypatch.setattr(settings, "BACKUP_DIR", str(tmp_path))
+    return tmp_path
+
+
+class TestDownloadBackup:
+    """Test downloading backup artifacts."""
+
+    async def _add_backup(self, db_session, file_path, **fields):
+        db_session.add(
+            Backup(
+                id=1,
+                ldap_server_id=1,
+                created_by=1,
+                status=BackupStatus.COMPLETED,
+                file_path=file_path,
+                **fields,
+            )
+        )
+        await db_session.commit()
+
+    async def _download(self, db_session, decoded=False):
+        return await backups.download_backup(
+            1, Request({"type": "http", "headers": []}), decoded, db_session, ADMIN
+        )
+
+    @pytest.mark.asyncio
+    async def test_local_range_request(self, db_session, backup_dir):
+        """Test that a Range request on a local file gets a partial response."""
+        path = backup_dir / "backup.ldif"
+        path.write_bytes(LDIF)
+        await self._add_backup(db_session, str(path))
+
+        response = _serve(await self._download(db_session), Range="bytes=4-20")
+
+        assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+        assert response.content == LDIF[4:21]
+        assert response.headers["content-range"] == f"bytes 4-20/{len(LDIF)}"
+
+    @pytest.mark.asyncio
+    async def test_decoded_download(self, db_session, backup_dir):
+        """Test that an encrypted, compressed backup is served as plain LDIF."""
+        path = backup_dir / "backup.ldif"
+        path.write_bytes(LDIF)
+        artifact, _, _ = BackupService().package_file(str(path), True, True)
+        await self._add_backup(
+            db_session, artifact, encrypted=True, compression_enabled=True
+        )
+
+        response = _serve(await self._download(db_session, decoded=True))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.content == LDIF
+        assert 'filename="backup.ldif"' in response.headers["content-disposition"]
+
+    @pytest.mark.asyncio
+    async def test_presigned_redirect(self, db_session, monkeypatch):
+        """Test that object storage downloads redirect to a presigned URL."""
+        client = MagicMock()
+        client.generate_presigned_url.return_value = "https://s3.example.com/signed"
+        storage = S3StorageBackend(bucket="backups", prefix="", client=client)
+        monkeypatch.setattr(settings, "S3_PRESIGNED_DOWNLOADS", True)
+        monkeypatch.setattr(backups, "get_storage_backend", lambda location: storage)
+        await self._add_backup(db_session, "s3://backups/backup.ldif.gz")
+
+        response = await self._download(db_session)
+
+        assert response.status_code == status.HTTP_307_TEMPORARY_REDIRECT
+        assert response.headers["location"] == "https://s3.example.com/signed"
+        client.generate_presigned_url.assert_called_once()
@@ -1,5 +1,12 @@
 """Tests for restore routes."""
-from fastapi import status
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException, status
+
+from api.models.models import Backup, BackupStatus, RestoreJob
+from api.routes import restores
 
 
 class TestRestoreRoutes:
@@ -46,4 +53,81 @@ class TestRestoreRoutes:
             status.HTTP_401_UNAUTHORIZED
         ]
 
-    
+
+@pytest_asyncio.fixture
+async def restore_job(db_session):
+    """Provide a failed restore job of an existing backup."""
+    db_session.add(
+        Backup(
+            id=1, ldap_server_id=1, created_by=1, status=BackupStatus.COMPLETED
+        )
+    )
+    job = RestoreJob(
+        id=7,
+        backup_id=1,
+        ldap_server_id=1,
+        created_by=1,
+        status=BackupStatus.FAILED,
+        error_message="Can't contact LDAP server",
+        completed_at=datetime(2026, 1, 1),
+    )
+    db_session.add(job)
+    await db_session.commit()
+    return job
+
+
+@pytest.fixture
+def redis_client(fake_redis, monkeypatch):
+    """Serve the routes an in-memory Redis."""
+
+    async def get_redis_client():
+        return fake_redis
+
+    monkeypatch.setattr(restores, "get_redis_client", get_redis_client)
+    return fake_redis
+
+
+class TestRetryRestoreJob:
+    """Test requeueing failed restore jobs."""
+
+    @pytest.mark.asyncio
+    async def test_requeues_failed_job(self, db_session, restore_job, redis_client):
+        """Test that a failed job goes back on the queue as pending."""
+        job = await restores.retry_restore_job(7, db_session, None)
+
+        assert job.status == BackupStatus.PENDING
+        assert job.error_message is None
+        assert redis_client.lists["restore_queue"] == ["7"]
+
+    @pytest.mark.asyncio
+    async def test_rejects_job_that_has_not_failed(
+        self, db_session, restore_job, redis_client
+    ):
+        """Test that only failed jobs can be retried."""
+        restore_job.status = BackupStatus.COMPLETED
+        await db_session.commit()
+
+        with pytest.raises(HTTPException) as error:
+            await restores.retry_restore_job(7, db_session, None)
+
+        assert error.value.status_code == status.HTTP_400_BAD_REQUEST
+        assert redis_client.lists == {}
+
+    @pytest.mark.asyncio
+    async def test_stays_failed_when_queueing_fails(
+        self, db_session, restore_job, redis_client
+    ):
+        """Test that a job is not left pending when Redis is unavailable."""
+
+        async def down(*args):
+            raise ConnectionError("Redis is down")
+
+        redis_client.rpush = down
+
+        with pytest.raises(HTTPException) as error:
+            await restores.retry_restore_job(7, db_session, None)
+
+        await db_session.refresh(restore_job)
+        assert error.value.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert restore_job.status == BackupStatus.FAILED
+        assert restore_job.error_message == "Can't contact LDAP server"
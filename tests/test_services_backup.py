@@ -1,4 +1,5 @@
 """Tests for backup service."""
+
 from api.services.backup_service import BackupService
 
 
@@ -37,3 +38,40 @@ class TestBackupService:
         decrypted_path = service.decrypt_file(encrypted_path)
         assert decrypted_path.endswith(".ldif")
         assert (tmp_path / "backup.ldif").read_text(encoding="utf-8") == "secret data"
+
+    def test_iter_decoded_streams_plain_ldif(self, tmp_path):
+        """Test decrypting and decompressing an artifact chunk by chunk."""
+        service = BackupService()
+        content = "".join(
+            f"dn: uid=user{i},dc=example,dc=com\nuid: user{i}\n\n" for i in range(500)
+        )
+        input_path = tmp_path / "backup.ldif"
+        input_path.write_text(content, encoding="utf-8")
+
+        artifact = service.encrypt_file(service.compress_file(str(input_path)))
+        with open(artifact, "rb") as f:
+            chunks = iter(lambda: f.read(7), b"")
+            decoded = b"".join(service.iter_decoded(chunks, True, True))
+
+        assert decoded.decode("utf-8") == content
+
+    def test_package_file_checksums(self, tmp_path):
+        """Test single-pass packaging records artifact and content hashes."""
+        import hashlib
+
+        service = BackupService()
+        content = b"dn: dc=example,dc=com\ndc: example\n\n" * 1000
+        input_path = tmp_path / "backup.ldif"
+        input_path.write_bytes(content)
+
+        path, checksum, content_checksum = service.package_file(
+            str(input_path), compress=True, encrypt=True
+        )
+
+        assert path.endswith(".ldif.gz.enc")
+        assert not input_path.exists()
+        with open(path, "rb") as f:
+            artifact = f.read()
+        assert checksum == hashlib.sha256(artifact).hexdigest()
+        assert content_checksum == hashlib.sha256(content).hexdigest()
+        assert b"".join(service.iter_decoded([artifact], True, True)) == content
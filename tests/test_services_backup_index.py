@@ -0,0 +1,208 @@
+"""Tests for backup entry index."""
+import os
+
+import pytest
+
+from api.core.config import settings
+from api.services.backup_index import (
+    BackupIndex,
+    BackupIndexCache,
+    SearchFilter,
+    build_backup_index,
+    clear_index_cache,
+    dn_sort_key,
+    open_backup_index,
+    split_dn,
+)
+
+LDIF = """dn: dc=example,dc=com
+objectClass: top
+objectClass: domain
+dc: example
+
+dn: ou=People,dc=example,dc=com
+objectClass: organizationalUnit
+ou: People
+
+dn: ou=Groups,dc=example,dc=com
+objectClass: organizationalUnit
+ou: Groups
+
+"""
+
+
+@pytest.fixture
+def ldif_path(tmp_path):
+    """Write a small directory with 25 users."""
+    users = "".join(
+        f"dn: uid=user{i:02d},ou=People,dc=example,dc=com\n"
+        f"objectClass: inetOrgPerson\n"
+        f"uid: user{i:02d}\n"
+        f"cn: User {i}\n"
+        f"jpegPhoto:: /9j/4A==\n\n"
+        for i in range(25)
+    )
+    path = tmp_path / "backup.ldif"
+    path.write_text(LDIF + users, encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def index(ldif_path, tmp_path):
+    """Build and open an index of the sample directory."""
+    index_path = str(tmp_path / "backup.idx.sqlite")
+    assert build_backup_index(str(ldif_path), index_path) == 28
+    index = BackupIndex(index_path)
+    yield index
+    index.close()
+
+
+class TestDNKeys:
+    """Test DN splitting and index keys."""
+
+    def test_split_dn_with_escapes(self):
+        """Test that escaped commas stay inside their RDN."""
+        assert split_dn("cn=Smith\\, John, ou=People,dc=example") == [
+            "cn=Smith\\, John",
+            "ou=People",
+            "dc=example",
+        ]
+
+    def test_sort_key_is_normalized_and_reversed(self):
+        """Test that keys ignore case and put ancestors first."""
+        assert dn_sort_key("UID=a, OU=People,dc=Example") == "dc=example,ou=people,uid=a"
+
+
+class TestSearchFilter:
+    """Test LDAP filter evaluation."""
+
+    def test_boolean_and_substring(self):
+        """Test nested filters against attributes."""
+        attrs = {"objectClass": ["person"], "cn": ["John Smith"], "uid": ["js"]}
+        assert SearchFilter("(&(objectClass=person)(cn=john*))").matches(attrs)
+        assert SearchFilter("(|(uid=nobody)(cn=*smi*))").matches(attrs)
+        assert not SearchFilter("(!(uid=js))").matches(attrs)
+        assert SearchFilter("mail=*").matches(attrs) is False
+        assert SearchFilter("(&(objectClass=person)(cn=x))").object_class == "person"
+
+    def test_invalid_filter(self):
+        """Test that malformed filters are rejected."""
+        with pytest.raises(ValueError):
+            SearchFilter("(&(uid=a)")
+
+
+class TestBackupIndex:
+    """Test browsing an indexed backup."""
+
+    def test_list_roots_and_children(self, index):
+        """Test one-level browsing from the top."""
+        roots = index.list_entries()
+        assert [e["dn"] for e in roots["entries"]] == ["dc=example,dc=com"]
+        assert roots["entries"][0]["has_children"] is True
+
+        children = index.list_entries(base="dc=example,dc=com")
+        assert [e["dn"] for e in children["entries"]] == [
+            "ou=Groups,dc=example,dc=com",
+            "ou=People,dc=example,dc=com",
+        ]
+
+    def test_paginated_subtree(self, index):
+        """Test cursor pagination over a subtree."""
+        seen = []
+        cursor = None
+        while True:
+            page = index.list_entries(
+                base="ou=people,dc=example,dc=com",
+                scope="sub",
+                cursor=cursor,
+                limit=10,
+            )
+            seen.extend(e["dn"] for e in page["entries"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert len(seen) == 26
+        assert len(set(seen)) == 26
+
+    def test_filtered_listing(self, index):
+        """Test objectClass and attribute filters."""
+        people = index.list_entries(
+            scope="sub", search_filter=SearchFilter("(objectClass=inetOrgPerson)")
+        )
+        assert len(people["entries"]) == 25
+
+        matched = index.list_entries(
+            scope="sub", search_filter=SearchFilter("(|(uid=user03)(cn=User 14))")
+        )
+        assert [e["dn"].split(",")[0] for e in matched["entries"]] == [
+            "uid=user03",
+            "uid=user14",
+        ]
+
+    def test_get_entry(self, index):
+        """Test reading a single entry, including binary values."""
+        entry = index.get_entry("UID=user07,ou=People,dc=example,dc=com")
+        assert entry["attributes"]["cn"] == ["User 7"]
+        assert entry["attributes"]["jpegPhoto"] == [{"binary": "/9j/4A=="}]
+        assert index.get_entry("uid=missing,dc=example,dc=com") is None
+
+    def test_encrypted_index(self, ldif_path, tmp_path, monkeypatch):
+        """Test that the index of an encrypted backup reveals nothing."""
+        monkeypatch.setattr(settings, "BACKUP_DIR", str(tmp_path))
+        index_path = str(tmp_path / "encrypted.idx.sqlite")
+        build_backup_index(str(ldif_path), index_path, encrypted=True)
+
+        with open(index_path, "rb") as f:
+            data = f.read()
+        assert b"User 7" not in data
+        assert b"ou=People" not in data
+        assert b"inetOrgPerson" not in data
+        # The plain SQLite file used while building is gone
+        assert set(os.listdir(tmp_path)) == {"backup.ldif", "encrypted.idx.sqlite"}
+
+        index = open_backup_index(index_path)
+        entry = index.get_entry("uid=user07,ou=People,dc=example,dc=com")
+        assert entry["attributes"]["uid"] == ["user07"]
+        # The decrypted index is only held in memory
+        assert os.listdir(tmp_path / ".index-cache") == []
+        index.close()
+        assert os.path.exists(index_path)
+
+    def test_clear_index_cache(self, tmp_path, monkeypatch):
+        """Test that index copies left by a crashed process are removed."""
+        monkeypatch.setattr(settings, "BACKUP_DIR", str(tmp_path))
+        cache_dir = tmp_path / ".index-cache"
+        cache_dir.mkdir()
+        (cache_dir / "leftover.idx.sqlite").write_bytes(b"SQLite format 3\x00")
+
+        clear_index_cache()
+
+        assert not cache_dir.exists()
+
+
+class TestBackupIndexCache:
+    """Test the LRU cache of open indexes."""
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self, ldif_path, tmp_path):
+        """Test that the least recently used index is closed."""
+        paths = []
+        for i in range(3):
+            path = str(tmp_path / f"{i}.idx.sqlite")
+            build_backup_index(str(ldif_path), path)
+            paths.append(path)
+
+        cache = BackupIndexCache(max_size=2)
+        first = await cache.acquire(1, paths[0])
+        cache.release(first)
+        assert await cache.acquire(1, paths[0]) is first
+        for backup_id, path in ((2, paths[1]), (3, paths[2])):
+            cache.release(await cache.acquire(backup_id, path))
+
+        # 1 is still in use, so it is evicted but stays open until released
+        assert list(cache._indexes) == [2, 3]
+        assert first.get_entry("dc=example,dc=com") is not None
+        cache.release(first)
+        with pytest.raises(Exception):
+            first.get_entry("dc=example,dc=com")
+        cache.evict([2, 3])
@@ -0,0 +1,139 @@
+"""Tests for configuration import/export service."""
+import json
+
+import pytest
+from sqlalchemy import func, select
+
+from api.models.models import LDAPServer, ScheduledBackup, User
+from api.services.config_service import (
+    SCHEDULED_BACKUP,
+    SERVER,
+    USER,
+    ConfigImportService,
+    stream_configuration_export,
+)
+
+
+def _server(name):
+    return {"name": name, "host": "ldap.example.com", "base_dn": "dc=example,dc=com"}
+
+
+class TestConfigImportService:
+    """Test bulk configuration import."""
+
+    @pytest.mark.asyncio
+    async def test_import_in_batches(self, db_session):
+        """Test that rows are inserted across several batches."""
+        importer = ConfigImportService(db_session, batch_size=2)
+        await importer.prefetch()
+        for i in range(5):
+            await importer.add(SERVER, _server(f"server{i}"))
+        await importer.flush()
+
+        count = await db_session.scalar(select(func.count(LDAPServer.id)))
+        assert count == 5
+        assert importer.report()["servers"] == 5
+
+    @pytest.mark.asyncio
+    async def test_existing_and_duplicate_rows_skipped(self, db_session):
+        """Test that existing and repeated names are reported as skipped."""
+        db_session.add(LDAPServer(**_server("existing")))
+        await db_session.commit()
+
+        importer = ConfigImportService(db_session)
+        await importer.prefetch()
+        await importer.add(SERVER, _server("existing"))
+        await importer.add(SERVER, _server("new"))
+        await importer.add(SERVER, _server("new"))
+        await importer.flush()
+
+        statuses = [(r["key"], r["status"]) for r in importer.report()["results"]]
+        assert ("existing", "skipped") in statuses
+        assert statuses.count(("new", "created")) == 1
+        assert statuses.count(("new", "skipped")) == 1
+
+    @pytest.mark.asyncio
+    async def test_schedules_and_users(self, db_session):
+        """Test schedules referencing servers and users with a default password."""
+        importer = ConfigImportService(db_session, default_password_hash="hash")
+        await importer.prefetch()
+        await importer.add(SERVER, _server("primary"))
+        await importer.flush()
+        server_id = await db_session.scalar(select(LDAPServer.id))
+
+        await importer.add(
+            SCHEDULED_BACKUP,
+            {"name": "nightly", "ldap_server_id": server_id, "cron_expression": "0 2 * * *"},
+        )
+        await importer.add(
+            SCHEDULED_BACKUP,
+            {"name": "orphan", "ldap_server_id": 999, "cron_expression": "0 2 * * *"},
+        )
+        await importer.add(USER, {"username": "alice", "email": "alice@example.com"})
+        await importer.flush()
+
+        report = importer.report()
+        assert report["scheduled_backups"] == 1
+        assert report["users"] == 1
+        assert await db_session.scalar(select(func.count(ScheduledBackup.id))) == 1
+        user = await db_session.scalar(select(User))
+        assert user.hashed_password == "hash"
+
+    @pytest.mark.asyncio
+    async def test_failed_import_is_not_applied(self, db_session, session_factory):
+        """Test that batches written before a failure are rolled back."""
+        importer = ConfigImportService(db_session, batch_size=2)
+        await importer.prefetch()
+        for i in range(3):
+            await importer.add(SERVER, _server(f"server{i}"))
+
+        async def fail():
+            raise RuntimeError("database went away")
+
+        importer._flush_users = fail
+        with pytest.raises(RuntimeError):
+            await importer.commit()
+
+        async with session_factory() as session:
+            assert await session.scalar(select(func.count(LDAPServer.id))) == 0
+
+    @pytest.mark.asyncio
+    async def test_invalid_rows_reported(self, db_session):
+        """Test that invalid rows are reported without aborting the import."""
+        importer = ConfigImportService(db_session)
+        await importer.prefetch()
+        await importer.add(SERVER, {"name": "missing-host"})
+        await importer.add(SCHEDULED_BACKUP, {"name": "bad", "cron_expression": "x"})
+        await importer.add("widget", {})
+        await importer.flush()
+
+        report = importer.report()
+        assert len(report["errors"]) == 3
+        assert all(r["status"] == "error" for r in report["results"])
+
+
+class TestConfigExportStream:
+    """Test streaming configuration export."""
+
+    @pytest.mark.asyncio
+    async def test_export_round_trips_through_import(self, db_session, session_factory):
+        """Test that streamed records can be fed back to the importer."""
+        importer = ConfigImportService(db_session, default_password_hash="hash")
+        await importer.prefetch()
+        for i in range(3):
+            await importer.add(SERVER, _server(f"server{i}"))
+        await importer.add(USER, {"username": "bob", "email": "bob@example.com"})
+        await importer.commit()
+
+        chunks = [
+            chunk
+            async for chunk in stream_configuration_export(session_factory, batch_size=2)
+        ]
+        records = [json.loads(line) for line in b"".join(chunks).splitlines()]
+
+        assert len(chunks) >= 2
+        assert [r["type"] for r in records].count(SERVER) == 3
+        user_record = next(r for r in records if r["type"] == USER)
+        assert user_record["data"]["role"] == "viewer"
+        assert "hashed_password" not in user_record["data"]
+        assert all("bind_password" not in r["data"] for r in records)
@@ -0,0 +1,126 @@
+"""Tests for dashboard statistics."""
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from api.models.models import (
+    Backup,
+    BackupStatus,
+    BackupType,
+    LDAPServer,
+    RestoreJob,
+    VerificationStatus,
+)
+from api.services.dashboard_service import SUMMARY_KEY, DashboardService
+
+NOW = datetime(2026, 10, 18, 12, 0)
+
+
+def _server(server_id, name, is_active=True):
+    return LDAPServer(
+        id=server_id,
+        name=name,
+        host=f"{name}.example.com",
+        base_dn="dc=example,dc=com",
+        is_active=is_active,
+    )
+
+
+def _backup(backup_id, server_id, status, days_ago, size=None, **kwargs):
+    created_at = NOW - timedelta(days=days_ago)
+    return Backup(
+        id=backup_id,
+        ldap_server_id=server_id,
+        created_by=1,
+        status=status,
+        file_size=size,
+        created_at=created_at,
+        completed_at=created_at if status == BackupStatus.COMPLETED else None,
+        **kwargs,
+    )
+
+
+class TestDashboardService:
+    """Test aggregated dashboard statistics."""
+
+    @pytest.mark.asyncio
+    async def test_summary(self, db_session):
+        """Test counts, bytes stored, last backups and failure rate."""
+        db_session.add_all(
+            [
+                _server(1, "primary"),
+                _server(2, "replica"),
+                _server(3, "retired", is_active=False),
+                _backup(1, 1, BackupStatus.COMPLETED, 1, size=100),
+                _backup(2, 1, BackupStatus.COMPLETED, 30, size=50),
+                _backup(
+                    3,
+                    2,
+                    BackupStatus.COMPLETED,
+                    2,
+                    size=25,
+                    backup_type=BackupType.INCREMENTAL,
+                    verification_status=VerificationStatus.CORRUPT,
+                ),
+                _backup(4, 2, BackupStatus.FAILED, 1),
+                _backup(5, 2, BackupStatus.FAILED, 20),
+                _backup(6, 1, BackupStatus.IN_PROGRESS, 0),
+                RestoreJob(
+                    id=1,
+                    backup_id=1,
+                    ldap_server_id=1,
+                    created_by=1,
+                    status=BackupStatus.PENDING,
+                ),
+            ]
+        )
+        await db_session.commit()
+
+        summary = await DashboardService(db_session).compute(now=NOW)
+
+        assert summary["servers"] == {"total": 3, "active": 2}
+        assert summary["backups"]["total"] == 6
+        assert summary["backups"]["by_status"] == {
+            "pending": 0,
+            "in_progress": 1,
+            "completed": 3,
+            "failed": 2,
+        }
+        assert summary["backups"]["by_type"] == {"full": 5, "incremental": 1}
+        assert summary["backups"]["bytes_stored"] == 175
+        assert summary["backups"]["corrupt"] == 1
+        assert summary["restores"]["total"] == 1
+        assert summary["active_jobs"] == 2
+        assert summary["last_backup_at"] == NOW - timedelta(days=1)
+        assert summary["failure_rate"]["completed"] == 2
+        assert summary["failure_rate"]["failed"] == 1
+        assert summary["failure_rate"]["rate"] == pytest.approx(1 / 3, abs=1e-4)
+        assert [(b["name"], b["last_success_at"]) for b in summary["last_backups"]] == [
+            ("primary", NOW - timedelta(days=1)),
+            ("replica", NOW - timedelta(days=2)),
+            ("retired", None),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_empty(self, db_session):
+        """Test the summary of an empty installation."""
+        summary = await DashboardService(db_session).compute(now=NOW)
+
+        assert summary["backups"]["total"] == 0
+        assert summary["last_backup_at"] is None
+        assert summary["failure_rate"]["rate"] == 0.0
+
+    @pytest.mark.asyncio
+    async def test_summary_is_cached(self, fake_redis, db_session):
+        """Test that a cached summary is served without querying."""
+        await DashboardService(db_session, fake_redis).get_summary()
+        assert SUMMARY_KEY in fake_redis.values
+
+        cached = json.loads(fake_redis.values[SUMMARY_KEY])
+        cached["active_jobs"] = 42
+        fake_redis.values[SUMMARY_KEY] = json.dumps(cached)
+
+        summary = await DashboardService(db_session, fake_redis).get_summary()
+        assert summary["active_jobs"] == 42
@@ -0,0 +1,181 @@
+"""Tests for backup diff engine."""
+import json
+import threading
+
+import pytest
+
+from api.core.config import settings
+from api.services.backup_index import BackupIndex, build_backup_index
+from api.services.diff_service import (
+    ADD,
+    DELETE,
+    MODIFY,
+    LiveSnapshot,
+    SnapshotCancelledError,
+    attribute_deltas,
+    diff_entries,
+    iter_json_changes,
+    iter_ldif_changes,
+)
+
+OLD = """dn: dc=example,dc=com
+objectClass: domain
+
+dn: ou=Old,dc=example,dc=com
+objectClass: organizationalUnit
+
+dn: uid=gone,ou=Old,dc=example,dc=com
+objectClass: account
+uid: gone
+
+dn: uid=alice,dc=example,dc=com
+objectClass: account
+uid: alice
+mail: alice@old.example.com
+description: unchanged
+
+"""
+
+NEW = """dn: dc=example,dc=com
+objectClass: domain
+
+dn: uid=alice,dc=example,dc=com
+objectClass: account
+UID: alice
+mail: alice@example.com
+description: unchanged
+
+dn: uid=bob,dc=example,dc=com
+objectClass: account
+uid: bob
+
+"""
+
+
+def _index(tmp_path, name, content):
+    ldif = tmp_path / f"{name}.ldif"
+    ldif.write_text(content, encoding="utf-8")
+    path = str(tmp_path / f"{name}.idx.sqlite")
+    build_backup_index(str(ldif), path)
+    return BackupIndex(path)
+
+
+@pytest.fixture
+def indexes(tmp_path, monkeypatch):
+    """Open indexes of two snapshots of the same directory."""
+    monkeypatch.setattr(settings, "BACKUP_DIR", str(tmp_path))
+    old = _index(tmp_path, "old", OLD)
+    new = _index(tmp_path, "new", NEW)
+    yield old, new
+    old.close()
+    new.close()
+
+
+class TestDiffEngine:
+    """Test the sorted merge-join diff."""
+
+    def test_entry_and_attribute_changes(self, indexes):
+        """Test added, removed and modified entries."""
+        old, new = indexes
+        changes = list(diff_entries(old.iter_entries(), new.iter_entries()))
+
+        by_dn = {change.dn: change for change in changes}
+        assert by_dn["uid=bob,dc=example,dc=com"].change == ADD
+        assert by_dn["uid=gone,ou=Old,dc=example,dc=com"].change == DELETE
+        assert by_dn["ou=Old,dc=example,dc=com"].change == DELETE
+
+        alice = by_dn["uid=alice,dc=example,dc=com"]
+        assert alice.change == MODIFY
+        assert list(alice.deltas) == ["mail"]
+        assert alice.deltas["mail"].added == ["alice@example.com"]
+        assert alice.deltas["mail"].removed == ["alice@old.example.com"]
+        assert len(changes) == 4
+
+    def test_large_group_membership_delta(self):
+        """Test that big multi-valued attributes diff quickly and in order."""
+        members = [f"uid=user{i},dc=example,dc=com" for i in range(100000)]
+        old = {"member": members, "cn": ["staff"]}
+        new = {"Member": members[2:] + ["uid=new2,dc=example,dc=com", "uid=new1,dc=example,dc=com"], "cn": ["staff"]}
+
+        deltas = attribute_deltas(old, new)
+
+        assert list(deltas) == ["Member"]
+        assert deltas["Member"].added == ["uid=new2,dc=example,dc=com", "uid=new1,dc=example,dc=com"]
+        assert deltas["Member"].removed == members[:2]
+
+    def test_ldif_output_deletes_children_first(self, indexes):
+        """Test the LDIF change file ordering and format."""
+        old, new = indexes
+        ldif = "".join(
+            iter_ldif_changes(diff_entries(old.iter_entries(), new.iter_entries()))
+        )
+
+        assert ldif.startswith("version: 1\n")
+        assert (
+            "changetype: modify\nadd: mail\nmail: alice@example.com\n-\n"
+            "delete: mail\nmail: alice@old.example.com\n-\n"
+        ) in ldif
+        assert ldif.index("dn: uid=gone,ou=Old") < ldif.index("dn: ou=Old")
+        assert ldif.index("changetype: add") < ldif.index("changetype: delete")
+
+    def test_json_summary(self, indexes):
+        """Test NDJSON output ends with counts."""
+        old, new = indexes
+        lines = list(
+            iter_json_changes(diff_entries(old.iter_entries(), new.iter_entries()))
+        )
+        assert json.loads(lines[-1]) == {
+            "type": "summary",
+            "added": 1,
+            "removed": 2,
+            "modified": 1,
+        }
+
+
+class _FakeDirectory:
+    """Stands in for LDAPService by writing a fixed LDIF."""
+
+    def __init__(self, content):
+        self.content = content
+        self.disconnected = False
+
+    def backup_to_ldif(self, output_path, progress=None):
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(self.content)
+            if progress:
+                progress(1, f.tell())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.disconnected = True
+
+
+class TestLiveSnapshot:
+    """Test diffing against a live directory snapshot."""
+
+    def test_snapshot_is_indexed_and_cleaned_up(self, indexes, tmp_path):
+        """Test that the scratch files are removed after use."""
+        old, _ = indexes
+        scratch = tmp_path / "scratch"
+        directory = _FakeDirectory(NEW)
+
+        with LiveSnapshot(directory, str(scratch)) as live:
+            changes = list(diff_entries(old.iter_entries(), live.iter_entries()))
+
+        assert len(changes) == 4
+        assert directory.disconnected
+        assert list(scratch.iterdir()) == []
+
+    def test_cancelled_snapshot_stops_export(self, tmp_path):
+        """Test that a snapshot nobody waits for stops and is cleaned up."""
+        scratch = tmp_path / "scratch"
+        cancelled = threading.Event()
+        cancelled.set()
+
+        with pytest.raises(SnapshotCancelledError):
+            with LiveSnapshot(_FakeDirectory(NEW), str(scratch), cancelled):
+                pass
+
+        assert list(scratch.iterdir()) == []
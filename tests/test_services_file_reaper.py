@@ -0,0 +1,91 @@
+"""Tests for backup file reaper."""
+import pytest
+
+from api.core.config import settings
+from api.services.file_reaper import REAP_PROCESSING, REAP_QUEUE, FileReaperService
+
+
+@pytest.fixture
+def backup_dir(tmp_path, monkeypatch):
+    """Point BACKUP_DIR at a temporary directory."""
+    directory = tmp_path / "backups"
+    directory.mkdir()
+    monkeypatch.setattr(settings, "BACKUP_DIR", str(directory))
+    return directory
+
+
+class TestFileReaperService:
+    """Test asynchronous backup file cleanup."""
+
+    @pytest.mark.asyncio
+    async def test_reap_removes_files(self, backup_dir):
+        """Test that files inside the backup directory are removed."""
+        paths = []
+        for i in range(5):
+            path = backup_dir / f"backup{i}.ldif.gz.enc"
+            path.write_bytes(b"data")
+            paths.append(str(path))
+
+        removed = await FileReaperService(concurrency=2).reap(paths + [None])
+
+        assert removed == 5
+        assert list(backup_dir.iterdir()) == []
+
+    @pytest.mark.asyncio
+    async def test_reap_ignores_missing_and_outside_files(self, backup_dir, tmp_path):
+        """Test that missing files and files outside BACKUP_DIR are skipped."""
+        outside = tmp_path / "outside.txt"
+        outside.write_text("keep")
+
+        removed = await FileReaperService().reap(
+            [str(backup_dir / "missing.ldif"), str(outside)]
+        )
+
+        assert removed == 0
+        assert outside.exists()
+
+    @pytest.mark.asyncio
+    async def test_enqueue_and_process_queue(self, fake_redis, backup_dir):
+        """Test queueing paths in Redis and processing one batch."""
+        path = backup_dir / "queued.ldif"
+        path.write_bytes(b"data")
+        reaper = FileReaperService(fake_redis)
+
+        assert await reaper.enqueue([str(path), None]) == 1
+        assert fake_redis.lists[REAP_QUEUE] == [str(path)]
+
+        assert await reaper.process_queue(batch_size=10) == 1
+        assert not path.exists()
+        assert fake_redis.lists[REAP_QUEUE] == []
+        assert fake_redis.lists[reaper.processing] == []
+
+    @pytest.mark.asyncio
+    async def test_failed_deletions_are_requeued(self, fake_redis, backup_dir):
+        """Test that a path that could not be deleted is queued again."""
+        stuck = backup_dir / "stuck"
+        stuck.mkdir()
+        reaper = FileReaperService(fake_redis)
+        await reaper.enqueue([str(stuck), str(backup_dir / "gone.ldif")])
+
+        assert await reaper.process_queue() == 0
+
+        assert fake_redis.lists[REAP_QUEUE] == [str(stuck)]
+        assert fake_redis.lists[reaper.processing] == []
+
+    @pytest.mark.asyncio
+    async def test_paths_claimed_by_stopped_worker_are_requeued(
+        self, fake_redis, backup_dir
+    ):
+        """Test that only a stopped worker's claims are taken over."""
+        orphan = backup_dir / "orphan.ldif"
+        orphan.write_bytes(b"data")
+        busy = backup_dir / "busy.ldif"
+        busy.write_bytes(b"data")
+        fake_redis.lists[f"{REAP_PROCESSING}:dead"] = [str(orphan)]
+        fake_redis.lists[f"{REAP_PROCESSING}:busy"] = [str(busy)]
+        reaper = FileReaperService(fake_redis, worker_id="live")
+
+        assert await reaper.requeue_in_flight("dead") == 1
+        assert await reaper.process_queue() == 1
+        assert not orphan.exists()
+        assert fake_redis.lists[f"{REAP_PROCESSING}:busy"] == [str(busy)]
@@ -0,0 +1,119 @@
+"""Tests for fleet health probing."""
+
+import threading
+import time
+
+import pytest
+
+from api.models.models import LDAPServer
+from api.services.health_service import FleetHealthService
+
+
+def _server(server_id, name, host="ldap.example.com", is_active=True):
+    return LDAPServer(
+        id=server_id,
+        name=name,
+        host=host,
+        port=389,
+        use_ssl=False,
+        base_dn="dc=example,dc=com",
+        is_active=is_active,
+    )
+
+
+def _healthy(server):
+    return {"reachable": True, "bind_ok": True, "latency_ms": 1.5}
+
+
+class TestFleetHealthService:
+    """Test concurrent probing and cached results."""
+
+    @pytest.mark.asyncio
+    async def test_probe_all_bounds_fan_out(self):
+        """Test that no more than the configured probes run at once."""
+        running = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def probe(server):
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.02)
+            with lock:
+                running -= 1
+            return _healthy(server)
+
+        servers = [_server(i, f"ldap{i}") for i in range(12)]
+        results = await FleetHealthService(probe=probe, concurrency=3).probe_all(
+            servers
+        )
+
+        assert [r["server_id"] for r in results] == list(range(12))
+        assert all(r["bind_ok"] for r in results)
+        assert peak == 3
+
+    @pytest.mark.asyncio
+    async def test_failed_and_hung_probes(self):
+        """Test that a failing or hung probe only affects its own server."""
+
+        def probe(server):
+            if server.name == "broken":
+                raise OSError("no route to host")
+            if server.name == "hung":
+                time.sleep(1.5)
+            return _healthy(server)
+
+        servers = [_server(1, "ok"), _server(2, "broken"), _server(3, "hung")]
+        results = await FleetHealthService(probe=probe, timeout=0.1).probe_all(servers)
+
+        assert results[0]["bind_ok"]
+        assert results[1]["error"] == "no route to host"
+        assert results[2]["error"] == "Timed out"
+        assert not results[2]["reachable"]
+
+    @pytest.mark.asyncio
+    async def test_run_records_active_servers(self, fake_redis, db_session):
+        """Test a full round against the database and Redis."""
+        db_session.add_all(
+            [
+                _server(1, "primary"),
+                _server(2, "replica"),
+                _server(3, "retired", is_active=False),
+            ]
+        )
+        await db_session.commit()
+
+        def probe(server):
+            if server.name == "replica":
+                return {"reachable": True, "bind_ok": False, "error": "Invalid"}
+            return _healthy(server)
+
+        stats = await FleetHealthService(fake_redis, probe).run(db_session)
+        cached = await FleetHealthService.get_cached(fake_redis)
+
+        assert stats == {"total": 2, "up": 1, "bind_failed": 1, "unreachable": 0}
+        assert [s["name"] for s in cached["servers"]] == ["primary", "replica"]
+        assert cached["up"] == 1 and cached["down"] == 1
+        assert cached["stale"] is False
+
+    @pytest.mark.asyncio
+    async def test_removed_servers_drop_out(self, fake_redis):
+        """Test that each round replaces the previous results."""
+        service = FleetHealthService(fake_redis, _healthy)
+
+        await service.record(
+            await service.probe_all([_server(1, "a"), _server(2, "b")])
+        )
+        await service.record(await service.probe_all([_server(2, "b")]))
+
+        cached = await FleetHealthService.get_cached(fake_redis)
+        assert [s["server_id"] for s in cached["servers"]] == [2]
+
+    @pytest.mark.asyncio
+    async def test_no_results_yet(self, fake_redis):
+        """Test the response before the first round has run."""
+        cached = await FleetHealthService.get_cached(fake_redis)
+        assert cached["servers"] == []
+        assert cached["stale"] is True
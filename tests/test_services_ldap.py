@@ -1,5 +1,18 @@
 """Tests for LDAP service."""
-from api.services.ldap_service import LDAPService
+import asyncio
+import time
+
+import ldap
+import pytest
+
+from api.core.config import settings
+from api.services.async_ldap_service import AsyncLDAPService, LDAPTimeoutError
+from api.services.ldap_pool import PoolTimeoutError
+from api.services.ldap_service import (
+    LDAPService,
+    is_server_error,
+    is_transient_error,
+)
 
 
 class TestLDAPService:
@@ -15,7 +28,7 @@ class TestLDAPService:
         )
         service.connect()
         connection = mock_ldap.return_value
-        connection.set_option.assert_called_once()
+        connection.set_option.assert_any_call(ldap.OPT_REFERRALS, 0)
         connection.simple_bind_s.assert_called()
 
     def test_search_all_entries(self, mock_ldap):
@@ -41,3 +54,283 @@ class TestLDAPService:
             base_dn="dc=example,dc=com"
         )
         assert service.test_connection() is True
+
+    def test_pooled_connections_are_reused(self, mock_ldap):
+        """Test that pooled services share one bound connection."""
+        from api.services.ldap_pool import ldap_pools
+
+        config = {
+            "host": "pool.example.com",
+            "port": 389,
+            "use_ssl": False,
+            "base_dn": "dc=example,dc=com",
+            "bind_dn": "cn=admin,dc=example,dc=com",
+            "bind_password": "secret",
+            "pooled": True,
+        }
+        try:
+            with LDAPService(**config) as first:
+                first.connect()
+            with LDAPService(**config) as second:
+                second.connect()
+                assert second.conn is mock_ldap.return_value
+
+            mock_ldap.assert_called_once()
+            mock_ldap.return_value.unbind_s.assert_not_called()
+        finally:
+            ldap_pools.close_all()
+
+    def test_search_entries_stops_at_size_limit(self, mock_ldap):
+        """Test that a size-limited search returns the entries it got."""
+        connection = mock_ldap.return_value
+        connection.result3.side_effect = [
+            (ldap.RES_SEARCH_ENTRY, [("dc=example,dc=com", {})], 1, []),
+            ldap.SIZELIMIT_EXCEEDED({}),
+        ]
+        service = LDAPService(
+            host="ldap.example.com",
+            port=389,
+            use_ssl=False,
+            base_dn="dc=example,dc=com"
+        )
+        result = service.search_entries(size_limit=1, timeout=5)
+        assert result == [("dc=example,dc=com", {})]
+
+    def test_restore_reports_progress(self, mock_ldap, tmp_path):
+        """Test that restore reports entries and bytes processed."""
+        ldif = tmp_path / "restore.ldif"
+        ldif.write_text(
+            "dn: ou=people,dc=example,dc=com\nobjectClass: organizationalUnit\n\n"
+            "dn: ou=groups,dc=example,dc=com\nobjectClass: organizationalUnit\n\n"
+        )
+        service = LDAPService(
+            host="ldap.example.com",
+            port=389,
+            use_ssl=False,
+            base_dn="dc=example,dc=com"
+        )
+        service.conn = mock_ldap.return_value
+        reports = []
+        restored = service.restore_from_ldif(
+            str(ldif), lambda entries, size: reports.append((entries, size))
+        )
+        assert restored == 2
+        assert reports[-1] == (2, ldif.stat().st_size)
+        assert set(service.timer.seconds) == {"ldap_add", "ldif_parse"}
+
+    def test_restore_fails_when_server_stays_down(self, mock_ldap, tmp_path):
+        """Test that a server lost mid-restore fails it for a retry."""
+        ldif = tmp_path / "restore.ldif"
+        ldif.write_text(
+            "dn: ou=people,dc=example,dc=com\nobjectClass: organizationalUnit\n\n"
+            "dn: ou=groups,dc=example,dc=com\nobjectClass: organizationalUnit\n\n"
+        )
+        mock_ldap.return_value.add_s.side_effect = ldap.SERVER_DOWN({})
+        service = LDAPService(
+            host="ldap.example.com",
+            port=389,
+            use_ssl=False,
+            base_dn="dc=example,dc=com"
+        )
+
+        with pytest.raises(ldap.SERVER_DOWN) as error:
+            service.restore_from_ldif(str(ldif))
+
+        assert is_transient_error(error.value)
+        # The first entry was tried again after one rebind, then given up on
+        assert mock_ldap.return_value.add_s.call_count == 2
+
+    def test_restore_skips_rejected_entries(self, mock_ldap, tmp_path):
+        """Test that an entry the server rejects does not stop the restore."""
+        ldif = tmp_path / "restore.ldif"
+        ldif.write_text(
+            "dn: ou=people,dc=example,dc=com\nobjectClass: organizationalUnit\n\n"
+            "dn: ou=groups,dc=example,dc=com\nobjectClass: organizationalUnit\n\n"
+        )
+        mock_ldap.return_value.add_s.side_effect = [
+            ldap.LDAPError({"desc": "Invalid syntax"}),
+            None,
+        ]
+        service = LDAPService(
+            host="ldap.example.com",
+            port=389,
+            use_ssl=False,
+            base_dn="dc=example,dc=com"
+        )
+        service.conn = mock_ldap.return_value
+
+        assert service.restore_from_ldif(str(ldif)) == 1
+
+    def test_backup_resumes_from_checkpoint(self, mock_ldap, monkeypatch, tmp_path):
+        """Test that an interrupted export continues after its checkpoint."""
+        monkeypatch.setattr(settings, "LDAP_CHECKPOINT_ENTRIES", 2)
+        entries = [
+            (f"cn=u{i},dc=example,dc=com", {"cn": [f"u{i}".encode()]})
+            for i in range(5)
+        ]
+        service = LDAPService(
+            host="ldap.example.com",
+            port=389,
+            use_ssl=False,
+            base_dn="dc=example,dc=com"
+        )
+
+        def interrupted(search_filter):
+            yield from entries[:3]
+            raise Exception("LDAP search failed: server down")
+
+        checkpoints = []
+        partial = tmp_path / "partial.ldif"
+        service.iter_entries = interrupted
+        with pytest.raises(Exception):
+            service.backup_to_ldif(str(partial), on_checkpoint=checkpoints.append)
+        assert checkpoints == [
+            {"offset": checkpoints[0]["offset"], "entries": 2, "last_dn": entries[1][0]}
+        ]
+
+        service.iter_entries = lambda search_filter: iter(entries)
+        assert service.backup_to_ldif(str(partial), checkpoint=checkpoints[0]) == 5
+
+        full = tmp_path / "full.ldif"
+        service.backup_to_ldif(str(full))
+        assert partial.read_text() == full.read_text()
+
+    def test_backup_restarts_when_checkpoint_does_not_match(
+        self, mock_ldap, tmp_path
+    ):
+        """Test that a changed directory restarts the export from scratch."""
+        entries = [("cn=a,dc=example,dc=com", {"cn": [b"a"]})]
+        service = LDAPService(
+            host="ldap.example.com",
+            port=389,
+            use_ssl=False,
+            base_dn="dc=example,dc=com"
+        )
+        service.iter_entries = lambda search_filter: iter(entries)
+        output = tmp_path / "backup.ldif"
+        output.write_text("dn: cn=gone,dc=example,dc=com\ncn: gone\n\n")
+
+        checkpoint = {
+            "offset": output.stat().st_size,
+            "entries": 1,
+            "last_dn": "cn=gone,dc=example,dc=com",
+        }
+        assert service.backup_to_ldif(str(output), checkpoint=checkpoint) == 1
+        assert output.read_text() == "dn: cn=a,dc=example,dc=com\ncn: a\n\n"
+
+    def test_restore_resumes_from_checkpoint(self, mock_ldap, tmp_path):
+        """Test that a restore continues at its checkpointed offset."""
+        first = "dn: ou=people,dc=example,dc=com\nobjectClass: organizationalUnit\n\n"
+        ldif = tmp_path / "restore.ldif"
+        ldif.write_text(
+            first + "dn: ou=groups,dc=example,dc=com\nobjectClass: organizationalUnit\n\n"
+        )
+        service = LDAPService(
+            host="ldap.example.com",
+            port=389,
+            use_ssl=False,
+            base_dn="dc=example,dc=com"
+        )
+        service.conn = mock_ldap.return_value
+        checkpoint = {"offset": len(first.encode()), "entries": 1, "restored": 1}
+
+        assert service.restore_from_ldif(str(ldif), checkpoint=checkpoint) == 2
+        service.conn.add_s.assert_called_once()
+        assert service.conn.add_s.call_args[0][0] == "ou=groups,dc=example,dc=com"
+
+    def test_transient_errors(self):
+        """Test that wrapped server and network errors count as transient."""
+        try:
+            try:
+                raise ldap.SERVER_DOWN({"desc": "Can't contact LDAP server"})
+            except ldap.LDAPError as e:
+                raise Exception(f"LDAP search failed: {str(e)}")
+        except Exception as wrapped:
+            assert is_transient_error(wrapped)
+
+        assert is_transient_error(ConnectionResetError())
+        assert not is_transient_error(ldap.INVALID_CREDENTIALS({}))
+        assert not is_transient_error(ValueError("bad LDIF"))
+
+    def test_pool_timeouts_are_not_server_errors(self):
+        """Test that running out of pool slots does not blame the server."""
+        try:
+            try:
+                raise PoolTimeoutError("No pooled connection within 30s")
+            except PoolTimeoutError as e:
+                raise Exception(f"LDAP search failed: {str(e)}")
+        except Exception as wrapped:
+            assert is_transient_error(wrapped)
+            assert not is_server_error(wrapped)
+
+        assert is_server_error(ldap.SERVER_DOWN({}))
+        assert not is_server_error(ValueError("bad LDIF"))
+
+
+class TestAsyncLDAPService:
+    """Test the event-loop-friendly LDAP facade."""
+
+    @pytest.mark.asyncio
+    async def test_test_connection(self, mock_ldap):
+        """Test connection checks run off the event loop."""
+        service = AsyncLDAPService(
+            LDAPService(
+                host="ldap.example.com",
+                port=389,
+                use_ssl=False,
+                base_dn="dc=example,dc=com"
+            )
+        )
+        assert await service.test_connection() is True
+
+    @pytest.mark.asyncio
+    async def test_operation_timeout(self, mock_ldap):
+        """Test that a hung LDAP call fails without blocking the loop."""
+        mock_ldap.return_value.simple_bind_s.side_effect = lambda *a: time.sleep(2)
+        service = AsyncLDAPService(
+            LDAPService(
+                host="ldap.example.com",
+                port=389,
+                use_ssl=False,
+                base_dn="dc=example,dc=com"
+            ),
+            timeout=0,
+        )
+        with pytest.raises(LDAPTimeoutError):
+            await service.connect()
+
+
+    @pytest.mark.asyncio
+    async def test_timed_out_connection_is_released_once_done(self, mock_ldap):
+        """Test that exiting after a timeout leaves the connection in use."""
+        state = {"searching": False, "unbound_while_searching": False}
+
+        def search(*args, **kwargs):
+            state["searching"] = True
+            time.sleep(1.5)
+            state["searching"] = False
+            raise ldap.TIMEOUT({})
+
+        def unbind():
+            state["unbound_while_searching"] |= state["searching"]
+
+        mock_ldap.return_value.search_ext.side_effect = search
+        mock_ldap.return_value.unbind_s.side_effect = unbind
+        service = AsyncLDAPService(
+            LDAPService(
+                host="ldap.example.com",
+                port=389,
+                use_ssl=False,
+                base_dn="dc=example,dc=com"
+            ),
+            timeout=0,
+        )
+        await service.connect()
+        with pytest.raises(LDAPTimeoutError):
+            async with service:
+                await service.search_entries()
+
+        while service.service.conn is not None:
+            await asyncio.sleep(0.05)
+        assert not state["unbound_while_searching"]
+        assert mock_ldap.return_value.unbind_s.call_count == 1
@@ -0,0 +1,205 @@
+"""Tests for the LDAP connection pool."""
+import threading
+
+import pytest
+
+from api.services.ldap_pool import (
+    ConnectionPool,
+    ConnectionPoolRegistry,
+    PoolTimeoutError,
+    pool_key,
+)
+
+
+class _Connections:
+    """Fake connection factory recording what the pool does."""
+
+    def __init__(self):
+        self.created = 0
+        self.closed = []
+        self.healthy = True
+        self.refuse = False
+
+    def create(self):
+        if self.refuse:
+            raise OSError("connection refused")
+        self.created += 1
+        return f"conn-{self.created}"
+
+    def check(self, conn):
+        if not self.healthy:
+            raise ConnectionError("server went away")
+
+    def close(self, conn):
+        self.closed.append(conn)
+
+
+def _pool(connections, **kwargs):
+    options = {
+        "max_size": 2,
+        "idle_seconds": 300,
+        "check_interval": 30,
+        "acquire_timeout": 0.1,
+    }
+    options.update(kwargs)
+    return ConnectionPool(
+        connections.create, connections.check, connections.close, **options
+    )
+
+
+class TestConnectionPool:
+    """Test connection reuse, limits and eviction."""
+
+    def test_reuses_released_connection(self):
+        """Test that a released connection is handed out again."""
+        connections = _Connections()
+        pool = _pool(connections)
+
+        first = pool.acquire()
+        pool.release(first)
+        second = pool.acquire()
+
+        assert second.conn == first.conn
+        assert connections.created == 1
+
+    def test_waits_for_connection_at_max_size(self):
+        """Test that acquire blocks at max size and times out."""
+        connections = _Connections()
+        pool = _pool(connections)
+        leases = [pool.acquire(), pool.acquire()]
+
+        with pytest.raises(PoolTimeoutError):
+            pool.acquire()
+
+        timer = threading.Timer(0.05, pool.release, args=(leases[0],))
+        timer.start()
+        pool.acquire_timeout = 2
+        assert pool.acquire().conn == leases[0].conn
+        timer.join()
+        assert connections.created == 2
+
+    def test_rebinds_after_failed_health_check(self):
+        """Test that a connection failing its check is replaced."""
+        connections = _Connections()
+        pool = _pool(connections, check_interval=0)
+
+        pool.release(pool.acquire())
+        connections.healthy = False
+        lease = pool.acquire()
+
+        assert lease.conn == "conn-2"
+        assert connections.closed == ["conn-1"]
+        assert pool.size == 1
+
+    def test_discarded_connection_is_closed(self):
+        """Test that a discarded connection frees its slot."""
+        connections = _Connections()
+        pool = _pool(connections)
+
+        pool.release(pool.acquire(), discard=True)
+
+        assert connections.closed == ["conn-1"]
+        assert pool.size == 0
+
+    def test_failed_create_frees_slot(self):
+        """Test that a failed bind does not leak pool capacity."""
+        connections = _Connections()
+        pool = _pool(connections, max_size=1)
+        connections.refuse = True
+
+        with pytest.raises(OSError):
+            pool.acquire()
+
+        connections.refuse = False
+        assert pool.acquire().conn == "conn-1"
+
+    def test_evicts_idle_connections(self):
+        """Test that connections idle past the timeout are closed."""
+        connections = _Connections()
+        pool = _pool(connections, idle_seconds=0)
+
+        pool.release(pool.acquire())
+
+        assert pool.evict_idle() == 1
+        assert connections.closed == ["conn-1"]
+        assert pool.size == 0
+
+    def test_close_closes_returned_leases(self):
+        """Test that leases released after close() are closed."""
+        connections = _Connections()
+        pool = _pool(connections)
+        lease = pool.acquire()
+
+        pool.close()
+        pool.release(lease)
+
+        assert connections.closed == ["conn-1"]
+        with pytest.raises(RuntimeError):
+            pool.acquire()
+
+
+class TestConnectionPoolRegistry:
+    """Test per-server pool lookup."""
+
+    def test_pools_are_keyed_on_server_config(self):
+        """Test that only identical configs share a pool."""
+        connections = _Connections()
+        registry = ConnectionPoolRegistry()
+        args = (connections.create, connections.check, connections.close)
+
+        key = pool_key("LDAP.example.com", 389, False, "cn=admin", "secret")
+        same = pool_key("ldap.example.com", 389, False, "cn=admin", "secret")
+        other = pool_key("ldap.example.com", 389, False, "cn=admin", "changed")
+
+        assert registry.get(key, *args) is registry.get(same, *args)
+        assert registry.get(key, *args) is not registry.get(other, *args)
+        assert "secret" not in key
+
+    def test_evict_idle_drops_empty_pools(self):
+        """Test that pools with no connections left are removed."""
+        connections = _Connections()
+        registry = ConnectionPoolRegistry()
+        args = (connections.create, connections.check, connections.close)
+        key = pool_key("ldap.example.com", 389, False, None, None)
+
+        pool = registry.get(key, *args)
+        pool.idle_seconds = 0
+        pool.release(pool.acquire())
+
+        assert registry.evict_idle() == 1
+        assert registry.get(key, *args) is not pool
+
+    def test_evict_idle_keeps_pools_with_leases(self):
+        """Test that a pool is not dropped while a lease is held."""
+        connections = _Connections()
+        registry = ConnectionPoolRegistry()
+        args = (connections.create, connections.check, connections.close)
+        key = pool_key("ldap.example.com", 389, False, None, None)
+
+        pool, lease = registry.acquire(key, *args)
+        pool.idle_seconds = 0
+        pool.release(registry.acquire(key, *args)[1], discard=True)
+
+        registry.evict_idle()
+
+        assert registry.get(key, *args) is pool
+        pool.release(lease)
+        assert pool.leases == 0
+
+    def test_acquire_replaces_pool_closed_by_eviction(self):
+        """Test that a pool evicted after lookup is not leased from."""
+        connections = _Connections()
+        registry = ConnectionPoolRegistry()
+        args = (connections.create, connections.check, connections.close)
+        key = pool_key("ldap.example.com", 389, False, None, None)
+
+        stale = registry.get(key, *args)
+        registry.evict_idle()
+        with pytest.raises(RuntimeError):
+            stale.acquire()
+
+        pool, lease = registry.acquire(key, *args)
+
+        assert pool is not stale
+        assert registry.get(key, *args) is pool
+        pool.release(lease)
@@ -0,0 +1,104 @@
+"""Tests for metrics shared between processes."""
+
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+from prometheus_client import REGISTRY
+
+from api.services.metrics_service import (
+    MULTIPROC_DIR_ENV,
+    MetricsService,
+    StageTimer,
+    get_registry,
+    ldap_connection_errors,
+    unhealthy_ldap_servers,
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RECORD_JOBS = """
+from api.services.metrics_service import MetricsService
+MetricsService.record_backup_started("full")
+MetricsService.record_backup_completed("full", 1.0, "ldap1", 10, 5)
+MetricsService.record_restore_started()
+"""
+
+
+def _run(code, env):
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, check=True)
+
+
+class TestMultiprocessMetrics:
+    """Tests for the multiprocess metrics mode."""
+
+    def test_single_process_uses_default_registry(self, monkeypatch):
+        """Test the default registry is scraped without a shared directory."""
+        monkeypatch.delenv(MULTIPROC_DIR_ENV, raising=False)
+
+        assert get_registry() is REGISTRY
+
+    def test_aggregates_all_processes(self, tmp_path, monkeypatch):
+        """Test a scrape sums the values recorded by every process."""
+        env = dict(os.environ, **{MULTIPROC_DIR_ENV: str(tmp_path)})
+        _run(RECORD_JOBS, env)
+        _run(RECORD_JOBS, env)
+        monkeypatch.setenv(MULTIPROC_DIR_ENV, str(tmp_path))
+
+        body = MetricsService.get_metrics().body.decode()
+
+        assert (
+            'ldapguard_backup_total{backup_type="full",status="completed"} 2.0' in body
+        )
+        assert "ldapguard_active_restores 2.0" in body
+        assert 'ldapguard_backup_entries{server_name="ldap1"} 5.0' in body
+
+    def test_dead_processes_leave_live_gauges(self, tmp_path, monkeypatch):
+        """Test a process marked dead no longer counts as running jobs."""
+        env = dict(os.environ, **{MULTIPROC_DIR_ENV: str(tmp_path)})
+        _run(RECORD_JOBS + "MetricsService.mark_process_dead()\n", env)
+        _run(RECORD_JOBS, env)
+        monkeypatch.setenv(MULTIPROC_DIR_ENV, str(tmp_path))
+
+        body = MetricsService.get_metrics().body.decode()
+
+        assert "ldapguard_active_restores 1.0" in body
+
+
+class TestLDAPHealthMetrics:
+    """Tests for fleet health probe metrics."""
+
+    def test_failed_probe_is_not_a_connection_error(self):
+        """Test a failed probe only marks the server down."""
+        errors = ldap_connection_errors.labels(server_name="probe-down")
+
+        MetricsService.record_ldap_health(
+            [{"name": "probe-down", "bind_ok": False, "duration_ms": 5}]
+        )
+
+        assert errors._value.get() == 0
+        assert unhealthy_ldap_servers._value.get() == 1
+
+
+class TestStageTimer:
+    """Tests for per-stage pipeline timing."""
+
+    def test_nested_stages_get_their_own_time(self):
+        """Test wrapped generators are not charged for the stages they pull from."""
+        timer = StageTimer()
+
+        def slow(items, seconds):
+            for item in items:
+                time.sleep(seconds)
+                yield item
+
+        chunks = timer.wrap(slow(range(5), 0.01), "read")
+        chunks = timer.wrap(slow(chunks, 0.02), "compress")
+        for _ in chunks:
+            timer.add("write", 0.5)
+
+        assert timer.seconds["read"] == pytest.approx(0.05, abs=0.02)
+        assert timer.seconds["compress"] == pytest.approx(0.10, abs=0.02)
+        assert timer.seconds["write"] == pytest.approx(2.5)
@@ -0,0 +1,220 @@
+"""Tests for live job progress."""
+
+import asyncio
+import json
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import select
+
+from api.models.models import Backup, BackupStatus
+from api.services.progress_service import (
+    BACKUP,
+    COMPLETED,
+    FAILED,
+    PROGRESS_CHANNEL,
+    ProgressBroker,
+    ProgressTracker,
+    ProgressWriter,
+    coalesce,
+    format_event,
+)
+
+
+class TestProgressTracker:
+    """Test progress publishing from jobs."""
+
+    @pytest.mark.asyncio
+    async def test_updates_are_throttled(self, fake_redis):
+        """Test that rapid updates publish at most once per interval."""
+        tracker = ProgressTracker(BACKUP, 7, fake_redis, interval=60)
+        tracker.set_phase("exporting", expected_entries=1000)
+        for count in range(1, 501):
+            tracker.update(count, count * 100)
+        await tracker.finish()
+
+        events = [json.loads(event) for _, event in fake_redis.published]
+        assert all(channel == PROGRESS_CHANNEL for channel, _ in fake_redis.published)
+        assert [event["phase"] for event in events] == ["exporting", "completed"]
+        assert events[-1]["entries"] == 500
+        assert events[-1]["bytes"] == 50000
+
+    @pytest.mark.asyncio
+    async def test_updates_from_worker_thread(self, fake_redis):
+        """Test that updates from a thread are published on the loop."""
+        tracker = ProgressTracker(BACKUP, 7, fake_redis, interval=0)
+        tracker.set_phase("exporting", expected_entries=200)
+
+        def export():
+            for count in (100, 200):
+                tracker.update(count, count * 10)
+
+        await asyncio.to_thread(export)
+        await tracker.finish(FAILED, "Server down")
+
+        events = [json.loads(event) for _, event in fake_redis.published]
+        assert [event["entries"] for event in events] == [0, 100, 200, 200]
+        assert events[-1]["phase"] == FAILED
+        assert events[-1]["error"] == "Server down"
+
+    @pytest.mark.asyncio
+    async def test_eta_from_expected_entries(self):
+        """Test that the ETA is estimated from the expected entry count."""
+        tracker = ProgressTracker(BACKUP, 1, interval=60)
+        tracker.set_phase("exporting", expected_entries=400)
+        tracker._phase_started -= 10
+        tracker.update(100, 1000)
+
+        event = tracker.snapshot()
+        assert event["entries_per_second"] == pytest.approx(10, rel=0.01)
+        assert event["eta_seconds"] == pytest.approx(30, rel=0.01)
+
+        await tracker.finish()
+        assert tracker.snapshot()["eta_seconds"] is None
+
+    @pytest.mark.asyncio
+    async def test_reset_phase_counts_from_zero(self):
+        """Test that a reset phase measures only its own work."""
+        tracker = ProgressTracker(BACKUP, 1, interval=60)
+        tracker.set_phase("verifying", expected_bytes=5000)
+        tracker._phase_started -= 100
+        tracker.update(0, 5000)
+
+        tracker.set_phase("restoring", expected_entries=400, reset=True)
+        assert tracker.snapshot()["bytes"] == 0
+        tracker._phase_started -= 10
+        tracker.update(100, 1000)
+
+        assert tracker.snapshot()["entries_per_second"] == pytest.approx(10, rel=0.01)
+        await tracker.finish()
+
+    @pytest.mark.asyncio
+    async def test_phase_durations_are_recorded(self):
+        """Test that each phase, but no terminal one, is timed once."""
+        def count(phase):
+            return REGISTRY.get_sample_value(
+                "ldapguard_job_phase_duration_seconds_count",
+                {"kind": BACKUP, "phase": phase},
+            ) or 0
+
+        before = {phase: count(phase) for phase in ("sorting", "sealing", COMPLETED)}
+        tracker = ProgressTracker(BACKUP, 1, interval=60)
+        tracker.set_phase("sorting")
+        tracker.set_phase("sealing")
+        tracker.apply(Backup(), COMPLETED)
+        await tracker.finish()
+
+        assert count("sorting") == before["sorting"] + 1
+        assert count("sealing") == before["sealing"] + 1
+        assert count(COMPLETED) == before[COMPLETED]
+
+
+class TestProgressBroker:
+    """Test fan-out of progress events to stream clients."""
+
+    @pytest.mark.asyncio
+    async def test_slow_client_drops_oldest(self):
+        """Test that a full client queue keeps the newest events."""
+        broker = ProgressBroker(queue_size=2)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=2)
+        broker._queues.add(queue)
+
+        for entries in (1, 2, 3):
+            broker.publish_local({"kind": BACKUP, "id": 1, "entries": entries})
+
+        assert [queue.get_nowait()["entries"] for _ in range(2)] == [2, 3]
+
+    def test_coalesce_keeps_latest_and_terminal(self):
+        """Test that coalescing keeps one event per job and never loses the end."""
+        events = [
+            {"kind": BACKUP, "id": 1, "phase": "exporting", "entries": 1},
+            {"kind": BACKUP, "id": 2, "phase": "exporting", "entries": 5},
+            {"kind": BACKUP, "id": 1, "phase": "completed", "entries": 9},
+            {"kind": BACKUP, "id": 1, "phase": "exporting", "entries": 2},
+            {"kind": BACKUP, "id": 2, "phase": "packaging", "entries": 0},
+        ]
+
+        result = coalesce(events)
+        assert [(e["id"], e["phase"]) for e in result] == [
+            (1, "completed"),
+            (2, "packaging"),
+        ]
+
+    def test_format_event(self):
+        """Test the server-sent event framing."""
+        message = format_event({"kind": BACKUP, "id": 1})
+        assert message.startswith("event: progress\ndata: ")
+        assert message.endswith("\n\n")
+        assert json.loads(message.split("data: ", 1)[1]) == {"kind": BACKUP, "id": 1}
+
+
+class TestProgressWriter:
+    """Test coalesced persistence of job progress."""
+
+    @pytest.mark.asyncio
+    async def test_flush_writes_changed_running_jobs(self, session_factory):
+        """Test that a flush batches changed jobs and skips finished rows."""
+        async with session_factory() as db:
+            db.add_all(
+                [
+                    Backup(
+                        id=1,
+                        ldap_server_id=1,
+                        created_by=1,
+                        status=BackupStatus.IN_PROGRESS,
+                    ),
+                    Backup(
+                        id=2,
+                        ldap_server_id=1,
+                        created_by=1,
+                        status=BackupStatus.COMPLETED,
+                        progress_phase=COMPLETED,
+                    ),
+                ]
+            )
+            await db.commit()
+
+        writer = ProgressWriter(session_factory)
+        running = ProgressTracker(BACKUP, 1, interval=60, writer=writer)
+        finished = ProgressTracker(BACKUP, 2, interval=60, writer=writer)
+        running.set_phase("exporting")
+        running.update(300, 4096)
+        finished.set_phase("storing")
+
+        assert await writer.flush() == 2
+        assert await writer.flush() == 0
+
+        async with session_factory() as db:
+            rows = {b.id: b for b in (await db.execute(select(Backup))).scalars().all()}
+        assert rows[1].progress_phase == "exporting"
+        assert rows[1].progress_entries == 300
+        assert rows[1].progress_bytes == 4096
+        assert rows[1].progress_updated_at is not None
+        assert rows[2].progress_phase == COMPLETED
+
+        running.update(600, 8192)
+        assert await writer.flush() == 1
+
+        await running.finish()
+        running.update(900, 9000)
+        assert await writer.flush() == 0
+
+    @pytest.mark.asyncio
+    async def test_apply_sets_final_progress(self):
+        """Test that the final state is copied onto the job row."""
+        tracker = ProgressTracker(BACKUP, 1, interval=60)
+        tracker.set_phase("exporting")
+        tracker.update(10, 100)
+        tracker.set_phase("storing")
+
+        tracker.save_checkpoint({"offset": 100, "entries": 10})
+
+        backup = Backup(id=1)
+        tracker.apply(backup, FAILED)
+        assert backup.progress_phase == FAILED
+        assert backup.progress_entries == 10
+        assert backup.progress_bytes == 100
+        assert json.loads(backup.checkpoint) == {"offset": 100, "entries": 10}
+
+        tracker.apply(backup, COMPLETED)
+        assert backup.checkpoint is None
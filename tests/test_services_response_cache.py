@@ -0,0 +1,141 @@
+"""Tests for the versioned response cache."""
+
+import json
+from datetime import datetime
+from typing import List
+
+import pytest
+from pydantic import BaseModel
+from starlette.requests import Request
+
+from api.services.response_cache import ResponseCache
+
+
+class _Item(BaseModel):
+    id: int
+    name: str
+    created_at: datetime
+
+
+class _Row:
+    """Stands in for an ORM row."""
+
+    def __init__(self, id, name):
+        self.id = id
+        self.name = name
+        self.created_at = datetime(2024, 1, 1)
+
+
+def _request(etag=None):
+    headers = [(b"if-none-match", etag.encode())] if etag else []
+    return Request({"type": "http", "method": "GET", "headers": headers})
+
+
+class _Loader:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return self.rows
+
+
+class TestResponseCache:
+    """Test cached responses and ETag revalidation."""
+
+    @pytest.mark.asyncio
+    async def test_caches_and_revalidates(self, fake_redis):
+        """Test that repeat requests skip the loader and return 304."""
+        cache = ResponseCache(fake_redis)
+        load = _Loader([_Row(1, "primary")])
+
+        first = await cache.respond(_request(), "servers", List[_Item], load)
+        etag = first.headers["etag"]
+        second = await cache.respond(_request(), "servers", List[_Item], load)
+        revalidated = await cache.respond(_request(etag), "servers", List[_Item], load)
+
+        assert first.status_code == 200
+        assert json.loads(first.body) == [
+            {"id": 1, "name": "primary", "created_at": "2024-01-01T00:00:00"}
+        ]
+        assert second.body == first.body
+        assert revalidated.status_code == 304
+        assert revalidated.headers["etag"] == etag
+        assert load.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_invalidate_changes_etag(self, fake_redis):
+        """Test that a write makes clients fetch the new response."""
+        cache = ResponseCache(fake_redis)
+        load = _Loader([_Row(1, "primary")])
+
+        first = await cache.respond(_request(), "servers", List[_Item], load)
+        await cache.invalidate("servers")
+        load.rows = [_Row(1, "primary"), _Row(2, "replica")]
+        second = await cache.respond(
+            _request(first.headers["etag"]), "servers", List[_Item], load
+        )
+
+        assert second.status_code == 200
+        assert second.headers["etag"] != first.headers["etag"]
+        assert len(json.loads(second.body)) == 2
+        assert load.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_etags_are_not_reused_after_redis_flush(self, fake_redis):
+        """Test that a flushed version is not restarted from a reused value."""
+        cache = ResponseCache(fake_redis)
+        load = _Loader([_Row(1, "primary")])
+
+        first = await cache.respond(_request(), "servers", List[_Item], load)
+        await cache.invalidate("servers")
+        second = await cache.respond(_request(), "servers", List[_Item], load)
+        fake_redis.values.clear()
+        load.rows = [_Row(2, "replica")]
+        after_flush = await cache.respond(
+            _request(first.headers["etag"]), "servers", List[_Item], load
+        )
+        await cache.invalidate("servers")
+        fake_redis.values.clear()
+        await cache.invalidate("servers")
+        after_invalidate = await cache.respond(_request(), "servers", List[_Item], load)
+
+        etags = [
+            response.headers["etag"]
+            for response in (first, second, after_flush, after_invalidate)
+        ]
+        assert after_flush.status_code == 200
+        assert len(set(etags)) == 4
+
+    @pytest.mark.asyncio
+    async def test_variants_are_cached_separately(self, fake_redis):
+        """Test that different query parameters get their own entries."""
+        cache = ResponseCache(fake_redis)
+        load = _Loader([])
+
+        first = await cache.respond(_request(), "x", List[_Item], load, variant="0:10")
+        second = await cache.respond(_request(), "x", List[_Item], load, variant="0:20")
+
+        assert first.headers["etag"] != second.headers["etag"]
+        assert load.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_without_redis(self, monkeypatch):
+        """Test that the body hash still allows a 304 when Redis is down."""
+
+        async def unavailable():
+            raise ConnectionError("redis down")
+
+        monkeypatch.setattr("api.services.response_cache.get_redis_client", unavailable)
+        cache = ResponseCache()
+        load = _Loader([_Row(1, "primary")])
+
+        first = await cache.respond(_request(), "servers", List[_Item], load)
+        second = await cache.respond(
+            _request(f'W/{first.headers["etag"]}'), "servers", List[_Item], load
+        )
+
+        assert first.status_code == 200
+        assert second.status_code == 304
+        assert load.calls == 2
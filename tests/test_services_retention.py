@@ -0,0 +1,147 @@
+"""Tests for backup retention service."""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from api.core.config import settings
+from api.models.models import Backup, BackupStatus, RestoreJob, ScheduledBackup
+from api.services.retention_service import (
+    RetentionService,
+    compute_gfs_retained,
+    gfs_window_start,
+)
+
+NOW = datetime(2026, 10, 18, 12, 0, 0)
+
+
+@pytest.fixture(autouse=True)
+def backup_dir(tmp_path, monkeypatch):
+    """Keep the backup files of each test in its own directory."""
+    monkeypatch.setattr(settings, "BACKUP_DIR", str(tmp_path))
+
+
+def _backup(backup_id, days_ago, schedule_id=1, parent_id=None, file_path=None):
+    return Backup(
+        id=backup_id,
+        ldap_server_id=1,
+        created_by=1,
+        status=BackupStatus.COMPLETED,
+        scheduled_backup_id=schedule_id,
+        parent_backup_id=parent_id,
+        file_path=file_path,
+        created_at=NOW - timedelta(days=days_ago),
+    )
+
+
+class TestGFSPolicy:
+    """Test grandfather-father-son bucket selection."""
+
+    def test_keeps_newest_per_day(self):
+        """Test that only the newest backup of each day is kept."""
+        backups = [
+            (1, NOW - timedelta(hours=1)),
+            (2, NOW - timedelta(hours=2)),
+            (3, NOW - timedelta(days=1)),
+            (4, NOW - timedelta(days=5)),
+        ]
+        assert compute_gfs_retained(backups, NOW, keep_daily=2) == {1, 3}
+
+    def test_weekly_and_monthly_buckets(self):
+        """Test weekly and monthly buckets combine."""
+        backups = [(i, NOW - timedelta(days=i * 7)) for i in range(1, 12)]
+        retained = compute_gfs_retained(backups, NOW, keep_weekly=2, keep_monthly=3)
+        assert {1} <= retained
+        assert len(retained) <= 5
+
+    def test_window_start(self):
+        """Test the oldest timestamp a policy can keep."""
+        assert gfs_window_start(NOW) is None
+        assert gfs_window_start(NOW, keep_daily=3) == datetime(2026, 10, 16)
+        assert gfs_window_start(NOW, keep_monthly=12) == datetime(2025, 11, 1)
+
+
+class TestRetentionService:
+    """Test database-driven retention."""
+
+    @pytest.mark.asyncio
+    async def test_expires_old_backups_and_files(self, db_session, tmp_path):
+        """Test that backups past retention are deleted with their files."""
+        old_file = tmp_path / "old.ldif"
+        old_file.write_text("data")
+        db_session.add(
+            ScheduledBackup(
+                id=1, name="nightly", ldap_server_id=1, cron_expression="0 2 * * *"
+            )
+        )
+        db_session.add_all(
+            [_backup(1, 40, file_path=str(old_file)), _backup(2, 1)]
+        )
+        await db_session.commit()
+
+        stats = await RetentionService(db_session).apply(now=NOW)
+
+        remaining = (await db_session.execute(select(Backup.id))).scalars().all()
+        assert remaining == [2]
+        assert stats == {"deleted": 1, "files_removed": 1}
+        assert not old_file.exists()
+
+    @pytest.mark.asyncio
+    async def test_restore_history_survives_expiry(self, db_session):
+        """Test that restores of an expired backup are kept, unlinked from it."""
+        db_session.add(
+            ScheduledBackup(
+                id=1, name="nightly", ldap_server_id=1, cron_expression="0 2 * * *"
+            )
+        )
+        db_session.add(_backup(1, 40))
+        db_session.add(
+            RestoreJob(
+                id=7,
+                backup_id=1,
+                ldap_server_id=1,
+                created_by=1,
+                status=BackupStatus.COMPLETED,
+                entries_restored=12,
+            )
+        )
+        await db_session.commit()
+
+        stats = await RetentionService(db_session).apply(now=NOW)
+
+        assert stats["deleted"] == 1
+        job = (await db_session.execute(select(RestoreJob))).scalar_one()
+        await db_session.refresh(job)
+        assert job.id == 7
+        assert job.backup_id is None
+        assert job.entries_restored == 12
+
+    @pytest.mark.asyncio
+    async def test_keep_last_and_dependencies(self, db_session):
+        """Test keep_last and that retained incrementals keep their parent."""
+        db_session.add(
+            ScheduledBackup(
+                id=1,
+                name="nightly",
+                ldap_server_id=1,
+                cron_expression="0 2 * * *",
+                retention_days=7,
+                keep_last=1,
+            )
+        )
+        db_session.add_all(
+            [
+                _backup(1, 60),
+                _backup(2, 50),
+                _backup(3, 45, parent_id=2),
+                _backup(4, 40, schedule_id=None, parent_id=2),
+            ]
+        )
+        await db_session.commit()
+
+        await RetentionService(db_session, batch_size=1).apply(now=NOW)
+
+        remaining = (await db_session.execute(select(Backup.id))).scalars().all()
+        # 3 is kept by keep_last and keeps its parent 2; unscheduled 4 is
+        # past BACKUP_RETENTION_DAYS
+        assert sorted(remaining) == [2, 3]
@@ -0,0 +1,81 @@
+"""Tests for job retries and per-server circuit breaking."""
+
+import time
+
+import pytest
+
+from api.services.retry_service import (
+    RETRY_KEY,
+    CircuitBreaker,
+    RetryPolicy,
+    RetryQueue,
+)
+
+
+class TestRetryPolicy:
+    """Test backoff of failed jobs."""
+
+    def test_delay_is_jittered_below_the_cap(self):
+        """Test that delays grow exponentially up to the cap."""
+        policy = RetryPolicy(max_attempts=5, base_delay=10, max_delay=60)
+        for attempts, ceiling in ((1, 10), (2, 20), (3, 40), (4, 60), (9, 60)):
+            delays = [policy.delay(attempts) for _ in range(50)]
+            assert all(0 <= d <= ceiling for d in delays)
+            assert len(set(delays)) > 1
+
+    def test_should_retry(self):
+        """Test that jobs stop retrying after the last attempt."""
+        policy = RetryPolicy(max_attempts=3)
+        assert policy.should_retry(1)
+        assert policy.should_retry(2)
+        assert not policy.should_retry(3)
+
+
+class TestRetryQueue:
+    """Test the delayed retry queue."""
+
+    @pytest.mark.asyncio
+    async def test_promotes_only_due_jobs(self, fake_redis):
+        """Test that due jobs move to their queues and later ones wait."""
+        retries = RetryQueue(fake_redis)
+        await retries.schedule("backup", 1, 0)
+        await retries.schedule("restore", 2, 0)
+        await retries.schedule("backup", 3, 3600)
+
+        assert await retries.promote_due() == 2
+        assert fake_redis.lists == {"backup_queue": ["1"], "restore_queue": ["2"]}
+        assert list(fake_redis.zsets[RETRY_KEY]) == ["backup:3"]
+
+        assert await retries.promote_due() == 0
+
+
+class TestCircuitBreaker:
+    """Test per-server circuit breaking."""
+
+    @pytest.mark.asyncio
+    async def test_opens_after_threshold(self, fake_redis):
+        """Test that repeated failures open the circuit for that server."""
+        breaker = CircuitBreaker(fake_redis, threshold=3, window=60, open_seconds=30)
+
+        assert not await breaker.record_failure(1)
+        assert not await breaker.record_failure(1)
+        assert await breaker.allow(1) is None
+        assert await breaker.record_failure(1)
+
+        wait = await breaker.allow(1)
+        assert wait is not None and 0 < wait <= 30
+        assert await breaker.allow(2) is None
+
+    @pytest.mark.asyncio
+    async def test_half_open_lets_one_probe_through(self, fake_redis):
+        """Test that after the open period a single job probes the server."""
+        breaker = CircuitBreaker(fake_redis, threshold=1, window=60, open_seconds=30)
+        await breaker.record_failure(1)
+        await fake_redis.delete("ldap_circuit:1:open")
+
+        assert await breaker.allow(1) is None
+        assert await breaker.allow(1) == 30
+
+        await breaker.record_success(1)
+        assert await breaker.allow(1) is None
+        assert await breaker.allow(1) is None
@@ -0,0 +1,132 @@
+"""Tests for backup verification."""
+
+import time
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import select
+
+from api.core.config import settings
+from api.models.models import Backup, BackupStatus, VerificationStatus
+from api.services.backup_service import BackupService
+from api.services.verification_service import (
+    BackupCorruptError,
+    BackupVerifier,
+    IORateLimiter,
+    check_artifact,
+)
+
+LDIF = b"".join(
+    b"dn: uid=user%d,dc=example,dc=com\nuid: user%d\n\n" % (i, i) for i in range(200)
+)
+
+
+@pytest.fixture
+def artifact(tmp_path, monkeypatch):
+    """Create a compressed and encrypted backup artifact."""
+    monkeypatch.setattr(settings, "BACKUP_DIR", str(tmp_path))
+    path = tmp_path / "backup.ldif"
+    path.write_bytes(LDIF)
+    return BackupService().package_file(str(path), compress=True, encrypt=True)
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class TestCheckArtifact:
+    """Test single-pass artifact checks."""
+
+    def test_valid_artifact(self, artifact):
+        """Test that a good artifact passes and reports its contents."""
+        path, checksum, content_checksum = artifact
+        result = check_artifact([_read(path)], True, True, checksum, content_checksum)
+        assert result["entries"] == 200
+        assert result["checksum"] == checksum
+
+    def test_reports_progress(self, artifact):
+        """Test that progress is reported as the artifact is read."""
+        path, _, _ = artifact
+        data = _read(path)
+        chunks = [data[i:i + 100] for i in range(0, len(data), 100)]
+        reports = []
+
+        check_artifact(chunks, True, True, progress=lambda *args: reports.append(args))
+
+        assert len(reports) == len(chunks)
+        assert reports[-1][1] == len(data)
+        assert 0 < reports[-1][0] <= 200
+
+    def test_checksum_mismatch(self, artifact):
+        """Test that a different artifact fails the checksum."""
+        path, _, content_checksum = artifact
+        with pytest.raises(BackupCorruptError, match="checksum"):
+            check_artifact([_read(path)], True, True, "0" * 64, content_checksum)
+
+    def test_damaged_artifact(self, artifact):
+        """Test that damaged data fails to decode."""
+        path, _, _ = artifact
+        data = bytearray(_read(path))
+        data[len(data) // 2] = ord("!")
+        with pytest.raises(BackupCorruptError):
+            check_artifact([bytes(data)], True, True)
+
+
+class TestIORateLimiter:
+    """Test the IO budget."""
+
+    def test_limits_throughput(self):
+        """Test that reads are slowed to the budget."""
+        limiter = IORateLimiter(100_000)
+        started = time.monotonic()
+        for _ in limiter.limit([b"x" * 10_000] * 5):
+            pass
+        assert time.monotonic() - started >= 0.45
+
+
+class TestBackupVerifier:
+    """Test the background verifier."""
+
+    @pytest.mark.asyncio
+    async def test_flags_corrupt_and_missing_backups(
+        self, db_session, artifact, tmp_path
+    ):
+        """Test verified, tampered and missing backups."""
+        path, checksum, content_checksum = artifact
+        tampered = tmp_path / "tampered.ldif.gz.enc"
+        tampered.write_bytes(_read(path)[:-10])
+
+        for backup_id, file_path in (
+            (1, path),
+            (2, str(tampered)),
+            (3, str(tmp_path / "missing.ldif.gz.enc")),
+        ):
+            db_session.add(
+                Backup(
+                    id=backup_id,
+                    ldap_server_id=1,
+                    created_by=1,
+                    status=BackupStatus.COMPLETED,
+                    file_path=file_path,
+                    checksum=checksum,
+                    content_checksum=content_checksum,
+                )
+            )
+        await db_session.commit()
+
+        stats = await BackupVerifier(db_session, io_budget_mb=0).run()
+
+        assert stats == {"verified": 1, "corrupt": 2, "errors": 0}
+        backups = {
+            backup.id: backup
+            for backup in (
+                await db_session.execute(select(Backup).order_by(Backup.id))
+            ).scalars()
+        }
+        assert backups[1].verification_status == VerificationStatus.VERIFIED
+        assert backups[2].verification_status == VerificationStatus.CORRUPT
+        assert backups[3].verification_error == "Backup file is missing"
+        assert (
+            await BackupVerifier(db_session).find_due(datetime.now(timezone.utc)) == []
+        )
@@ -0,0 +1,220 @@
+"""Tests for queued, retried webhook delivery."""
+
+import json
+import time
+
+import httpx
+import pytest
+
+from api.services.retry_service import RetryPolicy
+from api.services.webhook_service import (
+    DELIVERY_HEADER,
+    SIGNATURE_HEADER,
+    TIMESTAMP_HEADER,
+    WEBHOOK_DEAD_LETTER,
+    WEBHOOK_PROCESSING,
+    WEBHOOK_QUEUE,
+    WEBHOOK_RETRY_KEY,
+    Subscription,
+    WebhookDispatcher,
+    sign,
+)
+
+
+class _Receiver:
+    """Records requests and answers with queued status codes."""
+
+    def __init__(self, *statuses):
+        self.statuses = list(statuses)
+        self.requests = []
+
+    def __call__(self, request):
+        self.requests.append(request)
+        status = self.statuses.pop(0) if self.statuses else 200
+        return httpx.Response(status)
+
+
+def _dispatcher(redis, receiver, *subscriptions, attempts=3, worker_id="worker"):
+    return WebhookDispatcher(
+        redis,
+        subscriptions=list(subscriptions),
+        policy=RetryPolicy(max_attempts=attempts, base_delay=1, max_delay=1),
+        transport=httpx.MockTransport(receiver),
+        worker_id=worker_id,
+    )
+
+
+class TestSubscriptions:
+    """Tests for event filters and signing."""
+
+    def test_matches_patterns(self):
+        """Test subscriptions only accept matching events."""
+        subscription = Subscription("http://hook", events=["backup.*"])
+
+        assert subscription.matches("backup.failed")
+        assert not subscription.matches("restore.completed")
+        assert Subscription("http://hook").matches("restore.completed")
+
+    def test_sign_binds_timestamp(self):
+        """Test signatures change with the timestamp."""
+        assert sign("key", "1", b"{}") != sign("key", "2", b"{}")
+        assert sign("key", "1", b"{}").startswith("sha256=")
+
+
+class TestWebhookDispatcher:
+    """Tests for WebhookDispatcher."""
+
+    @pytest.mark.asyncio
+    async def test_enqueue_fans_out_to_matching_subscriptions(self, fake_redis):
+        """Test one delivery is queued per interested endpoint."""
+        dispatcher = _dispatcher(
+            fake_redis,
+            _Receiver(),
+            Subscription("http://all"),
+            Subscription("http://failures", events=["backup.failed"]),
+        )
+
+        assert await dispatcher.enqueue({"event": "backup.started"}) == 1
+        assert await dispatcher.enqueue({"event": "backup.failed"}) == 2
+
+        urls = [json.loads(item)["url"] for item in fake_redis.lists[WEBHOOK_QUEUE]]
+        assert urls == ["http://all", "http://all", "http://failures"]
+
+    @pytest.mark.asyncio
+    async def test_delivers_signed_events(self, fake_redis):
+        """Test queued events are posted with a verifiable signature."""
+        receiver = _Receiver()
+        dispatcher = _dispatcher(
+            fake_redis, receiver, Subscription("http://hook", secret="s3cret")
+        )
+
+        await dispatcher.enqueue({"event": "backup.completed", "backup_id": 7})
+        assert await dispatcher.process_queue() == 1
+        await dispatcher.close()
+
+        request = receiver.requests[0]
+        body = json.loads(request.content)
+        assert body["backup_id"] == 7
+        assert request.headers[DELIVERY_HEADER] == body["id"]
+        assert request.headers[SIGNATURE_HEADER] == sign(
+            "s3cret", request.headers[TIMESTAMP_HEADER], request.content
+        )
+
+    @pytest.mark.asyncio
+    async def test_batches_events_per_endpoint(self, fake_redis):
+        """Test events for a batching endpoint share a request."""
+        receiver = _Receiver()
+        dispatcher = _dispatcher(
+            fake_redis,
+            receiver,
+            Subscription("http://batched", batch_size=10),
+            Subscription("http://single"),
+        )
+
+        for backup_id in range(3):
+            await dispatcher.enqueue({"event": "backup.started", "id": backup_id})
+        await dispatcher.process_queue()
+        await dispatcher.close()
+
+        by_url = {}
+        for request in receiver.requests:
+            by_url.setdefault(request.url.host, []).append(json.loads(request.content))
+        assert len(by_url["batched"]) == 1
+        assert [e["id"] for e in by_url["batched"][0]["events"]] == [0, 1, 2]
+        assert len(by_url["single"]) == 3
+
+    @pytest.mark.asyncio
+    async def test_retries_then_dead_letters(self, fake_redis):
+        """Test failed deliveries are retried until attempts run out."""
+        receiver = _Receiver(503, 503)
+        dispatcher = _dispatcher(
+            fake_redis, receiver, Subscription("http://hook"), attempts=2
+        )
+
+        await dispatcher.enqueue({"event": "backup.failed"})
+        await dispatcher.process_queue()
+        assert len(fake_redis.zsets[WEBHOOK_RETRY_KEY]) == 1
+
+        assert await dispatcher.promote_due(now=time.time() + 5) == 1
+        await dispatcher.process_queue()
+        await dispatcher.close()
+
+        assert not fake_redis.zsets[WEBHOOK_RETRY_KEY]
+        dead = json.loads(fake_redis.lists[WEBHOOK_DEAD_LETTER][0])
+        assert dead["attempts"] == 2
+        assert dead["error"] == "HTTP 503"
+        assert len(receiver.requests) == 2
+
+    @pytest.mark.asyncio
+    async def test_client_errors_are_not_retried(self, fake_redis):
+        """Test a rejected delivery is dead-lettered at once."""
+        dispatcher = _dispatcher(
+            fake_redis, _Receiver(400), Subscription("http://hook")
+        )
+
+        await dispatcher.enqueue({"event": "backup.failed"})
+        await dispatcher.process_queue()
+        await dispatcher.close()
+
+        assert WEBHOOK_RETRY_KEY not in fake_redis.zsets
+        assert len(fake_redis.lists[WEBHOOK_DEAD_LETTER]) == 1
+
+    @pytest.mark.asyncio
+    async def test_sends_in_background_without_redis(self):
+        """Test events are still delivered once when Redis is unavailable."""
+        receiver = _Receiver()
+        dispatcher = _dispatcher(None, receiver, Subscription("http://hook"))
+
+        assert await dispatcher.enqueue({"event": "restore.started"}) == 1
+        await dispatcher.close()
+
+        assert len(receiver.requests) == 1
+
+    @pytest.mark.asyncio
+    async def test_acknowledges_handled_deliveries(self, fake_redis):
+        """Test sent and rescheduled deliveries leave the processing list."""
+        dispatcher = _dispatcher(
+            fake_redis,
+            _Receiver(503),
+            Subscription("http://flaky"),
+            Subscription("http://hook", events=["backup.*"]),
+        )
+
+        await dispatcher.enqueue({"event": "backup.failed"})
+        assert await dispatcher.process_queue() == 2
+        await dispatcher.close()
+
+        assert fake_redis.lists[dispatcher.processing] == []
+        assert fake_redis.lists[WEBHOOK_QUEUE] == []
+        assert len(fake_redis.zsets[WEBHOOK_RETRY_KEY]) == 1
+
+    @pytest.mark.asyncio
+    async def test_requeues_deliveries_claimed_before_a_crash(self, fake_redis):
+        """Test only a dead worker's deliveries are taken over by another."""
+        receiver = _Receiver()
+        dispatcher = _dispatcher(
+            fake_redis, receiver, Subscription("http://hook"), worker_id="dead"
+        )
+        busy = f"{WEBHOOK_PROCESSING}:busy"
+        fake_redis.lists[busy] = ["in flight on a live worker"]
+
+        async def crash(deliveries):
+            raise RuntimeError("worker killed")
+
+        await dispatcher.enqueue({"event": "backup.started", "id": 1})
+        await dispatcher.enqueue({"event": "backup.started", "id": 2})
+        dispatcher.deliver = crash
+        with pytest.raises(RuntimeError):
+            await dispatcher.process_queue()
+        assert len(fake_redis.lists[dispatcher.processing]) == 2
+
+        survivor = _dispatcher(
+            fake_redis, receiver, Subscription("http://hook"), worker_id="live"
+        )
+        assert await survivor.requeue_in_flight("dead") == 2
+        assert await survivor.process_queue() == 2
+        await survivor.close()
+
+        assert [json.loads(r.content)["id"] for r in receiver.requests] == [1, 2]
+        assert fake_redis.lists[dispatcher.processing] == []
+        assert fake_redis.lists[busy] == ["in flight on a live worker"]
@@ -0,0 +1,35 @@
+"""Tests for worker heartbeats."""
+import pytest
+
+from api.services.worker_registry import HEARTBEAT_KEY, WorkerRegistry
+
+
+class TestWorkerRegistry:
+    """Test finding workers that stopped sending heartbeats."""
+
+    @pytest.mark.asyncio
+    async def test_dead_workers_are_those_without_heartbeat(self, fake_redis):
+        """Test that live workers are never reported dead."""
+        first = WorkerRegistry(fake_redis, "first", ttl=60)
+        second = WorkerRegistry(fake_redis, "second", ttl=60)
+        await first.heartbeat()
+        await second.heartbeat()
+
+        assert await first.dead_workers() == []
+
+        # The second worker's heartbeat lapses
+        await fake_redis.delete(HEARTBEAT_KEY.format(worker_id="second"))
+
+        assert await first.dead_workers() == ["second"]
+        assert await second.dead_workers() == []
+
+    @pytest.mark.asyncio
+    async def test_forgotten_workers_are_not_reported_again(self, fake_redis):
+        """Test that a recovered worker is only handed back once."""
+        first = WorkerRegistry(fake_redis, "first", ttl=60)
+        await WorkerRegistry(fake_redis, "second", ttl=60).heartbeat()
+        await fake_redis.delete(HEARTBEAT_KEY.format(worker_id="second"))
+
+        await first.forget("second")
+
+        assert await first.dead_workers() == []
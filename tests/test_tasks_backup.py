@@ -0,0 +1,103 @@
+"""Tests for the backup worker task."""
+import pytest
+from sqlalchemy import select
+
+from api.core.config import settings
+from api.models.models import Backup, BackupStatus, BackupType, LDAPServer
+from api.services.ldap_service import LDAPService
+from api.services.retry_service import CIRCUIT_OPEN_KEY, RETRY_KEY
+from workers.tasks import backup_task
+
+
+@pytest.fixture(autouse=True)
+def backup_dir(tmp_path, monkeypatch):
+    """Keep the backup files of each test in its own directory."""
+    directory = tmp_path / "backups"
+    directory.mkdir()
+    monkeypatch.setattr(settings, "BACKUP_DIR", str(directory))
+    return directory
+
+
+async def _add_backup(session_factory, **fields):
+    """Add a pending backup of one server."""
+    async with session_factory() as db:
+        db.add(
+            LDAPServer(
+                id=1,
+                name="primary",
+                host="ldap.example.com",
+                base_dn="dc=example,dc=com",
+            )
+        )
+        db.add(
+            Backup(
+                id=1,
+                ldap_server_id=1,
+                created_by=1,
+                backup_type=BackupType.FULL,
+                status=BackupStatus.PENDING,
+                **fields,
+            )
+        )
+        await db.commit()
+
+
+class TestPerformBackup:
+    """Test the backup task end to end against a fake export."""
+
+    @pytest.mark.asyncio
+    async def test_failed_backup_removes_partial_export(
+        self, session_factory, backup_dir, monkeypatch
+    ):
+        """Test that a backup failing for good leaves no LDIF behind."""
+        await _add_backup(session_factory)
+
+        def export(self, path, *args):
+            with open(path, "w") as f:
+                f.write("dn: dc=example,dc=com\n")
+            raise ValueError("Malformed entry")
+
+        monkeypatch.setattr(backup_task, "AsyncSessionLocal", session_factory)
+        monkeypatch.setattr(LDAPService, "backup_to_ldif", export)
+
+        await backup_task.perform_backup(1)
+
+        async with session_factory() as db:
+            backup = await db.scalar(select(Backup).where(Backup.id == 1))
+        assert backup.status == BackupStatus.FAILED
+        assert backup.error_message == "Malformed entry"
+        assert list(backup_dir.iterdir()) == []
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_defers_backup(
+        self, session_factory, fake_redis, monkeypatch
+    ):
+        """Test that a backup waits for a failing server, using up an attempt."""
+        await _add_backup(session_factory)
+        await fake_redis.set(CIRCUIT_OPEN_KEY.format(server_id=1), "1", ex=60)
+        monkeypatch.setattr(backup_task, "AsyncSessionLocal", session_factory)
+
+        await backup_task.perform_backup(1, fake_redis)
+
+        async with session_factory() as db:
+            backup = await db.scalar(select(Backup).where(Backup.id == 1))
+        assert backup.status == BackupStatus.PENDING
+        assert backup.attempts == 1
+        assert "backup:1" in fake_redis.zsets[RETRY_KEY]
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_fails_backup_out_of_attempts(
+        self, session_factory, fake_redis, monkeypatch
+    ):
+        """Test that a server that stays down fails the backup for good."""
+        await _add_backup(session_factory, attempts=settings.JOB_RETRY_MAX_ATTEMPTS - 1)
+        await fake_redis.set(CIRCUIT_OPEN_KEY.format(server_id=1), "1", ex=60)
+        monkeypatch.setattr(backup_task, "AsyncSessionLocal", session_factory)
+
+        await backup_task.perform_backup(1, fake_redis)
+
+        async with session_factory() as db:
+            backup = await db.scalar(select(Backup).where(Backup.id == 1))
+        assert backup.status == BackupStatus.FAILED
+        assert "still failing" in backup.error_message
+        assert RETRY_KEY not in fake_redis.zsets
@@ -0,0 +1,46 @@
+"""Tests for the worker service."""
+import pytest
+
+from workers.main import WorkerService
+
+
+@pytest.fixture
+def worker(fake_redis):
+    """Provide a worker service connected to an in-memory Redis."""
+    service = WorkerService()
+    service.redis_client = fake_redis
+    return service
+
+
+class TestRunExclusive:
+    """Test that scheduled jobs run on one worker at a time."""
+
+    @pytest.mark.asyncio
+    async def test_skips_while_another_worker_holds_the_lock(self, worker):
+        """Test that a job is not started while its lock is held."""
+        runs = []
+
+        async def job():
+            runs.append("inner")
+
+        async def outer():
+            runs.append("outer")
+            await worker._run_exclusive("retention", 60, job)
+
+        await worker._run_exclusive("retention", 60, outer)
+
+        assert runs == ["outer"]
+        assert await worker.redis_client.get("retention_lock") is None
+
+    @pytest.mark.asyncio
+    async def test_overrun_keeps_the_next_runs_lock(self, worker, fake_redis):
+        """Test that a run outliving its TTL leaves a newer lock alone."""
+
+        async def job():
+            # The lock expires and another worker's run takes it
+            await fake_redis.delete("retention_lock")
+            await fake_redis.set("retention_lock", "next-run", ex=60)
+
+        await worker._run_exclusive("retention", 60, job)
+
+        assert await fake_redis.get("retention_lock") == "next-run"
@@ -12,6 +12,8 @@ function setAuthToken(token) {
 
 function clearAuthToken() {
     localStorage.removeItem('auth_token');
+    responseCache.clear();
+    stopProgressStream();
 }
 
 function authHeaders() {
@@ -24,6 +26,33 @@ function authHeaders() {
     };
 }
 
+// Responses of ETag-aware endpoints, revalidated with If-None-Match
+const responseCache = new Map();
+
+async function fetchCachedJSON(path) {
+    const url = `${API_URL}${path}`;
+    const cached = responseCache.get(url);
+    const headers = authHeaders();
+    if (cached) {
+        headers['If-None-Match'] = cached.etag;
+    }
+
+    const response = await fetch(url, { headers, cache: 'no-store' });
+    if (response.status === 304 && cached) {
+        return cached.data;
+    }
+    if (!response.ok) {
+        throw new Error(`Failed to load ${path}: ${response.status} ${response.statusText}`);
+    }
+
+    const data = await response.json();
+    const etag = response.headers.get('ETag');
+    if (etag) {
+        responseCache.set(url, { etag, data });
+    }
+    return data;
+}
+
 // Check authentication and initialize app
 async function checkAuthAndInit() {
     const token = getAuthToken();
@@ -56,6 +85,7 @@ async function checkAuthAndInit() {
             
             // Load initial data
             loadDashboard();
+            startProgressStream();
         } else {
             // Token invalid, show login
             clearAuthToken();
@@ -209,28 +239,22 @@ function loadTabData(tab) {
 // Load dashboard
 async function loadDashboard() {
     try {
-        // Load stats
-        const [servers, backups] = await Promise.all([
-            fetch(`${API_URL}/ldap-servers/`, { headers: authHeaders() }).then(r => {
-                if (!r.ok) throw new Error(`Failed to load servers: ${r.status} ${r.statusText}`);
-                return r.json();
-            }),
-            fetch(`${API_URL}/backups/`, { headers: authHeaders() }).then(r => {
-                if (!r.ok) throw new Error(`Failed to load backups: ${r.status} ${r.statusText}`);
-                return r.json();
-            })
-        ]);
-        
-        document.getElementById('total-servers').textContent = servers.length;
-        document.getElementById('total-backups').textContent = backups.length;
+        // Counts are aggregated server-side in one request
+        const response = await fetch(`${API_URL}/dashboard/summary`, {
+            headers: authHeaders()
+        });
+        if (!response.ok) {
+            throw new Error(`Failed to load dashboard: ${response.status} ${response.statusText}`);
+        }
+        const summary = await response.json();
         
-        // Count active jobs
-        const activeJobs = backups.filter(b => b.status === 'in_progress' || b.status === 'pending').length;
-        document.getElementById('active-jobs').textContent = activeJobs;
+        document.getElementById('total-servers').textContent = summary.servers.total;
+        document.getElementById('total-backups').textContent = summary.backups.total;
+        document.getElementById('active-jobs').textContent = summary.active_jobs;
         
-        // Last backup
-        if (backups.length > 0) {
-            const lastBackup = new Date(backups[0].created_at);
+        // Last successful backup
+        if (summary.last_backup_at) {
+            const lastBackup = new Date(summary.last_backup_at);
             document.getElementById('last-backup').textContent = lastBackup.toLocaleString();
         }
     } catch (error) {
@@ -241,13 +265,7 @@ async function loadDashboard() {
 // Load LDAP servers
 async function loadServers() {
     try {
-        const response = await fetch(`${API_URL}/ldap-servers/`, {
-            headers: authHeaders()
-        });
-        if (!response.ok) {
-            throw new Error(`Failed to load servers: ${response.status} ${response.statusText}`);
-        }
-        const servers = await response.json();
+        const servers = await fetchCachedJSON('/ldap-servers/');
         
         const tbody = document.getElementById('servers-tbody');
         
@@ -305,6 +323,7 @@ async function loadBackups() {
                     <span class="status-badge status-${backup.status.replace('_', '-')}">
                         ${escapeHtml(backup.status)}
                     </span>
+                    <span class="job-progress" data-progress="backup-${parseInt(backup.id)}">${progressLabel('backup', backup.id, backup)}</span>
                 </td>
                 <td>${backup.file_size ? formatBytes(backup.file_size) : 'N/A'}</td>
                 <td>${backup.entry_count ? parseInt(backup.entry_count) : 'N/A'}</td>
@@ -349,6 +368,7 @@ async function loadRestores() {
                     <span class="status-badge status-${restore.status.replace('_', '-')}">
                         ${escapeHtml(restore.status)}
                     </span>
+                    <span class="job-progress" data-progress="restore-${parseInt(restore.id)}">${progressLabel('restore', restore.id, restore)}</span>
                 </td>
                 <td>${restore.entries_restored ? parseInt(restore.entries_restored) : 'N/A'}</td>
                 <td>${new Date(restore.created_at).toLocaleString()}</td>
@@ -360,6 +380,116 @@ async function loadRestores() {
     }
 }
 
+// Live job progress, streamed as server-sent events. EventSource cannot
+// send the Authorization header, so the stream is read with fetch.
+const jobProgress = new Map();
+let progressController = null;
+let progressRetryDelay = 1000;
+
+function progressLabel(kind, id, job = null) {
+    // Live events first, then the progress last persisted on the row
+    let event = jobProgress.get(`${kind}-${id}`);
+    if (!event && job && job.status === 'in_progress' && job.progress_phase) {
+        event = {
+            phase: job.progress_phase,
+            entries: job.progress_entries,
+            bytes: job.progress_bytes,
+            eta_seconds: null
+        };
+    }
+    if (!event) return '';
+
+    const parts = [escapeHtml(event.phase)];
+    if (event.entries) {
+        const total = event.expected_entries ? ` / ~${parseInt(event.expected_entries)}` : '';
+        parts.push(`${parseInt(event.entries)}${total} entries`);
+    }
+    if (event.bytes) parts.push(formatBytes(event.bytes));
+    if (event.eta_seconds !== null && event.eta_seconds !== undefined) {
+        parts.push(`ETA ${Math.ceil(event.eta_seconds)}s`);
+    }
+    return parts.join(' · ');
+}
+
+function handleProgressEvent(event) {
+    const key = `${event.kind}-${event.id}`;
+
+    if (['completed', 'failed', 'retrying'].includes(event.phase)) {
+        // Final state comes from the API; refresh what is on screen
+        jobProgress.delete(key);
+        const activeTab = document.querySelector('.nav-tab.active')?.getAttribute('data-tab');
+        if (activeTab === 'dashboard' || activeTab === `${event.kind}s`) {
+            loadTabData(activeTab);
+        }
+        return;
+    }
+
+    jobProgress.set(key, event);
+    const element = document.querySelector(`[data-progress="${key}"]`);
+    if (element) {
+        element.innerHTML = progressLabel(event.kind, event.id);
+    }
+}
+
+async function startProgressStream() {
+    stopProgressStream();
+    const controller = new AbortController();
+    progressController = controller;
+
+    try {
+        const response = await fetch(`${API_URL}/events/jobs`, {
+            headers: authHeaders(),
+            signal: controller.signal
+        });
+        if (!response.ok) {
+            throw new Error(`Failed to open progress stream: ${response.status} ${response.statusText}`);
+        }
+        progressRetryDelay = 1000;
+
+        const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+        let buffer = '';
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += value;
+
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const message = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+                const data = message.split('\n')
+                    .filter(line => line.startsWith('data: '))
+                    .map(line => line.slice(6))
+                    .join('\n');
+                if (data) {
+                    handleProgressEvent(JSON.parse(data));
+                }
+            }
+        }
+    } catch (error) {
+        if (controller.signal.aborted) return;
+        console.error('Progress stream error:', error);
+    }
+
+    // Reconnect with backoff unless signed out or replaced
+    if (progressController === controller && getAuthToken()) {
+        setTimeout(() => {
+            if (progressController === controller && getAuthToken()) {
+                startProgressStream();
+            }
+        }, progressRetryDelay);
+        progressRetryDelay = Math.min(progressRetryDelay * 2, 30000);
+    }
+}
+
+function stopProgressStream() {
+    if (progressController) {
+        progressController.abort();
+        progressController = null;
+    }
+    jobProgress.clear();
+}
+
 // Load scheduled backups
 async function loadScheduled() {
     // Placeholder - would need scheduled backups endpoint
@@ -420,13 +550,3 @@ window.addEventListener('DOMContentLoaded', () => {
     checkAuthAndInit();
     loadAppVersion();
 });
-
-// Auto-refresh every 10 seconds for backups and restores
-setInterval(() => {
-    if (!getAuthToken()) return;
-    
-    const activeTab = document.querySelector('.nav-tab.active')?.getAttribute('data-tab');
-    if (activeTab === 'backups' || activeTab === 'restores') {
-        loadTabData(activeTab);
-    }
-}, 10000);
@@ -2,17 +2,31 @@ import asyncio
 import logging
 import os
 import sys
+from typing import Any, Awaitable, Callable
 
 import redis.asyncio as redis
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from redis.exceptions import LockError
 from sqlalchemy import select
 
 from api.core.config import settings
 from api.core.database import AsyncSessionLocal
+from api.core.tracing import decode_job, job_span, setup_tracing, shutdown_tracing
 from api.models.models import Backup, BackupStatus, ScheduledBackup
+from api.services.file_reaper import FileReaperService
+from api.services.ldap_pool import ldap_pools
+from api.services.metrics_service import MetricsService
+from api.services.progress_service import progress_writer
+from api.services.retry_service import RetryQueue
+from api.services.webhook_service import WebhookDispatcher, webhook_dispatcher
+from api.services.worker_registry import WORKER_ID, WorkerRegistry
 from workers.tasks.backup_task import perform_backup
+from workers.tasks.health_task import perform_health_probe
 from workers.tasks.restore_task import perform_restore
+from workers.tasks.retention_task import perform_retention
+from workers.tasks.verification_task import perform_verification
 
 # Add parent directory to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -31,6 +45,9 @@ class WorkerService:
     def __init__(self):
         self.scheduler = AsyncIOScheduler()
         self.redis_client = None
+        self.registry = None
+        self.webhook_dispatcher = None
+        self.webhook_task = None
 
     async def setup_redis(self):
         """Setup Redis connection."""
@@ -94,14 +111,87 @@ class WorkerService:
                 compression_enabled=True,
                 status=BackupStatus.PENDING,
                 created_by=1,  # System user
+                scheduled_backup_id=scheduled_backup.id,
             )
 
             db.add(new_backup)
             await db.commit()
             await db.refresh(new_backup)
 
-            # Perform backup
-            await perform_backup(new_backup.id)
+        # Perform backup
+        with job_span(
+            "backup",
+            attributes={
+                "ldapguard.backup_id": new_backup.id,
+                "ldapguard.scheduled_backup_id": scheduled_backup_id,
+            },
+        ):
+            await perform_backup(new_backup.id, self.redis_client)
+
+    async def _run_exclusive(
+        self, name: str, ttl: int, job: Callable[[], Awaitable[Any]]
+    ):
+        """Run a job on one worker at a time when Redis is available.
+
+        The "<name>_lock" lock holds a random token and is released with a
+        compare-and-delete, so a run that outlives its TTL cannot release
+        the lock of a later run on another worker.
+        """
+        if not self.redis_client:
+            await job()
+            return
+
+        lock = self.redis_client.lock(f"{name}_lock", timeout=ttl, blocking=False)
+        if not await lock.acquire():
+            logger.info(f"{name} already running on another worker")
+            return
+
+        try:
+            await job()
+        finally:
+            try:
+                await lock.release()
+            except LockError:
+                logger.warning(f"{name} outlasted its {ttl}s lock")
+
+    async def run_retention(self):
+        """Apply retention, on one worker at a time when Redis is available."""
+        await self._run_exclusive(
+            "retention", settings.RETENTION_INTERVAL_MINUTES * 60, perform_retention
+        )
+
+    async def run_verification(self):
+        """Verify backups, on one worker at a time when Redis is available."""
+        await self._run_exclusive(
+            "verification", settings.VERIFY_INTERVAL_MINUTES * 60, perform_verification
+        )
+
+    async def run_health_probe(self):
+        """Probe LDAP servers, on one worker at a time when Redis is available."""
+        await self._run_exclusive(
+            "health_probe",
+            settings.LDAP_HEALTH_INTERVAL_SECONDS,
+            lambda: perform_health_probe(self.redis_client),
+        )
+
+    async def flush_job_progress(self):
+        """Persist progress of running jobs in batched updates."""
+        try:
+            await progress_writer.flush()
+        except Exception as e:
+            logger.warning(f"Failed to persist job progress: {e}")
+
+    async def promote_retries(self):
+        """Queue jobs whose retry delay has passed."""
+        if not self.redis_client:
+            return
+
+        try:
+            promoted = await RetryQueue(self.redis_client).promote_due()
+            if promoted:
+                logger.info(f"Queued {promoted} job retries")
+        except Exception as e:
+            logger.error(f"Error promoting job retries: {e}")
 
     async def process_backup_queue(self):
         """Process backup requests from Redis queue."""
@@ -110,11 +200,14 @@ class WorkerService:
 
         try:
             # Check for pending backup jobs
-            backup_id = await self.redis_client.lpop("backup_queue")
+            payload = await self.redis_client.lpop("backup_queue")
 
-            if backup_id:
+            if payload:
+                # Continue the trace of the request that queued the backup
+                backup_id, carrier = decode_job(payload)
                 logger.info(f"Processing backup {backup_id} from queue")
-                await perform_backup(int(backup_id))
+                with job_span("backup", carrier, {"ldapguard.backup_id": backup_id}):
+                    await perform_backup(backup_id, self.redis_client)
         except Exception as e:
             logger.error(f"Error processing backup queue: {e}")
 
@@ -125,31 +218,137 @@ class WorkerService:
 
         try:
             # Check for pending restore jobs
-            restore_id = await self.redis_client.lpop("restore_queue")
+            payload = await self.redis_client.lpop("restore_queue")
 
-            if restore_id:
+            if payload:
+                # Continue the trace of the request that queued the restore
+                restore_id, carrier = decode_job(payload)
                 logger.info(f"Processing restore {restore_id} from queue")
-                await perform_restore(int(restore_id))
+                with job_span("restore", carrier, {"ldapguard.restore_id": restore_id}):
+                    await perform_restore(restore_id, self.redis_client)
         except Exception as e:
             logger.error(f"Error processing restore queue: {e}")
 
+    async def requeue_claims(self, worker_id: str):
+        """Hand the queue items a worker had claimed back to the queues."""
+        await FileReaperService(self.redis_client).requeue_in_flight(worker_id)
+        # Resent even when this worker has no subscriptions, for those that do
+        dispatcher = WebhookDispatcher(self.redis_client, subscriptions=[])
+        await dispatcher.requeue_in_flight(worker_id)
+
+    async def recover_dead_workers(self):
+        """Send a heartbeat and requeue the claims of workers that stopped."""
+        if not self.registry:
+            return
+
+        try:
+            await self.registry.heartbeat()
+            for worker_id in await self.registry.dead_workers():
+                await self.requeue_claims(worker_id)
+                await self.registry.forget(worker_id)
+        except Exception as e:
+            logger.error(f"Error recovering work of stopped workers: {e}")
+
+    async def process_file_reap_queue(self):
+        """Delete backup files queued by bulk deletions."""
+        if not self.redis_client:
+            return
+
+        try:
+            await FileReaperService(self.redis_client).process_queue()
+        except Exception as e:
+            logger.error(f"Error processing file reap queue: {e}")
+
     async def queue_processor_loop(self):
         """Continuous loop to process queues."""
         while True:
+            await self.promote_retries()
             await self.process_backup_queue()
             await self.process_restore_queue()
+            await self.process_file_reap_queue()
             await asyncio.sleep(5)  # Check every 5 seconds
 
     async def start(self):
         """Start the worker service."""
         logger.info("Starting LDAPGuard Worker Service")
 
+        # Trace jobs, continuing traces of the requests that queued them
+        setup_tracing("worker")
+
         # Setup Redis
         await self.setup_redis()
 
+        # Announce this worker, and pick up work that stopped workers claimed
+        # but did not finish
+        if self.redis_client:
+            self.registry = WorkerRegistry(self.redis_client)
+            await self.recover_dead_workers()
+
+        # Job metrics are recorded here, not in the API, so expose them
+        if settings.PROMETHEUS_ENABLED:
+            try:
+                MetricsService.start_exporter(settings.PROMETHEUS_PORT)
+            except OSError as e:
+                logger.error(f"Failed to start Prometheus exporter: {e}")
+
         # Load scheduled backups
         await self.load_scheduled_backups()
 
+        # Schedule retention
+        self.scheduler.add_job(
+            self.run_retention,
+            IntervalTrigger(minutes=settings.RETENTION_INTERVAL_MINUTES),
+            id="backup_retention",
+            replace_existing=True,
+        )
+
+        # Schedule background verification
+        self.scheduler.add_job(
+            self.run_verification,
+            IntervalTrigger(minutes=settings.VERIFY_INTERVAL_MINUTES),
+            id="backup_verification",
+            replace_existing=True,
+        )
+
+        # Schedule fleet health probing
+        self.scheduler.add_job(
+            self.run_health_probe,
+            IntervalTrigger(seconds=settings.LDAP_HEALTH_INTERVAL_SECONDS),
+            id="ldap_health_probe",
+            replace_existing=True,
+        )
+
+        # Keep this worker's claims its own and recover those of dead workers
+        self.scheduler.add_job(
+            self.recover_dead_workers,
+            IntervalTrigger(seconds=settings.WORKER_HEARTBEAT_SECONDS),
+            id="worker_heartbeat",
+            replace_existing=True,
+        )
+
+        # Close LDAP connections left idle by finished jobs
+        self.scheduler.add_job(
+            ldap_pools.evict_idle,
+            IntervalTrigger(seconds=settings.LDAP_POOL_IDLE_SECONDS),
+            id="ldap_pool_eviction",
+            replace_existing=True,
+        )
+
+        # Persist progress of running jobs
+        self.scheduler.add_job(
+            self.flush_job_progress,
+            IntervalTrigger(seconds=settings.PROGRESS_PERSIST_INTERVAL_SECONDS),
+            id="job_progress_flush",
+            replace_existing=True,
+        )
+
+        # Deliver queued webhook events alongside the job queues, so a slow
+        # receiver never holds up a backup or restore
+        if self.redis_client and settings.WEBHOOK_ENABLED:
+            self.webhook_dispatcher = WebhookDispatcher(self.redis_client)
+            if self.webhook_dispatcher.subscriptions:
+                self.webhook_task = asyncio.create_task(self.webhook_dispatcher.run())
+
         # Start scheduler
         self.scheduler.start()
         logger.info("Scheduler started")
@@ -164,9 +363,32 @@ class WorkerService:
         if self.scheduler.running:
             self.scheduler.shutdown()
 
+        if self.webhook_task:
+            self.webhook_task.cancel()
+            try:
+                await self.webhook_task
+            except asyncio.CancelledError:
+                pass
+        if self.webhook_dispatcher:
+            await self.webhook_dispatcher.close()
+        await webhook_dispatcher.close()
+
+        await asyncio.to_thread(ldap_pools.close_all)
+
+        # Nothing more will be processed here, so hand back unfinished claims
+        if self.registry:
+            try:
+                await self.requeue_claims(WORKER_ID)
+                await self.registry.forget(WORKER_ID)
+            except Exception as e:
+                logger.error(f"Error requeueing claimed work: {e}")
+
         if self.redis_client:
             await self.redis_client.close()
 
+        MetricsService.mark_process_dead()
+        shutdown_tracing()
+
 
 async def main():
     """Main entry point."""
@@ -1,24 +1,45 @@
+import asyncio
+import json
 import logging
+import os
 from datetime import datetime
+from typing import List
 
 from sqlalchemy import select
 
+from api.core.config import settings
 from api.core.database import AsyncSessionLocal
 from api.core.encryption import decrypt_ldap_password
 from api.models.models import Backup, BackupStatus, BackupType, LDAPServer
+from api.services.backup_index import INDEX_SUFFIX, build_backup_index
 from api.services.backup_service import BackupService
-from api.services.ldap_service import LDAPService
+from api.services.file_reaper import FileReaperService
+from api.services.ldap_service import (
+    LDAPService,
+    is_server_error,
+    is_transient_error,
+)
 from api.services.metrics_service import MetricsService
+from api.services.progress_service import (
+    BACKUP,
+    COMPLETED,
+    FAILED,
+    RETRYING,
+    ProgressTracker,
+    progress_writer,
+)
+from api.services.retry_service import CircuitBreaker, RetryPolicy, RetryQueue
+from api.services.storage_service import get_storage_backend
 from api.services.webhook_service import WebhookService
 
 logger = logging.getLogger(__name__)
 
 
-async def perform_backup(backup_id: int):
-    """Perform backup operation."""
+async def perform_backup(backup_id: int, redis_client=None):
+    """Perform backup operation, publishing progress through Redis."""
     start_time = datetime.utcnow()
     backup_service = BackupService()
-    webhook_service = WebhookService()
+    webhook_service = WebhookService(redis_client)
 
     async with AsyncSessionLocal() as db:
         # Get backup record
@@ -41,10 +62,77 @@ async def perform_backup(backup_id: int):
             await db.commit()
             return
 
+        # Jobs for a server whose circuit is open wait instead of timing out,
+        # each wait using up an attempt so a server that stays down fails them
+        breaker = CircuitBreaker(redis_client) if redis_client else None
+        retry_queue = RetryQueue(redis_client) if redis_client else None
+        retry_policy = RetryPolicy()
+        if breaker and retry_queue:
+            wait = await breaker.allow(ldap_server.id)
+            if wait is not None:
+                backup.attempts = (backup.attempts or 0) + 1
+                if not retry_policy.should_retry(backup.attempts):
+                    error = (
+                        f"LDAP server {ldap_server.name} still failing after "
+                        f"{backup.attempts} attempts"
+                    )
+                    logger.error(f"Backup {backup_id} failed: {error}")
+                    if backup.checkpoint:
+                        await FileReaperService().reap(
+                            [json.loads(backup.checkpoint)["path"]]
+                        )
+                    backup.status = BackupStatus.FAILED
+                    backup.error_message = error
+                    backup.completed_at = datetime.utcnow()
+                    await db.commit()
+                    await webhook_service.send_backup_failed(
+                        backup_id, ldap_server.name, error
+                    )
+                    MetricsService.record_backup_failed(backup.backup_type.value)
+                    return
+
+                backup.status = BackupStatus.PENDING
+                backup.error_message = (
+                    f"Deferred: LDAP server {ldap_server.name} is failing"
+                )
+                await db.commit()
+                await retry_queue.schedule(BACKUP, backup_id, wait)
+                MetricsService.record_job_deferred(BACKUP)
+                logger.warning(
+                    f"Backup {backup_id} deferred {wait:.0f}s, "
+                    f"circuit open for {ldap_server.name}"
+                )
+                return
+
+        # The last completed backup of this server sizes the ETA
+        expected_entries = await db.scalar(
+            select(Backup.entry_count)
+            .where(
+                Backup.ldap_server_id == ldap_server.id,
+                Backup.status == BackupStatus.COMPLETED,
+            )
+            .order_by(Backup.completed_at.desc())
+            .limit(1)
+        )
+        progress = ProgressTracker(
+            BACKUP, backup_id, redis_client, writer=progress_writer
+        )
+        in_ldap = False
+        # Local files written so far, removed if the backup finally fails
+        partial_paths: List[str] = []
+
+        # A retried backup continues the export it left behind
+        checkpoint = json.loads(backup.checkpoint) if backup.checkpoint else None
+        if checkpoint and not os.path.exists(checkpoint["path"]):
+            checkpoint = None
+        if checkpoint:
+            progress.save_checkpoint(checkpoint)
+
         try:
             # Update status
             backup.status = BackupStatus.IN_PROGRESS
             backup.started_at = start_time
+            backup.attempts = (backup.attempts or 0) + 1
             await db.commit()
 
             # Send webhook notification
@@ -66,51 +154,110 @@ async def perform_backup(backup_id: int):
                 base_dn=ldap_server.base_dn,
                 bind_dn=ldap_server.bind_dn,
                 bind_password=bind_password,
+                pooled=True,
+                server_name=ldap_server.name,
             )
 
             # Generate backup filename
-            filename = backup_service.generate_backup_filename(
-                ldap_server.name, backup.backup_type.value
-            )
-            file_path = backup_service.get_backup_path(filename)
-
-            # Perform backup
-            if backup.backup_type == BackupType.INCREMENTAL and backup.parent_backup_id:
-                # Get parent backup timestamp
-                result = await db.execute(
-                    select(Backup).where(Backup.id == backup.parent_backup_id)
+            if checkpoint:
+                file_path = checkpoint["path"]
+                logger.info(
+                    f"Resuming backup {backup_id} after "
+                    f"{checkpoint['entries']} entries"
                 )
-                parent_backup = result.scalar_one_or_none()
+            else:
+                filename = backup_service.generate_backup_filename(
+                    ldap_server.name, backup.backup_type.value
+                )
+                file_path = backup_service.get_backup_path(filename)
+            partial_paths.append(file_path)
 
-                if parent_backup and parent_backup.completed_at:
-                    entry_count = ldap_service.backup_to_ldif(
-                        file_path, search_filter="(objectClass=*)"
+            def save_checkpoint(point):
+                progress.save_checkpoint({**point, "path": file_path})
+
+            # Export on a pooled connection, off the event loop so progress
+            # events go out while it runs
+            progress.set_phase("exporting", expected_entries=expected_entries)
+            search_filter = "(objectClass=*)"
+            in_ldap = True
+            with ldap_service:
+                if (
+                    backup.backup_type == BackupType.INCREMENTAL
+                    and backup.parent_backup_id
+                ):
+                    # Get parent backup timestamp
+                    result = await db.execute(
+                        select(Backup).where(Backup.id == backup.parent_backup_id)
                     )
-                else:
-                    entry_count = ldap_service.backup_to_ldif(file_path)
-            else:
-                entry_count = ldap_service.backup_to_ldif(file_path)
+                    parent_backup = result.scalar_one_or_none()
 
-            ldap_service.disconnect()
+                    if parent_backup and parent_backup.completed_at:
+                        search_filter = "(objectClass=*)"
 
-            # Compress if enabled
-            if backup.compression_enabled:
-                file_path = backup_service.compress_file(file_path)
+                entry_count = await asyncio.to_thread(
+                    ldap_service.backup_to_ldif,
+                    file_path,
+                    search_filter,
+                    progress.update,
+                    checkpoint,
+                    save_checkpoint,
+                )
+            in_ldap = False
+            if breaker:
+                await breaker.record_success(ldap_server.id)
+
+            # Index entries for the content browser while the LDIF is plain
+            index_path = None
+            if settings.BACKUP_INDEX_ENABLED:
+                progress.set_phase("indexing")
+                index_path = f"{os.path.splitext(file_path)[0]}{INDEX_SUFFIX}"
+                try:
+                    await asyncio.to_thread(
+                        build_backup_index, file_path, index_path, backup.encrypted
+                    )
+                    partial_paths.append(index_path)
+                except Exception as e:
+                    logger.warning(f"Failed to index backup {backup_id}: {str(e)}")
+                    if os.path.exists(index_path):
+                        os.remove(index_path)
+                    index_path = None
 
-            # Encrypt if enabled
-            if backup.encrypted:
-                file_path = backup_service.encrypt_file(file_path)
+            # Compress and encrypt if enabled, checksumming as it streams
+            progress.set_phase("packaging")
+            file_path, checksum, content_checksum = await asyncio.to_thread(
+                backup_service.package_file,
+                file_path,
+                backup.compression_enabled,
+                backup.encrypted,
+            )
+            partial_paths.append(file_path)
 
             # Get file size
             file_size = backup_service.get_file_size(file_path)
 
+            # Hand the artifact to the configured storage backend
+            progress.set_phase("storing")
+            storage = get_storage_backend()
+            file_path = await asyncio.to_thread(
+                storage.store, file_path, os.path.basename(file_path)
+            )
+            if index_path:
+                index_path = await asyncio.to_thread(
+                    storage.store, index_path, os.path.basename(index_path)
+                )
+
             # Update backup record
             backup.status = BackupStatus.COMPLETED
             backup.file_path = file_path
+            backup.index_path = index_path
             backup.file_size = file_size
+            backup.checksum = checksum
+            backup.content_checksum = content_checksum
             backup.entry_count = entry_count
             backup.completed_at = datetime.utcnow()
+            progress.apply(backup, COMPLETED)
             await db.commit()
+            await progress.finish()
 
             # Calculate duration
             duration = (backup.completed_at - backup.started_at).total_seconds()
@@ -128,6 +275,16 @@ async def perform_backup(backup_id: int):
                 file_size,
                 entry_count,
             )
+            MetricsService.record_job_stages(
+                BACKUP, {**ldap_service.timer.seconds, **backup_service.timer.seconds}
+            )
+            throughput = progress.snapshot()
+            MetricsService.record_job_throughput(
+                BACKUP,
+                ldap_server.name,
+                throughput["entries_per_second"],
+                throughput["bytes_per_second"],
+            )
 
             logger.info(
                 f"Backup {backup_id} completed successfully. "
@@ -135,12 +292,41 @@ async def perform_backup(backup_id: int):
             )
 
         except Exception as e:
+            transient = is_transient_error(e)
+            if breaker and in_ldap and is_server_error(e):
+                if await breaker.record_failure(ldap_server.id):
+                    MetricsService.record_circuit_opened(ldap_server.name)
+
+            if retry_queue and transient and retry_policy.should_retry(backup.attempts):
+                delay = retry_policy.delay(backup.attempts)
+                logger.warning(
+                    f"Backup {backup_id} attempt {backup.attempts} failed, "
+                    f"retrying in {delay:.0f}s: {str(e)}"
+                )
+
+                backup.status = BackupStatus.PENDING
+                backup.error_message = f"Attempt {backup.attempts} failed: {str(e)}"
+                progress.apply(backup, RETRYING)
+                await db.commit()
+                await progress.finish(RETRYING, str(e))
+                await retry_queue.schedule(BACKUP, backup_id, delay)
+
+                MetricsService.record_job_retry(BACKUP)
+                MetricsService.record_ldap_connection_error(ldap_server.name)
+                return
+
             logger.error(f"Backup {backup_id} failed: {str(e)}")
 
+            # Nothing will resume from the partial export, so don't leave it
+            # filling BACKUP_DIR
+            await FileReaperService().reap(partial_paths)
+
             backup.status = BackupStatus.FAILED
             backup.error_message = str(e)
             backup.completed_at = datetime.utcnow()
+            progress.apply(backup, FAILED)
             await db.commit()
+            await progress.finish(FAILED, str(e))
 
             # Send webhook notification
             await webhook_service.send_backup_failed(
@@ -0,0 +1,38 @@
+import logging
+from typing import Any, Dict
+
+from api.core.database import AsyncSessionLocal
+from api.core.encryption import decrypt_ldap_password
+from api.models.models import LDAPServer
+from api.services.health_service import FleetHealthService
+from api.services.ldap_service import LDAPService
+
+logger = logging.getLogger(__name__)
+
+
+def probe_ldap_server(server: LDAPServer) -> Dict[str, Any]:
+    """Probe one server with a fresh bind."""
+    return LDAPService(
+        host=server.host,
+        port=server.port,
+        use_ssl=server.use_ssl,
+        base_dn=server.base_dn,
+        bind_dn=server.bind_dn,
+        bind_password=decrypt_ldap_password(
+            server.bind_password, server.password_encrypted
+        ),
+    ).probe()
+
+
+async def perform_health_probe(redis_client=None):
+    """Probe every active LDAP server and record the results."""
+    async with AsyncSessionLocal() as db:
+        try:
+            stats = await FleetHealthService(redis_client, probe_ldap_server).run(db)
+            logger.info(
+                f"Health probe completed. Up: {stats['up']}/{stats['total']}, "
+                f"bind failed: {stats['bind_failed']}, "
+                f"unreachable: {stats['unreachable']}"
+            )
+        except Exception as e:
+            logger.error(f"Health probe failed: {str(e)}")
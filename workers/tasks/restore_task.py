@@ -1,24 +1,48 @@
+import asyncio
+import json
 import logging
+import os
 from datetime import datetime
 
 from sqlalchemy import select
 
 from api.core.database import AsyncSessionLocal
 from api.core.encryption import decrypt_ldap_password
-from api.models.models import Backup, BackupStatus, LDAPServer, RestoreJob
-from api.services.backup_service import BackupService
-from api.services.ldap_service import LDAPService
+from api.models.models import (
+    Backup,
+    BackupStatus,
+    LDAPServer,
+    RestoreJob,
+    VerificationStatus,
+)
+from api.services.backup_service import CHUNK_SIZE, BackupService
+from api.services.ldap_service import (
+    LDAPService,
+    is_server_error,
+    is_transient_error,
+)
 from api.services.metrics_service import MetricsService
+from api.services.progress_service import (
+    COMPLETED,
+    FAILED,
+    RESTORE,
+    RETRYING,
+    ProgressTracker,
+    progress_writer,
+)
+from api.services.retry_service import CircuitBreaker, RetryPolicy, RetryQueue
+from api.services.storage_service import get_storage_backend
+from api.services.verification_service import BackupCorruptError, check_artifact
 from api.services.webhook_service import WebhookService
 
 logger = logging.getLogger(__name__)
 
 
-async def perform_restore(restore_id: int):
-    """Perform restore operation."""
+async def perform_restore(restore_id: int, redis_client=None):
+    """Perform restore operation, publishing progress through Redis."""
     start_time = datetime.utcnow()
     backup_service = BackupService()
-    webhook_service = WebhookService()
+    webhook_service = WebhookService(redis_client)
 
     async with AsyncSessionLocal() as db:
         # Get restore job
@@ -53,10 +77,53 @@ async def perform_restore(restore_id: int):
             await db.commit()
             return
 
+        # Jobs for a server whose circuit is open wait instead of timing out,
+        # each wait using up an attempt so a server that stays down fails them
+        breaker = CircuitBreaker(redis_client) if redis_client else None
+        retry_queue = RetryQueue(redis_client) if redis_client else None
+        retry_policy = RetryPolicy()
+        if breaker and retry_queue:
+            wait = await breaker.allow(ldap_server.id)
+            if wait is not None:
+                restore_job.attempts = (restore_job.attempts or 0) + 1
+                if not retry_policy.should_retry(restore_job.attempts):
+                    error = (
+                        f"LDAP server {ldap_server.name} still failing after "
+                        f"{restore_job.attempts} attempts"
+                    )
+                    logger.error(f"Restore job {restore_id} failed: {error}")
+                    restore_job.status = BackupStatus.FAILED
+                    restore_job.error_message = error
+                    restore_job.completed_at = datetime.utcnow()
+                    await db.commit()
+                    MetricsService.record_restore_failed()
+                    return
+
+                restore_job.status = BackupStatus.PENDING
+                restore_job.error_message = (
+                    f"Deferred: LDAP server {ldap_server.name} is failing"
+                )
+                await db.commit()
+                await retry_queue.schedule(RESTORE, restore_id, wait)
+                MetricsService.record_job_deferred(RESTORE)
+                logger.warning(
+                    f"Restore job {restore_id} deferred {wait:.0f}s, "
+                    f"circuit open for {ldap_server.name}"
+                )
+                return
+
+        # Local working copies created for this restore
+        scratch_files = []
+        in_ldap = False
+        progress = ProgressTracker(
+            RESTORE, restore_id, redis_client, writer=progress_writer
+        )
+
         try:
             # Update status
             restore_job.status = BackupStatus.IN_PROGRESS
             restore_job.started_at = start_time
+            restore_job.attempts = (restore_job.attempts or 0) + 1
             await db.commit()
 
             # Send webhook notification
@@ -65,16 +132,50 @@ async def perform_restore(restore_id: int):
             # Record metrics
             MetricsService.record_restore_started()
 
-            # Prepare backup file
-            file_path = backup.file_path
+            if backup.verification_status == VerificationStatus.CORRUPT:
+                raise BackupCorruptError(
+                    f"Backup is marked corrupt: {backup.verification_error}"
+                )
 
-            # Decrypt if encrypted
-            if backup.encrypted:
-                file_path = backup_service.decrypt_file(file_path)
+            # Prepare backup file (downloaded first for object storage)
+            progress.set_phase("fetching")
+            storage = get_storage_backend(backup.file_path)
+            file_path = await asyncio.to_thread(
+                storage.fetch,
+                backup.file_path,
+                backup_service.get_backup_path(os.path.basename(backup.file_path)),
+            )
+            if file_path != backup.file_path:
+                scratch_files.append(file_path)
+
+            # Decrypt and decompress, verifying checksums before the
+            # directory is touched
+            progress.set_phase("verifying", expected_bytes=backup.file_size)
+            plain_path = None
+            if backup.encrypted or backup.compression_enabled:
+                plain_path = backup_service.get_backup_path(
+                    f"restore_{restore_id}.ldif"
+                )
+                scratch_files.append(plain_path)
 
-            # Decompress if compressed
-            if backup.compression_enabled:
-                file_path = backup_service.decompress_file(file_path)
+            def verify(artifact_path: str):
+                with (
+                    open(artifact_path, "rb") as f_in,
+                    open(plain_path or os.devnull, "wb") as f_out,
+                ):
+                    check_artifact(
+                        iter(lambda: f_in.read(CHUNK_SIZE), b""),
+                        backup.encrypted,
+                        backup.compression_enabled,
+                        backup.checksum,
+                        backup.content_checksum,
+                        output=f_out,
+                        progress=progress.update,
+                    )
+
+            # Off the event loop, so progress events go out while it runs
+            await asyncio.to_thread(verify, file_path)
+            file_path = plain_path or file_path
 
             # Decrypt bind password if encrypted
             bind_password = decrypt_ldap_password(
@@ -89,18 +190,47 @@ async def perform_restore(restore_id: int):
                 base_dn=ldap_server.base_dn,
                 bind_dn=ldap_server.bind_dn,
                 bind_password=bind_password,
+                pooled=True,
+                server_name=ldap_server.name,
             )
 
-            # Perform restore
-            entries_restored = ldap_service.restore_from_ldif(file_path)
-
-            ldap_service.disconnect()
+            # Restore on a pooled connection, off the event loop so progress
+            # events go out while it runs
+            progress.set_phase(
+                "restoring",
+                expected_entries=backup.entry_count,
+                expected_bytes=os.path.getsize(file_path),
+                reset=True,
+            )
+            # A retried restore continues after the last entry it checkpointed
+            checkpoint = None
+            if restore_job.checkpoint:
+                checkpoint = json.loads(restore_job.checkpoint)
+                progress.save_checkpoint(checkpoint)
+                logger.info(
+                    f"Resuming restore job {restore_id} after "
+                    f"{checkpoint['entries']} entries"
+                )
+            in_ldap = True
+            with ldap_service:
+                entries_restored = await asyncio.to_thread(
+                    ldap_service.restore_from_ldif,
+                    file_path,
+                    progress.update,
+                    checkpoint,
+                    progress.save_checkpoint,
+                )
+            in_ldap = False
+            if breaker:
+                await breaker.record_success(ldap_server.id)
 
             # Update restore job
             restore_job.status = BackupStatus.COMPLETED
             restore_job.entries_restored = entries_restored
             restore_job.completed_at = datetime.utcnow()
+            progress.apply(restore_job, COMPLETED)
             await db.commit()
+            await progress.finish()
 
             # Calculate duration
             duration = (
@@ -114,6 +244,14 @@ async def perform_restore(restore_id: int):
 
             # Record metrics
             MetricsService.record_restore_completed(duration)
+            MetricsService.record_job_stages(RESTORE, ldap_service.timer.seconds)
+            throughput = progress.snapshot()
+            MetricsService.record_job_throughput(
+                RESTORE,
+                ldap_server.name,
+                throughput["entries_per_second"],
+                throughput["bytes_per_second"],
+            )
 
             logger.info(
                 f"Restore job {restore_id} completed successfully. "
@@ -121,12 +259,52 @@ async def perform_restore(restore_id: int):
             )
 
         except Exception as e:
+            transient = is_transient_error(e)
+            if breaker and in_ldap and is_server_error(e):
+                if await breaker.record_failure(ldap_server.id):
+                    MetricsService.record_circuit_opened(ldap_server.name)
+
+            if (
+                retry_queue
+                and transient
+                and retry_policy.should_retry(restore_job.attempts)
+            ):
+                delay = retry_policy.delay(restore_job.attempts)
+                logger.warning(
+                    f"Restore job {restore_id} attempt {restore_job.attempts} "
+                    f"failed, retrying in {delay:.0f}s: {str(e)}"
+                )
+
+                restore_job.status = BackupStatus.PENDING
+                restore_job.error_message = (
+                    f"Attempt {restore_job.attempts} failed: {str(e)}"
+                )
+                progress.apply(restore_job, RETRYING)
+                await db.commit()
+                await progress.finish(RETRYING, str(e))
+                await retry_queue.schedule(RESTORE, restore_id, delay)
+
+                MetricsService.record_job_retry(RESTORE)
+                return
+
             logger.error(f"Restore job {restore_id} failed: {str(e)}")
 
+            if isinstance(e, BackupCorruptError):
+                backup.verification_status = VerificationStatus.CORRUPT
+                backup.verification_error = str(e)
+                backup.verified_at = datetime.utcnow()
+
             restore_job.status = BackupStatus.FAILED
             restore_job.error_message = str(e)
             restore_job.completed_at = datetime.utcnow()
+            progress.apply(restore_job, FAILED)
             await db.commit()
+            await progress.finish(FAILED, str(e))
 
             # Record metrics
             MetricsService.record_restore_failed()
+
+        finally:
+            for scratch_file in scratch_files:
+                if scratch_file != backup.file_path and os.path.exists(scratch_file):
+                    os.remove(scratch_file)
@@ -0,0 +1,20 @@
+import logging
+
+from api.core.database import AsyncSessionLocal
+from api.services.retention_service import RetentionService
+
+logger = logging.getLogger(__name__)
+
+
+async def perform_retention():
+    """Apply backup retention policies."""
+    async with AsyncSessionLocal() as db:
+        try:
+            stats = await RetentionService(db).apply()
+            logger.info(
+                f"Retention completed. Backups deleted: {stats['deleted']}, "
+                f"files removed: {stats['files_removed']}"
+            )
+        except Exception as e:
+            logger.error(f"Retention failed: {str(e)}")
+            await db.rollback()
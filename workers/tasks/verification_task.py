@@ -0,0 +1,20 @@
+import logging
+
+from api.core.database import AsyncSessionLocal
+from api.services.verification_service import BackupVerifier
+
+logger = logging.getLogger(__name__)
+
+
+async def perform_verification():
+    """Verify the integrity of stored backups that are due."""
+    async with AsyncSessionLocal() as db:
+        try:
+            stats = await BackupVerifier(db).run()
+            logger.info(
+                f"Verification completed. Verified: {stats['verified']}, "
+                f"corrupt: {stats['corrupt']}, errors: {stats['errors']}"
+            )
+        except Exception as e:
+            logger.error(f"Verification failed: {str(e)}")
+            await db.rollback()